@@ -3,35 +3,105 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from apps.shared.models import User, TrackerResponse, Question
-from collections import Counter
 from django.db import models
-from statistics import mean
+from apps.shared.stats_rollup import dimension_counts, year_counts
+from apps.shared.utils.stats import db_mode, db_sample, summarize
 
-# Helper functions for statistics aggregation
+# Filtered counts used by the report types of generate_statistics_view, as
+# (rollup dimension, value predicate); they are summed from the StatsRollup
+# counts (see apps.shared.stats_rollup). Means and modes are computed in SQL
+# (see apps.shared.utils.stats).
+REPORT_COUNTS = {
+    'employed_count': ('alumni_status', lambda value: value.lower() == 'employed'),
+    'unemployed_count': ('alumni_status', lambda value: value.lower() == 'unemployed'),
+    'absorbed_count': ('alumni_status', lambda value: value.lower() == 'absorb'),
+    'high_position_count': ('alumni_status', lambda value: value.lower() == 'high position'),
+    'pursuing_further_study': ('alumni_further_study', lambda value: value.lower() == 'yes'),
+    'post_graduate_degree': ('alumni_program', lambda value: 'graduate' in value.lower()),
+}
 
-def safe_mode(qs, field):
-    vals = [getattr(a, field) for a in qs if getattr(a, field)]
-    return Counter(vals).most_common(1)[0][0] if vals else None
+REPORT_MEANS = {
+    'average_salary': 'salary_current',
+    'average_age': 'age',
+}
 
-def safe_mean(qs, field):
-    vals = []
-    for a in qs:
-        v = getattr(a, field)
-        if v and isinstance(v, (int, float)):
-            vals.append(float(v))
-        elif v and isinstance(v, str):
-            try:
-                vals.append(float(v.replace(',', '').replace(' ', '')))
-            except:
-                continue
-    return round(mean(vals), 2) if vals else None
+REPORT_MODES = {
+    'most_common_company': 'company_name_current',
+    'most_common_position': 'position_current',
+    'most_common_sector': 'sector_current',
+    'most_common_awards': 'awards_recognition_current',
+    'most_common_school': 'school_name',
+    'most_common_program': 'program',
+    'most_common_unemployment_reason': 'unemployment_reason',
+    'most_common_civil_status': 'civil_status',
+}
 
-def safe_sample(qs, field):
-    for a in qs:
-        v = getattr(a, field)
-        if v:
-            return v
-    return None
+REPORTS = {
+    'ALL': {
+        'counts': (),
+        'means': ('average_salary', 'average_age'),
+        'modes': ('most_common_company', 'most_common_position', 'most_common_sector', 'most_common_awards',
+                  'most_common_school', 'most_common_unemployment_reason', 'most_common_civil_status'),
+    },
+    'QPRO': {
+        'counts': ('employed_count', 'unemployed_count'),
+        'means': ('average_salary', 'average_age'),
+        'modes': ('most_common_company', 'most_common_position', 'most_common_sector', 'most_common_awards',
+                  'most_common_unemployment_reason', 'most_common_civil_status'),
+    },
+    'CHED': {
+        'counts': ('pursuing_further_study', 'post_graduate_degree'),
+        'means': ('average_age',),
+        'modes': ('most_common_school', 'most_common_program', 'most_common_awards', 'most_common_civil_status'),
+    },
+    'SUC': {
+        'counts': ('high_position_count',),
+        'means': ('average_salary', 'average_age'),
+        'modes': ('most_common_company', 'most_common_position', 'most_common_sector', 'most_common_awards',
+                  'most_common_civil_status'),
+    },
+    'AACUP': {
+        'counts': ('employed_count', 'absorbed_count', 'high_position_count'),
+        'means': ('average_salary', 'average_age'),
+        'modes': ('most_common_company', 'most_common_position', 'most_common_sector', 'most_common_awards',
+                  'most_common_school', 'most_common_civil_status'),
+    },
+}
+
+
+def report_statistics(alumni_qs, stats_type, year=None, course=None, status_counts=None):
+    """
+    Values for one report type. The total and the counts are summed from the
+    rollup (``status_counts`` may pass the alumni_status counts already read);
+    the means take one aggregate query, then one GROUP BY ... LIMIT 1 query
+    per mode and one for the sample email. Nothing but the rollup is read
+    when no alumni match.
+    """
+    spec = REPORTS[stats_type]
+    if status_counts is None:
+        status_counts = dimension_counts('alumni_status', year, course)
+    dimensions = {'alumni_status': status_counts}
+    stats = {'total': sum(status_counts.values())}
+    for name in spec['counts']:
+        dimension, matches = REPORT_COUNTS[name]
+        if dimension not in dimensions:
+            dimensions[dimension] = dimension_counts(dimension, year, course)
+        stats[name] = sum(users for value, users in dimensions[dimension].items() if value and matches(value))
+    empty = not stats['total']
+    if spec['means']:
+        if empty:
+            stats.update({name: None for name in spec['means']})
+        else:
+            means = summarize(alumni_qs, means={name: REPORT_MEANS[name] for name in spec['means']})
+            stats.update({name: means[name] for name in spec['means']})
+    for name in spec['modes']:
+        stats[name] = None if empty else db_mode(alumni_qs, REPORT_MODES[name])
+    stats['sample_email'] = None if empty else db_sample(alumni_qs, 'email')
+    return stats
+
+
+def _rate(count, total):
+    return round((count / total * 100), 2) if total > 0 else 0
 
 # Create your views here.
 
@@ -40,22 +110,15 @@ def safe_sample(qs, field):
 def alumni_statistics_view(request):
     year = request.GET.get('year')
     course = request.GET.get('course')
-    alumni_qs = User.objects.filter(account_type__user=True)
-    if year and year != 'ALL':
-        alumni_qs = alumni_qs.filter(year_graduated=year)
-    if course and course != 'ALL':
-        alumni_qs = alumni_qs.filter(course=course)
     # Count by employment status
-    status_counts = Counter(alumni_qs.values_list('user_status', flat=True))
+    status_counts = dimension_counts('alumni_status', year, course)
     # Count by year for year options
-    year_counts = Counter(User.objects.filter(account_type__user=True).values_list('year_graduated', flat=True))
-    filtered_year_counts = {y: c for y, c in year_counts.items() if y is not None}
     return JsonResponse({
         'success': True,
-        'status_counts': dict(status_counts),
+        'status_counts': status_counts,
         'years': [
             {'year': year, 'count': count}
-            for year, count in sorted(filtered_year_counts.items(), reverse=True)
+            for year, count in sorted(year_counts('alumni').items(), reverse=True)
         ]
     })
 
@@ -73,140 +136,146 @@ def generate_statistics_view(request):
     if course and course != 'ALL':
         alumni_qs = alumni_qs.filter(course=course)
     
-    total_alumni = alumni_qs.count()
+    status_counts = dimension_counts('alumni_status', year, course)
+
+    if stats_type not in REPORTS:
+        # Default fallback
+        return JsonResponse({
+            'success': True,
+            'type': 'DEFAULT',
+            'total_alumni': sum(status_counts.values()),
+            'status_counts': status_counts,
+            'year': year,
+            'course': course
+        })
+    
+    stats = report_statistics(alumni_qs, stats_type, year, course, status_counts)
+    total_alumni = stats['total']
     
     if stats_type == 'ALL':
         # Return all employment status counts and professional aggregates
-        status_counts = Counter(alumni_qs.values_list('user_status', flat=True))
-        # Professional aggregates
         return JsonResponse({
             'success': True,
             'type': 'ALL',
             'total_alumni': total_alumni,
-            'status_counts': dict(status_counts),
-            'most_common_company': safe_mode(alumni_qs, 'company_name_current'),
-            'most_common_position': safe_mode(alumni_qs, 'position_current'),
-            'most_common_sector': safe_mode(alumni_qs, 'sector_current'),
-            'average_salary': safe_mean(alumni_qs, 'salary_current'),
-            'most_common_awards': safe_mode(alumni_qs, 'awards_recognition_current'),
-            'most_common_school': safe_mode(alumni_qs, 'school_name'),
-            'most_common_unemployment_reason': safe_mode(alumni_qs, 'unemployment_reason'),
-            'most_common_civil_status': safe_mode(alumni_qs, 'civil_status'),
-            'average_age': safe_mean(alumni_qs, 'age'),
-            'sample_email': safe_sample(alumni_qs, 'email'),
+            'status_counts': status_counts,
+            'most_common_company': stats['most_common_company'],
+            'most_common_position': stats['most_common_position'],
+            'most_common_sector': stats['most_common_sector'],
+            'average_salary': stats['average_salary'],
+            'most_common_awards': stats['most_common_awards'],
+            'most_common_school': stats['most_common_school'],
+            'most_common_unemployment_reason': stats['most_common_unemployment_reason'],
+            'most_common_civil_status': stats['most_common_civil_status'],
+            'average_age': stats['average_age'],
+            'sample_email': stats['sample_email'],
             'year': year,
             'course': course
         })
     
     elif stats_type == 'QPRO':
         # QPRO: Employment statistics based on real data fields
-        employed = alumni_qs.filter(user_status__iexact='employed').count()  # user_status == 'employed'
-        unemployed = alumni_qs.filter(user_status__iexact='unemployed').count()  # user_status == 'unemployed'
-        employment_rate = (employed / total_alumni * 100) if total_alumni > 0 else 0
         return JsonResponse({
             'success': True,
             'type': 'QPRO',
             'total_alumni': total_alumni,
-            'employment_rate': round(employment_rate, 2),
-            'employed_count': employed,
-            'unemployed_count': unemployed,
+            'employment_rate': _rate(stats['employed_count'], total_alumni),
+            'employed_count': stats['employed_count'],  # user_status == 'employed'
+            'unemployed_count': stats['unemployed_count'],  # user_status == 'unemployed'
             # Real data fields
-            'most_common_company': safe_mode(alumni_qs, 'company_name_current'),
-            'most_common_position': safe_mode(alumni_qs, 'position_current'),
-            'most_common_sector': safe_mode(alumni_qs, 'sector_current'),
-            'average_salary': safe_mean(alumni_qs, 'salary_current'),
-            'most_common_awards': safe_mode(alumni_qs, 'awards_recognition_current'),
-            'most_common_unemployment_reason': safe_mode(alumni_qs, 'unemployment_reason'),
-            'most_common_civil_status': safe_mode(alumni_qs, 'civil_status'),
-            'average_age': safe_mean(alumni_qs, 'age'),
-            'sample_email': safe_sample(alumni_qs, 'email'),
+            'most_common_company': stats['most_common_company'],
+            'most_common_position': stats['most_common_position'],
+            'most_common_sector': stats['most_common_sector'],
+            'average_salary': stats['average_salary'],
+            'most_common_awards': stats['most_common_awards'],
+            'most_common_unemployment_reason': stats['most_common_unemployment_reason'],
+            'most_common_civil_status': stats['most_common_civil_status'],
+            'average_age': stats['average_age'],
+            'sample_email': stats['sample_email'],
             'year': year,
             'course': course
         })
     
     elif stats_type == 'CHED':
         # CHED: Further study statistics based on real data fields
-        pursuing_study = alumni_qs.filter(pursue_further_study__iexact='yes').count()  # pursue_further_study == 'yes'
         return JsonResponse({
             'success': True,
             'type': 'CHED',
             'total_alumni': total_alumni,
-            'pursuing_further_study': pursuing_study,
-            'post_graduate_degree': alumni_qs.filter(program__icontains='graduate').count(),  # program contains 'graduate'
-            'further_study_rate': round((pursuing_study / total_alumni * 100), 2) if total_alumni > 0 else 0,
-            'most_common_school': safe_mode(alumni_qs, 'school_name'),
-            'most_common_program': safe_mode(alumni_qs, 'program'),
-            'most_common_awards': safe_mode(alumni_qs, 'awards_recognition_current'),
-            'most_common_civil_status': safe_mode(alumni_qs, 'civil_status'),
-            'average_age': safe_mean(alumni_qs, 'age'),
-            'sample_email': safe_sample(alumni_qs, 'email'),
+            'pursuing_further_study': stats['pursuing_further_study'],  # pursue_further_study == 'yes'
+            'post_graduate_degree': stats['post_graduate_degree'],  # program contains 'graduate'
+            'further_study_rate': _rate(stats['pursuing_further_study'], total_alumni),
+            'most_common_school': stats['most_common_school'],
+            'most_common_program': stats['most_common_program'],
+            'most_common_awards': stats['most_common_awards'],
+            'most_common_civil_status': stats['most_common_civil_status'],
+            'average_age': stats['average_age'],
+            'sample_email': stats['sample_email'],
             'year': year,
             'course': course
         })
     
     elif stats_type == 'SUC':
         # SUC: High position and salary statistics based on real data fields
-        high_position = alumni_qs.filter(user_status__iexact='high position').count()  # user_status == 'high position'
         return JsonResponse({
             'success': True,
             'type': 'SUC',
             'total_alumni': total_alumni,
-            'high_position_count': high_position,
-            'high_position_rate': round((high_position / total_alumni * 100), 2) if total_alumni > 0 else 0,
-            'average_salary': safe_mean(alumni_qs, 'salary_current'),
-            'most_common_company': safe_mode(alumni_qs, 'company_name_current'),
-            'most_common_position': safe_mode(alumni_qs, 'position_current'),
-            'most_common_sector': safe_mode(alumni_qs, 'sector_current'),
-            'most_common_awards': safe_mode(alumni_qs, 'awards_recognition_current'),
-            'most_common_civil_status': safe_mode(alumni_qs, 'civil_status'),
-            'average_age': safe_mean(alumni_qs, 'age'),
-            'sample_email': safe_sample(alumni_qs, 'email'),
+            'high_position_count': stats['high_position_count'],  # user_status == 'high position'
+            'high_position_rate': _rate(stats['high_position_count'], total_alumni),
+            'average_salary': stats['average_salary'],
+            'most_common_company': stats['most_common_company'],
+            'most_common_position': stats['most_common_position'],
+            'most_common_sector': stats['most_common_sector'],
+            'most_common_awards': stats['most_common_awards'],
+            'most_common_civil_status': stats['most_common_civil_status'],
+            'average_age': stats['average_age'],
+            'sample_email': stats['sample_email'],
             'year': year,
             'course': course
         })
     
-    elif stats_type == 'AACUP':
-        # AACUP: Absorbed, employed, high position statistics based on real data fields
-        employed = alumni_qs.filter(user_status__iexact='employed').count()  # user_status == 'employed'
-        absorbed = alumni_qs.filter(user_status__iexact='absorb').count()  # user_status == 'absorb'
-        high_position = alumni_qs.filter(user_status__iexact='high position').count()  # user_status == 'high position'
-        employment_rate = (employed / total_alumni * 100) if total_alumni > 0 else 0
-        absorption_rate = (absorbed / total_alumni * 100) if total_alumni > 0 else 0
-        high_position_rate = (high_position / total_alumni * 100) if total_alumni > 0 else 0
-        return JsonResponse({
-            'success': True,
-            'type': 'AACUP',
-            'total_alumni': total_alumni,
-            'employment_rate': round(employment_rate, 2),
-            'absorption_rate': round(absorption_rate, 2),
-            'high_position_rate': round(high_position_rate, 2),
-            'employed_count': employed,
-            'absorbed_count': absorbed,
-            'high_position_count': high_position,
-            'most_common_company': safe_mode(alumni_qs, 'company_name_current'),
-            'most_common_position': safe_mode(alumni_qs, 'position_current'),
-            'most_common_sector': safe_mode(alumni_qs, 'sector_current'),
-            'average_salary': safe_mean(alumni_qs, 'salary_current'),
-            'most_common_awards': safe_mode(alumni_qs, 'awards_recognition_current'),
-            'most_common_school': safe_mode(alumni_qs, 'school_name'),
-            'most_common_civil_status': safe_mode(alumni_qs, 'civil_status'),
-            'average_age': safe_mean(alumni_qs, 'age'),
-            'sample_email': safe_sample(alumni_qs, 'email'),
-            'year': year,
-            'course': course
-        })
-    
-    else:
-        # Default fallback
-        status_counts = Counter(alumni_qs.values_list('user_status', flat=True))
-        return JsonResponse({
-            'success': True,
-            'type': 'DEFAULT',
-            'total_alumni': total_alumni,
-            'status_counts': dict(status_counts),
-            'year': year,
-            'course': course
-        })
+    # AACUP: Absorbed, employed, high position statistics based on real data fields
+    return JsonResponse({
+        'success': True,
+        'type': 'AACUP',
+        'total_alumni': total_alumni,
+        'employment_rate': _rate(stats['employed_count'], total_alumni),
+        'absorption_rate': _rate(stats['absorbed_count'], total_alumni),
+        'high_position_rate': _rate(stats['high_position_count'], total_alumni),
+        'employed_count': stats['employed_count'],  # user_status == 'employed'
+        'absorbed_count': stats['absorbed_count'],  # user_status == 'absorb'
+        'high_position_count': stats['high_position_count'],  # user_status == 'high position'
+        'most_common_company': stats['most_common_company'],
+        'most_common_position': stats['most_common_position'],
+        'most_common_sector': stats['most_common_sector'],
+        'average_salary': stats['average_salary'],
+        'most_common_awards': stats['most_common_awards'],
+        'most_common_school': stats['most_common_school'],
+        'most_common_civil_status': stats['most_common_civil_status'],
+        'average_age': stats['average_age'],
+        'sample_email': stats['sample_email'],
+        'year': year,
+        'course': course
+    })
+
+# Canonical list of all User fields for the detailed export: (column, User attribute)
+DETAILED_EXPORT_FIELDS = [
+    ('CTU_ID', 'acc_username'), ('First_Name', 'f_name'), ('Middle_Name', 'm_name'),
+    ('Last_Name', 'l_name'), ('Gender', 'gender'), ('Birthdate', 'birthdate'),
+    ('Year_Graduated', 'year_graduated'), ('Course', 'course'), ('Section', 'section'),
+    ('Program', 'program'), ('Status', 'status'), ('Phone_Number', 'phone_num'),
+    ('Email', 'email'), ('Address', 'address'), ('Civil_Status', 'civil_status'),
+    ('Social_Media', 'social_media'), ('Age', 'age'),
+    ('Company_Name_Current', 'company_name_current'), ('Position_Current', 'position_current'),
+    ('Sector_Current', 'sector_current'), ('Employment_Duration_Current', 'employment_duration_current'),
+    ('Salary_Current', 'salary_current'), ('Supporting_Document_Current', 'supporting_document_current'),
+    ('Awards_Recognition_Current', 'awards_recognition_current'),
+    ('Supporting_Document_Awards_Recognition', 'supporting_document_awards_recognition'),
+    ('Unemployment_Reason', 'unemployment_reason'), ('Pursue_Further_Study', 'pursue_further_study'),
+    ('Date_Started', 'date_started'), ('School_Name', 'school_name'), ('Profile_Pic', 'profile_pic'),
+    ('Profile_Bio', 'profile_bio'), ('Profile_Resume', 'profile_resume'),
+]
 
 @csrf_exempt
 @require_http_methods(["GET"])
@@ -224,63 +293,19 @@ def export_detailed_alumni_data(request):
         alumni_qs = alumni_qs.filter(course=course)
     
     # Do NOT filter by stats_type. Always return all alumni for the filter.
-    # Collect all tracker question texts that have been answered by any alumni in the queryset
-    all_tracker_qids = set()
-    for alum in alumni_qs:
-        tracker_responses = TrackerResponse.objects.filter(user=alum).order_by('-submitted_at')
-        latest_tracker = tracker_responses.first() if tracker_responses.exists() else None
-        tracker_answers = latest_tracker.answers if latest_tracker and latest_tracker.answers else {}
-        all_tracker_qids.update([int(qid) for qid in tracker_answers.keys() if str(qid).isdigit()])
-    
-    # Get question text for all qids
-    tracker_questions = {q.id: q.text for q in Question.objects.filter(id__in=all_tracker_qids)}
-    tracker_columns = [tracker_questions[qid] for qid in sorted(tracker_questions.keys())]
-    
-    # Canonical list of all User fields for export
-    export_fields = [
-        'CTU_ID', 'First_Name', 'Middle_Name', 'Last_Name', 'Gender', 'Birthdate', 'Year_Graduated', 'Course', 'Section',
-        'Program', 'Status', 'Phone_Number', 'Email', 'Address', 'Civil_Status', 'Social_Media', 'Age',
-        'Company_Name_Current', 'Position_Current', 'Sector_Current', 'Employment_Duration_Current', 'Salary_Current',
-        'Supporting_Document_Current', 'Awards_Recognition_Current', 'Supporting_Document_Awards_Recognition',
-        'Unemployment_Reason', 'Pursue_Further_Study', 'Date_Started', 'School_Name', 'Profile_Pic', 'Profile_Bio',
-        'Profile_Resume'
-    ]
-    
-    # Build a unique set of export columns: basic fields + tracker question texts (no duplicates)
-    export_columns = []
-    seen = set()
-    for field in export_fields:
-        if field not in seen:
-            export_columns.append(field)
-            seen.add(field)
-    for qtext in tracker_columns:
-        if qtext not in seen:
-            export_columns.append(qtext)
-            seen.add(qtext)
-    
+    from apps.shared.alumni_export import AlumniExport, export_response
+    export = AlumniExport(alumni_qs, DETAILED_EXPORT_FIELDS)
+
+    # ?format=csv|xlsx streams a file; the default stays the JSON payload
+    file_format = request.GET.get('format')
+    if file_format in ('csv', 'xlsx'):
+        return export_response(export, 'alumni_detailed_export', file_format)
+
     detailed_data = []
-    for alumni in alumni_qs:
-        data = {
-            'CTU_ID': alumni.acc_username,
-            'First_Name': alumni.f_name,
-            'Middle_Name': alumni.m_name or '',
-            'Last_Name': alumni.l_name,
-            'Gender': alumni.gender,
-            'Birthdate': str(alumni.birthdate) if alumni.birthdate else '',
-            'Year_Graduated': alumni.year_graduated,
-            'Course': alumni.course,
-            'Section': alumni.section or '',
-            'Program': alumni.program or '',
-            # ... (add all other fields as needed) ...
-        }
-        # Add tracker answers
-        tracker_responses = TrackerResponse.objects.filter(user=alumni).order_by('-submitted_at')
-        latest_tracker = tracker_responses.first() if tracker_responses.exists() else None
-        tracker_answers = latest_tracker.answers if latest_tracker and latest_tracker.answers else {}
-        for qid, qtext in tracker_questions.items():
-            answer = tracker_answers.get(str(qid)) or tracker_answers.get(qid)
-            if isinstance(answer, list):
-                answer = ', '.join(str(a) for a in answer)
-            data[qtext] = answer if answer is not None else ''
-        detailed_data.append(data)
+    for row in export.dicts():
+        if row['Birthdate']:
+            row['Birthdate'] = str(row['Birthdate'])
+        if row['Date_Started']:
+            row['Date_Started'] = str(row['Date_Started'])
+        detailed_data.append(row)
     return JsonResponse({'detailed_data': detailed_data})
@@ -13,10 +13,11 @@ import logging
 import time
 from typing import Dict, Optional, Tuple
 from functools import wraps
-from django.core.cache import cache
 from django.http import JsonResponse
 from django.utils import timezone
 
+from apps.shared.rate_limit import get_backend
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,7 +28,7 @@ class APIRateLimiter:
     Features:
     - Per-user rate limiting
     - Per-action type rate limiting
-    - Sliding window algorithm
+    - Sliding window algorithm (pluggable backend)
     - Configurable limits
     """
     
@@ -44,10 +45,12 @@ class APIRateLimiter:
     # TTL values (in seconds)
     RATE_LIMIT_TTL = 60  # 1 minute window
     
-    def __init__(self):
+    def __init__(self, backend=None):
         self.like_rate = self.DEFAULT_LIKE_RATE
         self.comment_rate = self.DEFAULT_COMMENT_RATE
         self.repost_rate = self.DEFAULT_REPOST_RATE
+        # Counting is delegated to a pluggable backend (see apps.shared.rate_limit)
+        self.backend = backend or get_backend()
     
     def check_rate_limit(self, user_id: int, action_type: str, target_id: Optional[int] = None) -> Tuple[bool, Dict[str, any]]:
         """
@@ -93,58 +96,40 @@ class APIRateLimiter:
                 rate_limit = 30
                 prefix = f"api_rate_{action_type}:"
             
-            # Per-user rate limiting
-            user_key = f"{prefix}user:{user_id}"
-            user_requests = self._get_request_times(user_key, now - self.RATE_LIMIT_TTL)
+            # Per-user rate limiting, plus per-target limiting to prevent spam
+            # on the same post/comment (e.g., max 5 likes per post per minute)
+            checks = [(f"{prefix}user:{user_id}", rate_limit)]
+            target_limit = min(5, rate_limit // 4)
+            if target_id:
+                checks.append((f"{prefix}target:{target_id}:user:{user_id}", target_limit))
+            
+            denied, hits = self.backend.hit_all(checks, self.RATE_LIMIT_TTL, now)
             
-            if len(user_requests) >= rate_limit:
-                oldest_request = user_requests[0] if user_requests else now
-                retry_after = int(oldest_request + self.RATE_LIMIT_TTL - now)
-                if retry_after < 0:
-                    retry_after = 1
-                
+            if denied == 0:
                 return False, {
                     'allowed': False,
                     'reason': f'{action_type}_rate_limit_exceeded',
                     'limit': rate_limit,
                     'window': self.RATE_LIMIT_TTL,
-                    'retry_after': retry_after,
+                    'retry_after': hits[0].retry_after,
                     'action': action_type
                 }
             
-            # Optional: Per-target rate limiting (prevent spam on same post/comment)
-            if target_id:
-                target_key = f"{prefix}target:{target_id}:user:{user_id}"
-                target_requests = self._get_request_times(target_key, now - self.RATE_LIMIT_TTL)
-                # More strict limit for same target (e.g., max 5 likes per post per minute)
-                target_limit = min(5, rate_limit // 4)
-                
-                if len(target_requests) >= target_limit:
-                    oldest_request = target_requests[0] if target_requests else now
-                    retry_after = int(oldest_request + self.RATE_LIMIT_TTL - now)
-                    if retry_after < 0:
-                        retry_after = 1
-                    
-                    return False, {
-                        'allowed': False,
-                        'reason': f'{action_type}_target_rate_limit_exceeded',
-                        'limit': target_limit,
-                        'window': self.RATE_LIMIT_TTL,
-                        'retry_after': retry_after,
-                        'action': action_type,
-                        'target_id': target_id
-                    }
-            
-            # Record the request
-            self._record_request(user_key, now)
-            if target_id:
-                target_key = f"{prefix}target:{target_id}:user:{user_id}"
-                self._record_request(target_key, now)
+            if denied == 1:
+                return False, {
+                    'allowed': False,
+                    'reason': f'{action_type}_target_rate_limit_exceeded',
+                    'limit': target_limit,
+                    'window': self.RATE_LIMIT_TTL,
+                    'retry_after': hits[1].retry_after,
+                    'action': action_type,
+                    'target_id': target_id
+                }
             
             return True, {
                 'allowed': True,
                 'limit': rate_limit,
-                'remaining': rate_limit - len(user_requests) - 1,
+                'remaining': max(0, rate_limit - hits[0].count),
                 'action': action_type
             }
             
@@ -152,29 +137,6 @@ class APIRateLimiter:
             logger.error(f"Rate limiting error: {e}")
             # On error, allow the request (fail open)
             return True, {'allowed': True, 'error': str(e)}
-    
-    def _get_request_times(self, key: str, window_start: float) -> list:
-        """Get request times within the window."""
-        try:
-            request_times = cache.get(key, [])
-            # Filter out old requests outside the window
-            request_times = [t for t in request_times if t >= window_start]
-            return request_times
-        except Exception as e:
-            logger.error(f"Error getting request times: {e}")
-            return []
-    
-    def _record_request(self, key: str, timestamp: float):
-        """Record a request timestamp."""
-        try:
-            request_times = cache.get(key, [])
-            request_times.append(timestamp)
-            # Keep only requests within the window
-            window_start = timestamp - self.RATE_LIMIT_TTL
-            request_times = [t for t in request_times if t >= window_start]
-            cache.set(key, request_times, self.RATE_LIMIT_TTL + 10)  # Extra 10s buffer
-        except Exception as e:
-            logger.error(f"Error recording request: {e}")
 
 
 # Global rate limiter instance
@@ -12,6 +12,7 @@ urlpatterns = [
     path('token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('import-alumni/', views.import_alumni_view, name='import_alumni'),
+    path('imports/<uuid:job_id>/status/', views.import_job_status_view, name='import_job_status'),
     path('alumni/statistics/', views.alumni_statistics_view, name='alumni_statistics'),
     path('alumni/list/', views.alumni_list_view, name='alumni_list'),
     path('alumni-list/', alumni_list_view, name='alumni_list_alias'),
@@ -21,6 +21,7 @@ from django.db.models import *
 from apps.shared.models import *
 from apps.shared.models import Follow
 from apps.shared.services import UserService
+from apps.shared import counters
 from apps.shared.points_milestones import (
     evaluate_and_award_milestones,
     get_milestone_status,
@@ -157,9 +158,6 @@ def award_engagement_points(user, action_type):
         if action_type == 'tracker_form' and not settings.tracker_form_enabled:
             return {'success': True, 'message': 'Tracker form rewards are disabled'}
         
-        # Get or create user points
-        user_points, created = UserPoints.objects.get_or_create(user=user)
-        
         points_map = {
             'like': settings.like_points,
             'comment': settings.comment_points,
@@ -188,9 +186,15 @@ def award_engagement_points(user, action_type):
         if action_type in suppressed_actions:
             action_points = 0
 
-        user_points.add_points(action_type, action_points)
+        # One INSERT ... ON CONFLICT DO UPDATE ... RETURNING; milestones are
+        # checked against the returned counters
+        user_points = UserPoints.record_action(user.user_id, action_type, action_points)
+        user_points.user = user
         
-        awarded_milestones = evaluate_and_award_milestones(user_points)
+        _, count_field = UserPoints.ACTION_FIELDS[action_type]
+        awarded_milestones = evaluate_and_award_milestones(
+            user_points, metrics=[count_field], settings=settings
+        )
         milestone_points = sum(item['points'] for item in awarded_milestones)
         total_awarded = action_points + milestone_points
         
@@ -202,17 +206,10 @@ def award_engagement_points(user, action_type):
         
         try:
             from apps.messaging.notification_broadcaster import broadcast_points_update
-            from django.db.models import Q
-            
-            # Refresh from DB to ensure totals reflect milestone updates
-            user_points.refresh_from_db()
+            from apps.shared.leaderboard import user_rank
             
-            # Calculate rank
-            higher_points_count = UserPoints.objects.filter(
-                Q(user__account_type__user=True) | Q(user__account_type__ojt=True),
-                total_points__gt=user_points.total_points
-            ).count()
-            rank = higher_points_count + 1
+            # Totals already include milestone awards (updated in place)
+            rank = user_rank(user.user_id, user_points.total_points)
             
             broadcast_points_update(user.user_id, {
                 'user_id': user.user_id,
@@ -275,13 +272,6 @@ def deduct_engagement_points(user, action_type):
         if not (is_alumni or is_ojt):
             return {'success': False, 'message': 'User is not eligible for points'}
         
-        # Get or create user points
-        user_points, created = UserPoints.objects.get_or_create(user=user)
-        
-        # If user points were just created, they have no points to deduct
-        if created:
-            return {'success': True, 'message': 'No points to deduct'}
-        
         # Deduct points based on action type using settings from database
         points_map = {
             'like': settings.like_points,
@@ -295,7 +285,10 @@ def deduct_engagement_points(user, action_type):
         
         points = points_map.get(action_type, 0)
         if points > 0:
-            user_points.deduct_points(action_type, points)
+            # Single UPDATE ... RETURNING; users without a points row have nothing to deduct
+            user_points = UserPoints.reverse_action(user.user_id, action_type, points)
+            if user_points is None:
+                return {'success': True, 'message': 'No points to deduct'}
             
             # Log the points deduction
             import logging
@@ -305,17 +298,9 @@ def deduct_engagement_points(user, action_type):
             # Broadcast points update via WebSocket for real-time updates
             try:
                 from apps.messaging.notification_broadcaster import broadcast_points_update
-                from django.db.models import Q
+                from apps.shared.leaderboard import user_rank
                 
-                # Get updated points data directly from database
-                user_points.refresh_from_db()
-                
-                # Calculate rank
-                higher_points_count = UserPoints.objects.filter(
-                    Q(user__account_type__user=True) | Q(user__account_type__ojt=True),
-                    total_points__gt=user_points.total_points
-                ).count()
-                rank = higher_points_count + 1
+                rank = user_rank(user.user_id, user_points.total_points)
                 
                 broadcast_points_update(user.user_id, {
                     'user_id': user.user_id,
@@ -372,118 +357,21 @@ from django.views.decorators.http import require_http_methods
 # Utility: build profile_pic URL with cache-busting when possible
 def create_mention_notifications(content, commenter_user, post_id=None, comment_id=None, reply_id=None, forum_id=None, donation_id=None, repost_id=None):
     """Create notifications for users mentioned in content"""
-    import re
-    from apps.shared.models import Notification
-    
-    # Find all @mentions in the content
-    mention_pattern = r'@([^@\s]+)'
-    mentions = re.findall(mention_pattern, content)
-    
-    for mention in mentions:
-        try:
-            # Try to find the user by name
-            # Split the mention into parts (could be "John Doe" or "John")
-            mention_parts = mention.split()
-            
-            if len(mention_parts) == 1:
-                # Single name - search by first name or last name
-                user = User.objects.filter(
-                    Q(f_name__icontains=mention_parts[0]) | Q(l_name__icontains=mention_parts[0])
-                ).first()
-            else:
-                # Multiple names - search by first and last name
-                user = User.objects.filter(
-                    Q(f_name__icontains=mention_parts[0]) & Q(l_name__icontains=mention_parts[-1])
-                ).first()
-            
-            if user and user.user_id != commenter_user.user_id:
-                # Create notification for the mentioned user
-                notification_content = f"{commenter_user.full_name} mentioned you in a comment"
-                
-                # Add actor ID for profile picture
-                notification_content += f"<!--ACTOR_ID:{commenter_user.user_id}-->"
-                
-                # Add post/comment/reply ID for redirection
-                if reply_id:
-                    notification_content += f"<!--REPLY_ID:{reply_id}-->"
-                
-                if comment_id:
-                    notification_content += f"<!--COMMENT_ID:{comment_id}-->"
-                
-                # Add repost ID if present
-                if repost_id:
-                    notification_content += f"<!--REPOST_ID:{repost_id}-->"
-                
-                # Add forum, donation, or post ID (in priority order)
-                if forum_id:
-                    notification_content += f"<!--FORUM_ID:{forum_id}-->"
-                elif donation_id:
-                    notification_content += f"<!--DONATION_ID:{donation_id}-->"
-                elif post_id:
-                    notification_content += f"<!--POST_ID:{post_id}-->"
-                
-                notification = Notification.objects.create(
-                    user=user,
-                    notif_type='mention',
-                    subject='You were mentioned',
-                    notifi_content=notification_content,
-                    notif_date=timezone.now()
-                )
-                # Broadcast mention notification in real-time
-                try:
-                    from apps.messaging.notification_broadcaster import broadcast_notification
-                    broadcast_notification(notification)
-                except Exception as e:
-                    logger.error(f"Error broadcasting mention notification: {e}")
-        except Exception as e:
-            # Skip if user not found or other error
-            continue
+    try:
+        from apps.shared.mentions import notify_mentions
+        notify_mentions(
+            content, commenter_user,
+            post_id=post_id, comment_id=comment_id, reply_id=reply_id,
+            forum_id=forum_id, donation_id=donation_id, repost_id=repost_id,
+        )
+    except Exception as e:
+        logger.error(f"Error creating mention notifications: {e}")
 
 def build_profile_pic_url(user, request=None):
     try:
-        # Use refactored profile model
-        profile = getattr(user, 'profile', None)
-        pic = getattr(profile, 'profile_pic', None) if profile else None
-        if pic:
-            url = pic.url
-            # Append last-modified timestamp for cache-busting when available
-            try:
-                modified = default_storage.get_modified_time(pic.name)
-                if modified:
-                    url = f"{url}?t={int(modified.timestamp())}"
-            except Exception:
-                pass
-
-            # Ensure we always return an absolute URL
-            try:
-                if not str(url).startswith('http'):
-                    from django.conf import settings
-                    
-                    # Try to get base URL from multiple sources (priority order):
-                    # 1. Request object (most accurate for mobile)
-                    # 2. Environment variable
-                    # 3. Settings file
-                    # 4. Fallback to localhost
-                    base_url = None
-                    
-                    if request:
-                        # Build URL from request (works for mobile accessing via network IP)
-                        scheme = 'https' if request.is_secure() else 'http'
-                        host = request.get_host()
-                        base_url = f"{scheme}://{host}"
-                    
-                    if not base_url:
-                        base_url = os.environ.get('BASE_URL') or getattr(settings, 'BASE_URL', 'http://127.0.0.1:8000')
-                    
-                    # Avoid double slashes when concatenating
-                    if base_url.endswith('/') and str(url).startswith('/'):
-                        return f"{base_url[:-1]}{url}"
-                    return f"{base_url}{url}"
-            except Exception:
-                # If anything goes wrong, return the relative URL as a fallback
-                return url
-
-            return url
+        # Versioned URL is cached per user; no storage stat per call
+        from apps.shared.avatars import avatar_url
+        return avatar_url(user, request)
     except Exception:
         pass
     # Return empty string instead of None for consistency
@@ -666,6 +554,44 @@ class CustomTokenObtainPairSerializer(serializers.Serializer):
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
+def _wants_async_import(request):
+    """Large sheets can be imported in the background with ``async=true``."""
+    flag = request.POST.get('async') or request.GET.get('async') or ''
+    return str(flag).lower() in ('1', 'true', 'yes')
+
+
+def _queue_import_job(request, kind, file, params, created_by):
+    from django.urls import reverse
+    from apps.shared.import_jobs import create_import_job
+    job = create_import_job(kind, file, params, created_by=created_by)
+    return JsonResponse({
+        'success': True,
+        'message': 'Import queued',
+        'job_id': str(job.job_id),
+        'status': job.status,
+        'status_url': request.build_absolute_uri(reverse('import_job_status', args=[job.job_id])),
+    }, status=202)
+
+
+@api_view(["GET"])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def import_job_status_view(request, job_id):
+    """Progress of a background alumni/OJT import started with ``async=true``, for the user who started it."""
+    from apps.shared.import_jobs import fail_stale_jobs, serialize_import_job
+    account_type = getattr(request.user, 'account_type', None)
+    if not account_type or not (account_type.coordinator or account_type.admin):
+        return JsonResponse({'success': False, 'message': 'Coordinator or admin access required'}, status=403)
+    job = ImportJob.objects.select_related('alumni_import').filter(
+        job_id=job_id, created_by_id=request.user.pk
+    ).first()
+    if job is None:
+        return JsonResponse({'success': False, 'message': 'Import job not found'}, status=404)
+    if job.status in (ImportJob.QUEUED, ImportJob.RUNNING) and fail_stale_jobs([job.job_id]):
+        job.refresh_from_db()
+    return JsonResponse({'success': True, 'job': serialize_import_job(job)})
+
+
 @csrf_exempt
 @require_http_methods(["POST", "OPTIONS"])
 def import_alumni_view(request):
@@ -686,169 +612,41 @@ def import_alumni_view(request):
             return JsonResponse({'success': False, 'message': 'Please upload an Excel file (.xlsx or .xls)'}, status=400)
         if not batch_year or not course:
             return JsonResponse({'success': False, 'message': 'Batch year and course are required'}, status=400)
-        # Read Excel file
+        if _wants_async_import(request):
+            # Only the job's owner can poll it, so an anonymous job could never be followed
+            current_user = get_current_user_from_request(request)
+            if current_user is None:
+                return JsonResponse({'success': False, 'message': 'Authentication required'}, status=401)
+            return _queue_import_job(
+                request, ImportJob.ALUMNI, file,
+                {'batch_year': batch_year, 'course': course},
+                current_user,
+            )
         try:
-            # Read without parse_dates first to see raw data
-            df = pd.read_excel(file)
-            print('HEADERS:', list(df.columns))
-            print('DEBUG: Raw birthdate column first 5 rows:')
-            print(df['Birthdate'].head())
-            print('DEBUG: Birthdate column data types:', df['Birthdate'].dtype)
-            
-            # Now try to convert birthdate column to proper dates
-            try:
-                df['Birthdate'] = pd.to_datetime(df['Birthdate'], errors='coerce')
-                print('DEBUG: After pd.to_datetime conversion:')
-                print(df['Birthdate'].head())
-            except Exception as e:
-                print(f"DEBUG: Error converting dates: {e}")
-                
+            df = pd.read_excel(file, dtype={'CTU_ID': str})
         except Exception as e:
             return JsonResponse({'success': False, 'message': f'Error reading Excel file: {str(e)}'}, status=400)
-        required_columns = ['CTU_ID', 'First_Name', 'Last_Name', 'Gender', 'Birthdate']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
+        from apps.shared.alumni_import import import_alumni_dataframe, missing_columns
+        missing = missing_columns(df)
+        if missing:
             return JsonResponse({
                 'success': False,
-                'message': f'Missing required columns: {", ".join(missing_columns)}'
+                'message': f'Missing required columns: {", ".join(missing)}'
             }, status=400)
         # Get alumni account type (user=True)
         try:
             alumni_account_type = AccountType.objects.get(user=True, admin=False, peso=False, coordinator=False)
         except Exception:
             return JsonResponse({'success': False, 'message': 'Alumni account type not found'}, status=500)
-        created_count = 0
-        skipped_count = 0
-        errors = []
-        for index, row in df.iterrows():
-            try:
-                ctu_id = str(row['CTU_ID']).strip()
-                first_name = str(row['First_Name']).strip()
-                middle_name = str(row.get('Middle_Name', '')).strip() if pd.notna(row.get('Middle_Name')) else ''
-                last_name = str(row['Last_Name']).strip()
-                gender = str(row['Gender']).strip().upper()
-                birthdate_str = str(row['Birthdate'])
-                
-                print(f"DEBUG: Row {index + 2} - CTU_ID: {ctu_id}, Name: {first_name} {last_name}")
-                phone_number = str(row.get('Phone_Number', '')).strip() if pd.notna(row.get('Phone_Number')) else ''
-                address = str(row.get('Address', '')).strip() if pd.notna(row.get('Address')) else ''
-                civil_status = str(row.get('Civil Status', '')).strip() if pd.notna(row.get('Civil Status', '')) else ''
-                social_media = str(row.get('Social Media', '')).strip() if pd.notna(row.get('Social Media', '')) else ''
-                # Validate required fields
-                if not ctu_id or not first_name or not last_name or not gender or not birthdate_str:
-                    errors.append(f"Row {index + 2}: Missing required fields (CTU_ID, First_Name, Last_Name, Gender, Birthdate)")
-                    continue
-                # Validate gender
-                if gender not in ['M', 'F']:
-                    errors.append(f"Row {index + 2}: Gender must be 'M' or 'F'")
-                    continue
-                # SIMPLE BULLETPROOF BIRTHDATE PARSING
-                print(f"DEBUG: Row {index + 2} - Raw birthdate: {row['Birthdate']} (type: {type(row['Birthdate'])})")
-                
-                birthdate = None
-                
-                # Method 1: Direct pandas datetime extraction
-                try:
-                    if pd.notna(row['Birthdate']):
-                        if hasattr(row['Birthdate'], 'date'):
-                            birthdate = row['Birthdate'].date()
-                            print(f"DEBUG: Method 1 SUCCESS - Direct date extraction: {birthdate}")
-                        elif hasattr(row['Birthdate'], 'to_pydatetime'):
-                            birthdate = row['Birthdate'].to_pydatetime().date()
-                            print(f"DEBUG: Method 1 SUCCESS - Pandas to datetime: {birthdate}")
-                except Exception as e:
-                    print(f"DEBUG: Method 1 failed: {e}")
-                
-                # Method 2: String parsing with ALL possible formats
-                if not birthdate:
-                    birthdate_str = str(row['Birthdate']).strip()
-                    print(f"DEBUG: Trying string parsing with: '{birthdate_str}'")
-                    
-                    # Try every possible date format
-                    formats_to_try = [
-                        "%Y-%m-%d", "%m/%d/%Y", "%d/%m/%Y", "%m-%d-%Y", "%d-%m-%Y",
-                        "%Y/%m/%d", "%m/%d/%y", "%d/%m/%y", "%Y-%m-%d %H:%M:%S",
-                        "%m/%d/%Y %H:%M:%S", "%d/%m/%Y %H:%M:%S", "%Y-%m-%d %H:%M",
-                        "%m/%d/%Y %H:%M", "%d/%m/%Y %H:%M", "%Y-%m-%d %H:%M:%S.%f",
-                        "%m/%d/%Y %H:%M:%S.%f", "%d/%m/%Y %H:%M:%S.%f"
-                    ]
-                    
-                    for fmt in formats_to_try:
-                        try:
-                            birthdate = datetime.strptime(birthdate_str, fmt).date()
-                            print(f"DEBUG: Method 2 SUCCESS - String format '{fmt}': {birthdate}")
-                            break
-                        except ValueError:
-                            continue
-                
-                # Method 3: Force pandas conversion
-                if not birthdate:
-                    try:
-                        pd_date = pd.to_datetime(row['Birthdate'], errors='coerce', infer_datetime_format=True)
-                        if pd.notna(pd_date):
-                            birthdate = pd_date.date()
-                            print(f"DEBUG: Method 3 SUCCESS - Pandas force conversion: {birthdate}")
-                    except Exception as e:
-                        print(f"DEBUG: Method 3 failed: {e}")
-                
-                # Method 4: Excel date number conversion
-                if not birthdate:
-                    try:
-                        if isinstance(row['Birthdate'], (int, float)):
-                            # Excel stores dates as numbers (days since 1900-01-01)
-                            excel_date = row['Birthdate']
-                            if excel_date > 1:  # Valid Excel date
-                                from datetime import timedelta
-                                excel_epoch = datetime(1900, 1, 1)
-                                birthdate = excel_epoch + timedelta(days=int(excel_date) - 2)  # -2 for Excel's leap year bug
-                                print(f"DEBUG: Method 4 SUCCESS - Excel date number {excel_date} -> {birthdate}")
-                    except Exception as e:
-                        print(f"DEBUG: Method 4 failed: {e}")
-                
-                if not birthdate:
-                    print(f"DEBUG: ALL METHODS FAILED for birthdate: {row['Birthdate']}")
-                    errors.append(f"Row {index + 2}: Cannot parse birthdate '{row['Birthdate']}'. Please check the format.")
-                    continue
-                else:
-                    print(f"DEBUG: FINAL SUCCESS - Birthdate saved as: {birthdate}")
-                # Check if user already exists
-                if User.objects.filter(acc_username=ctu_id).exists():
-                    errors.append(f"Row {index + 2}: CTU ID {ctu_id} already exists (skipped)")
-                    skipped_count += 1
-                    continue
-                # Create user
-                user = User.objects.create(
-                    acc_username=ctu_id,
-                    acc_password=birthdate,  # for login
-                    birthdate=birthdate,     # for display and correct field
-                    user_status='active',
-                    f_name=first_name,
-                    m_name=middle_name,
-                    l_name=last_name,
-                    gender=gender,
-                    phone_num=phone_number if phone_number else None,
-                    address=address if address else None,
-                    year_graduated=int(batch_year) if batch_year.isdigit() else None,
-                    course=course,
-                    account_type=alumni_account_type,
-                    civil_status=civil_status if civil_status else None,
-                    social_media=social_media if social_media else None,
-                )
-                
-                # Verify the birthdate was saved correctly
-                saved_user = User.objects.get(user_id=user.user_id)
-                print(f"DEBUG: VERIFICATION - User {ctu_id} birthdate saved as: {saved_user.acc_password}")
-                
-                created_count += 1
-            except Exception as e:
-                errors.append(f"Row {index + 2}: Unexpected error: {str(e)}")
-                continue
+        result = import_alumni_dataframe(df, batch_year, course, alumni_account_type)
+        created_count = result['created_count']
+        skipped_count = result['skipped_count']
         return JsonResponse({
             'success': True,
             'message': f'Successfully created {created_count} alumni accounts. Skipped {skipped_count} duplicates.',
             'created_count': created_count,
             'skipped_count': skipped_count,
-            'errors': errors
+            'errors': result['errors']
         })
     except Exception as e:
         return JsonResponse({'success': False, 'message': f'Server error: {str(e)}'}, status=500)
@@ -932,13 +730,17 @@ def notifications_view(request):
     user_id = request.GET.get('user_id')
     if not user_id:
         return JsonResponse({'success': False, 'message': 'user_id is required'}, status=400)
-    notifications = Notification.objects.filter(user_id=user_id).order_by('-notif_date')
+    notifications = (
+        Notification.objects.filter(user_id=user_id)
+        .select_related('payload')
+        .order_by('-notif_date')
+    )
     notif_list = [
         {
             'id': n.notification_id,
             'type': n.notif_type,
-            'subject': getattr(n, 'subject', None) or 'Tracker Form Reminder',
-            'content': n.notifi_content,
+            'subject': n.get_subject() or 'Tracker Form Reminder',
+            'content': n.get_content(),
             'date': n.notif_date.strftime('%Y-%m-%d %H:%M:%S'),
         }
         for n in notifications
@@ -954,8 +756,13 @@ def delete_notifications_view(request):
         notif_ids = data.get('notification_ids', [])
         if not notif_ids:
             return JsonResponse({'success': False, 'message': 'No notification IDs provided'}, status=400)
-        from apps.shared.models import Notification
-        deleted, _ = Notification.objects.filter(notification_id__in=notif_ids).delete()
+        from apps.shared.models import Notification, NotificationPayload
+        notifications = Notification.objects.filter(notification_id__in=notif_ids)
+        payload_ids = set(notifications.exclude(payload=None).values_list('payload_id', flat=True))
+        deleted, _ = notifications.delete()
+        # Broadcast payloads go once their last recipient deletes the delivery
+        if payload_ids:
+            NotificationPayload.delete_orphans(payload_ids)
         return JsonResponse({'success': True, 'deleted': deleted})
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
@@ -993,972 +800,30 @@ def import_ojt_view(request):
         
         # batch_year is now optional - will be auto-detected for second imports
 
+        if _wants_async_import(request):
+            return _queue_import_job(
+                request, ImportJob.OJT, file,
+                {'batch_year': batch_year, 'course': course, 'coordinator': coordinator_username},
+                request.user,
+            )
+
         # Read Excel file
         try:
-            df = pd.read_excel(file)
-            print('OJT IMPORT - HEADERS:', list(df.columns))
+            df = pd.read_excel(file, dtype={'CTU_ID': str})
         except Exception as e:
             return JsonResponse({'success': False, 'message': f'Error reading Excel file: {str(e)}'}, status=400)
 
-        # Auto-detect batch year: from existing user, Excel column, or current year + 1
-        from datetime import datetime
-        is_second_import = False
-        auto_detected_year = None
-        
-        # Try 1: Check if users already exist (second import - highest priority)
-        if df.shape[0] > 0:
-            first_ctu_id = str(df.iloc[0].get('CTU_ID', '')).strip()
-            if first_ctu_id:
-                existing_user = User.objects.filter(acc_username=first_ctu_id).first()
-                if existing_user and hasattr(existing_user, 'academic_info') and existing_user.academic_info:
-                    is_second_import = True
-                    auto_detected_year = existing_user.academic_info.year_graduated
-                    print(f'🔍 SECOND IMPORT DETECTED! User {first_ctu_id} exists with year {auto_detected_year}')
-        
-        # Try 2: Check if Excel has Batch_Year column (optional override)
-        if not auto_detected_year and 'Batch_Year' in df.columns and df.shape[0] > 0:
-            excel_year = df.iloc[0].get('Batch_Year')
-            if pd.notna(excel_year):
-                try:
-                    auto_detected_year = int(excel_year)
-                    print(f'✓ Batch year detected from Excel Batch_Year column: {auto_detected_year}')
-                except:
-                    pass
-        
-        # Try 3: Use current year + 1 (default for new students)
-        # Logic: If importing in 2025, students graduate in 2026
-        if not auto_detected_year:
-            current_year = datetime.now().year
-            auto_detected_year = current_year + 1
-            print(f'✓ Auto-calculated batch year: Current year ({current_year}) + 1 = {auto_detected_year}')
-        
-        # Set batch_year
-        if not batch_year:
-            batch_year = str(auto_detected_year)
-            print(f'✓ Using batch year: {batch_year}')
-        
-        # Auto-detect sections from Excel file
-        detected_sections = []
-        if 'Section' in df.columns:
-            detected_sections = df['Section'].dropna().astype(str).str.strip().unique().tolist()
-            detected_sections = [s for s in detected_sections if s and s != '']
-            print(f'OJT IMPORT - DETECTED SECTIONS FROM EXCEL: {detected_sections}')
-        else:
-            # If no Section column, try to detect from existing students (for second import)
-            print(f'OJT IMPORT - NO SECTION COLUMN, detecting from existing students...')
-            ctu_ids = df['CTU_ID'].dropna().astype(str).str.strip().tolist()
-            existing_sections = User.objects.filter(
-                acc_username__in=ctu_ids,
-                account_type__ojt=True
-            ).select_related('academic_info').values_list('academic_info__section', flat=True).distinct()
-            
-            existing_sections = [s for s in existing_sections if s]
-            
-            if existing_sections:
-                detected_sections = list(existing_sections)
-                print(f'OJT IMPORT - DETECTED SECTIONS FROM EXISTING STUDENTS: {detected_sections}')
-            else:
-                # Brand new import - use "4-A" as default (4th year, section A)
-                detected_sections = ["4-A"]
-                print(f'OJT IMPORT - NEW IMPORT, USING DEFAULT SECTION: 4-A (4th year, section A)')
-
-        # DEBUG: Show exact column names from Excel BEFORE normalization
-        print(f"📋 EXCEL COLUMNS (before normalization): {list(df.columns)}")
-        
-        # Normalize flexible header names for common variants
+        from apps.shared.ojt_import import OJTImportError, OJTImportPipeline
         try:
-            # Create a case-insensitive mapping
-            rename_map = {}
-            for col in df.columns:
-                col_lower = str(col).lower().strip()
-                
-                # First Name variants
-                if col_lower in ['firstname', 'first name']:
-                    rename_map[col] = 'First_Name'
-                # Middle Name variants
-                elif col_lower in ['middlename', 'middle name']:
-                    rename_map[col] = 'Middle_Name'
-                # Last Name variants
-                elif col_lower in ['lastname', 'last name']:
-                    rename_map[col] = 'Last_Name'
-                # Contact Number variants
-                elif col_lower in ['contactno', 'contact no', 'contact_no', 'contact number']:
-                    rename_map[col] = 'Contact_No'
-                # Company name variants
-                elif col_lower in ['company name', 'company_name', 'companyname', 'company']:
-                    rename_map[col] = 'Company'
-                # Company Address variants
-                elif col_lower in ['companyaddress', 'company address']:
-                    rename_map[col] = 'Company_Address'
-                # Company Email variants
-                elif col_lower in ['companyemail', 'company email']:
-                    rename_map[col] = 'Company_Email'
-                # Company Contact variants
-                elif col_lower in ['companycontact', 'company contact']:
-                    rename_map[col] = 'Company_Contact'
-                # Contact person name variants
-                elif col_lower in ['contactperson', 'contact_person', 'contact person name', 'contact person']:
-                    rename_map[col] = 'Contact_Person'
-                # Contact person position variants
-                elif col_lower in ['contact_person_position', 'contact person position', 'contactpersonposition', 'position']:
-                    rename_map[col] = 'Position'
-                # Status variants
-                elif col_lower in ['ojt_status', 'ojtstatus', 'ojt status']:
-                    rename_map[col] = 'Status'
-                # Date variants
-                elif col_lower in ['ojt_start_date', 'start_date', 'start date']:
-                    rename_map[col] = 'Ojt_Start_Date'
-                elif col_lower in ['ojt_end_date', 'end_date', 'end date']:
-                    rename_map[col] = 'Ojt_End_Date'
-                # Civil Status
-                elif col_lower == 'civil status':
-                    rename_map[col] = 'Civil_Status'
-                # Social Media
-                elif col_lower == 'social media':
-                    rename_map[col] = 'Social_Media'
-                # Batch Year
-                elif col_lower in ['batch year', 'batch_year', 'year']:
-                    rename_map[col] = 'Batch_Year'
-            
-            if rename_map:
-                print(f"🔄 Renaming columns: {rename_map}")
-                df.rename(columns=rename_map, inplace=True)
-        except Exception as e:
-            print(f"⚠️ Column rename failed: {e}")
-            pass
-        
-        # DEBUG: Show column names AFTER normalization
-        print(f"📋 EXCEL COLUMNS (after normalization): {list(df.columns)}")
-
-        # TWO-STEP IMPORT SUPPORT:
-        # FIRST IMPORT: CTU_ID + Personal info (creates users)
-        # SECOND IMPORT: CTU_ID only (updates company info for existing users)
-        # CTU_ID is the ONLY truly required column - system auto-detects if user exists
-        required_columns = ['CTU_ID']
-        optional_columns = ['First_Name', 'Last_Name', 'Gender', 'Password', 'Birthdate', 'Phone_Number', 'Address', 'Civil_Status', 'Social_Media',
-                           'Company Name', 'Company', 'Company_Address', 'Company_Email', 'Company_Contact',
-                           'Contact_Person', 'Position', 'Start_Date', 'End_Date', 'Status']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            return JsonResponse({
-                'success': False,
-                'message': f'Missing required OJT columns: {", ".join(missing_columns)}'
-            }, status=400)
-        print(f"✅ Smart import enabled: CTU_ID required, other fields auto-validated per row")
-
-        # Create import record
-        # Normalize batch_year to a single 4-digit year if possible
-        try:
-            import re
-            match = re.search(r"(20\d{2})", str(batch_year))
-            normalized_year = int(match.group(1)) if match else int(str(batch_year).strip())
-        except Exception:
-            normalized_year = batch_year
-
-        # Create import records for each detected section
-        import_records = []
-        for section in detected_sections:
-            import_record = OJTImport.objects.create(
+            response_data = OJTImportPipeline(
+                df,
+                file_name=file.name,
                 coordinator=coordinator_username,
-                batch_year=normalized_year,
-                course=course or 'Unknown',  # Provide default if empty
-                section=section,
-                file_name=file.name
-            )
-            import_records.append(import_record)
-
-        created_count = 0
-        skipped_count = 0
-        updating_count = 0  # Count students getting updated (2nd import)
-        retaking_count = 0  # Count students retaking OJT in a different batch
-        errors = []
-        exported_passwords = []  # List to collect (username, password) for export
-        total_rows = int(getattr(df, 'shape', [0])[0] or 0)
-        deactivated_count = 0  # Count old batch students deactivated
-        reactivated_count = 0  # Count students reactivated (same CTU_ID in new batch)
-
-        # Ensure OJT account type exists for new OJT users
-        try:
-            ojt_account_type, _ = AccountType.objects.get_or_create(
-                admin=False,
-                peso=False,
-                user=False,
-                coordinator=False,
-                ojt=True,
-            )
-        except Exception:
-            ojt_account_type = None
-        
-        # ===== NEW BATCH IMPORT LOGIC =====
-        # Step 1: Get all CTU_IDs from the new import
-        new_import_ctu_ids = set()
-        for idx, row in df.iterrows():
-            ctu_id = str(row.get('CTU_ID', '')).strip()
-            if ctu_id:
-                new_import_ctu_ids.add(ctu_id)
-        print(f"📋 New import contains {len(new_import_ctu_ids)} unique CTU_IDs")
-        
-        # Step 2: Find all existing OJT students from old batches for this coordinator
-        from django.db.models import Q
-        from apps.shared.models import AcademicInfo
-        
-        # Get all import records by this coordinator (except current batch)
-        old_imports = OJTImport.objects.filter(
-            coordinator=coordinator_username
-        ).exclude(batch_year=normalized_year)
-        
-        # Get year+section combinations from old imports
-        old_year_sections = set()
-        for imp in old_imports:
-            year = getattr(imp, 'batch_year', None)
-            section = getattr(imp, 'section', None)
-            if year:
-                old_year_sections.add((year, section))
-        
-        # Find all OJT students from old batches (only if old imports exist)
-        old_batch_users = User.objects.none()  # Start with empty queryset
-        
-        if old_year_sections:
-            # Find all OJT students from old batches
-            old_batch_users = User.objects.filter(
-                account_type__ojt=True,
-                user_status__iexact='Active',
-                academic_info__isnull=False  # Ensure academic_info exists
-            ).select_related('academic_info', 'ojt_info')
-            
-            # Filter by coordinator's old year+section combinations
-            year_section_filters = Q()
-            for year, section in old_year_sections:
-                if section:
-                    year_section_filters |= Q(academic_info__year_graduated=year, academic_info__section=section)
-                else:
-                    year_section_filters |= Q(academic_info__year_graduated=year)
-            
-            if year_section_filters:
-                old_batch_users = old_batch_users.filter(year_section_filters)
-        
-        # Step 3: Deactivate students NOT in the new import
-        # Special rule: If OJT status is "Incomplete", deactivation is based on the NEW batch's send date
-        # (SendDate is already imported at the top of the file)
-        
-        # Check if new batch has a send date set
-        new_batch_send_date = None
-        try:
-            # Try to find send date for the new batch
-            new_batch_send_date_obj = SendDate.objects.filter(
-                coordinator=coordinator_username,
-                batch_year=normalized_year
-            ).first()
-            
-            if new_batch_send_date_obj and new_batch_send_date_obj.send_date:
-                new_batch_send_date = new_batch_send_date_obj.send_date
-                print(f"📅 New batch ({normalized_year}) has send date: {new_batch_send_date}")
-            else:
-                print(f"📅 New batch ({normalized_year}) has no send date set")
-        except Exception as e:
-            print(f"⚠️ Could not check send date for new batch: {e}")
-        
-        for old_user in old_batch_users:
-            old_ctu_id = old_user.acc_username
-            
-            if old_ctu_id not in new_import_ctu_ids:
-                # Check OJT status before deactivating
-                should_deactivate = True
-                skip_reason = None
-                
-                # Get OJT info if exists
-                try:
-                    # Use select_related to efficiently get OJT info if it exists
-                    ojt_info = getattr(old_user, 'ojt_info', None)
-                    ojt_status = ojt_info.ojtstatus if ojt_info and ojt_info.ojtstatus else None
-                    
-                    # If OJT status is "Incomplete", check if new batch send date has passed
-                    # Keep incomplete students active until new batch send date is overdue
-                    if ojt_status and str(ojt_status).strip().lower() in ['incomplete', 'in complete']:
-                        if new_batch_send_date:
-                            # Check if send date has passed (is overdue)
-                            today = timezone.now().date()
-                            if today < new_batch_send_date:
-                                # Send date has NOT passed yet - DO NOT deactivate incomplete students
-                                should_deactivate = False
-                                days_until_due = (new_batch_send_date - today).days
-                                skip_reason = f"OJT status is Incomplete and new batch ({normalized_year}) send date ({new_batch_send_date}) is not yet due ({days_until_due} days remaining) - will keep active"
-                                print(f"🟡 Skipping deactivation for {old_ctu_id}: {skip_reason}")
-                            else:
-                                # Send date has passed (overdue) - deactivate incomplete students
-                                should_deactivate = True
-                                days_overdue = (today - new_batch_send_date).days
-                                print(f"⚠️ OJT status is Incomplete and new batch ({normalized_year}) send date ({new_batch_send_date}) is overdue ({days_overdue} days) - will deactivate {old_ctu_id}")
-                        else:
-                            # New batch has no send date - proceed with normal deactivation
-                            print(f"⚠️ OJT status is Incomplete but new batch ({normalized_year}) has no send date - will deactivate {old_ctu_id}")
-                            should_deactivate = True
-                    else:
-                        # OJT status is not "Incomplete" - proceed with normal deactivation
-                        should_deactivate = True
-                except Exception as e:
-                    # If error accessing OJT info, proceed with normal deactivation
-                    print(f"⚠️ Could not check OJT status for {old_ctu_id}: {e}")
-                    should_deactivate = True
-                
-                if should_deactivate:
-                    # Student not in new import - deactivate them
-                    old_user.user_status = 'Inactive'
-                    old_user.save(update_fields=['user_status'])
-                    deactivated_count += 1
-                    print(f"🔴 Deactivated old batch student: {old_ctu_id} (not in new import)")
-                else:
-                    # Skip deactivation due to incomplete OJT status
-                    print(f"🟡 Skipped deactivation for {old_ctu_id}: {skip_reason}")
-            else:
-                # Student IS in new import - ensure they're active (will be updated)
-                if old_user.user_status != 'Active':
-                    old_user.user_status = 'Active'
-                    old_user.save(update_fields=['user_status'])
-                    reactivated_count += 1
-                    print(f"🟢 Reactivated student: {old_ctu_id} (in new import)")
-        print(f"📊 Batch import summary:")
-        print(f"   - Deactivated {deactivated_count} old batch students")
-        print(f"   - Reactivated {reactivated_count} students (will be updated)")
-        print(f"   - Processing {len(new_import_ctu_ids)} students from new import")
-        
-        for index, row in df.iterrows():
-            print(f"--- Processing Row {index+2} ---")
-            try:
-                # --- Field Extraction and Cleaning ---
-                ctu_id = str(row.get('CTU_ID', '')).strip()
-                
-                print(f"\n{'='*80}")
-                print(f"🔍 PROCESSING ROW {index+2} - CTU_ID: {ctu_id}")
-                print(f"{'='*80}")
-                
-                first_name = str(row.get('First_Name', '')).strip()
-                middle_name = str(row.get('Middle_Name', '')).strip() if pd.notna(row.get('Middle_Name')) else ''
-                last_name = str(row.get('Last_Name', '')).strip()
-                gender_raw = str(row.get('Gender', '')).strip()
-                
-                # DEBUG: Show all available columns and company data
-                print(f"📋 Available columns in this row: {list(row.keys())}")
-                print(f"📦 Company data from Excel:")
-                print(f"   'Company': '{row.get('Company')}' (exists: {'Company' in row})")
-                print(f"   'Company_Address': '{row.get('Company_Address')}' (exists: {'Company_Address' in row})")
-                print(f"   'Company_Email': '{row.get('Company_Email')}' (exists: {'Company_Email' in row})")
-                print(f"   'Company_Contact': '{row.get('Company_Contact')}' (exists: {'Company_Contact' in row})")
-                print(f"👤 Personal data: First='{first_name}', Last='{last_name}', Gender='{gender_raw}'")
-                # Normalize gender values
-                if gender_raw.upper() in ['MALE', 'M']:
-                    gender = 'M'
-                elif gender_raw.upper() in ['FEMALE', 'F']:
-                    gender = 'F'
-                else:
-                    gender = gender_raw.upper()
-                # --- Section Handling ---
-                # Use section from Excel file if available, otherwise use first detected section
-                excel_section = str(row.get('Section', '')).strip()
-                if excel_section and excel_section in detected_sections:
-                    user_section = excel_section
-                    print(f"Row {index+2} - Using Excel section: '{excel_section}'")
-                else:
-                    # Use the first detected section as default
-                    user_section = detected_sections[0] if detected_sections else f"{batch_year}-A"
-                    print(f"Row {index+2} - Using default section: '{user_section}'")
-
-                # --- Password Handling (no birthdate login) ---
-                password_raw = str(row.get('Password', '')).strip()
-                if not password_raw:
-                    alphabet = string.ascii_letters + string.digits
-                    password_raw = ''.join(secrets.choice(alphabet) for _ in range(12))
-                    print(f"Row {index+2} - Generated password: {password_raw}")
-                else:
-                    print(f"Row {index+2} - Using provided password: {password_raw}")
-
-                # --- Age not derived from password; keep None unless separately provided
-                age = None
-
-                # --- Parse OJT Status from Excel ---
-                ojt_status = 'Ongoing'  # Default status
-                if 'Status' in row and pd.notna(row.get('Status')):
-                    excel_status = str(row.get('Status')).strip()
-                    # Normalize status values
-                    if excel_status.lower() in ['completed', 'complete', 'done']:
-                        ojt_status = 'Completed'
-                    elif excel_status.lower() in ['ongoing', 'active', 'in progress']:
-                        ojt_status = 'Ongoing'
-                    elif excel_status.lower() in ['incomplete', 'failed', 'dropped', 'not started']:
-                        ojt_status = 'Not Started'
-                    else:
-                        ojt_status = excel_status  # Use as-is if not recognized
-                    print(f"Row {index+2} - Status from Excel: '{excel_status}' -> Normalized to: '{ojt_status}'")
-                else:
-                    print(f"Row {index+2} - No Status in Excel, defaulting to: '{ojt_status}'")
-
-                # --- Parse OJT Start/End Dates ---
-                ojt_start_date = None
-                ojt_end_date = None
-
-                # Try different possible column names for start date
-                start_date_raw = row.get('Ojt_Start_Date') or row.get('Start_Date')
-                print(f"Row {index+2} - Raw Start Date: '{start_date_raw}', Type: {type(start_date_raw)}")
-                if pd.notna(start_date_raw):
-                    try:
-                        # Try multiple date parsing methods
-                        ojt_start_date = pd.to_datetime(start_date_raw, dayfirst=True).date()
-                        if ojt_start_date and ojt_start_date.year > 2020:  # Valid date check
-                            print(f"Row {index+2} - Parsed start date successfully: {ojt_start_date}")
-                        else:
-                            print(f"Row {index+2} - Invalid start date: {ojt_start_date}")
-                            ojt_start_date = None
-                    except Exception as e:
-                        print(f"Row {index+2} - FAILED to parse start date. Error: {e}")
-                        ojt_start_date = None
-                else:
-                    print(f"Row {index+2} - No start date found in row")
-
-                # Try different possible column names for end date
-                end_date_raw = row.get('Ojt_End_Date') or row.get('End_Date')
-                print(f"Row {index+2} - Raw End Date: '{end_date_raw}', Type: {type(end_date_raw)}")
-                if pd.notna(end_date_raw):
-                    try:
-                        ojt_end_date = pd.to_datetime(end_date_raw, dayfirst=True).date()
-                        print(f"Row {index+2} - Parsed end date successfully: {ojt_end_date}")
-                    except Exception as e:
-                        print(f"Row {index+2} - FAILED to parse end date. Error: {e}")
-                        ojt_end_date = None
-
-                # --- Validation Check ---
-                # CTU_ID is always required
-                if not ctu_id:
-                    error_msg = f"Row {index + 2}: Missing CTU_ID (required)"
-                    print(f"SKIPPING: {error_msg}")
-                    errors.append(error_msg)
-                    skipped_count += 1
-                    continue
-                
-                # Check if user exists - if yes, other fields are optional (update mode)
-                # If no, First_Name, Last_Name, Gender are required (create mode)
-                existing_user_check = User.objects.filter(acc_username=ctu_id).first()
-                
-                print(f"Row {index+2} - CTU_ID: {ctu_id}, User exists: {existing_user_check is not None}")
-                
-                # IMPORTANT: Check if this CTU_ID was imported by a different coordinator
-                if existing_user_check:
-                    # Check if user has academic_info (OJT students should have this)
-                    if hasattr(existing_user_check, 'academic_info') and existing_user_check.academic_info:
-                        user_year = existing_user_check.academic_info.year_graduated
-                        user_section = getattr(existing_user_check.academic_info, 'section', None) or ''
-                        
-                        # Find which coordinator(s) imported this user's year+section
-                        existing_imports = OJTImport.objects.filter(
-                            batch_year=user_year,
-                            section=user_section
-                        )
-                        
-                        if existing_imports.exists():
-                            # Check all imports for this year+section
-                            coordinators_for_this_batch = set()
-                            for imp in existing_imports:
-                                coordinators_for_this_batch.add(imp.coordinator)
-                            
-                            # If any coordinator other than current one imported this batch, block it
-                            other_coordinators = coordinators_for_this_batch - {coordinator_username}
-                            if other_coordinators:
-                                original_coordinator = list(other_coordinators)[0]  # Get first other coordinator
-                                error_msg = f"Row {index + 2}: CTU_ID {ctu_id} was already imported by {original_coordinator} (batch {user_year}, section {user_section}). Cannot import to {coordinator_username}."
-                                print(f"❌ BLOCKED: {error_msg}")
-                                errors.append(error_msg)
-                                skipped_count += 1
-                                continue
-                            else:
-                                print(f"✅ CTU_ID {ctu_id} was imported by same coordinator ({coordinator_username}) - allowing update")
-                        else:
-                            # User exists but no import record - might be from old system
-                            # Check if user is OJT type - if yes, block it to prevent conflicts
-                            if existing_user_check.account_type and existing_user_check.account_type.ojt:
-                                error_msg = f"Row {index + 2}: CTU_ID {ctu_id} already exists as OJT student (batch {user_year}, section {user_section}) but has no import record. Cannot import to prevent conflicts."
-                                print(f"❌ BLOCKED: {error_msg}")
-                                errors.append(error_msg)
-                                skipped_count += 1
-                                continue
-                
-                if not existing_user_check:
-                    # NEW USER - require all fields (including personal info AND company info)
-                    print(f"Row {index+2} - NEW USER MODE - validating required fields...")
-                    
-                    # Extract additional required fields - Personal Info
-                    birthdate_raw = row.get('Birthdate')
-                    contact_no = str(row.get('Contact_No', '')).strip() if pd.notna(row.get('Contact_No')) else ''
-                    email = str(row.get('Email', '')).strip() if pd.notna(row.get('Email')) else ''
-                    address = str(row.get('Address', '')).strip() if pd.notna(row.get('Address')) else ''
-                    
-                    # Extract required company fields
-                    company_name = str(row.get('Company', '')).strip() if pd.notna(row.get('Company')) else ''
-                    company_address = str(row.get('Company_Address', '')).strip() if pd.notna(row.get('Company_Address')) else ''
-                    company_email = str(row.get('Company_Email', '')).strip() if pd.notna(row.get('Company_Email')) else ''
-                    company_contact = str(row.get('Company_Contact', '')).strip() if pd.notna(row.get('Company_Contact')) else ''
-                    contact_person = str(row.get('Contact_Person', '')).strip() if pd.notna(row.get('Contact_Person')) else ''
-                    position = str(row.get('Position', '')).strip() if pd.notna(row.get('Position')) else ''
-                    
-                    # FIRST IMPORT: Require basic personal info + contact details
-                    # Company info can be added later via second import
-                    required_personal_data = {
-                        "FirstName": first_name,
-                        "LastName": last_name,
-                        "Gender": gender,
-                        "Section": excel_section,
-                        "Birthdate": birthdate_raw if pd.notna(birthdate_raw) else None,
-                        "ContactNo": contact_no,
-                        "Email": email,
-                        "Address": address
-                    }
-                    missing_fields = [key for key, value in required_personal_data.items() if not value]
-
-                    if missing_fields:
-                        error_msg = f"Row {index + 2}: New user requires - {', '.join(missing_fields)}"
-                        print(f"SKIPPING: {error_msg}")
-                        errors.append(error_msg)
-                        skipped_count += 1
-                        continue
-                    
-                    # Optional fields (nice to have but not required)
-                    # MiddleName only - all other personal fields are now required
-                    # Company fields are ALL optional for first import
-                    print(f"Row {index+2} - ✅ Required fields validated. Optional field: MiddleName={bool(middle_name)}")
-                    print(f"Row {index+2} - Company info (optional): CompanyName={bool(company_name)}, Address={bool(company_address)}, Email={bool(company_email)}, Contact={bool(company_contact)}, Person={bool(contact_person)}, Position={bool(position)}")
-
-                    # --- Gender Validation for new users ---
-                    if gender not in ['M', 'F']:
-                        error_msg = f"Row {index + 2}: Gender must be 'M'/'Male' or 'F'/'Female', but was '{gender}' (from raw: '{gender_raw}')"
-                        print(f"SKIPPING: {error_msg}")
-                        errors.append(error_msg)
-                        skipped_count += 1
-                        continue
-                    
-                    # --- Birthdate Validation (OPTIONAL - only validate if provided) ---
-                    bd = None  # Default to None if not provided
-                    if pd.notna(birthdate_raw):
-                        try:
-                            bd = pd.to_datetime(birthdate_raw, errors='coerce').date()
-                            if bd and (bd.year < 1900 or bd.year > 2020):
-                                error_msg = f"Row {index + 2}: Invalid birthdate '{birthdate_raw}'. Must be between 1900-2020."
-                                print(f"SKIPPING: {error_msg}")
-                                errors.append(error_msg)
-                                skipped_count += 1
-                                continue
-                        except Exception as e:
-                            print(f"Row {index + 2}: WARNING - Could not parse birthdate '{birthdate_raw}', setting to None")
-                            bd = None
-                    else:
-                        print(f"Row {index + 2} - No birthdate provided (optional field)")
-                else:
-                    # EXISTING USER - fields are optional, use existing data if not provided
-                    print(f"Row {index+2} - UPDATE MODE ACTIVATED - User {ctu_id} exists, proceeding with company data update...")
-
-                # If a user with this CTU_ID already exists, update academic year/course
-                existing_user = User.objects.filter(acc_username=ctu_id).first()
-                if existing_user:
-                    try:
-                        print(f"Row {index+2} - User {ctu_id} already exists, checking batch year...")
-                        
-                        # Ensure related models exist
-                        from apps.shared.models import UserProfile, AcademicInfo, OJTInfo, EmploymentHistory, OJTCompanyProfile
-                        profile, _ = UserProfile.objects.get_or_create(user=existing_user)
-                        academic, _ = AcademicInfo.objects.get_or_create(user=existing_user)
-                        
-                        # CHECK: Is student being imported for a DIFFERENT batch year? (Retaking OJT)
-                        # If yes, delete old OJT data from previous batch and start fresh
-                        old_batch_year = academic.year_graduated
-                        new_batch_year = int(normalized_year) if str(normalized_year).isdigit() else None
-                        
-                        if old_batch_year and new_batch_year and old_batch_year != new_batch_year:
-                            # CHECK: Is student already APPROVED (alumni)? 
-                            # If yes, BLOCK retaking - alumni cannot retake OJT
-                            is_alumni = existing_user.account_type and existing_user.account_type.user == True
-                            
-                            if is_alumni:
-                                # BLOCK: Alumni cannot retake OJT
-                                print(f"Row {index+2} - ⚠️ BLOCKED: Student {ctu_id} is already APPROVED (alumni) in batch {old_batch_year}")
-                                print(f"Row {index+2} - Alumni cannot retake OJT. Skipping import for this user.")
-                                errors.append(f"Row {index+2}: Student {ctu_id} ({first_name} {last_name}) is already APPROVED (alumni) and cannot retake OJT.")
-                                skipped_count += 1
-                                continue  # Skip this student, move to next row
-                            
-                            # Student is NOT alumni (INCOMPLETE or failed) - Allow retaking
-                            print(f"Row {index+2} - RETAKING OJT! Student was in batch {old_batch_year}, now importing for batch {new_batch_year}")
-                            print(f"Row {index+2} - Student is NOT alumni (INCOMPLETE/failed), retaking is allowed.")
-                            print(f"Row {index+2} - Deleting old OJT data from batch {old_batch_year}...")
-                            
-                            # Delete old OJT data
-                            OJTInfo.objects.filter(user=existing_user).delete()
-                            OJTCompanyProfile.objects.filter(user=existing_user).delete()
-                            
-                            # REACTIVATE ACCOUNT: Reset account type to OJT
-                            if not existing_user.account_type:
-                                existing_user.account_type = ojt_account_type
-                                existing_user.save()
-                            else:
-                                # Ensure OJT flag is set
-                                existing_user.account_type.ojt = True
-                                existing_user.account_type.save()
-                                print(f"Row {index+2} - Account reactivated as OJT student")
-                            
-                            retaking_count += 1
-                            print(f"Row {index+2} - Old OJT data deleted. Student will start fresh in batch {new_batch_year}")
-                        
-                        # Update section ONLY if explicitly provided in Excel (not auto-generated)
-                        # For second imports without Section column, keep existing section
-                        excel_section_provided = 'Section' in row and pd.notna(row.get('Section')) and str(row.get('Section')).strip()
-                        if excel_section_provided:
-                            academic.section = user_section
-                            academic.save()
-                            print(f"Row {index+2} - Updated section to: {user_section}")
-                        else:
-                            print(f"Row {index+2} - No Section in Excel, keeping existing section: {academic.section}")
-                        
-                        ojt_info, _ = OJTInfo.objects.get_or_create(user=existing_user)
-                        
-                        # Check if OJTCompanyProfile already has a company (for detecting first vs second import)
-                        from apps.shared.models import OJTCompanyProfile
-                        from django.db.utils import ProgrammingError
-                        try:
-                            existing_company_profile = existing_user.ojt_company_profile
-                            has_existing_company = existing_company_profile.company_name and str(existing_company_profile.company_name).strip()
-                        except (OJTCompanyProfile.DoesNotExist, ProgrammingError, AttributeError):
-                            has_existing_company = False
-                        
-                        # Check if user has initial password record (indicates account was already created)
-                        from apps.shared.models import UserInitialPassword
-                        has_initial_password = UserInitialPassword.objects.filter(user=existing_user).exists()
-                        
-                        # Ensure a first-login record exists and is active for coordinator-managed accounts
-                        ensure_initial_password_active(
-                            existing_user,
-                            raw_password=password_raw if password_raw else None,
-                            allow_create=bool(password_raw),
-                        )
-                        print(f"Row {index+2} - Initial password record ensured/activated for {ctu_id}")
-
-                        # Update names to match latest import where present (only if provided in Excel)
-                        updated = False
-                        if first_name:
-                            existing_user.f_name = first_name
-                            updated = True
-                        if middle_name:
-                            existing_user.m_name = middle_name
-                            updated = True
-                        if last_name:
-                            existing_user.l_name = last_name
-                            updated = True
-                        if gender and gender in ['M', 'F']:
-                            existing_user.gender = gender
-                            updated = True
-                        
-                        if updated:
-                            existing_user.save()
-                            print(f"Row {index+2} - Updated user personal info")
-                        else:
-                            print(f"Row {index+2} - No personal info changes, keeping existing data")
-
-                        # Update academic info from batch and course
-                        # Save normalized batch year
-                        try:
-                            academic.year_graduated = int(normalized_year)
-                        except Exception:
-                            pass
-                        if course:
-                            academic.program = course
-                        academic.save()
-
-                        # Update profile birthdate if present
-                        if pd.notna(row.get('Birthdate')):
-                            try:
-                                bd = pd.to_datetime(row.get('Birthdate'), errors='coerce').date()
-                                if bd:
-                                    profile.birthdate = bd
-                            except Exception:
-                                pass
-                        profile.save()
-
-                        # Update employment company and start date from spreadsheet
-                        company_name = (
-                            row.get('Company Name')
-                            or row.get('Company')
-                            or row.get('Company name current')
-                        )
-                        
-                        # Check if company info is being provided in this import
-                        has_new_company_info = pd.notna(company_name) and str(company_name).strip()
-                        
-                        if has_new_company_info:
-                            # If this is SECOND import (has new company but didn't have one before)
-                            # Set start date to TODAY automatically
-                            if not has_existing_company:
-                                from django.utils import timezone
-                                ojt_start_date = timezone.now().date()
-                                print(f"Row {index+2} - SECOND IMPORT DETECTED! Auto-setting start_date to TODAY: {ojt_start_date}")
-                                
-                                # Calculate end date from SendDate for this batch
-                                from apps.shared.models import SendDate
-                                send_date_obj = SendDate.objects.filter(
-                                    batch_year=normalized_year,
-                                    coordinator=coordinator_username
-                                ).first()
-                                
-                                if send_date_obj and send_date_obj.send_date:
-                                    ojt_end_date = send_date_obj.send_date
-                                    print(f"Row {index+2} - Auto-calculated end_date from SendDate: {ojt_end_date}")
-                        
-                        # Company data will be saved to OJTCompanyProfile only, not EmploymentHistory
-
-                        # Update OJT info (status, dates if parsed)
-                        # STATUS is ONLY changeable if start_date exists
-                        if 'ojt_start_date' in locals() and ojt_start_date:
-                            ojt_info.ojtstatus = ojt_status
-                            print(f"Row {index+2} - Start date exists, status set to: '{ojt_status}'")
-                        else:
-                            # Keep existing status or set to 'Not Started' if no start date
-                            if not ojt_info.ojtstatus:
-                                ojt_info.ojtstatus = 'Not Started'
-                            print(f"Row {index+2} - No start date, status remains: '{ojt_info.ojtstatus}'")
-                        
-                        # Set start/end dates
-                        if 'ojt_start_date' in locals() and ojt_start_date:
-                            ojt_info.ojt_start_date = ojt_start_date
-                        if 'ojt_end_date' in locals() and ojt_end_date:
-                            ojt_info.ojt_end_date = ojt_end_date
-                        ojt_info.save()
-                        
-                        # Update or create OJT Company Profile
-                        try:
-                            ojt_company_profile, created = OJTCompanyProfile.objects.get_or_create(
-                                user=existing_user,
-                                defaults={
-                                    'coordinator': coordinator_username,  # Track which coordinator imported this
-                                    'company_name': str(company_name).strip().upper() if has_new_company_info else None,
-                                    'start_date': ojt_start_date if 'ojt_start_date' in locals() else None,
-                                    'end_date': ojt_end_date if 'ojt_end_date' in locals() else None,
-                                }
-                            )
-                            
-                            if not created:
-                                # Update existing profile - also update coordinator if it's being updated
-                                ojt_company_profile.coordinator = coordinator_username  # Update coordinator on each import
-                                if has_new_company_info:
-                                    ojt_company_profile.company_name = str(company_name).strip().upper()
-                                if 'ojt_start_date' in locals() and ojt_start_date:
-                                    ojt_company_profile.start_date = ojt_start_date
-                                if 'ojt_end_date' in locals() and ojt_end_date:
-                                    ojt_company_profile.end_date = ojt_end_date
-                            
-                            # Update company details
-                            company_address = row.get('Company_Address')
-                            company_email = row.get('Company_Email')
-                            company_contact = row.get('Company_Contact')
-                            contact_person = row.get('Contact_Person')
-                            position = row.get('Position')
-                            
-                            if pd.notna(company_address) and str(company_address).strip():
-                                ojt_company_profile.company_address = str(company_address).strip()
-                            if pd.notna(company_email) and str(company_email).strip():
-                                ojt_company_profile.company_email = str(company_email).strip()
-                            if pd.notna(company_contact) and str(company_contact).strip():
-                                ojt_company_profile.company_contact = str(company_contact).strip()
-                            if pd.notna(contact_person) and str(contact_person).strip():
-                                ojt_company_profile.contact_person = str(contact_person).strip()
-                            if pd.notna(position) and str(position).strip():
-                                ojt_company_profile.position = str(position).strip()
-                            
-                            ojt_company_profile.save()
-                            print(f"Row {index+2} - Updated OJT Company Profile for {company_name}")
-                        except Exception as e:
-                            print(f"Row {index+2} - Failed to update OJT Company Profile: {e}")
-                            pass
-
-                        # User already existed - don't count as "created", just updated
-                        updating_count += 1
-                        print(f"Row {index+2} - ✅ UPDATE COMPLETE: User information updated (updating_count: {updating_count})")
-                        continue
-                    except Exception as _e:
-                        # Fall through to try creating a new one if update fails
-                        import traceback
-                        print(f"Row {index+2} - ❌ EXCEPTION during update for {ctu_id}: {_e}")
-                        print(f"Row {index+2} - Traceback: {traceback.format_exc()}")
-                        print(f"Row {index+2} - Will skip this row due to error")
-                        errors.append(f"Row {index+2}: Update failed for {ctu_id} - {str(_e)}")
-                        skipped_count += 1
-                        continue
-
-                # --- Create OJT user securely ---
-                ojt_user = User.objects.create(
-                    acc_username=ctu_id,
-                    user_status='active',
-                    f_name=first_name,
-                    m_name=middle_name,
-                    l_name=last_name,
-                    gender=gender,
-                    account_type=ojt_account_type or AccountType.objects.get(ojt=True, admin=False, peso=False, user=False, coordinator=False),
-                )
-                ojt_user.set_password(password_raw)
-                ojt_user.save()
-                # Store initial password (encrypted)
-                # Set is_active=True so users get forced to change password on first login
-                ensure_initial_password_active(ojt_user, raw_password=password_raw, allow_create=True)
-                from apps.shared.models import UserProfile, AcademicInfo, EmploymentHistory, OJTInfo
-                birthdate_val = row.get('Birthdate')
-                # Extract phone number from Contact_No column (your Excel uses Contact_No, not Phone_Number)
-                phone_num = str(row.get('Contact_No', '')).strip() if pd.notna(row.get('Contact_No')) else None
-                # Clean up phone number format (remove scientific notation)
-                if phone_num and 'E+' in phone_num:
-                    try:
-                        phone_num = str(int(float(phone_num)))
-                    except:
-                        pass
-                
-                profile_kwargs = dict(
-                    user=ojt_user,
-                    age=None,
-                    phone_num=phone_num,
-                    address=str(row.get('Address', '')).strip() if pd.notna(row.get('Address')) else None,
-                    civil_status=str(row.get('Civil_Status', '')).strip() if pd.notna(row.get('Civil_Status')) else None,
-                    social_media=str(row.get('Social_Media', '')).strip() if pd.notna(row.get('Social_Media')) else None,
-                )
-                if pd.notna(birthdate_val):
-                    try:
-                        # Try different date formats
-                        bd = pd.to_datetime(birthdate_val, errors='coerce').date()
-                        if bd and bd.year > 1900:  # Valid date check
-                            profile_kwargs['birthdate'] = bd
-                    except Exception as e:
-                        print(f"Row {index+2} - Failed to parse birthdate '{birthdate_val}': {e}")
-                        pass
-                UserProfile.objects.create(**profile_kwargs)
-                # Employment: company name and details
-                company_name_new = (
-                    row.get('Company Name')
-                    or row.get('Company')
-                    or row.get('Company name current')
-                )
-                # Note: OJT company data should NOT be copied to EmploymentHistory
-                # EmploymentHistory is for actual employment after graduation, not OJT
-                # OJT data should only be stored in OJTInfo model
-                print(f"Row {index+2} - NEW USER - OJT company data will be stored in OJTInfo only")
-                AcademicInfo.objects.create(
-                    user=ojt_user,
-                    year_graduated=int(normalized_year) if str(normalized_year).isdigit() else None,
-                    program=course if course else 'OJT',  # Use program field, set default if empty
-                    section=user_section,  # Use the determined section (from Excel or form)
-                )
-                # Create OJT info
-                try:
-                    # STATUS is ONLY set if start_date exists, otherwise set to 'Not Started'
-                    final_status = ojt_status if ('ojt_start_date' in locals() and ojt_start_date) else 'Not Started'
-                    
-                    OJTInfo.objects.create(
-                        ojt_start_date=ojt_start_date if 'ojt_start_date' in locals() else None,
-                        user=ojt_user,
-                        ojt_end_date=ojt_end_date if 'ojt_end_date' in locals() else None,
-                        ojtstatus=final_status,
-                    )
-                    if 'ojt_start_date' in locals() and ojt_start_date:
-                        print(f"Row {index+2} - Created new user with status: '{final_status}' (start date exists)")
-                    else:
-                        print(f"Row {index+2} - Created new user with status: '{final_status}' (no start date - first import)")
-                except Exception:
-                    pass
-                # Create OJT Company Profile
-                try:
-                    from apps.shared.models import OJTCompanyProfile
-                    ojt_company_kwargs = {
-                        'user': ojt_user,
-                        'coordinator': coordinator_username,  # Track which coordinator imported this
-                        'company_name': str(company_name_new).strip().upper() if pd.notna(company_name_new) and str(company_name_new).strip() else None,
-                        'start_date': ojt_start_date if 'ojt_start_date' in locals() else None,
-                        'end_date': ojt_end_date,
-                    }
-                    
-                    # Add company details if available
-                    company_address_new = row.get('Company_Address')
-                    company_email_new = row.get('Company_Email')
-                    company_contact_new = row.get('Company_Contact')
-                    contact_person_new = row.get('Contact_Person')
-                    position_new = row.get('Position')
-                    
-                    if pd.notna(company_address_new) and str(company_address_new).strip():
-                        ojt_company_kwargs['company_address'] = str(company_address_new).strip()
-                    if pd.notna(company_email_new) and str(company_email_new).strip():
-                        ojt_company_kwargs['company_email'] = str(company_email_new).strip()
-                    if pd.notna(company_contact_new) and str(company_contact_new).strip():
-                        ojt_company_kwargs['company_contact'] = str(company_contact_new).strip()
-                    if pd.notna(contact_person_new) and str(contact_person_new).strip():
-                        ojt_company_kwargs['contact_person'] = str(contact_person_new).strip()
-                    if pd.notna(position_new) and str(position_new).strip():
-                        ojt_company_kwargs['position'] = str(position_new).strip()
-                    
-                    OJTCompanyProfile.objects.create(**ojt_company_kwargs)
-                    print(f"Row {index+2} - Created OJT Company Profile for {company_name_new}")
-                except Exception as e:
-                    print(f"Row {index+2} - Failed to create OJT Company Profile: {e}")
-                    pass
-                exported_passwords.append({
-                    'CTU_ID': ctu_id,
-                    'First_Name': first_name,
-                    'Last_Name': last_name,
-                    'Password': password_raw
-                })
-
-                print(f"SUCCESS: Created OJT record for CTU_ID {ctu_id} with password: {password_raw}")
-                print(f"🔍 DEBUG: Added to exported_passwords list. Total count: {len(exported_passwords)}")
-                created_count += 1
-
-            except Exception as e:
-                error_msg = f"Row {index + 2}: An unexpected error occurred - {str(e)}"
-                print(f"ERROR: {error_msg}")
-                errors.append(error_msg)
-                skipped_count += 1
-                continue
-
-        # Update import records with actual created count (after section filtering)
-        for import_record in import_records:
-            import_record.records_imported = created_count
-            if errors:
-                import_record.status = 'Partial' if created_count > 0 else 'Failed'
-            import_record.save()
-
-        # Export passwords to Excel after import
-        print(f"🔍 DEBUG: exported_passwords count: {len(exported_passwords)}")
-        print(f"🔍 DEBUG: created_count: {created_count}")
-        print(f"🔍 DEBUG: exported_passwords: {exported_passwords}")
-        
-        # Always return JSON response, but include password data
-        total_processed = created_count + skipped_count
-        second_import_count = total_processed - created_count - skipped_count
-        
-        response_data = {
-            'success': True,
-            'message': f'OJT import completed. Created: {created_count}, Updated: {updating_count}, Skipped: {skipped_count}, Deactivated: {deactivated_count}',
-            'created_count': created_count,
-            'updating_count': updating_count,
-            'skipped_count': skipped_count,
-            'retaking_count': retaking_count,
-            'deactivated_count': deactivated_count,  # Old batch students deactivated
-            'reactivated_count': reactivated_count,  # Students reactivated (same CTU_ID)
-            'errors': errors[:10],  # Limit errors to first 10
-            'passwords': exported_passwords,  # Include passwords in response (only for first import)
-            'sections': detected_sections,  # Include detected sections
-            'batch_year': normalized_year  # Include batch year for filename generation
-        }
-        
-        if retaking_count > 0:
-            response_data['message'] += f' 🔄 {retaking_count} student(s) retaking OJT (account reactivated, old data cleared).'
-        
-        if exported_passwords:
-            print(f"🔍 DEBUG: Created {len(exported_passwords)} passwords for export")
-            response_data['message'] += f' ✅ {len(exported_passwords)} passwords generated (First Import).'
-        else:
-            response_data['message'] += ' ℹ️ No passwords generated (Second Import - company info updated).'
-        
-        if detected_sections:
-            response_data['message'] += f' Detected sections: {", ".join(detected_sections)}'
-        
+                batch_year=batch_year,
+                course=course,
+            ).run()
+        except OJTImportError as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
         return JsonResponse(response_data)
 
     except Exception as e:
@@ -3563,6 +2428,9 @@ def update_alumni_profile(request):
             profile.profile_pic = request.FILES['profile_pic']
 
         profile.save()
+        if 'profile_pic' in request.FILES:
+            from apps.shared.avatars import remember_avatar
+            remember_avatar(profile)
 
         return Response({
             'user': {
@@ -4099,6 +2967,8 @@ def delete_alumni_profile_pic(request):
             profile.profile_pic.delete(save=False)
             profile.profile_pic = None
             profile.save()
+            from apps.shared.avatars import forget_avatar
+            forget_avatar(user.user_id)
             # Also remove local file if path is available
             if file_path and os.path.exists(file_path):
                 try:
@@ -4123,9 +2993,8 @@ def post_detail_view(request, post_id):
             reposts = Repost.objects.filter(post=post).select_related('user')
             repost_data = []
             for repost in reposts:
-                # Get repost likes count and data
+                # Get repost likes data (count is stored on the repost row)
                 repost_likes = Like.objects.filter(repost=repost).select_related('user')
-                repost_likes_count = repost_likes.count()
                 repost_likes_data = []
                 for like in repost_likes:
                     repost_likes_data.append({
@@ -4139,19 +3008,15 @@ def post_detail_view(request, post_id):
                         }
                     })
 
-                # Get repost comments count and data
+                # Get repost comments data (counts are stored on the rows)
                 repost_comments = Comment.objects.filter(repost=repost).select_related('user').order_by('-date_created')
-                repost_comments_count = repost_comments.count()
                 repost_comments_data = []
                 for comment in repost_comments:
-                    # Get replies count for this comment
-                    replies_count = Reply.objects.filter(comment=comment).count()
-                    
                     repost_comments_data.append({
                         'comment_id': comment.comment_id,
                         'comment_content': comment.comment_content,
                         'date_created': comment.date_created.isoformat() if comment.date_created else None,
-                        'replies_count': replies_count,
+                        'replies_count': comment.replies_count,
                         'user': {
                             'user_id': comment.user.user_id,
                             'f_name': comment.user.f_name,
@@ -4165,8 +3030,8 @@ def post_detail_view(request, post_id):
                     'repost_id': repost.repost_id,
                     'repost_date': repost.repost_date.isoformat(),
                     'repost_caption': repost.caption,
-                    'likes_count': repost_likes_count,
-                    'comments_count': repost_comments_count,
+                    'likes_count': repost.likes_count,
+                    'comments_count': repost.comments_count,
                     'likes': repost_likes_data,
                     'comments': repost_comments_data,
                     'user': {
@@ -4244,9 +3109,9 @@ def post_detail_view(request, post_id):
                 'post_images': post_images,  # Multiple images
                 'type': post.type,
                 'created_at': post.created_at.isoformat() if hasattr(post, 'created_at') else None,
-                'likes_count': len(likes_data),
-                'comments_count': post.comments.count() if hasattr(post, 'comments') else 0,
-                'reposts_count': post.reposts.count() if hasattr(post, 'reposts') else 0,
+                'likes_count': post.likes_count,
+                'comments_count': post.comments_count,
+                'reposts_count': post.reposts_count,
                 'likes': likes_data,
                 'reposts': repost_data,
                 'comments': comments_data,
@@ -4394,8 +3259,8 @@ def repost_detail_view(request, repost_id):
             'l_name': repost.user.l_name,
             'profile_pic': build_profile_pic_url(repost.user),
         },
-        'likes_count': likes.count(),
-        'comments_count': comments.count(),
+        'likes_count': repost.likes_count,
+        'comments_count': repost.comments_count,
         'likes': [{
             'user_id': l.user.user_id,
             'f_name': l.user.f_name,
@@ -4410,7 +3275,7 @@ def repost_detail_view(request, repost_id):
             'comment_id': c.comment_id,
             'comment_content': c.comment_content,
             'date_created': c.date_created.isoformat() if c.date_created else None,
-            'replies_count': Reply.objects.filter(comment=c).count(),
+            'replies_count': c.replies_count,
             'user': {
                 'user_id': c.user.user_id,
                 'f_name': c.user.f_name,
@@ -4452,6 +3317,7 @@ def repost_like_view(request, repost_id):
             print(f"🔍 DEBUG: Like created={created}, like_id={like.like_id if like else None}")
             
             if created:
+                counters.like_added(like)
                 # Award engagement points for liking
                 award_engagement_points(user, 'like')
                 
@@ -4508,6 +3374,7 @@ def repost_like_view(request, repost_id):
         try:
             like = Like.objects.get(user=user, repost=repost)
             like.delete()
+            counters.like_removed(like)
             # Deduct engagement points for unliking
             deduct_engagement_points(user, 'like')
             return JsonResponse({'success': True, 'message': 'Repost unliked'})
@@ -4578,6 +3445,7 @@ def repost_comments_view(request, repost_id):
                 comment_content=content,
                 date_created=timezone.now()
             )
+            counters.comment_added(comment)
             
             # Determine repost type and original content info
             if repost.donation_request:
@@ -4670,6 +3538,7 @@ def repost_comment_edit_view(request, repost_id, comment_id):
         # Deduct engagement points for deleting comment
         deduct_engagement_points(comment.user, 'comment')
         comment.delete()
+        counters.comment_removed(comment)
         return JsonResponse({'success': True})
 
 @api_view(["POST", "DELETE"])
@@ -4691,6 +3560,7 @@ def post_like_view(request, post_id):
                 }
             )
             if created:
+                counters.like_added(like)
                 # Award engagement points (+1 for like)
                 award_engagement_points(user, 'like')
                 
@@ -4718,6 +3588,7 @@ def post_like_view(request, post_id):
             try:
                 like = Like.objects.get(user=user, post=post)
                 like.delete()
+                counters.like_removed(like)
                 # Deduct engagement points for unliking
                 deduct_engagement_points(user, 'like')
                 return JsonResponse({'success': True, 'message': 'Post unliked'})
@@ -4770,6 +3641,13 @@ def post_edit_view(request, post_id):
                 else:
                     deduct_engagement_points(user, 'post')
 
+                # Drop the post and its reposts from materialized timelines
+                try:
+                    from apps.shared.timeline import remove_post
+                    remove_post(post.post_id)
+                except Exception as e:
+                    logger.error(f"Error removing post {post.post_id} from timelines: {e}")
+
                 # Finally delete the post itself
                 post.delete()
                 return JsonResponse({'success': True, 'message': 'Post deleted'})
@@ -4817,6 +3695,7 @@ def comment_edit_view(request, post_id, comment_id):
             # Deduct engagement points for deleting comment
             deduct_engagement_points(comment.user, 'comment')
             comment.delete()
+            counters.comment_removed(comment)
             return JsonResponse({'success': True, 'message': 'Comment deleted'})
     except Post.DoesNotExist:
         return JsonResponse({'error': 'Post not found'}, status=404)
@@ -4836,14 +3715,11 @@ def post_comments_view(request, post_id):
             comments_data = []
 
             for comment in comments:
-                # Get reply count for this comment
-                reply_count = Reply.objects.filter(comment=comment).count()
-                
                 comments_data.append({
                     'comment_id': comment.comment_id,
                     'comment_content': comment.comment_content,
                     'date_created': comment.date_created.isoformat(),
-                    'replies_count': reply_count,
+                    'replies_count': comment.replies_count,
                     'user': {
                         'user_id': comment.user.user_id,
                         'f_name': comment.user.f_name,
@@ -4865,6 +3741,7 @@ def post_comments_view(request, post_id):
                 comment_content=data.get('comment_content', ''),
                 date_created=timezone.now()
             )
+            counters.comment_added(comment)
             
             # Award engagement points (+3 for comment)
             award_engagement_points(user, 'comment')
@@ -4946,6 +3823,7 @@ def comment_replies_view(request, comment_id):
                 reply_content=data.get('reply_content', ''),
                 date_created=timezone.now()
             )
+            counters.reply_added(reply)
             
             # Award engagement points (+2 for reply)
             award_engagement_points(user, 'reply')
@@ -5084,6 +3962,7 @@ def reply_edit_view(request, comment_id, reply_id):
             # Deduct engagement points for deleting reply
             deduct_engagement_points(reply_user, 'reply')
             reply.delete()
+            counters.reply_removed(reply)
             return JsonResponse({
                 'success': True,
                 'message': 'Reply deleted'
@@ -5286,6 +4165,13 @@ def post_delete_view(request, post_id):
             else:
                 deduct_engagement_points(user, 'post')
 
+            # Drop the post and its reposts from materialized timelines
+            try:
+                from apps.shared.timeline import remove_post
+                remove_post(post.post_id)
+            except Exception as e:
+                logger.error(f"Error removing post {post.post_id} from timelines: {e}")
+
             # Finally delete the post itself
             post.delete()
             return JsonResponse({'success': True, 'message': 'Post deleted'})
@@ -5342,6 +4228,13 @@ def post_repost_view(request, post_id):
             repost_date=timezone.now(),
             caption=caption,
         )
+        counters.repost_added(repost)
+
+        try:
+            from apps.shared.timeline import fan_out_repost
+            fan_out_repost(repost)
+        except Exception as e:
+            logger.error(f"Error fanning out repost {repost.repost_id} to timelines: {e}")
         
         # Award engagement points (+5 for share/repost)
         award_engagement_points(user, 'share')
@@ -5409,7 +4302,13 @@ def repost_delete_view(request, repost_id):
             print(f"🗑️ DEBUG: User {request.user.user_id} deleting repost {repost_id}")
             # Deduct engagement points for deleting repost (share)
             deduct_engagement_points(request.user, 'share')
+            try:
+                from apps.shared.timeline import remove_repost
+                remove_repost(repost.repost_id)
+            except Exception as e:
+                logger.error(f"Error removing repost {repost.repost_id} from timelines: {e}")
             repost.delete()
+            counters.repost_removed(repost)
             return JsonResponse({'success': True, 'message': 'Repost deleted successfully'})
             
     except Repost.DoesNotExist:
@@ -5520,82 +4419,18 @@ from apps.shared.models import Forum, Like, Comment, Repost, Post, Notification
 # ==========================
 
 def notify_users_of_admin_peso_post(post_author, post_type="post", post_id=None):
-    """Notify all OJT and alumni users when admin or PESO users post"""
+    """Notify all OJT and alumni users when admin or PESO users post.
+    
+    Notifications are bulk-created and broadcast per chunk on a background
+    thread once the post is committed (apps.shared.notification_fanout).
+    Returns True when the fan-out was queued.
+    """
     try:
-        # Check if the post author is admin or PESO
-        if not (post_author.account_type.admin or post_author.account_type.peso):
-            return 0  # Only notify for admin/PESO posts
-        
-        # Get all OJT and alumni users
-        ojt_users = User.objects.filter(account_type__ojt=True)
-        alumni_users = User.objects.filter(account_type__user=True)
-        
-        # Combine both user types
-        target_users = list(ojt_users) + list(alumni_users)
-        
-        # Create notification for each user
-        notifications_created = 0
-        for user in target_users:
-            # Skip notifying the post author themselves
-            if user.user_id == post_author.user_id:
-                continue
-                
-            # Get author's profile picture URL
-            profile_pic_url = ""
-            if hasattr(post_author, 'profile') and post_author.profile and post_author.profile.profile_pic:
-                profile_pic_url = post_author.profile.profile_pic.url
-            
-            # Determine author label
-            if post_author.account_type.admin:
-                author_label = "Admin"
-            elif post_author.account_type.peso:
-                author_label = "PESO"
-            
-            # Determine notification content based on post type and author label
-            if post_type == "forum":
-                content = f"{author_label} posted a new forum discussion."
-                subject = f"New Forum Discussion from {author_label}"
-            elif post_type == "donation":
-                content = f"{author_label} created a new donation request."
-                subject = f"New Donation Request from {author_label}"
-            else:
-                content = f"{author_label} shared a new post."
-                subject = f"New Post from {author_label}"
-            
-            # Add author info (hidden metadata)
-            content += f"<!--AUTHOR_ID:{post_author.user_id}-->"
-            content += f"<!--AUTHOR_NAME:{post_author.full_name}-->"
-            
-            # Add post link if available
-            if post_id:
-                if post_type == "forum":
-                    content += f"<!--FORUM_ID:{post_id}-->"
-                elif post_type == "donation":
-                    content += f"<!--DONATION_ID:{post_id}-->"
-                else:
-                    content += f"<!--POST_ID:{post_id}-->"
-            
-            notification = Notification.objects.create(
-                user=user,
-                notif_type='admin_peso_post',
-                subject=subject,
-                notifi_content=content,
-                notif_date=timezone.now()
-            )
-            
-            # Broadcast notification in real-time
-            try:
-                from apps.messaging.notification_broadcaster import broadcast_notification
-                broadcast_notification(notification)
-            except Exception as e:
-                logger.error(f"Error broadcasting admin/peso post notification: {e}")
-            notifications_created += 1
-        
-        return notifications_created
-        
+        from apps.shared.notification_fanout import queue_admin_peso_post_notifications
+        return queue_admin_peso_post_notifications(post_author, post_type, post_id)
     except Exception as e:
-        print(f"Error creating notifications: {e}")
-        return 0
+        logger.error(f"Error queueing admin/PESO post notifications: {e}")
+        return False
 # ==========================
 # Forum API (shared_forum links to shared_post)
 # ==========================
@@ -6290,6 +5125,12 @@ def follow_user_view(request, user_id):
                 following=user_to_follow
             )
             if created:
+                try:
+                    from apps.shared.timeline import add_follow
+                    add_follow(current_user, user_to_follow)
+                except Exception as e:
+                    logger.error(f"Error adding followed user's posts to timeline: {e}")
+
                 # Notify the followed user
                 try:
                     follow_notification = Notification.objects.create(
@@ -6314,15 +5155,11 @@ def follow_user_view(request, user_id):
                     user_points, _ = UserPoints.objects.get_or_create(user=current_user)
                     follow_count = Follow.objects.filter(follower=current_user).count()
                     user_points.set_follow_count(follow_count)
-                    awarded_milestones = evaluate_and_award_milestones(user_points)
+                    awarded_milestones = evaluate_and_award_milestones(user_points, metrics=['follow_count'])
                     if awarded_milestones:
                         from apps.messaging.notification_broadcaster import broadcast_points_update
-                        user_points.refresh_from_db()
-                        higher_points_count = UserPoints.objects.filter(
-                            Q(user__account_type__user=True) | Q(user__account_type__ojt=True),
-                            total_points__gt=user_points.total_points
-                        ).count()
-                        rank = higher_points_count + 1
+                        from apps.shared.leaderboard import user_rank
+                        rank = user_rank(current_user.user_id, user_points.total_points)
                         broadcast_points_update(current_user.user_id, {
                             'user_id': current_user.user_id,
                             'total_points': user_points.total_points,
@@ -6355,6 +5192,11 @@ def follow_user_view(request, user_id):
                     following=user_to_follow
                 )
                 follow_obj.delete()
+                try:
+                    from apps.shared.timeline import prune_follow
+                    prune_follow(current_user, user_to_follow)
+                except Exception as e:
+                    logger.error(f"Error pruning unfollowed user's posts from timeline: {e}")
                 try:
                     user_points, _ = UserPoints.objects.get_or_create(user=current_user)
                     follow_count = Follow.objects.filter(follower=current_user).count()
@@ -6507,14 +5349,13 @@ def online_users_view(request):
         from apps.shared.models import Follow
         from apps.messaging.connection_manager import connection_manager
         
-        # Get all users that current user follows
-        following_ids = set(Follow.objects.filter(follower=current_user).values_list('following_id', flat=True))
-        
-        # Get all users that follow current user
-        follower_ids = set(Follow.objects.filter(following=current_user).values_list('follower_id', flat=True))
-        
-        # Find mutual follows
-        mutual_follow_ids = following_ids.intersection(follower_ids)
+        # Mutual follows: users the current user follows who follow back
+        mutual_follow_ids = list(
+            User.objects.filter(
+                followers__follower=current_user,
+                following__following=current_user,
+            ).values_list('user_id', flat=True)
+        )
         
         if not mutual_follow_ids:
             return JsonResponse({
@@ -6523,27 +5364,22 @@ def online_users_view(request):
                 'count': 0
             })
         
-        # Get online status for mutual follows
+        # One cache round-trip for presence, one query for the online users
+        online_ids = connection_manager.get_online_user_ids(mutual_follow_ids)
         online_users = []
-        for user_id in mutual_follow_ids:
-            # Check if user is online (has active connections)
-            user_connections = connection_manager.get_user_connections(user_id)
-            if user_connections:
-                try:
-                    user = User.objects.get(user_id=user_id)
-                    online_users.append({
-                        'user_id': user.user_id,
-                        'ctu_id': user.acc_username,
-                        'name': ' '.join(filter(None, [user.f_name, user.m_name, user.l_name])),
-                        'f_name': user.f_name,
-                        'm_name': user.m_name,
-                        'l_name': user.l_name,
-                        'profile_pic': build_profile_pic_url(user),
-                        'is_online': True,
-                        'last_seen': timezone.now().isoformat()
-                    })
-                except User.DoesNotExist:
-                    continue
+        now = timezone.now().isoformat()
+        for user in User.objects.filter(user_id__in=online_ids).select_related('profile'):
+            online_users.append({
+                'user_id': user.user_id,
+                'ctu_id': user.acc_username,
+                'name': ' '.join(filter(None, [user.f_name, user.m_name, user.l_name])),
+                'f_name': user.f_name,
+                'm_name': user.m_name,
+                'l_name': user.l_name,
+                'profile_pic': build_profile_pic_url(user),
+                'is_online': True,
+                'last_seen': now
+            })
         
         return JsonResponse({
             'success': True,
@@ -6553,32 +5389,17 @@ def online_users_view(request):
         
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
+
+
 @api_view(["GET", "POST"])
 @permission_classes([IsAuthenticated])
 @parser_classes([MultiPartParser, JSONParser])
 def posts_view(request):
     """Used by Mobile – GET list posts, POST create post."""
+    from apps.shared.feed import visible_feed_posts
     try:
         user = request.user
-        from apps.shared.models import Follow, User as SharedUser
-        if user.account_type.admin or user.account_type.peso:
-            # Exclude forum posts from regular posts feed
-            posts = Post.objects.exclude(type='forum').select_related('user').order_by('-post_id')
-        elif user.account_type.user or user.account_type.ojt:
-            followed_users = Follow.objects.filter(follower=user).values_list('following', flat=True)
-            admin_users = SharedUser.objects.filter(account_type__admin=True).values_list('user_id', flat=True)
-            peso_users = SharedUser.objects.filter(account_type__peso=True).values_list('user_id', flat=True)
-            
-            # Exclude forum posts from regular posts feed
-            posts = Post.objects.filter(
-                Q(user__in=followed_users) |
-                Q(user__in=admin_users) |
-                Q(user__in=peso_users) |
-                Q(user=user)
-            ).exclude(type='forum').select_related('user').order_by('-post_id')
-        else:
-            # Exclude forum posts from regular posts feed
-            posts = Post.objects.exclude(type='forum').select_related('user').order_by('-post_id')
+        posts = visible_feed_posts(user)
         if request.method == "POST":
             # Handle both JSON and FormData requests using request.data
             data = request.data
@@ -6608,6 +5429,12 @@ def posts_view(request):
             )
             
             print(f"Post created successfully - ID: {new_post.post_id}, User: {new_post.user.user_id}")
+
+            try:
+                from apps.shared.timeline import fan_out_post
+                fan_out_post(new_post)
+            except Exception as e:
+                logger.error(f"Error fanning out post {new_post.post_id} to timelines: {e}")
             
             # Notify OJT and alumni users if post author is admin or PESO
             notify_users_of_admin_peso_post(request.user, "post", new_post.post_id)
@@ -6764,200 +5591,44 @@ def posts_view(request):
                 }
             }, status=201)
 
-        # Use the filtered posts from above (don't override with all posts)
-        # Build a combined feed with both posts and reposts as separate items
-        feed_items = []
-        
-        print(f"GET request - Found {posts.count()} posts for user {user.user_id}")
-
-        for post in posts:
-            try:
-                # Get likes count
-                likes_count = Like.objects.filter(post=post).count()
-                # Get comments count
-                comments_count = Comment.objects.filter(post=post).count()
-                # Get reposts count
-                reposts_count = Repost.objects.filter(post=post).count()
+        from apps.shared.feed import FeedAssembler, InvalidCursor, fetch_feed_page, DEFAULT_PAGE_SIZE
+        from apps.shared.timeline import fetch_timeline_page, timeline_entries, uses_timeline
 
-                # Check if current user liked this post
-                is_liked = Like.objects.filter(post=post, user=user).exists()
-
-                # Get likes data
-                likes = Like.objects.filter(post=post).select_related('user')
-                likes_data = []
-                for like in likes:
-                    pic = build_profile_pic_url(like.user)
-                    initials = None
-                    if not pic:
-                        try:
-                            f = (like.user.f_name or '').strip()[:1].upper()
-                            l = (like.user.l_name or '').strip()[:1].upper()
-                            initials = f + l if (f or l) else None
-                        except Exception:
-                            initials = None
-                    likes_data.append({
-                        'user_id': like.user.user_id,
-                        'f_name': like.user.f_name,
-                        'm_name': like.user.m_name,
-                        'l_name': like.user.l_name,
-                        'profile_pic': pic,
-                        'initials': initials,
-                    })
+        # Alumni/OJT feeds are read from the materialized FeedEntry timeline
+        # when FEED_TIMELINE_ENABLED is on; otherwise the live query is used.
+        use_timeline = uses_timeline(user)
 
-                # Get comments for the post
-                comments = Comment.objects.filter(post=post).select_related('user').order_by('-date_created')
-                comments_data = []
-                for comment in comments:
-                    comments_data.append({
-                        'comment_id': comment.comment_id,
-                        'comment_content': comment.comment_content,
-                        'date_created': comment.date_created.isoformat(),
-                        'user': {
-                            'user_id': comment.user.user_id,
-                            'f_name': comment.user.f_name,
-                            'm_name': comment.user.m_name,
-                            'l_name': comment.user.l_name,
-                            'profile_pic': build_profile_pic_url(comment.user),
-                        }
-                    })
+        # Keyset pagination: ?cursor=&limit= returns one page of the merged
+        # post/repost stream ordered by the database. Requests without either
+        # parameter keep the legacy full-feed response.
+        cursor = request.GET.get('cursor')
+        limit = request.GET.get('limit')
+        if cursor is not None or limit is not None:
+            try:
+                limit = int(limit) if limit else DEFAULT_PAGE_SIZE
+                if use_timeline:
+                    entries, next_cursor = fetch_timeline_page(user, cursor=cursor or None, limit=limit)
+                else:
+                    entries, next_cursor = fetch_feed_page(posts, cursor=cursor or None, limit=limit)
+            except (InvalidCursor, ValueError):
+                return JsonResponse({'posts': [], 'error': 'Invalid cursor or limit'}, status=400)
+            feed_items = FeedAssembler(user, request).assemble_entries(entries)
+            return JsonResponse({
+                'posts': feed_items,
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None,
+            })
 
-                # Get multiple images for the post
-                post_images = []
-                seen_urls = set()  # Track seen URLs to prevent duplicates
-                try:
-                    print(f'Processing images for post {post.post_id}')
-                    # Use direct ContentImage query to avoid duplicates
-                    content_images = ContentImage.objects.filter(content_type='post', content_id=post.post_id).order_by('order')
-                    print(f'Direct ContentImage query found {content_images.count()} images')
-                    for img in content_images:
-                        image_url = build_image_url(img.image, request)
-                        # Only add if not seen before
-                        if image_url and image_url not in seen_urls:
-                            seen_urls.add(image_url)
-                            print(f'Adding image: {image_url}')
-                            post_images.append({
-                                'image_id': img.image_id,
-                                'image_url': image_url,
-                                'order': img.order
-                            })
-                        else:
-                            print(f'Skipping duplicate image: {image_url}')
-                except Exception as img_error:
-                    print(f"Error processing images for post {post.post_id}: {img_error}")
-                    post_images = []  # Ensure post_images is always set
+        if use_timeline:
+            # Timeline entries are already ordered newest first
+            feed_items = FeedAssembler(user, request).assemble_entries(timeline_entries(user))
+            return JsonResponse({'posts': feed_items})
 
-                # Add the original post as a feed item
-                feed_items.append({
-                    'post_id': post.post_id,
-                    'post_content': post.post_content,
-                    'post_image': (post.post_image.url if getattr(post, 'post_image', None) else None),  # Backward compatibility
-                    'post_images': post_images,  # Multiple images
-                    'type': post.type,
-                    'created_at': post.created_at.isoformat() if hasattr(post, 'created_at') else None,
-                    'likes_count': likes_count,
-                    'comments_count': comments_count,
-                    'reposts_count': reposts_count,
-                    'is_liked': is_liked,
-                    'likes': likes_data,
-                    'comments': comments_data,
-                    'user': {
-                        'user_id': post.user.user_id,
-                        'f_name': post.user.f_name,
-                        'm_name': post.user.m_name,
-                        'l_name': post.user.l_name,
-                        'profile_pic': build_profile_pic_url(post.user),
-                    },
-                    'category': {
-                    },
-                    'item_type': 'post',  # Mark as original post
-                    'sort_date': post.created_at.isoformat() if hasattr(post, 'created_at') else None,
-                })
-                
-                # Add each repost as a separate feed item
-                reposts = Repost.objects.filter(post=post).select_related('user', 'post', 'post__user')
-                for repost in reposts:
-                    try:
-                        # Get repost likes count and data
-                        repost_likes = Like.objects.filter(repost=repost).select_related('user')
-                        repost_likes_count = repost_likes.count()
-                        
-                        # Check if current user liked this repost
-                        repost_is_liked = Like.objects.filter(repost=repost, user=user).exists()
-                        
-                        repost_likes_data = []
-                        for like in repost_likes:
-                            repost_likes_data.append({
-                                'like_id': like.like_id,
-                                'user_id': like.user.user_id,
-                                'user': {
-                                    'user_id': like.user.user_id,
-                                    'f_name': like.user.f_name,
-                                    'm_name': like.user.m_name,
-                                    'l_name': like.user.l_name,
-                                    'profile_pic': build_profile_pic_url(like.user),
-                                }
-                            })
-
-                        # Get repost comments count and data
-                        repost_comments = Comment.objects.filter(repost=repost).select_related('user')
-                        repost_comments_count = repost_comments.count()
-                        repost_comments_data = []
-                        for comment in repost_comments:
-                            # Get replies count for this comment
-                            replies_count = Reply.objects.filter(comment=comment).count()
-                            
-                            repost_comments_data.append({
-                                'comment_id': comment.comment_id,
-                                'comment_content': comment.comment_content,
-                                'date_created': comment.date_created.isoformat() if comment.date_created else None,
-                                'replies_count': replies_count,
-                                'user': {
-                                    'user_id': comment.user.user_id,
-                                    'f_name': comment.user.f_name,
-                                    'm_name': comment.user.m_name,
-                                    'l_name': comment.user.l_name,
-                                    'profile_pic': build_profile_pic_url(comment.user),
-                                }
-                            })
-
-                        feed_items.append({
-                            'repost_id': repost.repost_id,
-                            'repost_date': repost.repost_date.isoformat(),
-                            'repost_caption': repost.caption,
-                            'likes_count': repost_likes_count,
-                            'comments_count': repost_comments_count,
-                            'is_liked': repost_is_liked,
-                            'likes': repost_likes_data,
-                            'comments': repost_comments_data,
-                            'user': {
-                                'user_id': repost.user.user_id,
-                                'f_name': repost.user.f_name,
-                                'm_name': repost.user.m_name,
-                                'l_name': repost.user.l_name,
-                                'profile_pic': build_profile_pic_url(repost.user),
-                            },
-                            'original_post': {
-                                'post_id': post.post_id,
-                                'post_content': post.post_content,
-                                'post_image': (post.post_image.url if getattr(post, 'post_image', None) else None),  # Backward compatibility
-                                'post_images': post_images,  # Multiple images (already calculated above)
-                                'created_at': post.created_at.isoformat() if hasattr(post, 'created_at') else None,
-                                'user': {
-                                    'user_id': post.user.user_id,
-                                    'f_name': post.user.f_name,
-                                    'm_name': post.user.m_name,
-                                    'l_name': post.user.l_name,
-                                    'profile_pic': build_profile_pic_url(post.user),
-                                }
-                            },
-                            'item_type': 'repost',  # Mark as repost
-                            'sort_date': repost.repost_date.isoformat(),
-                        })
-                    except Exception:
-                        continue
-            except Exception as e:
-                print(f"Error processing post {post.post_id}: {e}")
-                continue
+        # Use the filtered posts from above (don't override with all posts)
+        # Build a combined feed with both posts and reposts as separate items.
+        # FeedAssembler loads likes/comments/images/reposts in bulk so the
+        # query count does not grow with the number of posts.
+        feed_items = FeedAssembler(user, request).assemble(posts)
 
         # Sort all feed items by date (most recent first)
         feed_items.sort(key=lambda x: x.get('sort_date') or '', reverse=True)
@@ -7817,25 +6488,46 @@ def delete_send_date_view(request):
 def engagement_leaderboard_view(request):
     """
     Get engagement points leaderboard for Alumni and OJT users.
-    Returns top users ranked by total points.
+    Returns top users ranked by total points (paged with ``offset``), or with
+    ``around_user=<user_id|me>`` the users ranked either side of that user.
     """
     try:
+        from apps.shared.leaderboard import get_leaderboard
+        
         limit = int(request.GET.get('limit', 50))  # Default to top 50
+        offset = max(0, int(request.GET.get('offset', 0)))
         user_type = request.GET.get('user_type', 'all')  # Keep for API compatibility
+        around_user = request.GET.get('around_user')
         
-        # Base query for users with points - ALUMNI and OJT users
-        points_query = UserPoints.objects.select_related('user', 'user__profile', 'user__academic_info', 'user__account_type')
-        
-        # Include both Alumni and OJT users
-        points_query = points_query.filter(
-            Q(user__account_type__user=True) | Q(user__account_type__ojt=True)
-        )
-        
-        # Order by total points descending and limit
-        top_users = points_query.order_by('-total_points')[:limit]
+        if around_user and around_user != 'me':
+            try:
+                around_user_id = int(around_user)
+            except ValueError:
+                return JsonResponse({'success': False, 'message': 'around_user must be a user id or "me"'}, status=400)
+        elif around_user:
+            around_user_id = request.user.user_id
+
+        # Ordered Alumni/OJT points board; pages are slices, not table sorts
+        board = get_leaderboard()
+        if around_user:
+            offset, entries = board.around(around_user_id, max(1, limit // 2))
+            offset = offset or 0
+        else:
+            entries = board.top(limit, offset)
+        
+        user_ids = [user_id for user_id, _ in entries]
+        points_by_user = {
+            user_points.user_id: user_points
+            for user_points in UserPoints.objects.select_related(
+                'user', 'user__profile', 'user__academic_info', 'user__account_type'
+            ).filter(user_id__in=user_ids)
+        }
         
         leaderboard_data = []
-        for rank, user_points in enumerate(top_users, start=1):
+        for rank, user_id in enumerate(user_ids, start=offset + 1):
+            user_points = points_by_user.get(user_id)
+            if user_points is None:
+                continue  # Deleted since the board was refreshed
             user = user_points.user
             profile = getattr(user, 'profile', None)
             academic_info = getattr(user, 'academic_info', None)
@@ -7863,9 +6555,13 @@ def engagement_leaderboard_view(request):
             'success': True,
             'leaderboard': leaderboard_data,
             'count': len(leaderboard_data),
+            'total': len(board),
+            'current_user_rank': board.rank(request.user.user_id),
             'filter': {
                 'user_type': user_type,
-                'limit': limit
+                'limit': limit,
+                'offset': offset,
+                'around_user': around_user
             }
         })
         
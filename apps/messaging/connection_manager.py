@@ -15,6 +15,8 @@ from django.utils import timezone
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 
+from .connection_store import ConnectionStore, get_connection_store
+
 logger = logging.getLogger(__name__)
 
 
@@ -26,7 +28,7 @@ class RedisConnectionManager:
     - Connection tracking per user and conversation
     - User presence indicators
     - Connection analytics and monitoring
-    - Automatic cleanup of stale connections
+    - Heartbeat-based cleanup of stale connections
     """
     
     # Redis key prefixes
@@ -34,15 +36,33 @@ class RedisConnectionManager:
     CONVERSATION_USERS_PREFIX = "ws:conversation_users:"
     USER_PRESENCE_PREFIX = "ws:user_presence:"
     CONNECTION_METADATA_PREFIX = "ws:connection_metadata:"
+    CONNECTION_HEARTBEATS_KEY = "ws:connection_heartbeats"
     ANALYTICS_PREFIX = "ws:analytics:"
     
     # TTL values (in seconds)
-    CONNECTION_TTL = 3600  # 1 hour
+    CONNECTION_TTL = 3600  # 1 hour without a heartbeat marks a connection stale
     PRESENCE_TTL = 300     # 5 minutes
     ANALYTICS_TTL = 86400  # 24 hours
     
-    def __init__(self):
+    # Seconds between opportunistic stale-connection sweeps per process
+    SWEEP_INTERVAL = 60
+    
+    def __init__(self, store: Optional[ConnectionStore] = None):
         self.channel_layer = get_channel_layer()
+        self._store = store
+        self._swept_at = time.monotonic()
+    
+    @property
+    def store(self) -> ConnectionStore:
+        """Membership store (native Redis sets, or in-memory without Redis)."""
+        if self._store is None:
+            self._store = get_connection_store(
+                self.USER_CONNECTIONS_PREFIX,
+                self.CONVERSATION_USERS_PREFIX,
+                self.CONNECTION_METADATA_PREFIX,
+                self.CONNECTION_HEARTBEATS_KEY,
+            )
+        return self._store
     
     def add_connection(self, user_id: int, conversation_id: int, channel_name: str, 
                       connection_metadata: Optional[Dict] = None) -> bool:
@@ -72,28 +92,8 @@ class RedisConnectionManager:
                 'user_agent': connection_metadata.get('user_agent') if connection_metadata else None,
             }
             
-            # Store connection metadata
-            cache.set(
-                f"{self.CONNECTION_METADATA_PREFIX}{channel_name}",
-                json.dumps(metadata),
-                timeout=self.CONNECTION_TTL
-            )
-            
-            # Add to user's connections set
-            user_connections_key = f"{self.USER_CONNECTIONS_PREFIX}{user_id}"
-            user_connections = cache.get(user_connections_key, set())
-            if not isinstance(user_connections, set):
-                user_connections = set()
-            user_connections.add(channel_name)
-            cache.set(user_connections_key, user_connections, timeout=self.CONNECTION_TTL)
-            
-            # Add to conversation's users set
-            conversation_users_key = f"{self.CONVERSATION_USERS_PREFIX}{conversation_id}"
-            conversation_users = cache.get(conversation_users_key, set())
-            if not isinstance(conversation_users, set):
-                conversation_users = set()
-            conversation_users.add(user_id)
-            cache.set(conversation_users_key, conversation_users, timeout=self.CONNECTION_TTL)
+            # Metadata, user/conversation memberships and the first heartbeat in one step
+            self.store.add(user_id, conversation_id, channel_name, metadata, time.time())
             
             # Update user presence
             self.update_user_presence(user_id, conversation_id, 'online')
@@ -101,6 +101,8 @@ class RedisConnectionManager:
             # Update analytics
             self._update_connection_analytics('connection_added', user_id, conversation_id)
             
+            self._maybe_sweep()
+            
             logger.info(f"Added WebSocket connection: user {user_id} to conversation {conversation_id}")
             return True
             
@@ -119,43 +121,21 @@ class RedisConnectionManager:
             bool: True if connection was removed successfully
         """
         try:
-            # Get connection metadata
-            metadata_key = f"{self.CONNECTION_METADATA_PREFIX}{channel_name}"
-            metadata_json = cache.get(metadata_key)
+            # Drops the metadata and every membership in one step; the user
+            # leaves the conversation once no connection to it remains
+            removed = self.store.remove(channel_name)
             
-            if not metadata_json:
+            if removed is None:
                 logger.warning(f"Connection metadata not found for channel: {channel_name}")
                 return False
             
-            metadata = json.loads(metadata_json)
+            metadata = removed['metadata']
             user_id = metadata['user_id']
             conversation_id = metadata['conversation_id']
             
-            # Remove from user's connections
-            user_connections_key = f"{self.USER_CONNECTIONS_PREFIX}{user_id}"
-            user_connections = cache.get(user_connections_key, set())
-            if isinstance(user_connections, set):
-                user_connections.discard(channel_name)
-                if user_connections:
-                    cache.set(user_connections_key, user_connections, timeout=self.CONNECTION_TTL)
-                else:
-                    cache.delete(user_connections_key)
-                    # Update user presence to offline if no more connections
-                    self.update_user_presence(user_id, conversation_id, 'offline')
-            
-            # Remove from conversation's users if user has no more connections to this conversation
-            if not self._user_has_connections_to_conversation(user_id, conversation_id):
-                conversation_users_key = f"{self.CONVERSATION_USERS_PREFIX}{conversation_id}"
-                conversation_users = cache.get(conversation_users_key, set())
-                if isinstance(conversation_users, set):
-                    conversation_users.discard(user_id)
-                    if conversation_users:
-                        cache.set(conversation_users_key, conversation_users, timeout=self.CONNECTION_TTL)
-                    else:
-                        cache.delete(conversation_users_key)
-            
-            # Remove connection metadata
-            cache.delete(metadata_key)
+            # Update user presence to offline if no more connections
+            if not removed['user_connections']:
+                self.update_user_presence(user_id, conversation_id, 'offline')
             
             # Update analytics
             self._update_connection_analytics('connection_removed', user_id, conversation_id)
@@ -167,6 +147,22 @@ class RedisConnectionManager:
             logger.error(f"Failed to remove WebSocket connection: {e}")
             return False
     
+    def heartbeat(self, channel_name: str) -> bool:
+        """
+        Mark a connection as alive (called on client pings).
+        
+        Args:
+            channel_name: WebSocket channel name
+            
+        Returns:
+            bool: True if the connection is tracked
+        """
+        try:
+            return self.store.heartbeat(channel_name, time.time())
+        except Exception as e:
+            logger.error(f"Failed to record heartbeat: {e}")
+            return False
+    
     def update_user_presence(self, user_id: int, conversation_id: int, status: str) -> bool:
         """
         Update user presence status.
@@ -210,20 +206,13 @@ class RedisConnectionManager:
             List of user presence data
         """
         try:
-            conversation_users_key = f"{self.CONVERSATION_USERS_PREFIX}{conversation_id}"
-            user_ids = cache.get(conversation_users_key, set())
-            
-            if not isinstance(user_ids, set):
+            user_ids = self.store.conversation_users(conversation_id)
+            if not user_ids:
                 return []
             
-            users = []
-            for user_id in user_ids:
-                presence_key = f"{self.USER_PRESENCE_PREFIX}{user_id}:{conversation_id}"
-                presence_json = cache.get(presence_key)
-                if presence_json:
-                    users.append(json.loads(presence_json))
-            
-            return users
+            presence_keys = [f"{self.USER_PRESENCE_PREFIX}{user_id}:{conversation_id}" for user_id in user_ids]
+            presences = cache.get_many(presence_keys)
+            return [json.loads(presences[key]) for key in presence_keys if presences.get(key)]
             
         except Exception as e:
             logger.error(f"Failed to get conversation users: {e}")
@@ -240,14 +229,31 @@ class RedisConnectionManager:
             List of channel names
         """
         try:
-            user_connections_key = f"{self.USER_CONNECTIONS_PREFIX}{user_id}"
-            connections = cache.get(user_connections_key, set())
-            return list(connections) if isinstance(connections, set) else []
+            return list(self.store.user_connections(user_id))
             
         except Exception as e:
             logger.error(f"Failed to get user connections: {e}")
             return []
     
+    def get_online_user_ids(self, user_ids) -> Set[int]:
+        """
+        Return which of ``user_ids`` have at least one open WebSocket connection.
+        
+        All users are checked in one round trip instead of one read per user.
+        
+        Args:
+            user_ids: Iterable of user IDs
+            
+        Returns:
+            Set of the user IDs that are online
+        """
+        try:
+            return self.store.online_user_ids(user_ids)
+            
+        except Exception as e:
+            logger.error(f"Failed to get online users: {e}")
+            return set()
+    
     def get_connection_analytics(self, conversation_id: Optional[int] = None) -> Dict:
         """
         Get connection analytics data.
@@ -273,39 +279,34 @@ class RedisConnectionManager:
     
     def cleanup_stale_connections(self) -> int:
         """
-        Clean up stale connections that have exceeded TTL.
+        Remove connections whose last heartbeat is older than CONNECTION_TTL.
+        
+        Only the expired range of the heartbeat index is read, so this is
+        cheap enough to run often.
         
         Returns:
             Number of connections cleaned up
         """
         try:
-            # This is a simplified cleanup - in production, you might want to use
-            # Redis SCAN to iterate through all connection keys
-            # For now, we rely on Redis TTL to handle cleanup automatically
+            self._swept_at = time.monotonic()
+            stale = self.store.stale_connections(time.time() - self.CONNECTION_TTL)
+            cleaned = sum(1 for channel_name in stale if self.remove_connection(channel_name))
             
             # Update analytics
             self._update_connection_analytics('cleanup_performed', None, None)
             
-            return 0  # Redis handles TTL cleanup automatically
+            if cleaned:
+                logger.info(f"Cleaned up {cleaned} stale WebSocket connections")
+            return cleaned
             
         except Exception as e:
             logger.error(f"Failed to cleanup stale connections: {e}")
             return 0
     
-    def _user_has_connections_to_conversation(self, user_id: int, conversation_id: int) -> bool:
-        """Check if user has any connections to a specific conversation."""
-        try:
-            user_connections = self.get_user_connections(user_id)
-            for channel_name in user_connections:
-                metadata_key = f"{self.CONNECTION_METADATA_PREFIX}{channel_name}"
-                metadata_json = cache.get(metadata_key)
-                if metadata_json:
-                    metadata = json.loads(metadata_json)
-                    if metadata.get('conversation_id') == conversation_id:
-                        return True
-            return False
-        except Exception:
-            return False
+    def _maybe_sweep(self) -> None:
+        """Run the stale-connection sweep at most every SWEEP_INTERVAL seconds."""
+        if time.monotonic() - self._swept_at >= self.SWEEP_INTERVAL:
+            self.cleanup_stale_connections()
     
     def _update_connection_analytics(self, event_type: str, user_id: Optional[int], 
                                    conversation_id: Optional[int]) -> None:
@@ -352,27 +353,22 @@ class RedisConnectionManager:
     def _broadcast_presence_update(self, user_id: int, conversation_id: int, status: str) -> None:
         """Broadcast presence update to conversation participants."""
         try:
-            if not self.channel_layer:
+            # Global (non-conversation) connections have no participants to notify
+            if not self.channel_layer or not conversation_id:
                 return
             
-            # Get all users in the conversation
-            users = self.get_conversation_users(conversation_id)
-            
-            # Send presence update to each user's connections
-            for user_data in users:
-                if user_data['user_id'] != user_id:  # Don't send to the user who changed status
-                    user_connections = self.get_user_connections(user_data['user_id'])
-                    for channel_name in user_connections:
-                        async_to_sync(self.channel_layer.send)(
-                            channel_name,
-                            {
-                                'type': 'presence_update',
-                                'user_id': user_id,
-                                'conversation_id': conversation_id,
-                                'status': status,
-                                'timestamp': timezone.now().isoformat(),
-                            }
-                        )
+            # Every chat socket of the conversation is in its group; sockets
+            # of the user who changed status skip the event themselves
+            async_to_sync(self.channel_layer.group_send)(
+                f"chat_{conversation_id}",
+                {
+                    'type': 'presence_update',
+                    'user_id': user_id,
+                    'conversation_id': conversation_id,
+                    'status': status,
+                    'timestamp': timezone.now().isoformat(),
+                }
+            )
                         
         except Exception as e:
             logger.error(f"Failed to broadcast presence update: {e}")
@@ -0,0 +1,283 @@
+"""
+Connection membership storage for the WebSocket connection manager.
+
+Connection tracking used to keep pickled Python sets in the Django cache:
+every connect/disconnect read a whole set, changed it locally and wrote it
+back, which grows with the set and drops updates when two workers race.
+A connection store keeps the same memberships with native set operations:
+
+- ``<user prefix><user_id>``                      channels of a user
+- ``<user prefix><user_id>:<conversation_id>``    channels of a user in one conversation
+- ``<conversation prefix><conversation_id>``       users connected to a conversation
+- ``<metadata prefix><channel_name>``              JSON connection metadata
+- ``<heartbeat key>``                              channel -> last heartbeat time
+
+Connections expire through heartbeats rather than key TTLs: each
+connection's last heartbeat is its score in the heartbeat sorted set, and
+the connection manager periodically removes connections whose heartbeat is
+too old, which also drops them from every membership set.
+
+RedisConnectionStore uses Redis sets and a sorted set, with one pipeline
+(or Lua script) per event. InMemoryConnectionStore implements the same
+operations on process-local dicts and is used when the cache is not Redis
+(development, tests).
+"""
+
+import json
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from apps.shared.redis_cache import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+def _member(value) -> str:
+    """Set members and key parts are strings, as Redis stores them."""
+    if isinstance(value, bytes):
+        return value.decode()
+    return str(value)
+
+
+def _user_id(member):
+    member = _member(member)
+    return int(member) if member.lstrip('-').isdigit() else member
+
+
+class ConnectionStore:
+    """
+    Interface shared by the Redis and in-memory stores.
+
+    Key prefixes come from the connection manager so existing key names
+    stay the same.
+    """
+
+    def __init__(self, user_prefix: str, conversation_prefix: str, metadata_prefix: str,
+                 heartbeat_key: str):
+        self.user_prefix = user_prefix
+        self.conversation_prefix = conversation_prefix
+        self.metadata_prefix = metadata_prefix
+        self.heartbeat_key = heartbeat_key
+
+    def add(self, user_id, conversation_id, channel_name: str, metadata: Dict, now: float) -> None:
+        raise NotImplementedError
+
+    def remove(self, channel_name: str) -> Optional[Dict]:
+        """
+        Drop a connection. Returns None when it is unknown, else
+        ``{'metadata', 'user_connections', 'conversation_connections'}`` with
+        the connections the user still has overall and in that conversation.
+        """
+        raise NotImplementedError
+
+    def heartbeat(self, channel_name: str, now: float) -> bool:
+        """Mark a connection alive; False when it is unknown."""
+        raise NotImplementedError
+
+    def user_connections(self, user_id) -> Set[str]:
+        raise NotImplementedError
+
+    def conversation_users(self, conversation_id) -> Set:
+        raise NotImplementedError
+
+    def online_user_ids(self, user_ids: Iterable) -> Set:
+        raise NotImplementedError
+
+    def stale_connections(self, before: float, limit: int = 1000) -> List[str]:
+        """Channels whose last heartbeat is older than ``before``."""
+        raise NotImplementedError
+
+
+# Remove one connection atomically. Key names are derived from the stored
+# metadata, so the whole disconnect is a single round trip.
+# KEYS: metadata key, heartbeat zset
+# ARGV: channel name, user prefix, conversation prefix
+# Returns {metadata, user connections left, conversation connections left}
+REMOVE_CONNECTION_SCRIPT = """
+redis.call('ZREM', KEYS[2], ARGV[1])
+local raw = redis.call('GET', KEYS[1])
+if not raw then
+    return false
+end
+redis.call('DEL', KEYS[1])
+local metadata = cjson.decode(raw)
+local function part(value)
+    if value == nil or value == cjson.null then
+        return 'None'
+    end
+    if type(value) == 'number' then
+        return string.format('%d', value)
+    end
+    return tostring(value)
+end
+local user_id = part(metadata.user_id)
+local conversation_id = part(metadata.conversation_id)
+local user_key = ARGV[2] .. user_id
+local user_conversation_key = user_key .. ':' .. conversation_id
+redis.call('SREM', user_key, ARGV[1])
+redis.call('SREM', user_conversation_key, ARGV[1])
+local user_left = redis.call('SCARD', user_key)
+local conversation_left = redis.call('SCARD', user_conversation_key)
+if conversation_left == 0 then
+    redis.call('SREM', ARGV[3] .. conversation_id, user_id)
+end
+return {raw, user_left, conversation_left}
+"""
+
+
+class RedisConnectionStore(ConnectionStore):
+    """Connection memberships in native Redis sets."""
+
+    def __init__(self, *args, client=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._client = client
+        self._remove_script = None
+
+    @property
+    def client(self):
+        return self._client or redis_client()
+
+    def add(self, user_id, conversation_id, channel_name, metadata, now):
+        user_key = f"{self.user_prefix}{user_id}"
+        user_conversation_key = f"{user_key}:{conversation_id}"
+        conversation_key = f"{self.conversation_prefix}{conversation_id}"
+
+        pipe = self.client.pipeline(transaction=True)
+        pipe.set(f"{self.metadata_prefix}{channel_name}", json.dumps(metadata))
+        pipe.sadd(user_key, channel_name)
+        pipe.sadd(user_conversation_key, channel_name)
+        pipe.sadd(conversation_key, _member(user_id))
+        pipe.zadd(self.heartbeat_key, {channel_name: now})
+        pipe.execute()
+
+    def remove(self, channel_name):
+        client = self.client
+        if self._remove_script is None:
+            self._remove_script = client.register_script(REMOVE_CONNECTION_SCRIPT)
+        result = self._remove_script(
+            keys=[f"{self.metadata_prefix}{channel_name}", self.heartbeat_key],
+            args=[channel_name, self.user_prefix, self.conversation_prefix],
+            client=client,
+        )
+        if not result:
+            return None
+        raw, user_left, conversation_left = result
+        return {
+            'metadata': json.loads(_member(raw)),
+            'user_connections': int(user_left),
+            'conversation_connections': int(conversation_left),
+        }
+
+    def heartbeat(self, channel_name, now):
+        # xx: only known connections; ch: report the updated score
+        return bool(self.client.zadd(self.heartbeat_key, {channel_name: now}, xx=True, ch=True))
+
+    def user_connections(self, user_id):
+        return {_member(channel) for channel in self.client.smembers(f"{self.user_prefix}{user_id}")}
+
+    def conversation_users(self, conversation_id):
+        members = self.client.smembers(f"{self.conversation_prefix}{conversation_id}")
+        return {_user_id(member) for member in members}
+
+    def online_user_ids(self, user_ids):
+        user_ids = list(user_ids)
+        if not user_ids:
+            return set()
+        pipe = self.client.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.scard(f"{self.user_prefix}{user_id}")
+        return {user_id for user_id, count in zip(user_ids, pipe.execute()) if count}
+
+    def stale_connections(self, before, limit=1000):
+        channels = self.client.zrangebyscore(self.heartbeat_key, '-inf', before, start=0, num=limit)
+        return [_member(channel) for channel in channels]
+
+
+class InMemoryConnectionStore(ConnectionStore):
+    """
+    Process-local store with the same behaviour as RedisConnectionStore.
+
+    Used when the default cache is not Redis, and as a fake in tests.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self._metadata: Dict[str, Dict] = {}
+        self._sets: Dict[str, Set[str]] = defaultdict(set)
+        self._heartbeats: Dict[str, float] = {}
+
+    def _discard(self, key, member):
+        members = self._sets.get(key)
+        if members is None:
+            return 0
+        members.discard(member)
+        if not members:
+            del self._sets[key]
+            return 0
+        return len(members)
+
+    def add(self, user_id, conversation_id, channel_name, metadata, now):
+        user_key = f"{self.user_prefix}{user_id}"
+        with self._lock:
+            self._metadata[channel_name] = json.loads(json.dumps(metadata))
+            self._sets[user_key].add(channel_name)
+            self._sets[f"{user_key}:{conversation_id}"].add(channel_name)
+            self._sets[f"{self.conversation_prefix}{conversation_id}"].add(_member(user_id))
+            self._heartbeats[channel_name] = now
+
+    def remove(self, channel_name):
+        with self._lock:
+            self._heartbeats.pop(channel_name, None)
+            metadata = self._metadata.pop(channel_name, None)
+            if metadata is None:
+                return None
+            user_id = _member(metadata.get('user_id'))
+            conversation_id = _member(metadata.get('conversation_id'))
+            user_key = f"{self.user_prefix}{user_id}"
+            user_left = self._discard(user_key, channel_name)
+            conversation_left = self._discard(f"{user_key}:{conversation_id}", channel_name)
+            if not conversation_left:
+                self._discard(f"{self.conversation_prefix}{conversation_id}", user_id)
+            return {
+                'metadata': metadata,
+                'user_connections': user_left,
+                'conversation_connections': conversation_left,
+            }
+
+    def heartbeat(self, channel_name, now):
+        with self._lock:
+            if channel_name not in self._heartbeats:
+                return False
+            self._heartbeats[channel_name] = now
+            return True
+
+    def user_connections(self, user_id):
+        with self._lock:
+            return set(self._sets.get(f"{self.user_prefix}{user_id}", ()))
+
+    def conversation_users(self, conversation_id):
+        with self._lock:
+            members = set(self._sets.get(f"{self.conversation_prefix}{conversation_id}", ()))
+        return {_user_id(member) for member in members}
+
+    def online_user_ids(self, user_ids):
+        with self._lock:
+            return {user_id for user_id in user_ids if self._sets.get(f"{self.user_prefix}{user_id}")}
+
+    def stale_connections(self, before, limit=1000):
+        with self._lock:
+            stale = sorted(
+                (seen, channel) for channel, seen in self._heartbeats.items() if seen <= before
+            )
+        return [channel for _, channel in stale[:limit]]
+
+
+def get_connection_store(*args, **kwargs) -> ConnectionStore:
+    """Redis store when the default cache is Redis, in-memory store otherwise."""
+    if redis_client() is not None:
+        return RedisConnectionStore(*args, **kwargs)
+    logger.info("Default cache is not Redis; tracking WebSocket connections in process memory")
+    return InMemoryConnectionStore(*args, **kwargs)
@@ -5,10 +5,12 @@ from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.utils import timezone
 from apps.shared.models import Message, Conversation, User, Notification
+from apps.shared.notification_fanout import AUDIENCE_GROUP
 from apps.shared.security import ContentSanitizer
 from .connection_manager import connection_manager
 from .message_ordering import message_sequencer
 from .rate_limiter import rate_limiter, connection_pool
+from .message_cache import message_cache
 from .monitoring import messaging_monitor, track_performance, PerformanceTracker
 from .performance_metrics import performance_metrics, PerformanceTracker as PerfTracker
 from .views import get_file_category
@@ -369,6 +371,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
 	async def handle_ping(self, data):
 		"""Handle ping/pong for connection health"""
+		await database_sync_to_async(connection_manager.heartbeat)(self.channel_name)
 		await self.send(text_data=json.dumps({
 			'type': 'pong',
 			'timestamp': timezone.now().isoformat()
@@ -385,6 +388,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
 	async def presence_update(self, event):
 		"""Handle presence update from group"""
+		# The user whose status changed does not need their own update
+		if event.get('user_id') == getattr(self.user, 'user_id', None):
+			return
 		await self.send(text_data=json.dumps({
 			'type': 'presence_update',
 			'user_id': event.get('user_id'),
@@ -436,6 +442,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
 				content=content,
 				message_type=message_type
 			)
+			# Invalidate the message windows and every participant's inbox
+			message_cache.invalidate_conversation(self.conversation_id)
 			
 			# Handle attachments
 			for attachment_data in attachments:
@@ -507,11 +515,16 @@ class NotificationConsumer(AsyncWebsocketConsumer):
 			self.channel_name
 		)
 		
+		# Alumni/OJT sockets also receive bulk fan-out notifications
+		self.in_audience = await database_sync_to_async(self._is_fanout_audience)()
+		if self.in_audience:
+			await self.channel_layer.group_add(AUDIENCE_GROUP, self.channel_name)
+		
 		# Register this connection for global presence/online detection
 		try:
 			from apps.messaging.connection_manager import connection_manager
 			# Use conversation_id = 0 to indicate a non-conversation global connection
-			connection_manager.add_connection(
+			await database_sync_to_async(connection_manager.add_connection)(
 				user_id=user_id,
 				conversation_id=0,
 				channel_name=self.channel_name,
@@ -541,11 +554,13 @@ class NotificationConsumer(AsyncWebsocketConsumer):
 			f"notifications_{user_id}",
 			self.channel_name
 		)
+		if getattr(self, 'in_audience', False):
+			await self.channel_layer.group_discard(AUDIENCE_GROUP, self.channel_name)
 
 		# Unregister from global presence
 		try:
 			from apps.messaging.connection_manager import connection_manager
-			connection_manager.remove_connection(self.channel_name)
+			await database_sync_to_async(connection_manager.remove_connection)(self.channel_name)
 		except Exception as e:
 			logger.warning(f"Failed to unregister notification WS: {e}")
 		
@@ -580,6 +595,8 @@ class NotificationConsumer(AsyncWebsocketConsumer):
 
 	async def handle_ping(self, data):
 		"""Handle ping/pong for connection health"""
+		from apps.messaging.connection_manager import connection_manager
+		await database_sync_to_async(connection_manager.heartbeat)(self.channel_name)
 		await self.send(text_data=json.dumps({
 			'type': 'pong',
 			'timestamp': timezone.now().isoformat()
@@ -594,6 +611,25 @@ class NotificationConsumer(AsyncWebsocketConsumer):
 		}))
 		logger.info(f"NotificationConsumer: Sent notification to WebSocket client")
 
+	async def notification_fanout(self, event):
+		"""Handle a bulk fan-out broadcast; forward it with this user's notification id"""
+		notification_id = await database_sync_to_async(self._fanout_notification_id)(event['payload_id'])
+		if notification_id is None:
+			return
+		await self.send(text_data=json.dumps({
+			'type': 'notification_update',
+			'notification': dict(event['notification'], id=notification_id)
+		}))
+
+	def _fanout_notification_id(self, payload_id):
+		return Notification.objects.filter(
+			user_id=getattr(self.user, 'user_id', None), payload_id=payload_id
+		).values_list('notification_id', flat=True).first()
+
+	def _is_fanout_audience(self):
+		account_type = getattr(self.user, 'account_type', None)
+		return bool(getattr(account_type, 'user', False) or getattr(account_type, 'ojt', False))
+
 	async def notification_count_update(self, event):
 		"""Handle notification count update from group"""
 		logger.info(f"NotificationConsumer: Received notification_count_update event: {event}")
@@ -0,0 +1,118 @@
+"""
+Conversation list (inbox) summaries.
+
+The inbox used to prefetch ``messages__sender`` and
+``messages__attachments`` for every conversation of the user, loading the
+whole message history into memory, and then ran ``get_last_message()``,
+``get_unread_count()`` and ``get_other_participant()`` per conversation.
+A page of summaries now costs a fixed number of queries:
+
+1. the conversations, annotated with the id of their last message and the
+   number of messages the user has not read (correlated subqueries)
+2. the participants of those conversations, with the one-to-one relations
+   ConversationSerializer nests (prefetch)
+3. the last messages with their senders, by primary key
+
+plus one cache ``get_many`` (and at most one profile query) for the
+avatars. Memory is bounded by the page, not by the history.
+
+Pages are ordered by ``(-updated_at, -conversation_id)`` and continue from
+an opaque keyset cursor, so paging stays stable while new conversations
+are created.
+"""
+
+import base64
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+# Reverse one-to-ones serialized for every participant by UserSerializer
+PARTICIPANT_RELATIONS = ('profile', 'academic_info', 'employment', 'tracker_data', 'ojt_info')
+
+
+def encode_cursor(conversation) -> str:
+    raw = f"{conversation.updated_at.isoformat()}|{conversation.conversation_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """``(updated_at, conversation_id)``; raises ValueError when malformed."""
+    try:
+        updated_at, conversation_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(updated_at), int(conversation_id)
+    except Exception as e:
+        raise ValueError(f"Invalid conversation cursor {cursor!r}") from e
+
+
+def summary_queryset(user):
+    """Conversations of ``user`` annotated with ``last_message_pk`` and ``unread_total``."""
+    from apps.shared.models import Conversation, Message, User
+
+    last_message = Message.objects.filter(
+        conversation=OuterRef('pk')
+    ).order_by('-created_at', '-message_id').values('message_id')[:1]
+
+    unread = Message.objects.filter(
+        conversation=OuterRef('pk'), is_read=False
+    ).exclude(sender=user).order_by().values('conversation').annotate(
+        total=Count('message_id')
+    ).values('total')
+
+    return Conversation.objects.filter(participants=user).annotate(
+        last_message_pk=Subquery(last_message, output_field=IntegerField()),
+        unread_total=Coalesce(Subquery(unread, output_field=IntegerField()), Value(0)),
+    ).prefetch_related(
+        Prefetch('participants', queryset=User.objects.select_related(*PARTICIPANT_RELATIONS))
+    ).order_by('-updated_at', '-conversation_id')
+
+
+def conversation_summaries(user, cursor: Optional[str] = None,
+                           limit: Optional[int] = None) -> Tuple[List, Optional[str]]:
+    """
+    One page of ``user``'s conversations, newest first, and the cursor of the
+    next page (None on the last page). Without ``limit`` every conversation
+    is returned.
+
+    Each conversation carries ``summary_last_message`` (the Message with its
+    sender loaded, or None), ``summary_unread_count`` and
+    ``summary_other_participant`` for ConversationSerializer.
+    """
+    from apps.shared.models import Message
+
+    queryset = summary_queryset(user)
+    if cursor:
+        updated_at, conversation_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(updated_at__lt=updated_at) |
+            Q(updated_at=updated_at, conversation_id__lt=conversation_id)
+        )
+
+    if limit is None:
+        conversations, next_cursor = list(queryset), None
+    else:
+        # One extra row tells whether another page exists
+        conversations = list(queryset[:limit + 1])
+        next_cursor = None
+        if len(conversations) > limit:
+            conversations = conversations[:limit]
+            next_cursor = encode_cursor(conversations[-1])
+
+    message_ids = [c.last_message_pk for c in conversations if c.last_message_pk]
+    messages = Message.objects.select_related('sender').in_bulk(message_ids) if message_ids else {}
+    for conversation in conversations:
+        conversation.summary_last_message = messages.get(conversation.last_message_pk)
+        conversation.summary_unread_count = conversation.unread_total
+        conversation.summary_other_participant = next(
+            (p for p in conversation.participants.all() if p.user_id != user.user_id), None
+        )
+
+    return conversations, next_cursor
+
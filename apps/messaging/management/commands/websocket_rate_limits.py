@@ -6,6 +6,7 @@ Usage:
     python manage.py websocket_rate_limits --user 123
     python manage.py websocket_rate_limits --pool-stats
     python manage.py websocket_rate_limits --cleanup
+    python manage.py websocket_rate_limits --benchmark 5000
 """
 
 from django.core.management.base import BaseCommand, CommandError
@@ -43,6 +44,13 @@ class Command(BaseCommand):
             type=int,
             help='Test rate limiting for a specific user ID',
         )
+        parser.add_argument(
+            '--benchmark',
+            type=int,
+            nargs='?',
+            const=5000,
+            help='Benchmark the rate limit backends with N checks (default 5000)',
+        )
 
     def handle(self, *args, **options):
         if options['status']:
@@ -55,9 +63,11 @@ class Command(BaseCommand):
             self.handle_cleanup()
         elif options['test_rate_limit']:
             self.handle_test_rate_limit(options['test_rate_limit'])
+        elif options['benchmark']:
+            self.handle_benchmark(options['benchmark'])
         else:
             self.stdout.write(
-                self.style.ERROR('Please specify an action: --status, --user, --pool-stats, --cleanup, or --test-rate-limit')
+                self.style.ERROR('Please specify an action: --status, --user, --pool-stats, --cleanup, --test-rate-limit, or --benchmark')
             )
 
     def handle_status(self):
@@ -238,45 +248,32 @@ class Command(BaseCommand):
         except Exception as e:
             raise CommandError(f'Failed to test rate limits: {e}')
 
+    def handle_benchmark(self, requests):
+        """Compare the rate limit backends on the configured cache."""
+        from apps.shared.rate_limit import benchmark
+        from apps.shared.redis_cache import redis_client
 
+        self.stdout.write(f'Rate Limit Backend Benchmark ({requests} checks, limit {rate_limiter.message_rate}/minute):')
+        self.stdout.write('=' * 50)
+        self.stdout.write(f'Active backend: {rate_limiter.backend.name}')
 
+        backends = ['list', 'counter']
+        if redis_client() is not None:
+            backends.append('sliding_log')
+        else:
+            self.stdout.write('Skipping sliding_log: the default cache is not Redis')
+        self.stdout.write('')
 
+        try:
+            results = benchmark(backends, limit=rate_limiter.message_rate, requests=requests)
+        except Exception as e:
+            raise CommandError(f'Failed to run benchmark: {e}')
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+        baseline = results['list']['seconds']
+        for name, result in results.items():
+            speedup = baseline / result['seconds'] if result['seconds'] else float('inf')
+            self.stdout.write(
+                f'  {name:<12} {result["seconds"]:.3f}s  '
+                f'{result["checks_per_second"]:>10.0f} checks/s  '
+                f'{speedup:>5.1f}x  allowed {result["allowed"]}'
+            )
@@ -3,14 +3,27 @@ Redis-based message caching for improved performance.
 
 This module provides caching for frequently accessed messages, conversation metadata,
 and user presence data to reduce database load and improve response times.
+
+Conversation message lists and user inboxes are invalidated through version
+keys rather than by deleting keys: every cached list is stored under the
+current version of its conversation (``conv_ver:<conversation_id>``) or user
+(``user_convs_ver:<user_id>``), and a write bumps the version once it
+commits. Entries stored under an old version are never read again and expire
+on their TTL, so one ``set_many`` invalidates every page and window of a
+conversation without knowing their keys.
 """
 
 import json
 import logging
-from typing import List, Dict, Optional, Any
+import time
+import uuid
+from typing import Callable, Iterable, List, Dict, Optional, Any
 from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
 from django.utils import timezone
 from datetime import timedelta
+from .performance_metrics import performance_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +46,8 @@ class MessageCache:
     USER_PRESENCE_PREFIX = "presence:"
     CONVERSATION_MESSAGES_PREFIX = "conv_msgs:"
     USER_CONVERSATIONS_PREFIX = "user_convs:"
+    CONVERSATION_VERSION_PREFIX = "conv_ver:"
+    USER_CONVERSATIONS_VERSION_PREFIX = "user_convs_ver:"
     
     # TTL values (in seconds)
     MESSAGE_TTL = 3600  # 1 hour
@@ -40,6 +55,158 @@ class MessageCache:
     PRESENCE_TTL = 300  # 5 minutes
     CONVERSATION_MESSAGES_TTL = 600  # 10 minutes
     USER_CONVERSATIONS_TTL = 900  # 15 minutes
+    # Outlives every versioned entry; a lost version only causes misses
+    VERSION_TTL = 86400  # 1 day
+    
+    # Newest messages kept per conversation for the first page of the message list
+    MESSAGE_WINDOW_SIZE = 50
+    
+    @classmethod
+    def _versions(cls, prefix: str, ids: Iterable[int]) -> Dict[int, str]:
+        """Current version per id, creating the missing ones."""
+        ids = list(ids)
+        keys = {f"{prefix}{id_}": id_ for id_ in ids}
+        found = cache.get_many(list(keys))
+        versions = {keys[key]: version for key, version in found.items()}
+        for key, id_ in keys.items():
+            if id_ not in versions:
+                version = uuid.uuid4().hex[:12]
+                # Another process may have created it first; use whichever won
+                if not cache.add(key, version, timeout=cls.VERSION_TTL):
+                    version = cache.get(key, version)
+                versions[id_] = version
+        return versions
+    
+    @classmethod
+    def _bump_versions(cls, prefix: str, ids: Iterable[int]) -> None:
+        cache.set_many(
+            {f"{prefix}{id_}": uuid.uuid4().hex[:12] for id_ in ids},
+            timeout=cls.VERSION_TTL,
+        )
+    
+    @classmethod
+    def conversation_version(cls, conversation_id: int) -> str:
+        return cls._versions(cls.CONVERSATION_VERSION_PREFIX, [conversation_id])[conversation_id]
+    
+    @classmethod
+    def user_conversations_version(cls, user_id: int) -> str:
+        return cls._versions(cls.USER_CONVERSATIONS_VERSION_PREFIX, [user_id])[user_id]
+    
+    @classmethod
+    def _conversation_messages_key(cls, conversation_id: int, suffix: Optional[str] = None) -> str:
+        cache_key = f"{cls.CONVERSATION_MESSAGES_PREFIX}{conversation_id}:{cls.conversation_version(conversation_id)}"
+        if suffix:
+            cache_key += f":{suffix}"
+        return cache_key
+    
+    @classmethod
+    def _user_conversations_key(cls, user_id: int, page_key: str = '') -> str:
+        cache_key = f"{cls.USER_CONVERSATIONS_PREFIX}{user_id}:{cls.user_conversations_version(user_id)}"
+        if page_key:
+            cache_key += f":{page_key}"
+        return cache_key
+    
+    @classmethod
+    def _read_through(cls, operation: str, cache_key: str, loader: Callable[[], Any], timeout: int) -> Any:
+        """
+        Return the JSON value cached under ``cache_key``, or call ``loader``
+        and cache its result. Hits and misses go to performance_metrics.
+        """
+        started = time.perf_counter()
+        try:
+            cached_data = cache.get(cache_key)
+        except Exception as e:
+            logger.error(f"Failed to read {cache_key}: {e}")
+            cached_data = None
+        
+        if cached_data is not None:
+            performance_metrics.track_cache_performance(
+                operation, cache_key, True, (time.perf_counter() - started) * 1000
+            )
+            return json.loads(cached_data)
+        
+        # Misses return the decoded JSON too, so both paths give the same data
+        cached_data = json.dumps(loader(), cls=DjangoJSONEncoder)
+        try:
+            cache.set(cache_key, cached_data, timeout=timeout)
+        except Exception as e:
+            logger.error(f"Failed to cache {cache_key}: {e}")
+        performance_metrics.track_cache_performance(
+            operation, cache_key, False, (time.perf_counter() - started) * 1000
+        )
+        return json.loads(cached_data)
+    
+    @classmethod
+    def get_or_set_message_window(cls, conversation_id: int, loader: Callable[[], Dict[str, Any]],
+                                  variant: str = '') -> Dict[str, Any]:
+        """
+        Read-through cache of a conversation's newest messages.
+        
+        Args:
+            conversation_id: Conversation ID
+            loader: Returns ``{'messages': [...newest first], 'has_more': bool}``
+                    with at most MESSAGE_WINDOW_SIZE messages
+            variant: Distinguishes renderings of the same window (e.g. the host
+                     absolute URLs were built for)
+            
+        Returns:
+            The cached or freshly loaded window
+        """
+        cache_key = cls._conversation_messages_key(conversation_id, f"window:{variant}")
+        return cls._read_through('message_window', cache_key, loader, cls.CONVERSATION_MESSAGES_TTL)
+    
+    @classmethod
+    def get_or_set_user_conversations(cls, user_id: int, loader: Callable[[], Any],
+                                      page_key: str = '') -> Any:
+        """
+        Read-through cache of one page of a user's inbox.
+        
+        Args:
+            user_id: User ID
+            loader: Returns the serialized page
+            page_key: Identifies the page (cursor, limit, host)
+            
+        Returns:
+            The cached or freshly loaded page
+        """
+        cache_key = cls._user_conversations_key(user_id, page_key)
+        return cls._read_through('user_conversations', cache_key, loader, cls.USER_CONVERSATIONS_TTL)
+    
+    @classmethod
+    def invalidate_conversation(cls, conversation_id: int,
+                                participant_ids: Optional[Iterable[int]] = None) -> bool:
+        """
+        Invalidate everything cached for a conversation once the current
+        transaction commits: its message windows and pages, its metadata and
+        the inbox of every participant.
+        
+        Args:
+            conversation_id: Conversation ID
+            participant_ids: Participant user IDs; looked up when omitted
+            
+        Returns:
+            bool: True if the invalidation was scheduled successfully
+        """
+        try:
+            if participant_ids is None:
+                from apps.shared.models import Conversation
+                participant_ids = Conversation.participants.through.objects.filter(
+                    conversation_id=conversation_id
+                ).values_list('user_id', flat=True)
+            participant_ids = list(participant_ids)
+            
+            def bump():
+                cls._bump_versions(cls.CONVERSATION_VERSION_PREFIX, [conversation_id])
+                cls._bump_versions(cls.USER_CONVERSATIONS_VERSION_PREFIX, participant_ids)
+                cache.delete(f"{cls.CONVERSATION_PREFIX}{conversation_id}")
+                logger.debug(f"Invalidated conversation {conversation_id} for users {participant_ids}")
+            
+            transaction.on_commit(bump)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to invalidate conversation {conversation_id}: {e}")
+            return False
     
     @classmethod
     def cache_message(cls, message_data: Dict[str, Any]) -> bool:
@@ -106,9 +273,7 @@ class MessageCache:
             bool: True if messages were cached successfully
         """
         try:
-            cache_key = f"{cls.CONVERSATION_MESSAGES_PREFIX}{conversation_id}"
-            if cursor:
-                cache_key += f":{cursor}"
+            cache_key = cls._conversation_messages_key(conversation_id, cursor)
             
             cache_data = {
                 'messages': messages,
@@ -139,9 +304,7 @@ class MessageCache:
             List of message data dictionaries or None if not found
         """
         try:
-            cache_key = f"{cls.CONVERSATION_MESSAGES_PREFIX}{conversation_id}"
-            if cursor:
-                cache_key += f":{cursor}"
+            cache_key = cls._conversation_messages_key(conversation_id, cursor)
             
             cached_data = cache.get(cache_key)
             if cached_data:
@@ -204,19 +367,21 @@ class MessageCache:
             return None
     
     @classmethod
-    def cache_user_conversations(cls, user_id: int, conversations: List[Dict[str, Any]]) -> bool:
+    def cache_user_conversations(cls, user_id: int, conversations: List[Dict[str, Any]],
+                                 page_key: str = '') -> bool:
         """
         Cache user's conversations list.
         
         Args:
             user_id: User ID
             conversations: List of conversation data dictionaries
+            page_key: Optional page identifier
             
         Returns:
             bool: True if conversations were cached successfully
         """
         try:
-            cache_key = f"{cls.USER_CONVERSATIONS_PREFIX}{user_id}"
+            cache_key = cls._user_conversations_key(user_id, page_key)
             cache_data = {
                 'conversations': conversations,
                 'cached_at': timezone.now().isoformat(),
@@ -233,18 +398,19 @@ class MessageCache:
             return False
     
     @classmethod
-    def get_user_conversations(cls, user_id: int) -> Optional[List[Dict[str, Any]]]:
+    def get_user_conversations(cls, user_id: int, page_key: str = '') -> Optional[List[Dict[str, Any]]]:
         """
         Get cached user conversations.
         
         Args:
             user_id: User ID
+            page_key: Optional page identifier
             
         Returns:
             List of conversation data dictionaries or None if not found
         """
         try:
-            cache_key = f"{cls.USER_CONVERSATIONS_PREFIX}{user_id}"
+            cache_key = cls._user_conversations_key(user_id, page_key)
             cached_data = cache.get(cache_key)
             
             if cached_data:
@@ -291,17 +457,8 @@ class MessageCache:
             bool: True if messages were invalidated successfully
         """
         try:
-            # In a production environment, you might want to use Redis SCAN
-            # to find all keys with the conversation prefix
-            # For now, we'll invalidate the most common patterns
-            
-            patterns = [
-                f"{cls.CONVERSATION_MESSAGES_PREFIX}{conversation_id}",
-                f"{cls.CONVERSATION_MESSAGES_PREFIX}{conversation_id}:*",
-            ]
-            
-            for pattern in patterns:
-                cache.delete(pattern)
+            # Every page and window is keyed by the conversation version
+            cls._bump_versions(cls.CONVERSATION_VERSION_PREFIX, [conversation_id])
             
             logger.debug(f"Invalidated cached messages for conversation {conversation_id}")
             return True
@@ -344,8 +501,7 @@ class MessageCache:
             bool: True if conversations were invalidated successfully
         """
         try:
-            cache_key = f"{cls.USER_CONVERSATIONS_PREFIX}{user_id}"
-            cache.delete(cache_key)
+            cls._bump_versions(cls.USER_CONVERSATIONS_VERSION_PREFIX, [user_id])
             
             logger.debug(f"Invalidated cached conversations for user {user_id}")
             return True
@@ -373,6 +529,7 @@ class MessageCache:
                 'presence_cache_ttl': cls.PRESENCE_TTL,
                 'conversation_messages_ttl': cls.CONVERSATION_MESSAGES_TTL,
                 'user_conversations_ttl': cls.USER_CONVERSATIONS_TTL,
+                'message_window_size': cls.MESSAGE_WINDOW_SIZE,
             }
             
             return stats
@@ -7,11 +7,12 @@ are displayed in the correct chronological order.
 """
 
 import logging
+import threading
 import time
 from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime, timezone as dt_timezone
 from django.utils import timezone
-from django.core.cache import cache
+from django.core.cache import cache, caches
 
 logger = logging.getLogger(__name__)
 
@@ -38,38 +39,72 @@ class MessageSequencer:
     PENDING_TTL = 300    # 5 minutes
     GAP_TTL = 1800       # 30 minutes
     
+    # Cache backends whose incr() is a single atomic server-side operation;
+    # any other backend is serialized with a process lock instead
+    ATOMIC_INCR_BACKENDS = ('RedisCache', 'PyMemcacheCache', 'PyLibMCCache')
+    
+    _incr_lock = threading.Lock()
+    
     @classmethod
-    def generate_sequence_number(cls, conversation_id: int, user_id: int) -> int:
+    def _incr_sequence(cls, sequence_key: str, count: int) -> int:
+        """Atomically add ``count`` to the counter at ``sequence_key`` and return the new value."""
+        for _ in range(3):
+            try:
+                value = cache.incr(sequence_key, count)
+            except ValueError:
+                # Counter missing (new conversation or expired); add() only
+                # succeeds for one concurrent caller, the rest just retry incr
+                cache.add(sequence_key, 0, timeout=cls.SEQUENCE_TTL)
+                continue
+            # incr() keeps the original expiry; keep active conversations alive
+            cache.touch(sequence_key, cls.SEQUENCE_TTL)
+            return value
+        raise RuntimeError(f"Could not increment {sequence_key}")
+    
+    @classmethod
+    def reserve_sequence_numbers(cls, conversation_id: int, count: int) -> range:
         """
-        Generate a unique sequence number for a message.
+        Reserve ``count`` consecutive sequence numbers for a conversation.
         
         Args:
             conversation_id: Conversation ID
-            user_id: User ID sending the message
+            count: Number of sequence numbers to reserve
             
         Returns:
-            int: Unique sequence number
+            range: The reserved sequence numbers, in order
         """
+        if count < 1:
+            return range(0)
         try:
-            # Use Redis INCR for atomic sequence generation
             sequence_key = f"{cls.SEQUENCE_PREFIX}{conversation_id}"
+            if type(caches["default"]).__name__ in cls.ATOMIC_INCR_BACKENDS:
+                last = cls._incr_sequence(sequence_key, count)
+            else:
+                with cls._incr_lock:
+                    last = cls._incr_sequence(sequence_key, count)
             
-            # Get current sequence number
-            current_seq = cache.get(sequence_key, 0)
-            if not isinstance(current_seq, int):
-                current_seq = 0
-            
-            # Increment sequence number
-            new_seq = current_seq + 1
-            cache.set(sequence_key, new_seq, timeout=cls.SEQUENCE_TTL)
-            
-            logger.debug(f"Generated sequence number {new_seq} for conversation {conversation_id}")
-            return new_seq
+            logger.debug(f"Reserved sequence numbers {last - count + 1}..{last} for conversation {conversation_id}")
+            return range(last - count + 1, last + 1)
             
         except Exception as e:
-            logger.error(f"Failed to generate sequence number: {e}")
+            logger.error(f"Failed to reserve sequence numbers: {e}")
             # Fallback to timestamp-based sequence
-            return int(time.time() * 1000000)  # Microsecond precision
+            base = int(time.time() * 1000000)  # Microsecond precision
+            return range(base, base + count)
+    
+    @classmethod
+    def generate_sequence_number(cls, conversation_id: int, user_id: int) -> int:
+        """
+        Generate a unique sequence number for a message.
+        
+        Args:
+            conversation_id: Conversation ID
+            user_id: User ID sending the message
+            
+        Returns:
+            int: Unique sequence number
+        """
+        return cls.reserve_sequence_numbers(conversation_id, 1)[0]
     
     @classmethod
     def create_message_metadata(cls, message_id: int, conversation_id: int, 
@@ -37,8 +37,8 @@ class NotificationBroadcaster:
             notification_data = {
                 'id': notification.notification_id,
                 'type': notification.notif_type,
-                'subject': notification.subject or 'Notification',
-                'content': notification.notifi_content,
+                'subject': notification.get_subject() or 'Notification',
+                'content': notification.get_content(),
                 'date': notification.notif_date.strftime('%Y-%m-%d %H:%M:%S'),
                 'is_read': notification.is_read,
                 'timestamp': timezone.now().isoformat()
@@ -11,6 +11,7 @@ from typing import Dict, List, Optional, Tuple
 from django.core.cache import cache
 from django.utils import timezone
 from collections import defaultdict, deque
+from apps.shared.rate_limit import get_backend
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +24,7 @@ class WebSocketRateLimiter:
     - Per-user rate limiting
     - Per-conversation rate limiting
     - Connection rate limiting
-    - Sliding window algorithm
+    - Sliding window algorithm (pluggable backend)
     - Burst protection
     """
     
@@ -42,10 +43,15 @@ class WebSocketRateLimiter:
     RATE_LIMIT_TTL = 3600  # 1 hour
     CONNECTION_TTL = 300   # 5 minutes
     
-    def __init__(self):
+    # Sliding window length (in seconds)
+    WINDOW = 60
+    
+    def __init__(self, backend=None):
         self.message_rate = self.DEFAULT_MESSAGE_RATE
         self.connection_rate = self.DEFAULT_CONNECTION_RATE
         self.typing_rate = self.DEFAULT_TYPING_RATE
+        # Counting is delegated to a pluggable backend (see apps.shared.rate_limit)
+        self.backend = backend or get_backend()
     
     def check_message_rate_limit(self, user_id: int, conversation_id: int) -> Tuple[bool, Dict[str, any]]:
         """
@@ -59,45 +65,38 @@ class WebSocketRateLimiter:
             Tuple of (allowed, rate_limit_info)
         """
         try:
-            now = time.time()
-            window_start = now - 60  # 1 minute window
-            
-            # Per-user rate limiting
             user_key = f"{self.MESSAGE_RATE_PREFIX}user:{user_id}"
-            user_requests = self._get_request_times(user_key, window_start)
+            conv_key = f"{self.MESSAGE_RATE_PREFIX}conv:{conversation_id}"
+            conv_limit = self.message_rate * 2  # Allow more messages per conversation
             
-            if len(user_requests) >= self.message_rate:
+            # Per-user rate limiting, then per-conversation (more lenient)
+            denied, hits = self.backend.hit_all(
+                [(user_key, self.message_rate), (conv_key, conv_limit)], self.WINDOW, time.time()
+            )
+            
+            if denied == 0:
                 return False, {
                     'allowed': False,
                     'reason': 'user_rate_limit_exceeded',
                     'limit': self.message_rate,
-                    'window': 60,
-                    'retry_after': int(user_requests[0] + 60 - now) if user_requests else 60
+                    'window': self.WINDOW,
+                    'retry_after': hits[0].retry_after
                 }
             
-            # Per-conversation rate limiting (more lenient)
-            conv_key = f"{self.MESSAGE_RATE_PREFIX}conv:{conversation_id}"
-            conv_requests = self._get_request_times(conv_key, window_start)
-            conv_limit = self.message_rate * 2  # Allow more messages per conversation
-            
-            if len(conv_requests) >= conv_limit:
+            if denied == 1:
                 return False, {
                     'allowed': False,
                     'reason': 'conversation_rate_limit_exceeded',
                     'limit': conv_limit,
-                    'window': 60,
-                    'retry_after': int(conv_requests[0] + 60 - now) if conv_requests else 60
+                    'window': self.WINDOW,
+                    'retry_after': hits[1].retry_after
                 }
             
-            # Record the request
-            self._record_request(user_key, now)
-            self._record_request(conv_key, now)
-            
             return True, {
                 'allowed': True,
-                'user_requests': len(user_requests) + 1,
+                'user_requests': hits[0].count,
                 'user_limit': self.message_rate,
-                'conv_requests': len(conv_requests) + 1,
+                'conv_requests': hits[1].count,
                 'conv_limit': conv_limit
             }
             
@@ -118,45 +117,37 @@ class WebSocketRateLimiter:
             Tuple of (allowed, rate_limit_info)
         """
         try:
-            now = time.time()
-            window_start = now - 60  # 1 minute window
-            
             # Per-user connection rate limiting
-            user_key = f"{self.CONNECTION_RATE_PREFIX}user:{user_id}"
-            user_connections = self._get_request_times(user_key, window_start)
+            checks = [(f"{self.CONNECTION_RATE_PREFIX}user:{user_id}", self.connection_rate)]
+            
+            # Per-IP connection rate limiting (if IP provided)
+            ip_limit = self.connection_rate * 3  # More lenient for IP
+            if ip_address:
+                checks.append((f"{self.CONNECTION_RATE_PREFIX}ip:{ip_address}", ip_limit))
+            
+            denied, hits = self.backend.hit_all(checks, self.WINDOW, time.time())
             
-            if len(user_connections) >= self.connection_rate:
+            if denied == 0:
                 return False, {
                     'allowed': False,
                     'reason': 'connection_rate_limit_exceeded',
                     'limit': self.connection_rate,
-                    'window': 60,
-                    'retry_after': int(user_connections[0] + 60 - now) if user_connections else 60
+                    'window': self.WINDOW,
+                    'retry_after': hits[0].retry_after
                 }
             
-            # Per-IP connection rate limiting (if IP provided)
-            if ip_address:
-                ip_key = f"{self.CONNECTION_RATE_PREFIX}ip:{ip_address}"
-                ip_connections = self._get_request_times(ip_key, window_start)
-                ip_limit = self.connection_rate * 3  # More lenient for IP
-                
-                if len(ip_connections) >= ip_limit:
-                    return False, {
-                        'allowed': False,
-                        'reason': 'ip_connection_rate_limit_exceeded',
-                        'limit': ip_limit,
-                        'window': 60,
-                        'retry_after': int(ip_connections[0] + 60 - now) if ip_connections else 60
-                    }
-                
-                self._record_request(ip_key, now)
-            
-            # Record the connection
-            self._record_request(user_key, now)
+            if denied == 1:
+                return False, {
+                    'allowed': False,
+                    'reason': 'ip_connection_rate_limit_exceeded',
+                    'limit': ip_limit,
+                    'window': self.WINDOW,
+                    'retry_after': hits[1].retry_after
+                }
             
             return True, {
                 'allowed': True,
-                'user_connections': len(user_connections) + 1,
+                'user_connections': hits[0].count,
                 'user_limit': self.connection_rate
             }
             
@@ -176,28 +167,22 @@ class WebSocketRateLimiter:
             Tuple of (allowed, rate_limit_info)
         """
         try:
-            now = time.time()
-            window_start = now - 60  # 1 minute window
-            
             # Per-user typing rate limiting
             user_key = f"{self.TYPING_RATE_PREFIX}user:{user_id}"
-            user_typing = self._get_request_times(user_key, window_start)
+            hit = self.backend.hit(user_key, self.typing_rate, self.WINDOW, time.time())
             
-            if len(user_typing) >= self.typing_rate:
+            if not hit.allowed:
                 return False, {
                     'allowed': False,
                     'reason': 'typing_rate_limit_exceeded',
                     'limit': self.typing_rate,
-                    'window': 60,
-                    'retry_after': int(user_typing[0] + 60 - now) if user_typing else 60
+                    'window': self.WINDOW,
+                    'retry_after': hit.retry_after
                 }
             
-            # Record the typing event
-            self._record_request(user_key, now)
-            
             return True, {
                 'allowed': True,
-                'typing_events': len(user_typing) + 1,
+                'typing_events': hit.count,
                 'limit': self.typing_rate
             }
             
@@ -217,80 +202,27 @@ class WebSocketRateLimiter:
         """
         try:
             now = time.time()
-            window_start = now - 60
-            
-            # Get message rate status
-            msg_key = f"{self.MESSAGE_RATE_PREFIX}user:{user_id}"
-            msg_requests = self._get_request_times(msg_key, window_start)
-            
-            # Get connection rate status
-            conn_key = f"{self.CONNECTION_RATE_PREFIX}user:{user_id}"
-            conn_requests = self._get_request_times(conn_key, window_start)
-            
-            # Get typing rate status
-            typing_key = f"{self.TYPING_RATE_PREFIX}user:{user_id}"
-            typing_requests = self._get_request_times(typing_key, window_start)
-            
-            return {
-                'user_id': user_id,
-                'timestamp': now,
-                'message_rate': {
-                    'current': len(msg_requests),
-                    'limit': self.message_rate,
-                    'remaining': max(0, self.message_rate - len(msg_requests)),
-                    'reset_in': int(msg_requests[0] + 60 - now) if msg_requests else 0
-                },
-                'connection_rate': {
-                    'current': len(conn_requests),
-                    'limit': self.connection_rate,
-                    'remaining': max(0, self.connection_rate - len(conn_requests)),
-                    'reset_in': int(conn_requests[0] + 60 - now) if conn_requests else 0
-                },
-                'typing_rate': {
-                    'current': len(typing_requests),
-                    'limit': self.typing_rate,
-                    'remaining': max(0, self.typing_rate - len(typing_requests)),
-                    'reset_in': int(typing_requests[0] + 60 - now) if typing_requests else 0
+            status = {'user_id': user_id, 'timestamp': now}
+            
+            for name, prefix, limit in (
+                ('message_rate', self.MESSAGE_RATE_PREFIX, self.message_rate),
+                ('connection_rate', self.CONNECTION_RATE_PREFIX, self.connection_rate),
+                ('typing_rate', self.TYPING_RATE_PREFIX, self.typing_rate),
+            ):
+                current, reset_in = self.backend.peek(f"{prefix}user:{user_id}", self.WINDOW, now)
+                status[name] = {
+                    'current': current,
+                    'limit': limit,
+                    'remaining': max(0, limit - current),
+                    'reset_in': reset_in
                 }
-            }
+            
+            return status
             
         except Exception as e:
             logger.error(f"Failed to get user rate limit status: {e}")
             return {'error': str(e)}
     
-    def _get_request_times(self, key: str, window_start: float) -> List[float]:
-        """Get request times within the sliding window."""
-        try:
-            cached_data = cache.get(key, [])
-            if not isinstance(cached_data, list):
-                return []
-            
-            # Filter out old requests
-            recent_requests = [t for t in cached_data if t >= window_start]
-            
-            # Update cache with filtered data
-            if len(recent_requests) != len(cached_data):
-                cache.set(key, recent_requests, timeout=self.RATE_LIMIT_TTL)
-            
-            return recent_requests
-            
-        except Exception as e:
-            logger.error(f"Failed to get request times for {key}: {e}")
-            return []
-    
-    def _record_request(self, key: str, timestamp: float) -> None:
-        """Record a request timestamp."""
-        try:
-            cached_data = cache.get(key, [])
-            if not isinstance(cached_data, list):
-                cached_data = []
-            
-            cached_data.append(timestamp)
-            cache.set(key, cached_data, timeout=self.RATE_LIMIT_TTL)
-            
-        except Exception as e:
-            logger.error(f"Failed to record request for {key}: {e}")
-    
     def cleanup_old_requests(self) -> int:
         """
         Clean up old rate limit data.
@@ -299,9 +231,8 @@ class WebSocketRateLimiter:
             Number of keys cleaned up
         """
         try:
-            # This is a simplified cleanup - in production you might want to use
-            # Redis SCAN to iterate through all rate limit keys
-            # For now, we rely on TTL to handle cleanup automatically
+            # Every backend stores its counters with a TTL, so expired
+            # windows disappear on their own
             
             logger.debug("Rate limit cleanup completed")
             return 0  # Redis handles TTL cleanup automatically
@@ -5,6 +5,7 @@ This module tests connection tracking, user presence, and analytics.
 """
 
 import json
+import time
 from unittest.mock import patch, MagicMock
 from django.test import TestCase
 from django.core.cache import cache
@@ -148,6 +149,24 @@ class ConnectionManagerTestCase(TestCase):
         self.assertEqual(len(user_connections), 1)
         self.assertIn('test_channel_2', user_connections)
     
+    def test_get_online_user_ids(self):
+        """Test batched online lookup for several users."""
+        self.connection_manager.add_connection(
+            self.user1.user_id,
+            self.conversation.conversation_id,
+            'test_channel_1'
+        )
+        
+        online = self.connection_manager.get_online_user_ids(
+            [self.user1.user_id, self.user2.user_id, 999]
+        )
+        self.assertEqual(online, {self.user1.user_id})
+        
+        # Users go offline once their last connection is removed
+        self.connection_manager.remove_connection('test_channel_1')
+        self.assertEqual(self.connection_manager.get_online_user_ids([self.user1.user_id]), set())
+        self.assertEqual(self.connection_manager.get_online_user_ids([]), set())
+    
     def test_conversation_users_tracking(self):
         """Test conversation users tracking."""
         # Add connections for both users
@@ -314,6 +333,38 @@ class ConnectionManagerTestCase(TestCase):
         user_connections = self.connection_manager.get_user_connections(self.user1.user_id)
         self.assertEqual(len(user_connections), 5)
 
+    def test_heartbeat_and_stale_connection_sweep(self):
+        """Test connections without recent heartbeats are swept."""
+        from apps.messaging.connection_store import InMemoryConnectionStore
+        
+        manager = RedisConnectionManager(store=InMemoryConnectionStore(
+            RedisConnectionManager.USER_CONNECTIONS_PREFIX,
+            RedisConnectionManager.CONVERSATION_USERS_PREFIX,
+            RedisConnectionManager.CONNECTION_METADATA_PREFIX,
+            RedisConnectionManager.CONNECTION_HEARTBEATS_KEY,
+        ))
+        conversation_id = self.conversation.conversation_id
+        manager.add_connection(self.user1.user_id, conversation_id, 'test_channel_1')
+        manager.add_connection(self.user2.user_id, conversation_id, 'test_channel_2')
+        
+        # Only known connections accept heartbeats
+        self.assertTrue(manager.heartbeat('test_channel_1'))
+        self.assertFalse(manager.heartbeat('unknown_channel'))
+        
+        # user2's connection last checked in more than CONNECTION_TTL ago
+        with patch('apps.messaging.connection_manager.time.time',
+                   return_value=time.time() + manager.CONNECTION_TTL + 1):
+            manager.heartbeat('test_channel_1')
+            cleaned_count = manager.cleanup_stale_connections()
+        
+        self.assertEqual(cleaned_count, 1)
+        self.assertEqual(manager.get_online_user_ids(
+            [self.user1.user_id, self.user2.user_id]
+        ), {self.user1.user_id})
+        user_ids = [user['user_id'] for user in manager.get_conversation_users(conversation_id)]
+        self.assertNotIn(self.user2.user_id, user_ids)
+
+
 
 
 
@@ -0,0 +1,114 @@
+"""
+Tests for conversation list summaries.
+
+This module tests the inbox summary query, its cursor paging and its
+query count.
+"""
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from apps.messaging.conversation_summary import (
+    conversation_summaries,
+    decode_cursor,
+    encode_cursor,
+)
+from apps.shared.models import Conversation, Message, User
+
+
+class ConversationSummaryTestCase(TestCase):
+    """Test case for conversation summaries."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.User = get_user_model()
+
+        # Create test users
+        self.user1 = self.User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpass123',
+            user_id=1,
+            name='Test User 1',
+            full_name='Test User 1'
+        )
+
+        self.user2 = self.User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='testpass123',
+            user_id=2,
+            name='Test User 2',
+            full_name='Test User 2'
+        )
+
+        # Create test conversations, each with a few messages
+        self.conversations = []
+        for i in range(3):
+            conversation = Conversation.objects.create()
+            conversation.participants.add(self.user1, self.user2)
+            for j in range(4):
+                Message.objects.create(
+                    conversation=conversation,
+                    sender=self.user2 if j % 2 else self.user1,
+                    content=f'Message {i}.{j}',
+                    created_at=timezone.now(),
+                )
+            self.conversations.append(conversation)
+
+    def test_last_message_and_unread_count(self):
+        """Test that summaries carry the last message and unread count."""
+        conversations, next_cursor = conversation_summaries(self.user1)
+
+        self.assertEqual(len(conversations), 3)
+        self.assertIsNone(next_cursor)
+        for conversation in conversations:
+            last = Message.objects.filter(conversation=conversation).order_by('-created_at', '-message_id').first()
+            self.assertEqual(conversation.summary_last_message, last)
+            # Messages 1 and 3 were sent by user2 and are unread
+            self.assertEqual(conversation.summary_unread_count, 2)
+            self.assertEqual(conversation.summary_other_participant, self.user2)
+
+    def test_cursor_pages_cover_every_conversation_once(self):
+        """Test that paging with the cursor returns each conversation once."""
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = conversation_summaries(self.user1, cursor=cursor, limit=2)
+            seen.extend(c.conversation_id for c in page)
+            if cursor is None:
+                break
+
+        self.assertEqual(sorted(seen), sorted(c.conversation_id for c in self.conversations))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_query_count_does_not_grow_with_history(self):
+        """Test that the number of queries is fixed."""
+        with CaptureQueriesContext(connection) as before:
+            conversation_summaries(self.user1, limit=10)
+
+        for conversation in self.conversations:
+            for j in range(20):
+                Message.objects.create(
+                    conversation=conversation,
+                    sender=self.user2,
+                    content=f'More {j}',
+                    created_at=timezone.now(),
+                )
+
+        with CaptureQueriesContext(connection) as after:
+            conversation_summaries(self.user1, limit=10)
+
+        self.assertEqual(len(before), len(after))
+
+    def test_cursor_round_trip(self):
+        """Test cursor encoding and rejection of malformed cursors."""
+        conversation = self.conversations[0]
+        updated_at, conversation_id = decode_cursor(encode_cursor(conversation))
+
+        self.assertEqual(updated_at, conversation.updated_at)
+        self.assertEqual(conversation_id, conversation.conversation_id)
+        with self.assertRaises(ValueError):
+            decode_cursor('not-a-cursor')
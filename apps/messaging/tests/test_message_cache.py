@@ -0,0 +1,79 @@
+"""
+Tests for the read-through message cache.
+
+This module tests message windows, inbox pages and their version-key
+invalidation.
+"""
+
+from unittest.mock import patch
+from django.test import TestCase
+from django.core.cache import cache
+from apps.messaging.message_cache import message_cache
+
+
+class MessageCacheTestCase(TestCase):
+    """Test case for the read-through message cache."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.loads = 0
+        cache.clear()
+
+    def tearDown(self):
+        """Clean up test data."""
+        cache.clear()
+
+    def _load_window(self):
+        self.loads += 1
+        return {'messages': [{'message_id': self.loads}], 'has_more': False}
+
+    def test_window_is_read_through(self):
+        """Test that a window is loaded once and then served from cache."""
+        first = message_cache.get_or_set_message_window(1, self._load_window)
+        second = message_cache.get_or_set_message_window(1, self._load_window)
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.loads, 1)
+
+    def test_invalidation_is_scoped_to_the_conversation(self):
+        """Test that invalidating one conversation keeps the others cached."""
+        message_cache.get_or_set_message_window(1, self._load_window)
+        message_cache.get_or_set_message_window(2, self._load_window)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            message_cache.invalidate_conversation(1, participant_ids=[10, 11])
+
+        window = message_cache.get_or_set_message_window(1, self._load_window)
+        message_cache.get_or_set_message_window(2, self._load_window)
+
+        self.assertEqual(window['messages'][0]['message_id'], 3)
+        self.assertEqual(self.loads, 3)
+
+    def test_invalidation_reaches_participant_inboxes(self):
+        """Test that participants' inbox pages are reloaded after a write."""
+        pages = {'count': 0}
+
+        def load_page():
+            pages['count'] += 1
+            return {'results': [], 'next_cursor': None}
+
+        for user_id in (10, 11, 12):
+            message_cache.get_or_set_user_conversations(user_id, load_page, page_key='all')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            message_cache.invalidate_conversation(1, participant_ids=[10, 11])
+
+        for user_id in (10, 11, 12):
+            message_cache.get_or_set_user_conversations(user_id, load_page, page_key='all')
+
+        # Users 10 and 11 reload; user 12 is not a participant
+        self.assertEqual(pages['count'], 5)
+
+    def test_hits_and_misses_are_tracked(self):
+        """Test that hits and misses are reported to performance metrics."""
+        with patch('apps.messaging.message_cache.performance_metrics') as metrics:
+            message_cache.get_or_set_message_window(1, self._load_window)
+            message_cache.get_or_set_message_window(1, self._load_window)
+
+        hits = [call.args[2] for call in metrics.track_cache_performance.call_args_list]
+        self.assertEqual(hits, [False, True])
@@ -416,7 +416,55 @@ class MessageOrderingTestCase(TestCase):
         self.assertEqual(seq1, 1)
         self.assertEqual(seq2, 2)
         self.assertEqual(seq3, 3)
-    
+
+    def test_reserve_sequence_numbers(self):
+        """Test reserving a batch of sequence numbers."""
+        first = self.message_sequencer.generate_sequence_number(
+            self.conversation.conversation_id,
+            self.user1.user_id
+        )
+        reserved = self.message_sequencer.reserve_sequence_numbers(
+            self.conversation.conversation_id,
+            5
+        )
+        following = self.message_sequencer.generate_sequence_number(
+            self.conversation.conversation_id,
+            self.user1.user_id
+        )
+
+        # Reserved numbers are consecutive and skipped by later messages
+        self.assertEqual(first, 1)
+        self.assertEqual(list(reserved), [2, 3, 4, 5, 6])
+        self.assertEqual(following, 7)
+
+        # Reserving nothing does not advance the sequence
+        self.assertEqual(len(self.message_sequencer.reserve_sequence_numbers(
+            self.conversation.conversation_id, 0
+        )), 0)
+
+    def test_concurrent_batch_reservation(self):
+        """Test concurrent batch reservations never overlap."""
+        import threading
+
+        reserved = []
+        lock = threading.Lock()
+
+        def reserve_batch():
+            numbers = self.message_sequencer.reserve_sequence_numbers(
+                self.conversation.conversation_id,
+                3
+            )
+            with lock:
+                reserved.extend(numbers)
+
+        threads = [threading.Thread(target=reserve_batch) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(reserved), list(range(1, 61)))
+
     def test_message_metadata_validation(self):
         """Test message metadata validation."""
         # Test with invalid message type
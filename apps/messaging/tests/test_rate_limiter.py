@@ -359,6 +359,41 @@ class RateLimiterTestCase(TestCase):
         self.assertGreater(allowed_count, 0)
         self.assertLessEqual(allowed_count, self.rate_limiter.message_rate)
 
+    def test_backends_enforce_same_limit(self):
+        """Test every cache-based backend allows exactly the configured rate."""
+        from apps.shared.rate_limit import get_backend
+
+        for name in ('list', 'counter'):
+            cache.clear()
+            limiter = WebSocketRateLimiter(backend=get_backend(name))
+            results = [
+                limiter.check_message_rate_limit(self.user1.user_id, self.conversation.conversation_id)[0]
+                for _ in range(limiter.message_rate + 5)
+            ]
+            self.assertEqual(results.count(True), limiter.message_rate, name)
+            status = limiter.get_user_rate_limit_status(self.user1.user_id)
+            self.assertEqual(status['message_rate']['current'], limiter.message_rate, name)
+
+    def test_denied_request_is_not_counted(self):
+        """Test a request rejected by the conversation limit does not use up the user limit."""
+        conv_limit = self.rate_limiter.message_rate * 2
+
+        # Fill the conversation limit from other users
+        for user_id in range(100, 100 + conv_limit):
+            self.rate_limiter.check_message_rate_limit(user_id, self.conversation.conversation_id)
+
+        for i in range(3):
+            can_send, rate_info = self.rate_limiter.check_message_rate_limit(
+                self.user1.user_id,
+                self.conversation.conversation_id
+            )
+            self.assertFalse(can_send)
+            self.assertEqual(rate_info['reason'], 'conversation_rate_limit_exceeded')
+
+        status = self.rate_limiter.get_user_rate_limit_status(self.user1.user_id)
+        self.assertEqual(status['message_rate']['current'], 0)
+
+
 
 
 
@@ -25,6 +25,14 @@ from apps.shared.serializers import (
 from .permissions import IsAlumniOrOJT
 from apps.shared.security import ContentSanitizer, SecurityValidator
 from .message_cache import message_cache
+from .conversation_summary import (
+	DEFAULT_PAGE_SIZE,
+	MAX_PAGE_SIZE,
+	conversation_summaries,
+	decode_cursor,
+	summary_queryset,
+)
+from apps.shared.avatars import avatar_urls
 from .cloud_storage import cloud_storage
 from .monitoring import messaging_monitor, track_performance, PerformanceTracker
 from .performance_metrics import performance_metrics, PerformanceTracker as PerfTracker
@@ -66,46 +74,54 @@ class ConversationListView(generics.ListCreateAPIView):
     serializer_class = ConversationSerializer
     permission_classes = [IsAuthenticated, IsAlumniOrOJT]
 
-    @track_performance('conversation_list')
     def get_queryset(self):
-        user = self.request.user
-        
+        return summary_queryset(self.request.user)
+
+    @track_performance('conversation_list')
+    def list(self, request, *args, **kwargs):
+        user = request.user
+        cursor = request.query_params.get('cursor')
+        limit = request.query_params.get('limit')
+        # Clients that page get {'results', 'next_cursor'}; others the whole list
+        paged = cursor is not None or limit is not None
+        if paged:
+            try:
+                limit = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+            except (TypeError, ValueError):
+                logger.warning("Invalid limit parameter: %s, using default %s", limit, DEFAULT_PAGE_SIZE)
+                limit = DEFAULT_PAGE_SIZE
+        if cursor:
+            try:
+                decode_cursor(cursor)
+            except ValueError as e:
+                logger.warning("Invalid cursor parameter: %s, error: %s", cursor, e)
+                return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+
+        def load_page():
+            conversations, next_cursor = conversation_summaries(user, cursor=cursor or None, limit=limit)
+            others = [c.summary_other_participant for c in conversations if c.summary_other_participant]
+            serializer = ConversationSerializer(conversations, many=True, context={
+                'request': request,
+                'avatar_urls': avatar_urls(others, request),
+            })
+            return {'results': serializer.data, 'next_cursor': next_cursor}
+
         with PerformanceTracker('conversation_list_query', {'user_id': user.user_id}):
-            # Try to get from cache first
-            cached_conversations = message_cache.get_user_conversations(user.user_id)
-            if cached_conversations:
-                logger.debug(f"Retrieved {len(cached_conversations)} conversations from cache for user {user.user_id}")
-            
-            # Optimize queryset with select_related and prefetch_related
-            queryset = Conversation.objects.filter(
-                participants=user
-            ).select_related().prefetch_related(
-                'participants',
-                'messages__sender',
-                'messages__attachments'
-            ).order_by('-updated_at')
-            
-            # Cache the results for next time
-            conversations_data = []
-            for conv in queryset:
-                conv_data = {
-                    'conversation_id': conv.conversation_id,
-                    'created_at': conv.created_at.isoformat(),
-                    'updated_at': conv.updated_at.isoformat(),
-                    'participants': [p.user_id for p in conv.participants.all()],
-                }
-                conversations_data.append(conv_data)
-            
-            message_cache.cache_user_conversations(user.user_id, conversations_data)
-            
+            # Invalidated by message_cache.invalidate_conversation on every write
+            page = message_cache.get_or_set_user_conversations(
+                user.user_id, load_page, page_key=f"{cursor or ''}:{limit or 'all'}:{request.get_host()}"
+            )
+
             # Track business metric
             messaging_monitor.track_business_metric(
                 'conversations_accessed',
                 1,
                 {'user_id': str(user.user_id)}
             )
-            
-            return queryset
+
+        if paged:
+            return Response(page)
+        return Response(page['results'])
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -116,6 +132,7 @@ class ConversationListView(generics.ListCreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         conversation = serializer.save()
+        message_cache.invalidate_conversation(conversation.conversation_id)
         response_serializer = ConversationSerializer(conversation, context={'request': request})
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
 
@@ -147,14 +164,15 @@ class MessageListView(generics.ListCreateAPIView):
             except Exception as e:
                 logger.warning("Invalid cursor parameter: %s, error: %s", cursor, e)
 
+        return qs[:self._page_limit()]
+
+    def _page_limit(self):
         limit = self.request.query_params.get('limit')
         try:
-            limit_val = max(1, min(int(limit or 50), 100))
+            return max(1, min(int(limit or 50), 100))
         except Exception as e:
             logger.warning("Invalid limit parameter: %s, using default 50, error: %s", limit, e)
-            limit_val = 50
-
-        return qs[:limit_val]
+            return 50
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -293,10 +311,6 @@ class MessageListView(generics.ListCreateAPIView):
         except Exception as e:
             logger.error("Failed to broadcast message %s to WebSocket: %s", message.message_id, e)
         
-        # Invalidate cache for this conversation
-        message_cache.invalidate_conversation_messages(conversation_id)
-        message_cache.invalidate_conversation_metadata(conversation_id)
-        
         # Cache the new message
         message_data = {
             'message_id': message.message_id,
@@ -332,10 +346,33 @@ class MessageListView(generics.ListCreateAPIView):
         )
         
         conversation.save()
+        # Invalidate the message windows and every participant's inbox
+        message_cache.invalidate_conversation(conversation.conversation_id)
         response_serializer = MessageSerializer(message, context={'request': request})
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
 
     def list(self, request, *args, **kwargs):
+        # The newest page is served from the cached message window
+        limit = self._page_limit()
+        if not request.query_params.get('cursor') and limit <= message_cache.MESSAGE_WINDOW_SIZE:
+            conversation = get_object_or_404(Conversation, conversation_id=self.kwargs['conversation_id'])
+            if not conversation.participants.filter(user_id=request.user.user_id).exists():
+                return Response({'results': [], 'next_cursor': None})
+
+            window = message_cache.get_or_set_message_window(
+                conversation.conversation_id,
+                lambda: self._load_window(conversation),
+                variant=request.get_host(),
+            )
+            messages = window['messages'][:limit]
+            next_cursor = None
+            if messages and (len(window['messages']) > limit or window['has_more']):
+                next_cursor = messages[-1]['message_id']
+            return Response({
+                'results': messages[::-1],  # return ascending for UI
+                'next_cursor': next_cursor,
+            })
+
         queryset = self.get_queryset()
         serializer = MessageSerializer(queryset, many=True, context={'request': request})
 
@@ -363,6 +400,17 @@ class MessageListView(generics.ListCreateAPIView):
             'next_cursor': next_cursor,
         })
 
+    def _load_window(self, conversation):
+        """The newest MESSAGE_WINDOW_SIZE messages, newest first, for the message cache."""
+        size = message_cache.MESSAGE_WINDOW_SIZE
+        messages = list(Message.objects.filter(conversation=conversation).select_related(
+            'sender'
+        ).prefetch_related(
+            'attachments'
+        ).order_by('-created_at', '-message_id')[:size + 1])
+        serializer = MessageSerializer(messages[:size], many=True, context={'request': self.request})
+        return {'messages': serializer.data, 'has_more': len(messages) > size}
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, IsAlumniOrOJT])
@@ -371,6 +419,8 @@ def mark_conversation_as_read(request, conversation_id):
     if not conversation.participants.filter(user_id=request.user.user_id).exists():
         return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
     updated_count = Message.objects.filter(conversation=conversation, is_read=False).exclude(sender=request.user).update(is_read=True)
+    if updated_count:
+        message_cache.invalidate_conversation(conversation.conversation_id)
     return Response({'status': 'success', 'messages_marked_read': updated_count, 'timestamp': timezone.now().isoformat()})
 
 
@@ -426,6 +476,7 @@ def update_message(request, conversation_id, message_id):
     
     message.content = content.strip()
     message.save()
+    message_cache.invalidate_conversation(conversation.conversation_id)
     
     # Return updated message
     from apps.shared.serializers import MessageSerializer
@@ -443,6 +494,7 @@ def delete_message(request, conversation_id, message_id):
     if message.sender.user_id != request.user.user_id:
         return Response({'error': 'You can only delete your own messages'}, status=status.HTTP_403_FORBIDDEN)
     message.delete()
+    message_cache.invalidate_conversation(conversation.conversation_id)
     return Response({'status': 'success', 'message': 'Message deleted successfully'})
 
 
@@ -461,12 +513,13 @@ def messaging_stats(request):
 		is_read=False
 	).exclude(sender=user).count()
 	
-	# Optimize recent conversations query with select_related
-	recent_conversations = Conversation.objects.filter(
-		participants=user
-	).select_related().prefetch_related('messages').order_by('-updated_at')[:5]
-	
-	recent_serializer = ConversationSerializer(recent_conversations, many=True, context={'request': request})
+	# Summaries carry their last message and unread count; no message history is loaded
+	recent_conversations, _ = conversation_summaries(user, limit=5)
+	others = [c.summary_other_participant for c in recent_conversations if c.summary_other_participant]
+	recent_serializer = ConversationSerializer(recent_conversations, many=True, context={
+		'request': request,
+		'avatar_urls': avatar_urls(others, request),
+	})
 	return Response({
 		'total_conversations': total_conversations,
 		'total_messages_sent': total_messages_sent,
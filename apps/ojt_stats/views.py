@@ -16,6 +16,7 @@ from statistics import mean
 from django.utils import timezone
 from datetime import datetime, timedelta
 import json
+from apps.shared.stats_rollup import dimension_counts, year_counts
 from apps.shared.utils.stats import safe_mode_related, safe_mean_related
 
 logger = logging.getLogger(__name__)
@@ -64,15 +65,9 @@ def ojt_statistics_view(request):
 	try:
 		year = request.GET.get('year')
 		course = request.GET.get('course')
-		ojt_qs = User.objects.filter(account_type__ojt=True)
-		if year and year != 'ALL':
-			ojt_qs = ojt_qs.filter(academic_info__year_graduated=year)
-		if course and course != 'ALL':
-			ojt_qs = ojt_qs.filter(academic_info__program=course)
-		status_counts = Counter(ojt_qs.values_list('ojtstatus', flat=True))
-		year_counts = Counter(User.objects.filter(account_type__ojt=True).values_list('academic_info__year_graduated', flat=True))
-		filtered_year_counts = {y: c for y, c in year_counts.items() if y is not None}
-		total_ojt = ojt_qs.count()
+		# Counts come from the StatsRollup table (see apps.shared.stats_rollup)
+		status_counts = dimension_counts('ojt_status', year, course)
+		total_ojt = sum(status_counts.values())
 		completed_count = status_counts.get('Completed', 0)
 		ongoing_count = status_counts.get('Ongoing', 0)
 		incomplete_count = status_counts.get('Incomplete', 0)
@@ -82,13 +77,13 @@ def ojt_statistics_view(request):
 		return JsonResponse({
 			'success': True,
 			'total_ojt': total_ojt,
-			'status_counts': dict(status_counts),
+			'status_counts': status_counts,
 			'completion_rate': completion_rate,
 			'ongoing_rate': ongoing_rate,
 			'incomplete_rate': incomplete_rate,
 			'years': [
 				{'year': year, 'count': count}
-				for year, count in sorted(filtered_year_counts.items(), reverse=True)
+				for year, count in sorted(year_counts('ojt').items(), reverse=True)
 			]
 		})
 	except Exception as e:
@@ -114,9 +109,9 @@ def generate_ojt_statistics_view(request):
 			ojt_qs = ojt_qs.filter(academic_info__year_graduated=year)
 		if course and course != 'ALL':
 			ojt_qs = ojt_qs.filter(academic_info__program=course)
-		total_ojt = ojt_qs.count()
+		status_counts = dimension_counts('ojt_status', year, course)
+		total_ojt = sum(status_counts.values())
 		if stats_type == 'ALL':
-			status_counts = Counter(ojt_qs.values_list('ojtstatus', flat=True))
 			completed_rate = round((status_counts.get('Completed', 0) / total_ojt * 100), 2) if total_ojt > 0 else 0
 			ongoing_rate = round((status_counts.get('Ongoing', 0) / total_ojt * 100), 2) if total_ojt > 0 else 0
 			incomplete_rate = round((status_counts.get('Incomplete', 0) / total_ojt * 100), 2) if total_ojt > 0 else 0
@@ -124,7 +119,7 @@ def generate_ojt_statistics_view(request):
 				'success': True,
 				'type': 'ALL',
 				'total_ojt': total_ojt,
-				'status_counts': dict(status_counts),
+				'status_counts': status_counts,
 				'completion_rate': completed_rate,
 				'ongoing_rate': ongoing_rate,
 				'incomplete_rate': incomplete_rate,
@@ -137,46 +132,45 @@ def generate_ojt_statistics_view(request):
 				'course': course
 			})
 		elif stats_type == 'status_tracking':
-			status_counts = Counter(ojt_qs.values_list('ojtstatus', flat=True))
-			completed_students = ojt_qs.filter(ojtstatus='Completed')
-			ongoing_students = ojt_qs.filter(ojtstatus='Ongoing')
-			incomplete_students = ojt_qs.filter(ojtstatus='Incomplete')
+			completed_count = status_counts.get('Completed', 0)
+			ongoing_count = status_counts.get('Ongoing', 0)
+			incomplete_count = status_counts.get('Incomplete', 0)
 			return JsonResponse({
 				'success': True,
 				'type': 'status_tracking',
 				'total_ojt': total_ojt,
-				'status_counts': dict(status_counts),
-				'completed_students_count': completed_students.count(),
-				'ongoing_students_count': ongoing_students.count(),
-				'incomplete_students_count': incomplete_students.count(),
-				'completion_rate': round((completed_students.count() / total_ojt * 100), 2) if total_ojt > 0 else 0,
-				'ongoing_rate': round((ongoing_students.count() / total_ojt * 100), 2) if total_ojt > 0 else 0,
-				'incomplete_rate': round((incomplete_students.count() / total_ojt * 100), 2) if total_ojt > 0 else 0,
+				'status_counts': status_counts,
+				'completed_students_count': completed_count,
+				'ongoing_students_count': ongoing_count,
+				'incomplete_students_count': incomplete_count,
+				'completion_rate': round((completed_count / total_ojt * 100), 2) if total_ojt > 0 else 0,
+				'ongoing_rate': round((ongoing_count / total_ojt * 100), 2) if total_ojt > 0 else 0,
+				'incomplete_rate': round((incomplete_count / total_ojt * 100), 2) if total_ojt > 0 else 0,
 				'year': year,
 				'course': course
 			})
 		elif stats_type == 'academic_progress':
-			completed_students = ojt_qs.filter(ojtstatus='Completed')
-			ongoing_students = ojt_qs.filter(ojtstatus='Ongoing')
-			incomplete_students = ojt_qs.filter(ojtstatus='Incomplete')
+			completed_students = ojt_qs.filter(ojt_info__ojtstatus='Completed')
+			ongoing_students = ojt_qs.filter(ojt_info__ojtstatus='Ongoing')
+			incomplete_students = ojt_qs.filter(ojt_info__ojtstatus='Incomplete')
 			return JsonResponse({
 				'success': True,
 				'type': 'academic_progress',
 				'total_ojt': total_ojt,
 				'completed': {
-					'count': completed_students.count(),
+					'count': status_counts.get('Completed', 0),
 					'most_common_course': safe_mode_related(completed_students, 'academic_info__program'),
 					'most_common_section': safe_mode_related(completed_students, 'academic_info__section'),
 					'most_common_school': safe_mode_related(completed_students, 'academic_info__school_name'),
 				},
 				'ongoing': {
-					'count': ongoing_students.count(),
+					'count': status_counts.get('Ongoing', 0),
 					'most_common_course': safe_mode_related(ongoing_students, 'academic_info__program'),
 					'most_common_section': safe_mode_related(ongoing_students, 'academic_info__section'),
 					'most_common_school': safe_mode_related(ongoing_students, 'academic_info__school_name'),
 				},
 				'incomplete': {
-					'count': incomplete_students.count(),
+					'count': status_counts.get('Incomplete', 0),
 					'most_common_course': safe_mode_related(incomplete_students, 'academic_info__program'),
 					'most_common_section': safe_mode_related(incomplete_students, 'academic_info__section'),
 					'most_common_school': safe_mode_related(incomplete_students, 'academic_info__school_name'),
@@ -185,7 +179,6 @@ def generate_ojt_statistics_view(request):
 				'course': course
 			})
 		elif stats_type == 'coordinator_summary':
-			status_counts = Counter(ojt_qs.values_list('ojtstatus', flat=True))
 			total_completed = status_counts.get('Completed', 0)
 			total_ongoing = status_counts.get('Ongoing', 0)
 			total_incomplete = status_counts.get('Incomplete', 0)
@@ -0,0 +1,158 @@
+"""
+Streaming alumni export.
+
+Alumni are read in keyset-ordered chunks and each chunk's latest
+TrackerResponse is fetched with one ``DISTINCT ON (user_id)`` query, so an
+export costs a couple of queries per chunk instead of several per alumnus.
+Rows are written either as CSV through a StreamingHttpResponse or into an
+openpyxl write-only workbook spooled to a temporary file; neither keeps the
+whole export in memory.
+"""
+import csv
+import tempfile
+
+from django.http import FileResponse, StreamingHttpResponse
+
+from apps.shared.models import Question, TrackerResponse
+
+EXPORT_CHUNK_SIZE = 2000
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def latest_tracker_responses(users):
+    """Each user's most recent TrackerResponse (PostgreSQL ``DISTINCT ON``)."""
+    return (
+        TrackerResponse.objects.filter(user__in=users)
+        .order_by('user_id', '-submitted_at')
+        .distinct('user_id')
+    )
+
+
+def _format_answer(answer):
+    if isinstance(answer, list):
+        return ', '.join(str(a) for a in answer)
+    return answer if answer is not None else ''
+
+
+def _cell(value):
+    """Spreadsheet-safe value: keep scalars and dates, stringify anything else."""
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list, tuple, set)):
+        return str(value)
+    return value
+
+
+class AlumniExport:
+    """
+    Column layout plus a row generator for an alumni queryset.
+
+    ``fields`` is a list of ``(header, attribute)`` pairs read from each User.
+    Every tracker question answered in the users' latest responses is added
+    as an extra column after them; a tracker answer only fills a field
+    column of the same name when the User value is empty.
+    """
+
+    def __init__(self, users, fields):
+        self.users = users
+        self.fields = fields
+        self._questions = None
+
+    @property
+    def questions(self):
+        """``[(question_id, text)]`` for every answered question, by id."""
+        if self._questions is None:
+            qids = set()
+            answers = latest_tracker_responses(self.users).values_list('answers', flat=True)
+            for answer_map in answers.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+                if answer_map:
+                    qids.update(int(qid) for qid in answer_map.keys() if str(qid).isdigit())
+            texts = dict(Question.objects.filter(id__in=qids).values_list('id', 'text'))
+            self._questions = sorted(texts.items())
+        return self._questions
+
+    @property
+    def headers(self):
+        headers = []
+        for header in [header for header, _ in self.fields] + [text for _, text in self.questions]:
+            if header not in headers:
+                headers.append(header)
+        return headers
+
+    def _chunks(self):
+        last_id = 0
+        while True:
+            chunk = list(self.users.filter(user_id__gt=last_id).order_by('user_id')[:EXPORT_CHUNK_SIZE])
+            if not chunk:
+                return
+            answers = dict(
+                latest_tracker_responses([user.user_id for user in chunk]).values_list('user_id', 'answers')
+            )
+            yield chunk, answers
+            last_id = chunk[-1].user_id
+
+    def dicts(self):
+        """Yield one ``{header: value}`` dict per alumnus."""
+        questions = self.questions
+        for chunk, answers in self._chunks():
+            for user in chunk:
+                row = {}
+                for header, attribute in self.fields:
+                    value = getattr(user, attribute, '')
+                    row[header] = value if value is not None else ''
+                tracker_answers = answers.get(user.user_id) or {}
+                for qid, text in questions:
+                    if text in row and row[text]:
+                        continue  # Already filled by the user model
+                    answer = tracker_answers.get(str(qid)) or tracker_answers.get(qid)
+                    row[text] = _format_answer(answer)
+                yield row
+
+    def rows(self):
+        """Yield one list of cell values per alumnus, in ``headers`` order."""
+        headers = self.headers
+        for row in self.dicts():
+            yield [_cell(row.get(header)) for header in headers]
+
+
+class _Echo:
+    """File-like object whose write() hands the CSV line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def csv_response(export, filename):
+    writer = csv.writer(_Echo())
+
+    def stream():
+        yield writer.writerow(export.headers)
+        for row in export.rows():
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(stream(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+
+def xlsx_response(export, filename):
+    from openpyxl import Workbook
+
+    # Write-only mode streams rows to disk instead of building the sheet in memory
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(export.headers)
+    for row in export.rows():
+        sheet.append(row)
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(output, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
+
+
+def export_response(export, basename, file_format='xlsx'):
+    """Stream ``export`` as ``<basename>.csv`` or ``<basename>.xlsx``."""
+    if file_format == 'csv':
+        return csv_response(export, f'{basename}.csv')
+    return xlsx_response(export, f'{basename}.xlsx')
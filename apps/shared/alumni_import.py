@@ -0,0 +1,222 @@
+"""
+Bulk alumni Excel import.
+
+The uploaded sheet is validated column-wise with pandas, existing CTU IDs are
+fetched with one query, and the new alumni are written with ``bulk_create``
+(User plus its UserProfile/AcademicInfo/TrackerData rows) inside a single
+transaction. The per-row error report keeps the wording of the old
+row-by-row importer so the frontend shows the same messages.
+"""
+import logging
+from datetime import datetime
+
+import pandas as pd
+from django.db import transaction
+
+from apps.shared.models import AcademicInfo, TrackerData, User, UserProfile
+from apps.shared.stats_rollup import rebuild_on_commit
+from apps.shared.timeline import seed_timelines_on_commit
+
+logger = logging.getLogger('apps.shared.alumni_import')
+
+REQUIRED_COLUMNS = ['CTU_ID', 'First_Name', 'Last_Name', 'Gender', 'Birthdate']
+
+BULK_BATCH_SIZE = 500
+
+# Rows between progress callbacks
+PROGRESS_INTERVAL = 500
+
+# Formats tried for birthdates pandas could not infer
+BIRTHDATE_FORMATS = [
+    "%Y-%m-%d", "%m/%d/%Y", "%d/%m/%Y", "%m-%d-%Y", "%d-%m-%Y",
+    "%Y/%m/%d", "%m/%d/%y", "%d/%m/%y", "%Y-%m-%d %H:%M:%S",
+    "%m/%d/%Y %H:%M:%S", "%d/%m/%Y %H:%M:%S", "%Y-%m-%d %H:%M",
+    "%m/%d/%Y %H:%M", "%d/%m/%Y %H:%M", "%Y-%m-%d %H:%M:%S.%f",
+    "%m/%d/%Y %H:%M:%S.%f", "%d/%m/%Y %H:%M:%S.%f",
+]
+
+# Excel serial day 0, shifted by Excel's 1900 leap-year bug
+EXCEL_EPOCH = pd.Timestamp(1899, 12, 30)
+
+
+def missing_columns(df):
+    return [col for col in REQUIRED_COLUMNS if col not in df.columns]
+
+
+def text_column(df, column):
+    """Stripped string values of ``column`` with blanks for NaN/missing columns."""
+    if column not in df.columns:
+        return pd.Series('', index=df.index, dtype=object)
+    values = df[column]
+    return values.where(values.notna(), '').astype(str).str.strip()
+
+
+def too_long_fields(model, values):
+    """
+    ``field (max N)`` labels for the ``values`` that exceed ``model``'s
+    CharField max_length. Bulk writes would otherwise fail the whole batch
+    with DataError instead of rejecting the one row.
+    """
+    labels = []
+    for name, value in values.items():
+        max_length = model._meta.get_field(name).max_length
+        if value and max_length and len(str(value)) > max_length:
+            labels.append(f"{name} (max {max_length})")
+    return labels
+
+
+def _parse_birthdate_text(value):
+    text = str(value).strip()
+    for fmt in BIRTHDATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_birthdates(raw):
+    """
+    Convert a raw Birthdate column to ``datetime.date`` objects (None when
+    unparseable). Real Excel dates and Excel serial numbers are converted
+    in bulk; only the leftover text cells are tried format by format.
+    """
+    if pd.api.types.is_datetime64_any_dtype(raw):
+        parsed = raw
+    else:
+        serials = pd.to_numeric(raw, errors='coerce')
+        is_number = serials.notna()
+        parsed = pd.to_datetime(raw.where(~is_number), errors='coerce', format='mixed')
+        is_serial = is_number & serials.gt(1)
+        parsed[is_serial] = EXCEL_EPOCH + pd.to_timedelta(serials[is_serial].astype(int), unit='D')
+
+    dates = pd.Series(parsed.dt.date, index=raw.index, dtype=object)
+    dates = dates.where(parsed.notna(), None)
+
+    leftover = dates.isna() & raw.notna()
+    for index in raw.index[leftover]:
+        dates.at[index] = _parse_birthdate_text(raw.at[index])
+    return dates
+
+
+def import_alumni_dataframe(df, batch_year, course, account_type, progress=None, import_record=None):
+    """
+    Validate ``df`` and create every new alumni account in bulk.
+
+    Returns ``{'created_count', 'skipped_count', 'errors'}`` where ``errors``
+    holds one ``"Row N: ..."`` message per rejected or skipped row, in sheet
+    order (row numbers count the header as row 1).
+
+    ``progress(rows_processed, errors)`` is called every PROGRESS_INTERVAL
+    validated rows; created users are linked to ``import_record`` if given.
+    """
+    ctu_ids = text_column(df, 'CTU_ID')
+    first_names = text_column(df, 'First_Name')
+    middle_names = text_column(df, 'Middle_Name')
+    last_names = text_column(df, 'Last_Name')
+    genders = text_column(df, 'Gender').str.upper()
+    phone_numbers = text_column(df, 'Phone_Number')
+    addresses = text_column(df, 'Address')
+    civil_statuses = text_column(df, 'Civil Status')
+    social_media = text_column(df, 'Social Media')
+    birthdates = parse_birthdates(df['Birthdate'])
+
+    missing = (
+        ctu_ids.eq('') | first_names.eq('') | last_names.eq('') |
+        genders.eq('') | df['Birthdate'].isna()
+    )
+    bad_gender = ~missing & ~genders.isin(['M', 'F'])
+    bad_birthdate = ~missing & ~bad_gender & birthdates.isna()
+    valid = ~(missing | bad_gender | bad_birthdate)
+
+    existing = set(
+        User.objects.filter(acc_username__in=ctu_ids[valid].unique().tolist())
+        .values_list('acc_username', flat=True)
+    )
+
+    year_graduated = int(batch_year) if str(batch_year).isdigit() else None
+    errors = []
+    new_users = []
+    skipped_count = 0
+    seen = set()
+    for position, index in enumerate(df.index):
+        if progress and position and position % PROGRESS_INTERVAL == 0:
+            progress(position, errors)
+        row_label = f"Row {position + 2}"
+        if missing.at[index]:
+            errors.append(f"{row_label}: Missing required fields (CTU_ID, First_Name, Last_Name, Gender, Birthdate)")
+            continue
+        if bad_gender.at[index]:
+            errors.append(f"{row_label}: Gender must be 'M' or 'F'")
+            continue
+        if bad_birthdate.at[index]:
+            errors.append(f"{row_label}: Cannot parse birthdate '{df['Birthdate'].at[index]}'. Please check the format.")
+            continue
+
+        ctu_id = ctu_ids.at[index]
+        if ctu_id in existing or ctu_id in seen:
+            errors.append(f"{row_label}: CTU ID {ctu_id} already exists (skipped)")
+            skipped_count += 1
+            continue
+
+        values = {
+            'acc_username': ctu_id,
+            'f_name': first_names.at[index],
+            'm_name': middle_names.at[index],
+            'l_name': last_names.at[index],
+            'gender': genders.at[index],
+            'phone_num': phone_numbers.at[index] or None,
+            'address': addresses.at[index] or None,
+            'course': course,
+            'civil_status': civil_statuses.at[index] or None,
+            'social_media': social_media.at[index] or None,
+        }
+        too_long = too_long_fields(User, values)
+        if too_long:
+            errors.append(f"{row_label}: Value too long for {', '.join(too_long)}")
+            continue
+        seen.add(ctu_id)
+
+        birthdate = birthdates.at[index]
+        new_users.append(User(
+            acc_password=birthdate,  # for login
+            birthdate=birthdate,
+            user_status='active',
+            year_graduated=year_graduated,
+            account_type=account_type,
+            import_id=import_record,
+            **values,
+        ))
+
+    with transaction.atomic():
+        created = User.objects.bulk_create(new_users, batch_size=BULK_BATCH_SIZE)
+        UserProfile.objects.bulk_create([
+            UserProfile(
+                user=user,
+                phone_num=user.phone_num,
+                address=user.address,
+                birthdate=user.birthdate,
+                civil_status=user.civil_status,
+                social_media=user.social_media,
+            )
+            for user in created
+        ], batch_size=BULK_BATCH_SIZE)
+        AcademicInfo.objects.bulk_create([
+            AcademicInfo(user=user, year_graduated=year_graduated, program=course)
+            for user in created
+        ], batch_size=BULK_BATCH_SIZE)
+        TrackerData.objects.bulk_create(
+            [TrackerData(user=user) for user in created], batch_size=BULK_BATCH_SIZE
+        )
+        # bulk_create skips the rollup and timeline signals
+        rebuild_on_commit()
+        seed_timelines_on_commit(user.pk for user in created)
+
+    if progress:
+        progress(len(df.index), errors)
+    logger.info(f"Alumni import: {len(created)} created, {skipped_count} skipped, {len(errors)} errors")
+    return {
+        'created_count': len(created),
+        'skipped_count': skipped_count,
+        'errors': errors,
+    }
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class SharedConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.shared'
+
+    def ready(self):
+        from apps.shared import job_index, leaderboard, points_milestones, points_settings, stats_rollup, timeline
+        job_index.connect_signals()
+        leaderboard.connect_signals()
+        points_milestones.connect_signals()
+        points_settings.connect_signals()
+        stats_rollup.connect_signals()
+        timeline.connect_signals()
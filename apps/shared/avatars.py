@@ -0,0 +1,144 @@
+"""
+Cached profile picture URLs.
+
+``build_profile_pic_url`` used to stat the picture in storage
+(``default_storage.get_modified_time``, an S3 HEAD with remote storages) on
+every call to build its ``?t=`` cache-busting token, and feeds call it for
+every post, like, comment and repost author. The relative, versioned URL of
+each user's picture is now kept in the cache under ``avatar_url:<user_id>``
+together with the picture's storage name:
+
+* the version token is the profile's ``updated_at`` at the time the
+  picture was written, so no storage call is needed to build it
+* :func:`remember_avatar` stores the new entry when a picture is uploaded
+  and :func:`forget_avatar` when it is deleted
+* when the user's profile is already loaded (``select_related``), an entry
+  whose storage name no longer matches is rebuilt, so uploads made through
+  other processes are picked up
+* :func:`avatar_urls` resolves many users with one ``get_many`` and at most
+  one UserProfile query for the misses
+"""
+import logging
+import os
+
+from django.core.cache import cache
+
+logger = logging.getLogger('apps.shared.avatars')
+
+AVATAR_CACHE_PREFIX = 'avatar_url:'
+AVATAR_CACHE_TIMEOUT = 86400
+
+# Cached value for users without a picture: (storage name, relative url)
+NO_AVATAR = ('', '')
+
+
+def _cache_key(user_id):
+    return f'{AVATAR_CACHE_PREFIX}{user_id}'
+
+
+def _entry(profile):
+    pic = getattr(profile, 'profile_pic', None) if profile else None
+    if not pic:
+        return NO_AVATAR
+    url = pic.url
+    if profile.updated_at:
+        url = f"{url}?t={int(profile.updated_at.timestamp())}"
+    return pic.name, url
+
+
+def _loaded_profile(user):
+    """``(loaded, profile)``; ``loaded`` is False when accessing it would query."""
+    from apps.shared.models import User
+
+    if not User.profile.is_cached(user):
+        return False, None
+    try:
+        return True, user.profile
+    except Exception:
+        return True, None
+
+
+def _is_current(entry, profile):
+    pic = getattr(profile, 'profile_pic', None) if profile else None
+    return entry[0] == (pic.name if pic else '')
+
+
+def absolute_url(url, request=None):
+    """
+    Make ``url`` absolute from the request host, else ``BASE_URL`` (env or
+    settings), else http://127.0.0.1:8000. Empty URLs stay empty.
+    """
+    if not url or str(url).startswith('http'):
+        return url
+    try:
+        from django.conf import settings
+
+        base_url = None
+        if request:
+            # Build URL from request (works for mobile accessing via network IP)
+            scheme = 'https' if request.is_secure() else 'http'
+            base_url = f"{scheme}://{request.get_host()}"
+        if not base_url:
+            base_url = os.environ.get('BASE_URL') or getattr(settings, 'BASE_URL', 'http://127.0.0.1:8000')
+
+        # Avoid double slashes when concatenating
+        if base_url.endswith('/') and str(url).startswith('/'):
+            return f"{base_url[:-1]}{url}"
+        return f"{base_url}{url}"
+    except Exception:
+        # If anything goes wrong, return the relative URL as a fallback
+        return url
+
+
+def avatar_url(user, request=None):
+    """Absolute, versioned picture URL for ``user``, or "" when there is none."""
+    key = _cache_key(user.user_id)
+    entry = cache.get(key)
+    loaded, profile = _loaded_profile(user)
+    if entry is None or (loaded and not _is_current(entry, profile)):
+        if not loaded:
+            profile = getattr(user, 'profile', None)
+        entry = _entry(profile)
+        cache.set(key, entry, AVATAR_CACHE_TIMEOUT)
+    return absolute_url(entry[1], request)
+
+
+def avatar_urls(users, request=None):
+    """``{user_id: url}`` for ``users``, resolved with one cache round trip."""
+    from apps.shared.models import UserProfile
+
+    users = {user.user_id: user for user in users}
+    if not users:
+        return {}
+    cached = cache.get_many([_cache_key(user_id) for user_id in users])
+
+    entries, stale, unloaded = {}, {}, []
+    for user_id, user in users.items():
+        entry = cached.get(_cache_key(user_id))
+        loaded, profile = _loaded_profile(user)
+        if loaded:
+            if entry is None or not _is_current(entry, profile):
+                entry = stale[_cache_key(user_id)] = _entry(profile)
+        elif entry is None:
+            unloaded.append(user_id)
+            continue
+        entries[user_id] = entry
+
+    if unloaded:
+        profiles = {p.user_id: p for p in UserProfile.objects.filter(user_id__in=unloaded)}
+        for user_id in unloaded:
+            entries[user_id] = stale[_cache_key(user_id)] = _entry(profiles.get(user_id))
+    if stale:
+        cache.set_many(stale, AVATAR_CACHE_TIMEOUT)
+
+    return {user_id: absolute_url(entry[1], request) for user_id, entry in entries.items()}
+
+
+def remember_avatar(profile):
+    """Store the entry for a freshly uploaded (or cleared) picture."""
+    cache.set(_cache_key(profile.user_id), _entry(profile), AVATAR_CACHE_TIMEOUT)
+
+
+def forget_avatar(user_id):
+    """Record that ``user_id`` no longer has a picture."""
+    cache.set(_cache_key(user_id), NO_AVATAR, AVATAR_CACHE_TIMEOUT)
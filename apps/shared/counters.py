@@ -0,0 +1,122 @@
+"""
+Denormalized engagement counters for Post, Repost and Comment.
+
+Views bump the stored ``*_count`` columns with single atomic
+``UPDATE ... SET x = x + n`` statements when likes, comments, reposts and
+replies are created or deleted, so reads get the counts with the row instead
+of running ``COUNT(*)`` per item. ``reconcile_counters`` recomputes them in
+bulk to repair drift (e.g. after cascaded deletes or a fresh deploy).
+"""
+import logging
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from apps.shared.models import Comment, Like, Post, Reply, Repost
+
+logger = logging.getLogger('apps.shared.counters')
+
+RECONCILE_CHUNK_SIZE = 5000
+
+
+def adjust(model, pk, field, delta):
+    """Atomically add ``delta`` to ``field`` on one row, never going below zero."""
+    if not pk or not delta:
+        return
+    if delta > 0:
+        value = F(field) + delta
+    else:
+        value = Greatest(F(field) + delta, Value(0))
+    model.objects.filter(pk=pk).update(**{field: value})
+
+
+def like_added(like):
+    if like.post_id:
+        adjust(Post, like.post_id, 'likes_count', 1)
+    elif like.repost_id:
+        adjust(Repost, like.repost_id, 'likes_count', 1)
+
+
+def like_removed(like):
+    if like.post_id:
+        adjust(Post, like.post_id, 'likes_count', -1)
+    elif like.repost_id:
+        adjust(Repost, like.repost_id, 'likes_count', -1)
+
+
+def comment_added(comment):
+    if comment.post_id:
+        adjust(Post, comment.post_id, 'comments_count', 1)
+    elif comment.repost_id:
+        adjust(Repost, comment.repost_id, 'comments_count', 1)
+
+
+def comment_removed(comment):
+    if comment.post_id:
+        adjust(Post, comment.post_id, 'comments_count', -1)
+    elif comment.repost_id:
+        adjust(Repost, comment.repost_id, 'comments_count', -1)
+
+
+def repost_added(repost):
+    adjust(Post, repost.post_id, 'reposts_count', 1)
+
+
+def repost_removed(repost):
+    adjust(Post, repost.post_id, 'reposts_count', -1)
+
+
+def reply_added(reply):
+    adjust(Comment, reply.comment_id, 'replies_count', 1)
+
+
+def reply_removed(reply):
+    adjust(Comment, reply.comment_id, 'replies_count', -1)
+
+
+def _count_subquery(model, fk_field, pk_field):
+    rows = (
+        model.objects.filter(**{fk_field: OuterRef('pk')})
+        .order_by()
+        .values(fk_field)
+        .annotate(total=Count(pk_field))
+        .values('total')
+    )
+    return Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+
+
+# (counter model, counter field, counted model, FK on counted model, counted pk).
+# Like and Comment have no repost FK in this schema, so the Repost
+# likes_count/comments_count columns have no source table to be recomputed
+# from and are left as maintained by the views.
+COUNTER_SPECS = [
+    (Post, 'likes_count', Like, 'post', 'like_id'),
+    (Post, 'comments_count', Comment, 'post', 'comment_id'),
+    (Post, 'reposts_count', Repost, 'post', 'repost_id'),
+    (Comment, 'replies_count', Reply, 'comment', 'reply_id'),
+]
+
+
+def reconcile_counters(dry_run=False):
+    """
+    Recompute every stored counter from the source tables.
+
+    Each counter is fixed with one set-based UPDATE restricted to drifted
+    rows. Returns ``{'Model.field': drifted_row_count}``.
+    """
+    report = {}
+    for model, field, counted, fk_field, pk_field in COUNTER_SPECS:
+        actual = _count_subquery(counted, fk_field, pk_field)
+        drifted = model.objects.annotate(actual_count=actual).exclude(**{field: F('actual_count')})
+        label = f"{model.__name__}.{field}"
+        if dry_run:
+            report[label] = drifted.count()
+            continue
+        drifted_pks = list(drifted.values_list('pk', flat=True))
+        for start in range(0, len(drifted_pks), RECONCILE_CHUNK_SIZE):
+            chunk = drifted_pks[start:start + RECONCILE_CHUNK_SIZE]
+            model.objects.filter(pk__in=chunk).update(**{field: actual})
+        if drifted_pks:
+            logger.info(f"Reconciled {len(drifted_pks)} rows of {label}")
+        report[label] = len(drifted_pks)
+    return report
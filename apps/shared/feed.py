@@ -0,0 +1,433 @@
+"""
+Batched feed assembly for the home feed.
+
+Builds the same JSON items that posts_view used to produce post by post, but
+loads likes, comments, images and reposts for the whole page with a fixed
+number of ``IN`` queries and joins them in memory.
+"""
+import base64
+import binascii
+import logging
+from collections import defaultdict
+from datetime import datetime
+
+from django.db.models import F, IntegerField, Q, Value
+
+from apps.shared.models import Comment, ContentImage, FeedEntry, Follow, Like, Post, Repost, User
+
+logger = logging.getLogger('apps.shared.feed')
+
+# Item kinds in the merged feed stream. The numeric value is the secondary
+# sort key so posts and reposts with identical timestamps have a stable order.
+KIND_POST = FeedEntry.POST
+KIND_REPOST = FeedEntry.REPOST
+KIND_NAMES = {KIND_POST: 'post', KIND_REPOST: 'repost'}
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """Raised when a feed cursor cannot be decoded."""
+
+
+def encode_cursor(sort_ts, kind, item_id):
+    raw = f"{sort_ts.isoformat()}|{kind}|{item_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        ts, kind, item_id = raw.split('|')
+        return datetime.fromisoformat(ts), int(kind), int(item_id)
+    except (ValueError, binascii.Error, UnicodeError) as e:
+        raise InvalidCursor(f"Invalid feed cursor: {cursor}") from e
+
+
+def visible_feed_posts(user):
+    """Return the posts queryset visible in ``user``'s home feed.
+
+    Admin/PESO see every non-forum post; alumni and OJT users see posts from
+    people they follow, from admin/PESO accounts, and their own.
+    """
+    if user.account_type.admin or user.account_type.peso:
+        # Exclude forum posts from regular posts feed
+        return Post.objects.exclude(type='forum').select_related('user').order_by('-post_id')
+    elif user.account_type.user or user.account_type.ojt:
+        followed_users = Follow.objects.filter(follower=user).values_list('following', flat=True)
+        admin_users = User.objects.filter(account_type__admin=True).values_list('user_id', flat=True)
+        peso_users = User.objects.filter(account_type__peso=True).values_list('user_id', flat=True)
+
+        # Exclude forum posts from regular posts feed
+        return Post.objects.filter(
+            Q(user__in=followed_users) |
+            Q(user__in=admin_users) |
+            Q(user__in=peso_users) |
+            Q(user=user)
+        ).exclude(type='forum').select_related('user').order_by('-post_id')
+    # Exclude forum posts from regular posts feed
+    return Post.objects.exclude(type='forum').select_related('user').order_by('-post_id')
+
+
+def _keyset_filter(kind, cursor):
+    """
+    Row filter for one branch of the merged stream so that only rows strictly
+    after ``cursor`` in ``(sort_ts, kind, item_id)`` descending order remain.
+    Each branch has a constant kind, which reduces the tuple comparison to a
+    simple predicate on ``sort_ts`` and ``item_id``.
+    """
+    c_ts, c_kind, c_id = cursor
+    if kind < c_kind:
+        return Q(sort_ts__lte=c_ts)
+    if kind > c_kind:
+        return Q(sort_ts__lt=c_ts)
+    return Q(sort_ts__lt=c_ts) | Q(sort_ts=c_ts, item_id__lt=c_id)
+
+
+def fetch_feed_page(posts, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Return one keyset page of the merged post/repost stream.
+
+    ``posts`` is the queryset of posts visible to the viewer; reposts of those
+    posts are merged in by the database with a UNION ordered by
+    ``(sort_ts, kind, item_id)`` descending, so only ``limit + 1`` rows are
+    read. Returns ``(entries, next_cursor)`` where ``entries`` is a list of
+    ``(kind, item_id)`` tuples and ``next_cursor`` is None on the last page.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    decoded = decode_cursor(cursor) if cursor else None
+
+    post_rows = posts.order_by().annotate(
+        sort_ts=F('created_at'),
+        kind=Value(KIND_POST, output_field=IntegerField()),
+        item_id=F('post_id'),
+    )
+    repost_rows = Repost.objects.filter(
+        post_id__in=posts.order_by().values('post_id')
+    ).annotate(
+        sort_ts=F('repost_date'),
+        kind=Value(KIND_REPOST, output_field=IntegerField()),
+        item_id=F('repost_id'),
+    )
+    if decoded:
+        post_rows = post_rows.filter(_keyset_filter(KIND_POST, decoded))
+        repost_rows = repost_rows.filter(_keyset_filter(KIND_REPOST, decoded))
+
+    stream = post_rows.values_list('sort_ts', 'kind', 'item_id').union(
+        repost_rows.values_list('sort_ts', 'kind', 'item_id'), all=True
+    ).order_by('-sort_ts', '-kind', '-item_id')
+    rows = list(stream[:limit + 1])
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(*rows[-1])
+    return [(kind, item_id) for _, kind, item_id in rows], next_cursor
+
+
+def _user_summary(user, profile_pic_url):
+    return {
+        'user_id': user.user_id,
+        'f_name': user.f_name,
+        'm_name': user.m_name,
+        'l_name': user.l_name,
+        'profile_pic': profile_pic_url(user),
+    }
+
+
+def _initials(user):
+    try:
+        f = (user.f_name or '').strip()[:1].upper()
+        l = (user.l_name or '').strip()[:1].upper()
+        return f + l if (f or l) else None
+    except Exception:
+        return None
+
+
+class FeedAssembler:
+    """
+    Assemble feed items (posts and their reposts) for a page of posts.
+
+    The query count is constant regardless of how many posts are in the page:
+    one query for the posts, then one bulk query each for post likes, post
+    comments, post images and reposts. Like and Comment only reference posts,
+    so repost items carry empty ``likes``/``comments`` lists. Engagement
+    counts come from the denormalized ``*_count`` columns.
+    """
+
+    def __init__(self, viewer, request=None, profile_pic_url=None, image_url=None):
+        self.viewer = viewer
+        self.request = request
+        # Avatars are resolved per page in one batch unless a resolver is injected
+        self._batch_avatars = profile_pic_url is None
+        self._avatars = {}
+        if profile_pic_url is None or image_url is None:
+            from apps.api.views import build_image_url, build_profile_pic_url
+            profile_pic_url = profile_pic_url or build_profile_pic_url
+            image_url = image_url or build_image_url
+        self._profile_pic_url = profile_pic_url
+        self._image_url = image_url
+
+    # --- Bulk loaders ---
+
+    def _load_post_likes(self, post_ids):
+        grouped = defaultdict(list)
+        likes = Like.objects.filter(post_id__in=post_ids).select_related('user', 'user__profile')
+        for like in likes:
+            grouped[like.post_id].append(like)
+        return grouped
+
+    def _load_post_comments(self, post_ids):
+        grouped = defaultdict(list)
+        comments = (
+            Comment.objects.filter(post_id__in=post_ids)
+            .select_related('user', 'user__profile')
+            .order_by('-date_created')
+        )
+        for comment in comments:
+            grouped[comment.post_id].append(comment)
+        return grouped
+
+    def _load_post_images(self, post_ids):
+        grouped = defaultdict(list)
+        try:
+            images = ContentImage.objects.filter(
+                content_type='post', content_id__in=post_ids
+            ).order_by('content_id', 'order')
+            for img in images:
+                grouped[img.content_id].append(img)
+        except Exception as e:
+            logger.warning(f"Could not load post images for feed: {e}")
+        return grouped
+
+    def _load_reposts(self, post_ids):
+        grouped = defaultdict(list)
+        reposts = Repost.objects.filter(post_id__in=post_ids).select_related('user', 'user__profile')
+        for repost in reposts:
+            grouped[repost.post_id].append(repost)
+        return grouped
+
+    def _prefetch_avatars(self, *groups):
+        """Resolve the avatars of every author in ``groups`` with one batch lookup."""
+        if not self._batch_avatars:
+            return
+        users = [item.user for group in groups for items in group for item in items]
+        try:
+            from apps.shared.avatars import avatar_urls
+            self._avatars.update(avatar_urls(users))
+        except Exception as e:
+            logger.warning(f"Could not batch-resolve feed avatars: {e}")
+
+    def _avatar(self, user):
+        url = self._avatars.get(user.user_id)
+        return url if url is not None else self._profile_pic_url(user)
+
+    # --- Serializers ---
+
+    def _serialize_post_images(self, images):
+        post_images = []
+        seen_urls = set()
+        for img in images:
+            image_url = self._image_url(img.image, self.request)
+            if image_url and image_url not in seen_urls:
+                seen_urls.add(image_url)
+                post_images.append({
+                    'image_id': img.image_id,
+                    'image_url': image_url,
+                    'order': img.order,
+                })
+        return post_images
+
+    def _serialize_post(self, post, likes, comments, post_images):
+        viewer_id = self.viewer.user_id
+        likes_data = []
+        for like in likes:
+            pic = self._avatar(like.user)
+            likes_data.append({
+                'user_id': like.user.user_id,
+                'f_name': like.user.f_name,
+                'm_name': like.user.m_name,
+                'l_name': like.user.l_name,
+                'profile_pic': pic,
+                'initials': None if pic else _initials(like.user),
+            })
+
+        comments_data = [{
+            'comment_id': comment.comment_id,
+            'comment_content': comment.comment_content,
+            'date_created': comment.date_created.isoformat(),
+            'user': _user_summary(comment.user, self._avatar),
+        } for comment in comments]
+
+        created_at = post.created_at.isoformat() if hasattr(post, 'created_at') else None
+        return {
+            'post_id': post.post_id,
+            'post_content': post.post_content,
+            'post_image': (post.post_image.url if getattr(post, 'post_image', None) else None),  # Backward compatibility
+            'post_images': post_images,
+            'type': post.type,
+            'created_at': created_at,
+            'likes_count': post.likes_count,
+            'comments_count': post.comments_count,
+            'reposts_count': post.reposts_count,
+            'is_liked': any(like.user_id == viewer_id for like in likes),
+            'likes': likes_data,
+            'comments': comments_data,
+            'user': _user_summary(post.user, self._avatar),
+            'category': {
+            },
+            'item_type': 'post',
+            'sort_date': created_at,
+        }
+
+    def _serialize_repost(self, repost, post, post_images, likes, comments):
+        viewer_id = self.viewer.user_id
+        likes_data = [{
+            'like_id': like.like_id,
+            'user_id': like.user.user_id,
+            'user': _user_summary(like.user, self._avatar),
+        } for like in likes]
+
+        comments_data = [{
+            'comment_id': comment.comment_id,
+            'comment_content': comment.comment_content,
+            'date_created': comment.date_created.isoformat() if comment.date_created else None,
+            'replies_count': comment.replies_count,
+            'user': _user_summary(comment.user, self._avatar),
+        } for comment in comments]
+
+        return {
+            'repost_id': repost.repost_id,
+            'repost_date': repost.repost_date.isoformat(),
+            'repost_caption': getattr(repost, 'caption', None),
+            'likes_count': repost.likes_count,
+            'comments_count': repost.comments_count,
+            'is_liked': any(like.user_id == viewer_id for like in likes),
+            'likes': likes_data,
+            'comments': comments_data,
+            'user': _user_summary(repost.user, self._avatar),
+            'original_post': {
+                'post_id': post.post_id,
+                'post_content': post.post_content,
+                'post_image': (post.post_image.url if getattr(post, 'post_image', None) else None),  # Backward compatibility
+                'post_images': post_images,
+                'created_at': post.created_at.isoformat() if hasattr(post, 'created_at') else None,
+                'user': _user_summary(post.user, self._avatar),
+            },
+            'item_type': 'repost',
+            'sort_date': repost.repost_date.isoformat(),
+        }
+
+    # --- Public API ---
+
+    def assemble(self, posts):
+        """
+        Return feed items for ``posts`` (a queryset or list of Post objects).
+
+        Each post yields one ``item_type='post'`` entry followed by one
+        ``item_type='repost'`` entry per repost, in the same shape the mobile
+        client already consumes. Items are not sorted; callers decide ordering.
+        """
+        if hasattr(posts, 'select_related'):
+            posts = posts.select_related('user', 'user__profile')
+        posts = list(posts)
+        if not posts:
+            return []
+
+        post_ids = [post.post_id for post in posts]
+        likes_by_post = self._load_post_likes(post_ids)
+        comments_by_post = self._load_post_comments(post_ids)
+        images_by_post = self._load_post_images(post_ids)
+        reposts_by_post = self._load_reposts(post_ids)
+
+        self._prefetch_avatars(
+            [posts],
+            likes_by_post.values(), comments_by_post.values(), reposts_by_post.values(),
+        )
+
+        feed_items = []
+        for post in posts:
+            try:
+                post_images = self._serialize_post_images(images_by_post.get(post.post_id, []))
+                reposts = reposts_by_post.get(post.post_id, [])
+                feed_items.append(self._serialize_post(
+                    post,
+                    likes_by_post.get(post.post_id, []),
+                    comments_by_post.get(post.post_id, []),
+                    post_images,
+                ))
+                for repost in reposts:
+                    try:
+                        feed_items.append(self._serialize_repost(repost, post, post_images, [], []))
+                    except Exception:
+                        continue
+            except Exception as e:
+                logger.error(f"Error assembling feed item for post {post.post_id}: {e}")
+                continue
+        return feed_items
+
+    def assemble_entries(self, entries):
+        """
+        Return feed items for an ordered list of ``(kind, item_id)`` entries as
+        produced by :func:`fetch_feed_page`, preserving their order.
+
+        Reposts carry their original post, so originals are loaded alongside
+        the page posts; likes and comments are only loaded for items that are
+        actually on the page.
+        """
+        if not entries:
+            return []
+        page_post_ids = [item_id for kind, item_id in entries if kind == KIND_POST]
+        repost_ids = [item_id for kind, item_id in entries if kind == KIND_REPOST]
+
+        reposts = {
+            r.repost_id: r
+            for r in Repost.objects.filter(repost_id__in=repost_ids).select_related('user', 'user__profile')
+        } if repost_ids else {}
+        all_post_ids = set(page_post_ids) | {r.post_id for r in reposts.values()}
+        posts = {
+            p.post_id: p
+            for p in Post.objects.filter(post_id__in=all_post_ids).select_related('user', 'user__profile')
+        }
+
+        likes_by_post = self._load_post_likes(page_post_ids) if page_post_ids else {}
+        comments_by_post = self._load_post_comments(page_post_ids) if page_post_ids else {}
+        images_by_post = self._load_post_images(list(all_post_ids))
+        self._prefetch_avatars(
+            [posts.values(), reposts.values()],
+            likes_by_post.values(), comments_by_post.values(),
+        )
+
+        images_cache = {}
+
+        def post_images_for(post_id):
+            if post_id not in images_cache:
+                images_cache[post_id] = self._serialize_post_images(images_by_post.get(post_id, []))
+            return images_cache[post_id]
+
+        feed_items = []
+        for kind, item_id in entries:
+            try:
+                if kind == KIND_POST:
+                    post = posts.get(item_id)
+                    if post is None:
+                        continue
+                    feed_items.append(self._serialize_post(
+                        post,
+                        likes_by_post.get(item_id, []),
+                        comments_by_post.get(item_id, []),
+                        post_images_for(item_id),
+                    ))
+                else:
+                    repost = reposts.get(item_id)
+                    post = posts.get(repost.post_id) if repost else None
+                    if post is None:
+                        continue
+                    feed_items.append(self._serialize_repost(
+                        repost, post, post_images_for(post.post_id), [], []
+                    ))
+            except Exception as e:
+                logger.error(f"Error assembling feed item {KIND_NAMES.get(kind)} {item_id}: {e}")
+                continue
+        return feed_items
@@ -0,0 +1,212 @@
+"""
+In-process background runner for alumni/OJT spreadsheet imports.
+
+The upload is stored on an ImportJob row and processed on a small thread
+pool, so the HTTP request returns a job id immediately instead of holding a
+worker (and the proxy) for the whole import. Progress is written to the job
+row while rows are validated; clients poll ``/imports/<job_id>/status/``.
+No broker is needed - jobs run inside the web process that accepted them,
+so a restart loses whatever was queued or running; ``fail_stale_jobs`` marks
+such jobs failed once they exceed ``IMPORT_JOB_TIMEOUT`` seconds.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pandas as pd
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.shared.models import AccountType, Import, ImportJob
+
+logger = logging.getLogger('apps.shared.import_jobs')
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        workers = getattr(settings, 'IMPORT_JOB_WORKERS', 2)
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='import-job')
+    return _executor
+
+
+def create_import_job(kind, upload, params, created_by=None):
+    """Store ``upload`` on a new queued ImportJob and schedule it after commit."""
+    job = ImportJob(
+        kind=kind,
+        file_name=upload.name,
+        params=params,
+        created_by=created_by,
+    )
+    job.file.save(upload.name, upload, save=False)
+    job.save()
+    transaction.on_commit(lambda: _get_executor().submit(run_import_job, job.job_id))
+    return job
+
+
+def _report_progress(job_id):
+    def progress(rows_processed, errors):
+        ImportJob.objects.filter(pk=job_id).update(rows_processed=rows_processed, errors=list(errors))
+    return progress
+
+
+def _run_alumni(job, df, progress):
+    from apps.shared.alumni_import import import_alumni_dataframe, missing_columns
+
+    missing = missing_columns(df)
+    if missing:
+        raise ValueError(f'Missing required columns: {", ".join(missing)}')
+    try:
+        account_type = AccountType.objects.get(user=True, admin=False, peso=False, coordinator=False)
+    except AccountType.DoesNotExist:
+        raise ValueError('Alumni account type not found')
+
+    batch_year = str(job.params.get('batch_year', ''))
+    course = job.params.get('course', '')
+    import_record = None
+    if job.created_by_id and batch_year.isdigit():
+        import_record = Import.objects.create(
+            user=job.created_by,
+            import_year=int(batch_year),
+            import_by=job.created_by.acc_username,
+        )
+    result = import_alumni_dataframe(
+        df, batch_year, course, account_type, progress=progress, import_record=import_record
+    )
+    job.alumni_import = import_record
+    created_count = result['created_count']
+    skipped_count = result['skipped_count']
+    result['message'] = f'Successfully created {created_count} alumni accounts. Skipped {skipped_count} duplicates.'
+    return result
+
+
+def _run_ojt(job, df, progress):
+    from apps.shared.ojt_import import OJTImportPipeline
+
+    pipeline = OJTImportPipeline(
+        df,
+        file_name=job.file_name,
+        coordinator=job.params.get('coordinator', ''),
+        batch_year=job.params.get('batch_year', ''),
+        course=job.params.get('course', ''),
+        progress=progress,
+    )
+    result = pipeline.run()
+    # Unlike the synchronous response, keep the complete error list
+    result['errors'] = pipeline.errors
+    job.ojt_imports.set(pipeline.import_records)
+    return result
+
+
+RUNNERS = {
+    ImportJob.ALUMNI: _run_alumni,
+    ImportJob.OJT: _run_ojt,
+}
+
+
+def run_import_job(job_id):
+    """Process one queued job; safe to call directly (e.g. from a shell)."""
+    close_old_connections()
+    try:
+        job = ImportJob.objects.get(pk=job_id)
+        job.status = ImportJob.RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at'])
+        try:
+            with job.file.open('rb') as fh:
+                df = pd.read_excel(fh, dtype={'CTU_ID': str})
+            job.total_rows = len(df.index)
+            job.save(update_fields=['total_rows'])
+
+            result = RUNNERS[job.kind](job, df, _report_progress(job.job_id))
+            job.status = ImportJob.COMPLETED
+            job.rows_processed = job.total_rows
+            job.errors = result.get('errors', [])
+            job.message = result.get('message', '')
+            # Generated passwords stay in the encrypted UserInitialPassword table only
+            passwords = result.pop('passwords', None)
+            if passwords is not None:
+                result['passwords_count'] = len(passwords)
+            job.result = result
+        except Exception as e:
+            logger.exception(f"Import job {job_id} failed")
+            job.status = ImportJob.FAILED
+            job.message = str(e)
+        job.finished_at = timezone.now()
+        job.save(update_fields=[
+            'status', 'rows_processed', 'errors', 'message', 'result', 'alumni_import', 'finished_at',
+        ])
+        if job.file:
+            job.file.delete(save=True)
+    except Exception as e:
+        logger.error(f"Import job {job_id} could not be processed: {e}")
+    finally:
+        close_old_connections()
+
+
+def fail_stale_jobs(job_ids=None):
+    """
+    Mark queued/running jobs that outlived ``IMPORT_JOB_TIMEOUT`` (queued
+    since ``created_at``, running since ``started_at``) as failed, limited to
+    ``job_ids`` when given. Their worker died with the process that owned it,
+    so nothing else would ever finish them. Returns the number of jobs failed.
+    """
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'IMPORT_JOB_TIMEOUT', 3600))
+    stale = ImportJob.objects.filter(
+        Q(status=ImportJob.QUEUED, created_at__lt=cutoff) | Q(status=ImportJob.RUNNING, started_at__lt=cutoff)
+    )
+    if job_ids is not None:
+        stale = stale.filter(job_id__in=job_ids)
+    failed = 0
+    for job in stale.only('job_id', 'file'):
+        # Conditional update so a worker finishing concurrently is not overwritten
+        updated = ImportJob.objects.filter(
+            pk=job.pk, status__in=[ImportJob.QUEUED, ImportJob.RUNNING]
+        ).update(
+            status=ImportJob.FAILED,
+            message='Import was interrupted before it finished; please upload the file again.',
+            finished_at=timezone.now(),
+        )
+        if updated:
+            failed += 1
+            logger.warning(f"Import job {job.job_id} was stale and has been marked failed")
+            if job.file:
+                job.file.delete(save=True)
+    return failed
+
+
+def serialize_import_job(job):
+    return {
+        'job_id': str(job.job_id),
+        'kind': job.kind,
+        'status': job.status,
+        'file_name': job.file_name,
+        'total_rows': job.total_rows,
+        'rows_processed': job.rows_processed,
+        'errors': job.errors,
+        'message': job.message,
+        'result': job.result,
+        'import_record': {
+            'import_id': job.alumni_import.import_id,
+            'import_year': job.alumni_import.import_year,
+            'import_by': job.alumni_import.import_by,
+        } if job.alumni_import else None,
+        'ojt_imports': [
+            {
+                'import_id': record.import_id,
+                'batch_year': record.batch_year,
+                'course': record.course,
+                'section': record.section,
+                'records_imported': record.records_imported,
+                'status': record.status,
+            }
+            for record in job.ojt_imports.all()
+        ],
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
@@ -0,0 +1,311 @@
+"""
+Job alignment computation and bulk recalculation.
+
+:func:`compute_job_alignment` is the pure-Python core of
+``EmploymentHistory.update_job_alignment``: it takes plain values and a
+:class:`~apps.shared.job_index.JobTitleIndex` and returns the new alignment
+fields, so it can run without the ORM.
+
+:func:`recalculate_job_alignments` uses it to recalculate every alumnus at
+once. EmploymentHistory rows are streamed in keyset-ordered chunks of plain
+values, aligned on a process pool whose workers each rebuild the title index
+once from the preloaded rows, and only the rows whose fields changed are
+written back with ``bulk_update``. Progress goes to the
+``job_alignment_progress`` cache key after every chunk.
+
+Model imports stay inside functions so worker processes can import this
+module without setting Django up.
+"""
+import logging
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+from apps.shared.job_index import PROGRAMS, JobTitleIndex, program_key
+
+logger = logging.getLogger('apps.shared.job_alignment')
+
+RECALC_CHUNK_SIZE = 1000
+
+PROGRESS_CACHE_KEY = 'job_alignment_progress'
+PROGRESS_TIMEOUT = 3600
+
+# Fields written back by the bulk recalculation
+ALIGNMENT_FIELDS = [
+    'position_current',
+    'date_started',
+    'self_employed',
+    'high_position',
+    'absorbed',
+    'job_alignment_status',
+    'job_alignment_category',
+    'job_alignment_title',
+    'job_alignment_original_program',
+]
+
+HIGH_POSITION_KEYWORDS = [
+    'chief', 'director', 'president', 'vice president', 'ceo', 'cto', 'cfo', 'vp',
+    'senior manager', 'senior director', 'executive', 'head of', 'lead'
+]
+
+MANAGER_EXCLUDES = ['assistant', 'junior', 'trainee', 'intern']
+
+
+def normalize_job_title(position):
+    """Collapse whitespace and upper-case, as EmploymentHistory stores titles."""
+    if not position:
+        return ''
+    return ' '.join(position.strip().split()).upper()
+
+
+def _is_absorbed(company_name, ojt_company_name, date_started, year_graduated):
+    # Priority 1: current company matches the OJT company
+    if company_name and ojt_company_name:
+        current = company_name.lower().strip()
+        ojt = ojt_company_name.lower().strip()
+        if current == ojt or current in ojt or ojt in current:
+            return True
+    # Priority 2: hired by the end of the graduation year's June
+    if date_started and year_graduated:
+        return date_started <= date(year_graduated, 6, 30)
+    return False
+
+
+def compute_job_alignment(values, job_index):
+    """
+    Alignment fields for one employment record.
+
+    ``values`` holds ``position_current``, ``company_name_current``,
+    ``date_started``, ``program``, ``year_graduated``, ``q_employment_type``
+    and ``ojt_company_name`` (missing keys count as empty). Returns
+    ``(fields, match_method)`` where ``fields`` maps EmploymentHistory field
+    names to their new values; fields that would not change are left out.
+    """
+    position = values.get('position_current')
+    if not position:
+        return {
+            'job_alignment_status': 'not_aligned',
+            'job_alignment_category': None,
+            'job_alignment_title': None,
+        }, None
+
+    position = normalize_job_title(position)
+    position_lower = position.lower()
+    course_lower = (values.get('program') or '').lower()
+    fields = {'position_current': position}
+
+    # Self-employed status from tracker answer Q23 (q_employment_type)
+    employment_type = (values.get('q_employment_type') or '').lower()
+    fields['self_employed'] = 'self-employed' in employment_type or 'self employed' in employment_type
+
+    # High position (AACUP); "manager" counts unless it is an assistant/junior role
+    high_position = any(keyword in position_lower for keyword in HIGH_POSITION_KEYWORDS)
+    if 'manager' in position_lower and not any(exclude in position_lower for exclude in MANAGER_EXCLUDES):
+        high_position = True
+    fields['high_position'] = high_position
+
+    # Absorbed (AACUP)
+    date_started = values.get('date_started')
+    if isinstance(date_started, str):
+        try:
+            date_started = datetime.strptime(date_started, '%Y-%m-%d').date()
+        except (ValueError, TypeError):
+            date_started = None
+        fields['date_started'] = date_started
+    fields['absorbed'] = _is_absorbed(
+        values.get('company_name_current'),
+        values.get('ojt_company_name'),
+        date_started,
+        values.get('year_graduated'),
+    )
+
+    # Alignment: the user's own program only; other programs wait for confirmation
+    key = program_key(course_lower)
+    matched_title, match_method = job_index.match(key, position) if key else (None, None)
+    if matched_title:
+        fields.update({
+            'job_alignment_status': 'aligned',
+            'job_alignment_category': PROGRAMS[key][1],
+            'job_alignment_title': matched_title,
+        })
+    else:
+        fields.update({
+            'job_alignment_status': 'pending_user_confirmation',
+            'job_alignment_category': None,
+            'job_alignment_title': None,
+            'job_alignment_original_program': course_lower,
+        })
+        match_method = None
+    return fields, match_method
+
+
+# --- bulk recalculation -----------------------------------------------------
+
+_worker_index = None
+
+
+def _init_worker(version, rows):
+    global _worker_index
+    _worker_index = JobTitleIndex(version, rows)
+
+
+def _align_chunk(rows):
+    """Worker entry point: ``[(id, new_fields | None, error | None)]`` for ``rows``."""
+    results = []
+    for row in rows:
+        try:
+            fields, _ = compute_job_alignment(row, _worker_index)
+            results.append((row['id'], fields, None))
+        except Exception as e:
+            results.append((row['id'], None, str(e)))
+    return results
+
+
+def _employment_rows(queryset, chunk_size):
+    """Yield lists of plain value dicts, keyset-ordered by id."""
+    from django.db.models import F
+
+    rows = queryset.values(
+        'id',
+        'company_name_current',
+        *ALIGNMENT_FIELDS,
+        program=F('user__academic_info__program'),
+        year_graduated=F('user__academic_info__year_graduated'),
+        q_employment_type=F('user__tracker_data__q_employment_type'),
+        ojt_company_name=F('user__ojt_company_profile__company_name'),
+    )
+    last_id = 0
+    while True:
+        chunk = list(rows.filter(id__gt=last_id).order_by('id')[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1]['id']
+
+
+def _use_process_pool(workers):
+    # Daemonic processes (e.g. Celery prefork children) may not start children
+    return workers > 1 and not multiprocessing.current_process().daemon
+
+
+def _aligned_chunks(chunks, index, workers):
+    """Yield ``(rows, results)`` per chunk, in order, computed on ``workers`` processes."""
+    if not _use_process_pool(workers):
+        _init_worker(index.version, index.rows)
+        for rows in chunks:
+            yield rows, _align_chunk(rows)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(index.version, index.rows)
+    ) as executor:
+        # Keep a couple of chunks per worker in flight so reading, aligning
+        # and writing overlap without buffering the whole table
+        pending = deque()
+        for rows in chunks:
+            pending.append((rows, executor.submit(_align_chunk, rows)))
+            if len(pending) >= workers * 2:
+                rows, future = pending.popleft()
+                yield rows, future.result()
+        while pending:
+            rows, future = pending.popleft()
+            yield rows, future.result()
+
+
+def _create_missing_employment(users):
+    from apps.shared.models import EmploymentHistory
+
+    missing = users.filter(employment__isnull=True).values_list('user_id', flat=True)
+    created = EmploymentHistory.objects.bulk_create(
+        [EmploymentHistory(user_id=user_id) for user_id in missing.iterator()],
+        batch_size=RECALC_CHUNK_SIZE,
+    )
+    return len(created)
+
+
+def recalculate_job_alignments(workers=None, chunk_size=RECALC_CHUNK_SIZE, create_missing=False):
+    """
+    Recalculate job alignment for every alumnus' EmploymentHistory.
+
+    ``workers`` defaults to ``settings.JOB_ALIGNMENT_WORKERS`` (CPU count when
+    unset); with one worker, or inside a daemonic process, chunks are aligned
+    in-process. ``create_missing`` first creates empty EmploymentHistory rows
+    for alumni without one.
+
+    Returns totals: ``total_users``, ``processed``, ``updated`` (rows whose
+    fields changed), ``errors``, the ``aligned``/``not_aligned``/
+    ``self_employed``/``high_position``/``absorbed`` counts, ``created`` and
+    ``completed_at``.
+    """
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.db import transaction
+    from django.utils import timezone
+
+    from apps.shared.job_index import get_job_index
+    from apps.shared.models import EmploymentHistory, User
+
+    if workers is None:
+        workers = getattr(settings, 'JOB_ALIGNMENT_WORKERS', None) or multiprocessing.cpu_count()
+
+    created = 0
+    if create_missing:
+        created = _create_missing_employment(User.objects.filter(account_type__user=True))
+
+    employments = EmploymentHistory.objects.filter(user__account_type__user=True)
+    total = employments.count()
+    results = {
+        'total_users': total,
+        'processed': 0,
+        'updated': 0,
+        'errors': 0,
+        'aligned': 0,
+        'not_aligned': 0,
+        'self_employed': 0,
+        'high_position': 0,
+        'absorbed': 0,
+        'created': created,
+    }
+    logger.info(f"Recalculating job alignment for {total} alumni on {workers} worker(s)")
+
+    index = get_job_index()
+    chunks = _employment_rows(employments, chunk_size)
+    for rows, aligned in _aligned_chunks(chunks, index, workers):
+        now = timezone.now()
+        changed = []
+        for row, (employment_id, fields, error) in zip(rows, aligned):
+            results['processed'] += 1
+            if error is not None:
+                results['errors'] += 1
+                logger.error(f"Error aligning employment {employment_id}: {error}")
+                continue
+            new = {field: row[field] for field in ALIGNMENT_FIELDS}
+            new.update(fields)
+            results['aligned' if new['job_alignment_status'] == 'aligned' else 'not_aligned'] += 1
+            results['self_employed'] += bool(new['self_employed'])
+            results['high_position'] += bool(new['high_position'])
+            results['absorbed'] += bool(new['absorbed'])
+            if any(new[field] != row[field] for field in ALIGNMENT_FIELDS):
+                # bulk_update skips auto_now, so stamp updated_at explicitly
+                changed.append(EmploymentHistory(id=employment_id, updated_at=now, **new))
+
+        if changed:
+            with transaction.atomic():
+                EmploymentHistory.objects.bulk_update(changed, ALIGNMENT_FIELDS + ['updated_at'])
+            results['updated'] += len(changed)
+
+        processed = results['processed']
+        progress = (processed / total) * 100 if total else 100.0
+        cache.set(PROGRESS_CACHE_KEY, {
+            'processed': processed,
+            'total': total,
+            'updated': results['updated'],
+            'errors': results['errors'],
+            'progress_percent': round(progress, 2),
+        }, PROGRESS_TIMEOUT)
+        logger.info(f"Job alignment progress: {processed}/{total} ({progress:.1f}%)")
+
+    results['completed_at'] = time.time()
+    return results
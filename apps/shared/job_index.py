@@ -0,0 +1,269 @@
+"""
+Process-local job title index used for job alignment.
+
+EmploymentHistory used to run separate ``iexact``, ``icontains`` and
+``TrigramSimilarity`` queries against the Simple*Job tables for every program
+on every save. The three tables are small and rarely change, so they are
+loaded once per process into a :class:`JobTitleIndex` that answers the same
+match tiers in memory:
+
+* exact     - normalized (lower-cased) title map
+* substring - character-trigram postings narrow the titles that can contain
+              the position, then a plain ``in`` check confirms it
+* fuzzy     - pg_trgm-compatible word trigrams and similarity, threshold 0.6
+
+The index is versioned: saves/deletes on the job tables invalidate it in the
+current process and bump INDEX_VERSION_KEY in the shared cache once they
+commit. Other processes compare that version, plus a count/max(id) signature
+for bulk inserts that skip the signals, at most every INDEX_CHECK_INTERVAL
+seconds, so in-place title edits are picked up too (when the cache backend is
+shared between them).
+"""
+import logging
+import re
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+
+logger = logging.getLogger('apps.shared.job_index')
+
+FUZZY_THRESHOLD = 0.6
+
+INDEX_CHECK_INTERVAL = 60  # seconds between cross-process staleness checks
+
+INDEX_VERSION_KEY = 'job_title_index_version'
+INDEX_VERSION_TIMEOUT = None  # never expire; a missing key just forces a reload
+
+# Program key -> (job model name, alignment category)
+PROGRAMS = {
+    'bit-ct': ('SimpleCompTechJob', 'comp_tech'),
+    'bsit': ('SimpleInfoTechJob', 'info_tech'),
+    'bsis': ('SimpleInfoSystemJob', 'info_system'),
+}
+
+_WORD_RE = re.compile(r'[^\W_]+', re.UNICODE)
+
+
+def similarity_trigrams(text):
+    """Trigram set as pg_trgm builds it: per word, padded with '  ' and ' '."""
+    grams = set()
+    for word in _WORD_RE.findall(text.lower()):
+        padded = f'  {word} '
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+def trigram_similarity(left, right):
+    """``similarity()`` from pg_trgm for two precomputed trigram sets."""
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+def _char_trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def program_key(program):
+    """Map a free-text program/course name to a PROGRAMS key (or None)."""
+    program = (program or '').lower()
+    if 'bit-ct' in program or 'computer technology' in program:
+        return 'bit-ct'
+    if 'bsit' in program or 'information technology' in program:
+        return 'bsit'
+    if 'bsis' in program or 'information system' in program:
+        return 'bsis'
+    return None
+
+
+def _job_model(key):
+    from django.apps import apps
+    return apps.get_model('shared', PROGRAMS[key][0])
+
+
+def _job_models():
+    """``{program key: job model}`` for the job tables that are installed."""
+    models = {}
+    for key in PROGRAMS:
+        try:
+            models[key] = _job_model(key)
+        except LookupError:
+            continue
+    return models
+
+
+class _ProgramTitles:
+    """All titles of one Simple*Job table, in primary-key order."""
+
+    def __init__(self, rows):
+        self.titles = []
+        self.lowered = []
+        self.exact = {}
+        self.char_postings = {}
+        self.similarity_sets = []
+        self.similarity_postings = {}
+        for position, (_, title) in enumerate(rows):
+            lowered = title.lower()
+            self.titles.append(title)
+            self.lowered.append(lowered)
+            self.exact.setdefault(lowered, position)
+            for gram in _char_trigrams(lowered):
+                self.char_postings.setdefault(gram, set()).add(position)
+            grams = similarity_trigrams(title)
+            self.similarity_sets.append(grams)
+            for gram in grams:
+                self.similarity_postings.setdefault(gram, set()).add(position)
+
+    def find_exact(self, text):
+        position = self.exact.get(text.lower())
+        return self.titles[position] if position is not None else None
+
+    def find_substring(self, text):
+        needle = text.lower()
+        if len(needle) >= 3:
+            candidates = None
+            for gram in _char_trigrams(needle):
+                postings = self.char_postings.get(gram, set())
+                candidates = postings if candidates is None else candidates & postings
+                if not candidates:
+                    return None
+            candidates = sorted(candidates)
+        else:
+            candidates = range(len(self.titles))
+        for position in candidates:
+            if needle in self.lowered[position]:
+                return self.titles[position]
+        return None
+
+    def find_fuzzy(self, text):
+        grams = similarity_trigrams(text)
+        candidates = set()
+        for gram in grams:
+            candidates |= self.similarity_postings.get(gram, set())
+        best, best_score = None, FUZZY_THRESHOLD
+        for position in sorted(candidates):
+            score = trigram_similarity(grams, self.similarity_sets[position])
+            if score > best_score:
+                best, best_score = position, score
+        if best is None:
+            return None, None
+        return self.titles[best], best_score
+
+
+class JobTitleIndex:
+    """Immutable snapshot of the three job title tables."""
+
+    def __init__(self, version, titles_by_program):
+        self.version = version
+        self.rows = titles_by_program  # raw (id, title) rows, cheap to ship to worker processes
+        self.programs = {key: _ProgramTitles(rows) for key, rows in titles_by_program.items()}
+
+    def exact(self, key, text):
+        """Title in program ``key`` equal to ``text`` ignoring case, else None."""
+        if key not in self.programs or not text:
+            return None
+        return self.programs[key].find_exact(text)
+
+    def match(self, key, text):
+        """
+        Three-tier match of ``text`` in program ``key``.
+
+        Returns ``(job_title, match_method)`` with the same method labels the
+        database queries produced ('exact', 'substring',
+        'fuzzy (similarity: 0.73)'), or ``(None, None)``.
+        """
+        if key not in self.programs or not text:
+            return None, None
+        titles = self.programs[key]
+        title = titles.find_exact(text)
+        if title is not None:
+            return title, 'exact'
+        title = titles.find_substring(text)
+        if title is not None:
+            return title, 'substring'
+        title, score = titles.find_fuzzy(text)
+        if title is not None:
+            return title, f'fuzzy (similarity: {score:.2f})'
+        return None, None
+
+
+def _shared_version():
+    version = cache.get(INDEX_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        # Another process may have set it first; use whichever won
+        if not cache.add(INDEX_VERSION_KEY, version, INDEX_VERSION_TIMEOUT):
+            version = cache.get(INDEX_VERSION_KEY, version)
+    return version
+
+
+def _table_signature():
+    signature = [_shared_version()]
+    for key, model in _job_models().items():
+        stats = model.objects.aggregate(count=Count('id'), max_id=Max('id'))
+        signature.append((key, stats['count'], stats['max_id']))
+    return tuple(signature)
+
+
+def _load_index():
+    version = _table_signature()
+    # Programs without an installed job table have no titles and never match
+    titles = {
+        key: list(model.objects.order_by('id').values_list('id', 'job_title'))
+        for key, model in _job_models().items()
+    }
+    logger.info(f"Loaded job title index {version}")
+    return JobTitleIndex(version, titles)
+
+
+_lock = threading.Lock()
+_index = None
+_checked_at = 0.0
+
+
+def get_job_index():
+    """Return the current process-wide index, (re)loading it when stale."""
+    global _index, _checked_at
+    now = time.monotonic()
+    index = _index
+    if index is not None and now - _checked_at < INDEX_CHECK_INTERVAL:
+        return index
+    with _lock:
+        if _index is None:
+            _index = _load_index()
+        elif now - _checked_at >= INDEX_CHECK_INTERVAL and _table_signature() != _index.version:
+            _index = _load_index()
+        _checked_at = now
+        return _index
+
+
+def invalidate_job_index(**kwargs):
+    """Drop the cached index and bump the shared version once the change commits."""
+    global _index
+
+    def bump():
+        global _index
+        cache.set(INDEX_VERSION_KEY, uuid.uuid4().hex, INDEX_VERSION_TIMEOUT)
+        with _lock:
+            _index = None
+
+    with _lock:
+        _index = None
+    transaction.on_commit(bump)
+
+
+def connect_signals():
+    models = _job_models()
+    for key in PROGRAMS:
+        model = models.get(key)
+        if model is None:
+            logger.warning(f"Job table model {PROGRAMS[key][0]} is not installed; index invalidation skipped")
+            continue
+        post_save.connect(invalidate_job_index, sender=model, dispatch_uid=f'job_index_save_{key}')
+        post_delete.connect(invalidate_job_index, sender=model, dispatch_uid=f'job_index_delete_{key}')
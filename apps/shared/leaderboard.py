@@ -0,0 +1,218 @@
+"""
+Process-local engagement points leaderboard.
+
+Ranks used to be computed with ``UserPoints.objects.filter(total_points__gt=x)
+.count()`` after every like, comment and follow, and the leaderboard endpoint
+re-sorted the table on every request. A :class:`Leaderboard` keeps the
+eligible (alumni and OJT) users in a bisect-maintained list ordered by
+points, so rank lookups are a binary search and top-N / around-user pages
+are list slices.
+
+The board is loaded once per process and kept in sync:
+
+* saves/deletes of UserPoints in this process are applied on commit; only
+  users not yet on the board cost an eligibility lookup, cached until the
+  next full reload
+* changes made by other processes are picked up every REFRESH_INTERVAL
+  seconds by re-reading the rows updated since the last refresh
+* a full reload every FULL_RELOAD_INTERVAL seconds repairs anything the
+  deltas cannot see (rows deleted elsewhere, account type changes)
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+logger = logging.getLogger('apps.shared.leaderboard')
+
+REFRESH_INTERVAL = 5  # seconds between delta refreshes
+FULL_RELOAD_INTERVAL = 600  # seconds between full reloads
+
+# Re-read a little before the last refresh so rows committed late are not missed
+REFRESH_OVERLAP = timedelta(seconds=30)
+
+ELIGIBLE_USERS = Q(user__account_type__user=True) | Q(user__account_type__ojt=True)
+
+
+def is_eligible(user):
+    account_type = getattr(user, 'account_type', None)
+    return bool(getattr(account_type, 'user', False) or getattr(account_type, 'ojt', False))
+
+
+class Leaderboard:
+    """
+    Users ordered by points (highest first, then by user id).
+
+    ``rank`` is the competition rank used in points broadcasts: one plus the
+    number of users with strictly more points, so ties share a rank.
+    Positions (for pages) are zero-based indexes into the ordering.
+    """
+
+    def __init__(self, points_by_user=None):
+        self._lock = threading.Lock()
+        self._points = dict(points_by_user or {})
+        self._entries = sorted((-points, user_id) for user_id, points in self._points.items())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def update(self, user_id, points):
+        with self._lock:
+            old = self._points.get(user_id)
+            if old == points:
+                return
+            if old is not None:
+                del self._entries[bisect_left(self._entries, (-old, user_id))]
+            self._points[user_id] = points
+            insort(self._entries, (-points, user_id))
+
+    def remove(self, user_id):
+        with self._lock:
+            old = self._points.pop(user_id, None)
+            if old is not None:
+                del self._entries[bisect_left(self._entries, (-old, user_id))]
+
+    def score(self, user_id):
+        return self._points.get(user_id)
+
+    def rank(self, user_id):
+        """Competition rank of ``user_id``, or None when not on the board."""
+        points = self._points.get(user_id)
+        if points is None:
+            return None
+        return self.rank_for_points(points)
+
+    def rank_for_points(self, points):
+        """Rank a user with ``points`` would have."""
+        return bisect_left(self._entries, (-points,)) + 1
+
+    def position(self, user_id):
+        points = self._points.get(user_id)
+        if points is None:
+            return None
+        return bisect_left(self._entries, (-points, user_id))
+
+    def top(self, limit, offset=0):
+        """``[(user_id, points)]`` for positions ``offset`` .. ``offset + limit``."""
+        with self._lock:
+            entries = self._entries[offset:offset + limit]
+        return [(user_id, -negated) for negated, user_id in entries]
+
+    def around(self, user_id, radius):
+        """
+        ``(offset, [(user_id, points)])`` for up to ``radius`` users either side
+        of ``user_id``; ``(None, [])`` when the user is not on the board.
+        """
+        with self._lock:
+            position = self.position(user_id)
+            if position is None:
+                return None, []
+            offset = max(0, position - radius)
+            entries = self._entries[offset:position + radius + 1]
+        return offset, [(uid, -negated) for negated, uid in entries]
+
+
+def _eligible_points():
+    from apps.shared.models import UserPoints
+    return UserPoints.objects.filter(ELIGIBLE_USERS)
+
+
+def _load_board():
+    board = Leaderboard(_eligible_points().values_list('user_id', 'total_points'))
+    logger.info(f"Loaded engagement leaderboard with {len(board)} users")
+    return board
+
+
+_lock = threading.Lock()
+_board = None
+_eligibility = {}  # user_id -> eligible, for users not on the board
+_loaded_at = 0.0
+_refreshed_at = 0.0
+_watermark = None
+
+
+def _refresh(board, since):
+    for user_id, points in _eligible_points().filter(updated_at__gte=since).values_list('user_id', 'total_points'):
+        board.update(user_id, points)
+
+
+def get_leaderboard():
+    """Return the process-wide leaderboard, refreshing it when due."""
+    global _board, _loaded_at, _refreshed_at, _watermark
+    now = time.monotonic()
+    board = _board
+    if board is not None and now - _refreshed_at < REFRESH_INTERVAL:
+        return board
+    with _lock:
+        started = timezone.now()
+        if _board is None or now - _loaded_at >= FULL_RELOAD_INTERVAL:
+            _board = _load_board()
+            _eligibility.clear()
+            _loaded_at = now
+        elif now - _refreshed_at >= REFRESH_INTERVAL:
+            _refresh(_board, _watermark)
+        _watermark = started - REFRESH_OVERLAP
+        _refreshed_at = now
+        return _board
+
+
+def _is_eligible_id(board, user_id):
+    """Users already on the board are eligible; others are looked up once."""
+    if board.score(user_id) is not None:
+        return True
+    eligible = _eligibility.get(user_id)
+    if eligible is None:
+        from apps.shared.models import User
+        eligible = User.objects.filter(
+            Q(account_type__user=True) | Q(account_type__ojt=True), pk=user_id
+        ).exists()
+        _eligibility[user_id] = eligible
+    return eligible
+
+
+def record_points(user_id, total_points, eligible=None):
+    """
+    Apply a committed points total to the loaded board (if any). With
+    ``eligible`` None the user's eligibility is resolved from the board.
+    """
+    board = _board
+    if board is None:
+        return
+    if eligible is None:
+        eligible = _is_eligible_id(board, user_id)
+    if eligible:
+        board.update(user_id, total_points)
+    else:
+        board.remove(user_id)
+
+
+def user_rank(user_id, total_points):
+    """Rank for ``user_id`` holding ``total_points``, applying that total first."""
+    board = get_leaderboard()
+    board.update(user_id, total_points)
+    return board.rank(user_id)
+
+
+def _points_saved(sender, instance, **kwargs):
+    user_id, total_points = instance.user_id, instance.total_points
+    # Use the user only when already loaded; a lookup here would cost a query per save
+    user_field = sender._meta.get_field('user')
+    eligible = is_eligible(instance.user) if user_field.is_cached(instance) else None
+    transaction.on_commit(lambda: record_points(user_id, total_points, eligible))
+
+
+def _points_deleted(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: record_points(user_id, None, eligible=False))
+
+
+def connect_signals():
+    from apps.shared.models import UserPoints
+    post_save.connect(_points_saved, sender=UserPoints, dispatch_uid='leaderboard_points_saved')
+    post_delete.connect(_points_deleted, sender=UserPoints, dispatch_uid='leaderboard_points_deleted')
@@ -0,0 +1,58 @@
+"""
+Django management command to (re)build the materialized home-feed timeline.
+
+Usage:
+    # Rebuild every alumni/OJT timeline
+    python manage.py backfill_feed_timeline
+
+    # Rebuild a single user's timeline
+    python manage.py backfill_feed_timeline --user-id 123
+
+Run this once on an existing database before turning on FEED_TIMELINE_ENABLED
+(the timeline is maintained on every write from then on, whatever the
+setting), and again whenever it needs to be resynchronised with the live
+follow/admin/PESO rules.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from apps.shared.models import User
+from apps.shared.timeline import rebuild_timeline, timeline_enabled
+
+
+class Command(BaseCommand):
+    help = 'Backfill the FeedEntry home-feed timeline for alumni and OJT users'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user-id',
+            type=int,
+            help='Only rebuild the timeline of this user'
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(
+            Q(account_type__user=True) | Q(account_type__ojt=True)
+        ).select_related('account_type').order_by('user_id')
+
+        if options['user_id']:
+            users = users.filter(user_id=options['user_id'])
+            if not users.exists():
+                raise CommandError(f"Alumni/OJT user with ID {options['user_id']} does not exist")
+
+        total_users = 0
+        total_entries = 0
+        for user in users.iterator(chunk_size=500):
+            total_entries += rebuild_timeline(user)
+            total_users += 1
+            if total_users % 500 == 0:
+                self.stdout.write(f"   Rebuilt {total_users} timelines...")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Rebuilt {total_users} timelines ({total_entries} entries)"
+        ))
+        if not timeline_enabled():
+            self.stdout.write(self.style.WARNING(
+                "FEED_TIMELINE_ENABLED is off; posts_view still uses the live query path."
+            ))
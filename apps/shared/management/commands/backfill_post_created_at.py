@@ -0,0 +1,75 @@
+"""
+Django management command to date posts created before Post.created_at existed.
+
+Usage:
+    # Posts up to and including id 4821 predate the column
+    python manage.py backfill_post_created_at --up-to-post-id 4821
+
+    # Report the dates without writing them
+    python manage.py backfill_post_created_at --up-to-post-id 4821 --dry-run
+
+When the column is added, every existing post receives the same migration
+timestamp. This command gives each of them the time of its first comment or
+repost instead, capped so that dates never increase as post ids decrease (a
+post is never dated after a newer one). Posts without any activity take the
+date of the next newer post; the newest one keeps the migration timestamp.
+Run backfill_feed_timeline afterwards if the FeedEntry timeline is in use.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Min
+
+from apps.shared.models import Comment, Post, Repost
+
+BULK_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Date posts that predate Post.created_at from their first comment or repost'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--up-to-post-id',
+            type=int,
+            required=True,
+            help='Highest post id created before the created_at column was added',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many posts would be re-dated',
+        )
+
+    def handle(self, *args, **options):
+        up_to = options['up_to_post_id']
+        dry_run = options['dry_run']
+        if dry_run:
+            self.stdout.write(self.style.WARNING("DRY RUN MODE - No changes will be made"))
+
+        first_activity = {}
+        for model, date_field in ((Comment, 'date_created'), (Repost, 'repost_date')):
+            rows = model.objects.filter(post_id__lte=up_to).values('post_id').annotate(
+                first=Min(date_field)
+            ).values_list('post_id', 'first')
+            for post_id, first in rows:
+                if first and (post_id not in first_activity or first < first_activity[post_id]):
+                    first_activity[post_id] = first
+
+        # Dates may not increase as ids decrease, starting from the first newer post
+        ceiling = Post.objects.filter(post_id__gt=up_to).order_by('post_id').values_list(
+            'created_at', flat=True
+        ).first()
+        changed = []
+        for post in Post.objects.filter(post_id__lte=up_to).order_by('-post_id').only('post_id', 'created_at'):
+            created_at = first_activity.get(post.post_id, ceiling or post.created_at)
+            if ceiling:
+                created_at = min(created_at, ceiling)
+            ceiling = created_at
+            if post.created_at != created_at:
+                post.created_at = created_at
+                changed.append(post)
+
+        if not dry_run:
+            Post.objects.bulk_update(changed, ['created_at'], batch_size=BULK_BATCH_SIZE)
+        verb = 'Would re-date' if dry_run else 'Re-dated'
+        self.stdout.write(self.style.SUCCESS(f"✅ {verb} {len(changed)} posts"))
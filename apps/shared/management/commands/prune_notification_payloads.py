@@ -0,0 +1,39 @@
+"""
+Django management command to delete broadcast payloads nobody receives any more.
+
+Usage:
+    # Report orphaned payloads without deleting them
+    python manage.py prune_notification_payloads --dry-run
+
+    # Delete them (safe to schedule, e.g. nightly)
+    python manage.py prune_notification_payloads
+
+delete_notifications_view removes a payload with its last delivery, but
+deliveries also disappear through cascades (a deleted user takes their
+notifications along) which leave the shared NotificationPayload behind.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.shared.models import NotificationPayload
+
+
+class Command(BaseCommand):
+    help = 'Delete notification payloads that no longer have any deliveries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many payloads are orphaned',
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING("DRY RUN MODE - No changes will be made"))
+            orphaned = NotificationPayload.objects.filter(deliveries__isnull=True).count()
+            self.stdout.write(self.style.SUCCESS(f"✅ Found {orphaned} orphaned payloads"))
+            return
+
+        deleted = NotificationPayload.delete_orphans()
+        self.stdout.write(self.style.SUCCESS(f"✅ Deleted {deleted} orphaned payloads"))
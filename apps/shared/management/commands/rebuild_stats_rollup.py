@@ -0,0 +1,31 @@
+"""
+Django management command to rebuild the StatsRollup dashboard counts.
+
+Usage:
+    python manage.py rebuild_stats_rollup
+
+Run this once before turning on STATS_ROLLUP_ENABLED, and again whenever the
+rollup may have drifted from the User/AcademicInfo/OJTInfo tables (raw SQL
+updates, restores).
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.shared.stats_rollup import rebuild_rollup, rollup_enabled
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the StatsRollup table behind the alumni/OJT statistics dashboards'
+
+    def handle(self, *args, **options):
+        report = rebuild_rollup()
+
+        for dimension, rows in report.items():
+            self.stdout.write(f"   {dimension}: {rows} rows")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Rebuilt the statistics rollup ({sum(report.values())} rows)"
+        ))
+        if not rollup_enabled():
+            self.stdout.write(self.style.WARNING(
+                "STATS_ROLLUP_ENABLED is off; the statistics views still count the live tables."
+            ))
@@ -0,0 +1,38 @@
+"""
+Django management command to repair denormalized engagement counters.
+
+Usage:
+    # Report drifted rows without changing anything
+    python manage.py reconcile_engagement_counters --dry-run
+
+    # Recompute likes/comments/reposts/replies counters from source tables
+    python manage.py reconcile_engagement_counters
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.shared.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored likes/comments/reposts/replies counters on posts, reposts and comments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many rows have drifted',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        if dry_run:
+            self.stdout.write(self.style.WARNING("DRY RUN MODE - No changes will be made"))
+
+        report = reconcile_counters(dry_run=dry_run)
+        for label, drifted in report.items():
+            self.stdout.write(f"   {label}: {drifted} drifted rows")
+
+        total = sum(report.values())
+        verb = 'Found' if dry_run else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f"✅ {verb} {total} drifted counters"))
@@ -0,0 +1,170 @@
+"""
+@mention resolution and notifications.
+
+Every ``@name`` in a comment/reply used to be resolved with its own
+``f_name__icontains | l_name__icontains`` scan and notified with its own
+``Notification.objects.create``. :func:`resolve_mentions` resolves all of a
+text's mentions together:
+
+1. the author's followed users (the list the mention picker offers) are
+   loaded once and matched exactly on first/last name, case-insensitively
+2. names still unresolved are matched exactly against every user with one
+   query on the ``Lower(f_name)`` / ``Lower(l_name)`` indexes
+3. names still unresolved fall back to a substring match over the followed
+   users, which covers partially typed names
+
+Ties go to the lowest user id. :func:`notify_mentions` then creates every
+mention notification with one ``bulk_create``, sharing a NotificationPayload
+when several users are mentioned.
+"""
+import logging
+import re
+
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from apps.shared.models import Notification, NotificationPayload, User
+
+logger = logging.getLogger('apps.shared.mentions')
+
+MENTION_PATTERN = re.compile(r'@([^@\s]+)')
+
+_NAME_FIELDS = ('user_id', 'f_name', 'm_name', 'l_name')
+
+
+def parse_mentions(content):
+    """Distinct ``@mention`` names in ``content``, in order of appearance."""
+    mentions = []
+    for mention in MENTION_PATTERN.findall(content or ''):
+        if mention not in mentions:
+            mentions.append(mention)
+    return mentions
+
+
+def _name_key(mention):
+    """``(first, last)`` lower-cased; ``last`` is None for one-word mentions."""
+    parts = mention.lower().split()
+    if len(parts) == 1:
+        return parts[0], None
+    return parts[0], parts[-1]
+
+
+def _exact_match(key, user):
+    first, last = key
+    f_name, l_name = (user.f_name or '').lower(), (user.l_name or '').lower()
+    if last is None:
+        return first in (f_name, l_name)
+    return first == f_name and last == l_name
+
+
+def _substring_match(key, user):
+    first, last = key
+    f_name, l_name = (user.f_name or '').lower(), (user.l_name or '').lower()
+    if last is None:
+        return first in f_name or first in l_name
+    return first in f_name and last in l_name
+
+
+def _pick(key, users, match):
+    candidates = [user for user in users if match(key, user)]
+    return min(candidates, key=lambda user: user.user_id) if candidates else None
+
+
+def resolve_mentions(mentions, author):
+    """Map each mention name to the User it refers to (unresolved names are left out)."""
+    keys = {mention: _name_key(mention) for mention in mentions}
+    if not keys:
+        return {}
+
+    followed = list(User.objects.filter(followers__follower=author).only(*_NAME_FIELDS))
+    resolved = {}
+    for mention, key in keys.items():
+        user = _pick(key, followed, _exact_match)
+        if user is not None:
+            resolved[mention] = user
+
+    pending = {mention: key for mention, key in keys.items() if mention not in resolved}
+    if pending:
+        condition = Q()
+        for first, last in pending.values():
+            if last is None:
+                condition |= Q(f_name_lower=first) | Q(l_name_lower=first)
+            else:
+                condition |= Q(f_name_lower=first, l_name_lower=last)
+        candidates = list(
+            User.objects.annotate(f_name_lower=Lower('f_name'), l_name_lower=Lower('l_name'))
+            .filter(condition).only(*_NAME_FIELDS)
+        )
+        for mention, key in pending.items():
+            user = _pick(key, candidates, _exact_match) or _pick(key, followed, _substring_match)
+            if user is not None:
+                resolved[mention] = user
+    return resolved
+
+
+def mention_notification_content(author, post_id=None, comment_id=None, reply_id=None,
+                                 forum_id=None, donation_id=None, repost_id=None):
+    content = f"{author.full_name} mentioned you in a comment"
+
+    # Add actor ID for profile picture
+    content += f"<!--ACTOR_ID:{author.user_id}-->"
+
+    # Add post/comment/reply ID for redirection
+    if reply_id:
+        content += f"<!--REPLY_ID:{reply_id}-->"
+    if comment_id:
+        content += f"<!--COMMENT_ID:{comment_id}-->"
+    if repost_id:
+        content += f"<!--REPOST_ID:{repost_id}-->"
+
+    # Add forum, donation, or post ID (in priority order)
+    if forum_id:
+        content += f"<!--FORUM_ID:{forum_id}-->"
+    elif donation_id:
+        content += f"<!--DONATION_ID:{donation_id}-->"
+    elif post_id:
+        content += f"<!--POST_ID:{post_id}-->"
+    return content
+
+
+def notify_mentions(content, author, **target_ids):
+    """
+    Notify every user mentioned in ``content`` (except ``author``) and
+    broadcast the notifications. ``target_ids`` are the post/comment/reply/
+    forum/donation/repost ids embedded for redirection. Returns the
+    created notifications.
+    """
+    mentioned = resolve_mentions(parse_mentions(content), author)
+    recipients = {user.user_id: user for user in mentioned.values() if user.user_id != author.user_id}
+    if not recipients:
+        return []
+
+    subject = 'You were mentioned'
+    notification_content = mention_notification_content(author, **target_ids)
+    payload = None
+    if len(recipients) > 1:
+        payload = NotificationPayload.objects.create(
+            notif_type='mention', subject=subject, content=notification_content
+        )
+    notif_date = timezone.now()
+    notifications = Notification.objects.bulk_create([
+        Notification(
+            user=user,
+            notif_type='mention',
+            subject=None if payload else subject,
+            notifi_content='' if payload else notification_content,
+            notif_date=notif_date,
+            payload=payload,
+        )
+        for user in recipients.values()
+    ])
+
+    # Broadcast mention notifications in real-time
+    try:
+        from apps.messaging.notification_broadcaster import broadcast_notification
+        for notification in notifications:
+            broadcast_notification(notification)
+    except Exception as e:
+        logger.error(f"Error broadcasting mention notification: {e}")
+    return notifications
@@ -1,9 +1,12 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.conf import settings
+from django.utils import timezone
 from cryptography.fernet import Fernet
 from typing import Optional
 import hashlib
 import base64
+import uuid
 
 class AccountType(models.Model):
     account_type_id = models.AutoField(primary_key=True)
@@ -26,6 +29,8 @@ class Comment(models.Model):
     post = models.ForeignKey('Post', on_delete=models.CASCADE, related_name='comments')
     comment_content = models.TextField(null=True, blank=True)
     date_created = models.DateTimeField()
+    # Denormalized engagement counter, maintained by apps.shared.counters
+    replies_count = models.IntegerField(default=0)
 
 class Reply(models.Model):
     reply_id = models.AutoField(primary_key=True)
@@ -103,6 +108,29 @@ class Message(models.Model):
     message_content = models.TextField()
     date_send = models.DateTimeField()
 
+class NotificationPayload(models.Model):
+    """Subject and content shared by every recipient of a broadcast notification."""
+    payload_id = models.AutoField(primary_key=True)
+    notif_type = models.CharField(max_length=100)
+    subject = models.CharField(max_length=255, blank=True, null=True)
+    content = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'shared_notificationpayload'
+
+    @classmethod
+    def delete_orphans(cls, payload_ids=None):
+        """
+        Delete payloads that no delivery points at any more, limited to
+        ``payload_ids`` when given. Returns the number of payloads deleted.
+        """
+        orphans = cls.objects.filter(deliveries__isnull=True)
+        if payload_ids is not None:
+            orphans = orphans.filter(payload_id__in=payload_ids)
+        deleted, _ = orphans.delete()
+        return deleted
+
 class Notification(models.Model):
     notification_id = models.AutoField(primary_key=True)
     user = models.ForeignKey('User', on_delete=models.CASCADE, related_name='notifications')
@@ -110,6 +138,16 @@ class Notification(models.Model):
     subject = models.CharField(max_length=255, blank=True, null=True)  # Added subject field
     notifi_content = models.TextField()
     notif_date = models.DateTimeField()
+    # Broadcast deliveries leave subject/notifi_content empty and read them from the payload
+    payload = models.ForeignKey(
+        'NotificationPayload', on_delete=models.CASCADE, null=True, blank=True, related_name='deliveries'
+    )
+
+    def get_subject(self):
+        return self.payload.subject if self.payload_id else self.subject
+
+    def get_content(self):
+        return self.payload.content if self.payload_id else self.notifi_content
 
 class PostCategory(models.Model):
     post_cat_id = models.AutoField(primary_key=True)
@@ -126,6 +164,13 @@ class Post(models.Model):
     post_image = models.CharField(max_length=255)
     post_content = models.TextField()
     type = models.CharField(max_length=50, null=True, blank=True)
+    # Sort key of the merged post/repost feed; rows older than this column are
+    # dated by `python manage.py backfill_post_created_at`
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Denormalized engagement counters, maintained by apps.shared.counters
+    likes_count = models.IntegerField(default=0)
+    comments_count = models.IntegerField(default=0)
+    reposts_count = models.IntegerField(default=0)
 
 class Qpro(models.Model):
     qpro_id = models.AutoField(primary_key=True)
@@ -136,6 +181,9 @@ class Repost(models.Model):
     post = models.ForeignKey('Post', on_delete=models.CASCADE, related_name='reposts')
     user = models.ForeignKey('User', on_delete=models.CASCADE, related_name='reposts')
     repost_date = models.DateTimeField()
+    # Denormalized engagement counters, maintained by apps.shared.counters
+    likes_count = models.IntegerField(default=0)
+    comments_count = models.IntegerField(default=0)
 
 class ContentImage(models.Model):
     """Stores images for posts, forums, comments, replies, and donations"""
@@ -184,6 +232,63 @@ class Follow(models.Model):
     def __str__(self):
         return f"{self.follower.full_name} follows {self.following.full_name}"
 
+class FeedEntry(models.Model):
+    """Materialized home-feed timeline row (fan-out on write).
+
+    One row per (owner, item) for every post/repost visible in the owner's
+    feed, so reading a feed page is a single range scan on
+    (owner, sort_ts, item_type, item_id). Maintained by apps.shared.timeline.
+    """
+    # Numeric kinds double as the secondary sort key of the merged feed stream
+    POST = 1
+    REPOST = 0
+    ITEM_TYPE_CHOICES = [
+        (POST, 'Post'),
+        (REPOST, 'Repost'),
+    ]
+
+    owner = models.ForeignKey('User', on_delete=models.CASCADE, related_name='feed_entries')
+    item_type = models.SmallIntegerField(choices=ITEM_TYPE_CHOICES)
+    item_id = models.IntegerField()
+    # Author of the underlying post; lets unfollow prune without joining Post/Repost
+    source_user = models.ForeignKey('User', on_delete=models.CASCADE, related_name='+')
+    sort_ts = models.DateTimeField()
+
+    class Meta:
+        db_table = 'shared_feedentry'
+        unique_together = [['owner', 'item_type', 'item_id']]
+        indexes = [
+            models.Index(fields=['owner', '-sort_ts', '-item_type', '-item_id']),
+            models.Index(fields=['owner', 'source_user']),
+            models.Index(fields=['item_type', 'item_id']),
+        ]
+
+    def __str__(self):
+        return f"FeedEntry {self.get_item_type_display()} {self.item_id} for user {self.owner_id}"
+
+class StatsRollup(models.Model):
+    """Number of users per (year, course, dimension, value) for the statistics dashboards.
+
+    Dimensions are named per population (e.g. ``alumni_status``, ``ojt_status``).
+    Unknown years are stored as 0 and missing courses/values as ''.
+    Maintained by apps.shared.stats_rollup.
+    """
+    year = models.IntegerField(default=0)
+    course = models.CharField(max_length=100, blank=True, default='')
+    dimension = models.CharField(max_length=50)
+    value = models.CharField(max_length=255, blank=True, default='')
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'shared_statsrollup'
+        unique_together = [['dimension', 'year', 'course', 'value']]
+        indexes = [
+            models.Index(fields=['dimension', 'course', 'year']),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension}={self.value!r} ({self.year}, {self.course}): {self.count}"
+
 class Standard(models.Model):
     standard_id = models.AutoField(primary_key=True)
     tracker_form = models.ForeignKey('TrackerForm', on_delete=models.CASCADE, related_name='standards')
@@ -248,6 +353,13 @@ class User(models.Model):
     USERNAME_FIELD = 'acc_username'
     REQUIRED_FIELDS = []
 
+    class Meta:
+        indexes = [
+            # Case-insensitive exact name lookups (@mention resolution)
+            models.Index(Lower('f_name'), name='shared_user_f_name_lower_idx'),
+            models.Index(Lower('l_name'), name='shared_user_l_name_lower_idx'),
+        ]
+
     @property
     def is_anonymous(self):
         return False
@@ -365,6 +477,7 @@ class UserPoints(models.Model):
         indexes = [
             models.Index(fields=['-total_points']),  # For leaderboard queries
             models.Index(fields=['user']),
+            models.Index(fields=['updated_at']),  # Leaderboard delta refreshes
         ]
         verbose_name = 'User Points'
         verbose_name_plural = 'User Points'
@@ -372,87 +485,145 @@ class UserPoints(models.Model):
     def __str__(self):
         return f"{self.user.full_name}: {self.total_points} pts"
     
+    # Fields summed into total_points
+    POINTS_FIELDS = [
+        'points_from_likes',
+        'points_from_comments',
+        'points_from_shares',
+        'points_from_replies',
+        'points_from_posts',
+        'points_from_posts_with_photos',
+        'points_from_tracker_form',
+        'points_from_milestones',
+    ]
+    
+    # action type -> (points field, count field)
+    ACTION_FIELDS = {
+        'like': ('points_from_likes', 'like_count'),
+        'comment': ('points_from_comments', 'comment_count'),
+        'share': ('points_from_shares', 'share_count'),
+        'reply': ('points_from_replies', 'reply_count'),
+        'post': ('points_from_posts', 'post_count'),
+        'post_with_photo': ('points_from_posts_with_photos', 'post_with_photo_count'),
+        'tracker_form': ('points_from_tracker_form', 'tracker_form_count'),
+        'milestone': ('points_from_milestones', 'milestone_count'),
+    }
+    
     def _recalculate_total_points(self) -> None:
-        self.total_points = (
-            self.points_from_likes +
-            self.points_from_comments +
-            self.points_from_shares +
-            self.points_from_replies +
-            self.points_from_posts +
-            self.points_from_posts_with_photos +
-            self.points_from_tracker_form +
-            self.points_from_milestones
+        self.total_points = sum(getattr(self, field) for field in self.POINTS_FIELDS)
+    
+    @classmethod
+    def apply_deltas(cls, user_id: int, deltas: dict, create: bool = False) -> Optional['UserPoints']:
+        """Add ``deltas`` ({field: n}) to a user's row in one statement.
+        
+        Each field is clamped at zero and total_points is recomputed in the
+        same ``UPDATE ... RETURNING``, so concurrent actions cannot lose
+        updates. With ``create`` a missing row is inserted first
+        (``INSERT ... ON CONFLICT DO UPDATE``); otherwise None is returned
+        when the user has no row.
+        """
+        from django.db import connection
+        qn = connection.ops.quote_name
+        # SQLite spells GREATEST as the multi-argument MAX
+        greatest = 'MAX' if connection.vendor == 'sqlite' else 'GREATEST'
+        now = timezone.now()
+        
+        set_clauses, set_params = [], []
+        for field, delta in deltas.items():
+            set_clauses.append(f"{qn(field)} = {greatest}(up.{qn(field)} + %s, 0)")
+            set_params.append(delta)
+        total_terms, total_params = [], []
+        for field in cls.POINTS_FIELDS:
+            if field in deltas:
+                total_terms.append(f"{greatest}(up.{qn(field)} + %s, 0)")
+                total_params.append(deltas[field])
+            else:
+                total_terms.append(f"up.{qn(field)}")
+        set_clauses.append(f"{qn('total_points')} = {' + '.join(total_terms)}")
+        set_clauses.append(f"{qn('updated_at')} = %s")
+        set_sql = ', '.join(set_clauses)
+        set_params = set_params + total_params + [now]
+        table = qn(cls._meta.db_table)
+        
+        if not create:
+            sql = f"UPDATE {table} AS up SET {set_sql} WHERE up.{qn('user_id')} = %s RETURNING *"
+            return next(iter(cls.objects.raw(sql, set_params + [user_id])), None)
+        
+        insert_values = {}
+        for field in cls._meta.concrete_fields:
+            if field.primary_key:
+                continue
+            if field.attname == 'user_id':
+                insert_values[field.column] = user_id
+            elif field.attname in ('created_at', 'updated_at'):
+                insert_values[field.column] = now
+            elif field.attname in deltas:
+                insert_values[field.column] = max(0, deltas[field.attname])
+            else:
+                insert_values[field.column] = field.get_default()
+        insert_values['total_points'] = sum(max(0, deltas.get(field, 0)) for field in cls.POINTS_FIELDS)
+        columns = ', '.join(qn(column) for column in insert_values)
+        placeholders = ', '.join(['%s'] * len(insert_values))
+        sql = (
+            f"INSERT INTO {table} AS up ({columns}) VALUES ({placeholders}) "
+            f"ON CONFLICT ({qn('user_id')}) DO UPDATE SET {set_sql} RETURNING *"
         )
+        return next(iter(cls.objects.raw(sql, list(insert_values.values()) + set_params)))
+    
+    @classmethod
+    def _action_deltas(cls, action_type: str, points: int, sign: int) -> dict:
+        if action_type not in cls.ACTION_FIELDS:
+            return {}
+        points_field, count_field = cls.ACTION_FIELDS[action_type]
+        deltas = {points_field: sign * points}
+        if action_type != 'milestone' or points > 0:
+            deltas[count_field] = sign
+        return deltas
+    
+    @classmethod
+    def record_action(cls, user_id: int, action_type: str, points: int = 0) -> 'UserPoints':
+        """Add points and one action for ``user_id``, creating the row if needed."""
+        deltas = cls._action_deltas(action_type, points, 1)
+        if not deltas:
+            return cls.objects.get_or_create(user_id=user_id)[0]
+        return cls.apply_deltas(user_id, deltas, create=True)
+    
+    @classmethod
+    def reverse_action(cls, user_id: int, action_type: str, points: int = 0) -> Optional['UserPoints']:
+        """Undo one action for ``user_id``; None when the user has no points row."""
+        if action_type == 'milestone':
+            return cls.objects.filter(user_id=user_id).first()
+        deltas = cls._action_deltas(action_type, points, -1)
+        if not deltas:
+            return cls.objects.filter(user_id=user_id).first()
+        return cls.apply_deltas(user_id, deltas)
+    
+    def _copy_row(self, row) -> None:
+        if row is None:
+            return
+        for field in self._meta.concrete_fields:
+            setattr(self, field.attname, getattr(row, field.attname))
+        self._state.adding = False
     
     def add_points(self, action_type: str, points: int = 0) -> None:
         """Add points for a specific action type and increment counts."""
-        if action_type == 'like':
-            self.points_from_likes += points
-            self.like_count += 1
-        elif action_type == 'comment':
-            self.points_from_comments += points
-            self.comment_count += 1
-        elif action_type == 'share':
-            self.points_from_shares += points
-            self.share_count += 1
-        elif action_type == 'reply':
-            self.points_from_replies += points
-            self.reply_count += 1
-        elif action_type == 'post':
-            self.points_from_posts += points
-            self.post_count += 1
-        elif action_type == 'post_with_photo':
-            self.points_from_posts_with_photos += points
-            self.post_with_photo_count += 1
-        elif action_type == 'tracker_form':
-            self.points_from_tracker_form += points
-            self.tracker_form_count += 1
-        elif action_type == 'milestone':
-            self.points_from_milestones += points
-            if points > 0:
-                self.milestone_count += 1
-        self._recalculate_total_points()
-        self.save()
+        deltas = self._action_deltas(action_type, points, 1)
+        if deltas:
+            self._copy_row(self.apply_deltas(self.user_id, deltas, create=True))
     
     def add_milestone_points(self, points: int) -> None:
         """Award milestone points and increment milestone counters."""
         if points <= 0:
             return
-        self.points_from_milestones += points
-        self.milestone_count += 1
-        self._recalculate_total_points()
-        self.save(update_fields=[
-            'points_from_milestones',
-            'milestone_count',
-            'total_points',
-            'updated_at',
-        ])
+        self.add_points('milestone', points)
     
     def deduct_points(self, action_type: str, points: int = 0) -> None:
         """Deduct points for a specific action type (e.g., when unliking)."""
-        if action_type == 'like':
-            self.points_from_likes = max(0, self.points_from_likes - points)
-            self.like_count = max(0, self.like_count - 1)
-        elif action_type == 'comment':
-            self.points_from_comments = max(0, self.points_from_comments - points)
-            self.comment_count = max(0, self.comment_count - 1)
-        elif action_type == 'share':
-            self.points_from_shares = max(0, self.points_from_shares - points)
-            self.share_count = max(0, self.share_count - 1)
-        elif action_type == 'reply':
-            self.points_from_replies = max(0, self.points_from_replies - points)
-            self.reply_count = max(0, self.reply_count - 1)
-        elif action_type == 'post':
-            self.points_from_posts = max(0, self.points_from_posts - points)
-            self.post_count = max(0, self.post_count - 1)
-        elif action_type == 'post_with_photo':
-            self.points_from_posts_with_photos = max(0, self.points_from_posts_with_photos - points)
-            self.post_with_photo_count = max(0, self.post_with_photo_count - 1)
-        elif action_type == 'tracker_form':
-            self.points_from_tracker_form = max(0, self.points_from_tracker_form - points)
-            self.tracker_form_count = max(0, self.tracker_form_count - 1)
-        self._recalculate_total_points()
-        self.save()
+        if action_type == 'milestone':
+            return
+        deltas = self._action_deltas(action_type, points, -1)
+        if deltas:
+            self._copy_row(self.apply_deltas(self.user_id, deltas))
     
     def set_follow_count(self, count: int) -> None:
         """Update cached follow count used when evaluating milestones."""
@@ -531,7 +702,13 @@ class EngagementPointsSettings(models.Model):
     
     @classmethod
     def get_settings(cls):
-        """Get the current settings, creating default if none exist."""
+        """Get the current settings (cached per process, see apps.shared.points_settings)."""
+        from apps.shared.points_settings import get_points_settings
+        return get_points_settings()
+
+    @classmethod
+    def load_settings(cls):
+        """Read the settings row, creating default if none exist."""
         settings, created = cls.objects.get_or_create(
             pk=1,
             defaults={
@@ -703,30 +880,22 @@ class EmploymentHistory(models.Model):
         position_lower = normalized_position.lower()
         program_lower = (program or '').lower()
         
-        # Check alignment against job tables
+        # Check alignment against job tables (in-memory title index)
+        from apps.shared.job_index import get_job_index
+        job_index = get_job_index()
         alignment_found = False
         
-        # Check SimpleInfoTechJob (BSIT)
-        if 'bsit' in program_lower or 'information technology' in program_lower:
-            if SimpleInfoTechJob.objects.filter(job_title__iexact=normalized_position).exists():
-                self.job_alignment_status = 'aligned'
-                self.job_alignment_category = 'BSIT'
-                self.job_alignment_title = normalized_position
-                alignment_found = True
-        
-        # Check SimpleInfoSystemJob (BSIS)
-        if not alignment_found and ('bsis' in program_lower or 'information system' in program_lower):
-            if SimpleInfoSystemJob.objects.filter(job_title__iexact=normalized_position).exists():
-                self.job_alignment_status = 'aligned'
-                self.job_alignment_category = 'BSIS'
-                self.job_alignment_title = normalized_position
-                alignment_found = True
-        
-        # Check SimpleCompTechJob (BIT-CT)
-        if not alignment_found and ('bit-ct' in program_lower or 'computer technology' in program_lower):
-            if SimpleCompTechJob.objects.filter(job_title__iexact=normalized_position).exists():
+        # Check SimpleInfoTechJob (BSIT), SimpleInfoSystemJob (BSIS), SimpleCompTechJob (BIT-CT)
+        for key, category, program_names in (
+            ('bsit', 'BSIT', ('bsit', 'information technology')),
+            ('bsis', 'BSIS', ('bsis', 'information system')),
+            ('bit-ct', 'BIT-CT', ('bit-ct', 'computer technology')),
+        ):
+            if alignment_found or not any(name in program_lower for name in program_names):
+                continue
+            if job_index.exact(key, normalized_position) is not None:
                 self.job_alignment_status = 'aligned'
-                self.job_alignment_category = 'BIT-CT'
+                self.job_alignment_category = category
                 self.job_alignment_title = normalized_position
                 alignment_found = True
         
@@ -763,190 +932,53 @@ class EmploymentHistory(models.Model):
         """Update job alignment fields based on position_current and program
         This connects tracker answers to statistics types (CHED, SUC, AACUP)
         """
-        if not self.position_current:
-            self.job_alignment_status = 'not_aligned'
-            self.job_alignment_category = None
-            self.job_alignment_title = None
-            return
-        
-        normalized_position = self._normalize_job_title(self.position_current)
-        self.position_current = normalized_position
-        position_lower = normalized_position.lower()
-        course_lower = (self.user.academic_info.program or '').lower() if hasattr(self.user, 'academic_info') else ''
-        
-        # STEP 1: Self-employed status based on tracker answer Q23 (q_employment_type)
-        # Check if user is self-employed based on tracker response
-        tracker_data = getattr(self.user, 'tracker_data', None)
-        if tracker_data and tracker_data.q_employment_type:
-            employment_type_lower = tracker_data.q_employment_type.lower()
-            if 'self-employed' in employment_type_lower or 'self employed' in employment_type_lower:
-                self.self_employed = True
-            else:
-                self.self_employed = False
-        else:
-            self.self_employed = False
-        
-        # STEP 2: Check for high position status (for AACUP statistics)
-        # More specific keywords and context-aware detection
-        high_position_keywords = [
-            'chief', 'director', 'president', 'vice president', 'ceo', 'cto', 'cfo', 'vp',
-            'senior manager', 'senior director', 'executive', 'head of', 'lead'
-        ]
-        
-        # Check for high position keywords
-        is_high_position = any(keyword in position_lower for keyword in high_position_keywords)
-        
-        # Additional checks for management positions
-        if 'manager' in position_lower:
-            # Only consider "manager" as high position if it's not "assistant manager" or similar
-            if not any(exclude in position_lower for exclude in ['assistant', 'junior', 'trainee', 'intern']):
-                is_high_position = True
-        
-        self.high_position = is_high_position
-        
-        # STEP 3: Check for absorbed status (for AACUP) - typically first job after graduation
-        # Priority 1: If current company matches OJT company, they were absorbed
-        absorbed_by_ojt_match = False
-        if self.company_name_current and hasattr(self.user, 'ojt_company_profile') and self.user.ojt_company_profile:
-            ojt_company = getattr(self.user.ojt_company_profile, 'company_name', '')
-            if ojt_company and self.company_name_current:
-                # Case-insensitive comparison with normalization
-                current_company_normalized = self.company_name_current.lower().strip()
-                ojt_company_normalized = ojt_company.lower().strip()
-                
-                # Check for exact match or partial match (for variations in company names)
-                if (current_company_normalized == ojt_company_normalized or 
-                    current_company_normalized in ojt_company_normalized or
-                    ojt_company_normalized in current_company_normalized):
-                    absorbed_by_ojt_match = True
-                    self.absorbed = True
-        
-        # Priority 2: If not absorbed by OJT match, check if hired within 6 months of graduation
-        if not absorbed_by_ojt_match and self.date_started and hasattr(self.user, 'academic_info') and self.user.academic_info.year_graduated:
-            # If hired within 6 months of graduation, consider absorbed
-            from datetime import date
-            graduation_date = date(self.user.academic_info.year_graduated, 6, 30)  # Assume June graduation
-            
-            # Ensure date_started is a date object for comparison
-            if isinstance(self.date_started, str):
-                try:
-                    from datetime import datetime
-                    self.date_started = datetime.strptime(self.date_started, '%Y-%m-%d').date()
-                except (ValueError, TypeError):
-                    self.date_started = None
-            
-            if self.date_started and self.date_started <= graduation_date:
-                self.absorbed = True
-            else:
-                self.absorbed = False
-        elif not absorbed_by_ojt_match:
-            # If no date started or graduation info, default to False
-            self.absorbed = False
-        
-        # STEP 4: Smart Job Alignment with Database Expansion
-        # SENIOR DEV: Intelligent job alignment with automatic database expansion
+        # The rules live in apps.shared.job_alignment so bulk recalculation
+        # can run them without the ORM
         import logging
-        from django.contrib.postgres.search import TrigramSimilarity
+        from apps.shared.job_alignment import compute_job_alignment
+        from apps.shared.job_index import get_job_index
         
         logger = logging.getLogger('apps.shared.models')
-        job_aligned = False
-        match_method = None
-        
-        # Helper function for multi-tier matching
-        def find_job_match(job_model, position, position_lower):
-            """
-            Three-tier matching strategy:
-            1. Exact match (case-insensitive)
-            2. Substring match (contains)
-            3. Fuzzy match (trigram similarity > 0.6)
-            Returns: (matched_job, match_method)
-            """
-            # Tier 1: Exact match
-            match = job_model.objects.filter(job_title__iexact=position).first()
-            if match:
-                return match, 'exact'
-            
-            # Tier 2: Substring match
-            match = job_model.objects.filter(job_title__icontains=position_lower).first()
-            if match:
-                return match, 'substring'
-            
-            # Tier 3: Fuzzy match using trigram similarity
-            try:
-                match = job_model.objects.annotate(
-                    similarity=TrigramSimilarity('job_title', position_lower)
-                ).filter(similarity__gt=0.6).order_by('-similarity').first()
-                if match:
-                    return match, f'fuzzy (similarity: {match.similarity:.2f})'
-            except Exception:
-                pass  # Trigram not available, skip fuzzy matching
-            
-            return None, None
-        
-        # STEP 4A: Check user's own program first
-        user_program_match = None
-        user_program_category = None
-        
-        if 'bit-ct' in course_lower or 'computer technology' in course_lower:
-            matched_job, match_method = find_job_match(SimpleCompTechJob, self.position_current, position_lower)
-            if matched_job:
-                user_program_match = matched_job
-                user_program_category = 'comp_tech'
-        
-        elif 'bsit' in course_lower or 'information technology' in course_lower:
-            matched_job, match_method = find_job_match(SimpleInfoTechJob, self.position_current, position_lower)
-            if matched_job:
-                user_program_match = matched_job
-                user_program_category = 'info_tech'
-        
-        elif 'bsis' in course_lower or 'information system' in course_lower:
-            matched_job, match_method = find_job_match(SimpleInfoSystemJob, self.position_current, position_lower)
-            if matched_job:
-                user_program_match = matched_job
-                user_program_category = 'info_system'
+        academic_info = getattr(self.user, 'academic_info', None)
+        tracker_data = getattr(self.user, 'tracker_data', None)
+        ojt_company_profile = getattr(self.user, 'ojt_company_profile', None)
+        fields, match_method = compute_job_alignment({
+            'position_current': self.position_current,
+            'company_name_current': self.company_name_current,
+            'date_started': self.date_started,
+            'program': academic_info.program if academic_info else None,
+            'year_graduated': academic_info.year_graduated if academic_info else None,
+            'q_employment_type': tracker_data.q_employment_type if tracker_data else None,
+            'ojt_company_name': getattr(ojt_company_profile, 'company_name', None),
+        }, get_job_index())
+        for field, value in fields.items():
+            setattr(self, field, value)
         
-        # STEP 4B: If found in user's program - align immediately
-        if user_program_match:
-            self.job_alignment_status = 'aligned'
-            self.job_alignment_category = user_program_category
-            self.job_alignment_title = user_program_match.job_title
-            job_aligned = True
-            
+        if not self.position_current:
+            return
+        if match_method and 'fuzzy' in match_method:
             # Log fuzzy matches for review
-            if match_method and 'fuzzy' in match_method:
-                logger.info(f"Fuzzy match in own program: '{self.position_current}' -> '{user_program_match.job_title}' ({match_method})")
-        
-        # STEP 4C: If NOT found in user's program - show radio button for potential expansion
-        else:
-            # SENIOR DEV: Show radio button immediately, don't check other programs yet
-            self.job_alignment_status = 'pending_user_confirmation'
-            self.job_alignment_category = None
-            self.job_alignment_title = None
-            self.job_alignment_original_program = course_lower
-            
-            logger.info(f"Job not found in user's program: '{self.position_current}' (Program: {course_lower}, User: {self.user.user_id}) - Awaiting user confirmation")
+            logger.info(f"Fuzzy match in own program: '{self.position_current}' -> '{self.job_alignment_title}' ({match_method})")
+        elif self.job_alignment_status == 'pending_user_confirmation':
+            logger.info(f"Job not found in user's program: '{self.position_current}' (Program: {self.job_alignment_original_program}, User: {self.user.user_id}) - Awaiting user confirmation")
     
     def _find_cross_program_match(self, position_lower, original_program):
         """
         Find job matches in other programs when no match found in original program.
         Returns dict with match info or None if no cross-program match found.
         """
-        # Define program mappings
-        program_job_models = {
-            'bit-ct': SimpleCompTechJob,
-            'bsit': SimpleInfoTechJob, 
-            'bsis': SimpleInfoSystemJob
-        }
+        from apps.shared.job_index import PROGRAMS, get_job_index
+        job_index = get_job_index()
         
-        # Get all programs except the original one
-        other_programs = {k: v for k, v in program_job_models.items() if k not in original_program}
-        
-        for program_name, job_model in other_programs.items():
-            matched_job, match_method = self._find_job_match_in_model(job_model, position_lower)
+        # Check all programs except the original one
+        for program_name in PROGRAMS:
+            if program_name in original_program:
+                continue
+            matched_title, match_method = job_index.match(program_name, position_lower)
             
-            if matched_job:
+            if matched_title:
                 return {
-                    'title': matched_job.job_title,
+                    'title': matched_title,
                     'category': self._get_category_for_program(program_name),
                     'suggested_program': program_name,
                     'match_method': match_method
@@ -954,32 +986,6 @@ class EmploymentHistory(models.Model):
         
         return None
     
-    def _find_job_match_in_model(self, job_model, position_lower):
-        """Helper to find job match in a specific model"""
-        from django.contrib.postgres.search import TrigramSimilarity
-        
-        # Tier 1: Exact match
-        match = job_model.objects.filter(job_title__iexact=position_lower).first()
-        if match:
-            return match, 'exact'
-        
-        # Tier 2: Substring match
-        match = job_model.objects.filter(job_title__icontains=position_lower).first()
-        if match:
-            return match, 'substring'
-        
-        # Tier 3: Fuzzy match
-        try:
-            match = job_model.objects.annotate(
-                similarity=TrigramSimilarity('job_title', position_lower)
-            ).filter(similarity__gt=0.6).order_by('-similarity').first()
-            if match:
-                return match, f'fuzzy (similarity: {match.similarity:.2f})'
-        except Exception:
-            pass
-        
-        return None, None
-    
     def _get_category_for_program(self, program_name):
         """Get job category string for program name"""
         category_map = {
@@ -1195,6 +1201,56 @@ class OJTImport(models.Model):
         return f"OJT Import {self.import_id} - {self.course} {self.batch_year} ({self.section or 'No Section'})"
 
 
+class ImportJob(models.Model):
+    """Background alumni/OJT spreadsheet import, processed by apps.shared.import_jobs"""
+    ALUMNI = 'alumni'
+    OJT = 'ojt'
+    KIND_CHOICES = [
+        (ALUMNI, 'Alumni'),
+        (OJT, 'OJT'),
+    ]
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+
+    # UUID so job status URLs cannot be enumerated
+    job_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    file = models.FileField(upload_to='imports/', null=True, blank=True)  # Removed once processed
+    file_name = models.CharField(max_length=255)
+    params = models.JSONField(default=dict, blank=True)  # batch_year, course, coordinator...
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='import_jobs')
+    total_rows = models.IntegerField(default=0)
+    rows_processed = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    message = models.TextField(blank=True, default='')
+    result = models.JSONField(null=True, blank=True)  # Same payload the synchronous import returns
+    alumni_import = models.ForeignKey(Import, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    ojt_imports = models.ManyToManyField(OJTImport, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'shared_importjob'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} import {self.job_id} ({self.status})"
+
+
 class OJTCompanyProfile(models.Model):
     """OJT Company Profile - Stores company information for OJT students"""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='ojt_company_profile')
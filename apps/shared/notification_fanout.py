@@ -0,0 +1,178 @@
+"""
+Bulk notification fan-out for admin/PESO posts.
+
+An admin or PESO post notifies every alumnus and OJT student. Instead of one
+``Notification.objects.create`` and one channel-layer send per recipient
+inside the request, the subject and content are stored once as a
+NotificationPayload, the recipients are read in keyset-ordered chunks of
+ids, and each chunk's lightweight delivery rows (Notification rows pointing
+at the payload) are written with ``bulk_create``. Once every chunk is written
+the payload is pushed with a single ``group_send`` to the shared
+AUDIENCE_GROUP that alumni/OJT notification sockets join; each socket looks
+up its own notification id for the payload.
+
+The fan-out runs on a background thread after the post's transaction
+commits; the number of notifications delivered is logged and kept under
+``notification_fanout:<notif_type>:<object_id>`` in the cache.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.shared.models import Notification, NotificationPayload, User
+
+logger = logging.getLogger('apps.shared.notification_fanout')
+
+FANOUT_CHUNK_SIZE = 1000
+
+# Channel layer group joined by every alumni/OJT notification socket
+AUDIENCE_GROUP = 'notifications_audience'
+
+RESULT_TIMEOUT = 86400
+
+AUDIENCE_USERS = Q(account_type__ojt=True) | Q(account_type__user=True)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='notification-fanout')
+    return _executor
+
+
+def admin_peso_post_message(post_author, post_type='post', post_id=None):
+    """``(subject, content)`` for an admin/PESO post, or None for other authors."""
+    account_type = post_author.account_type
+    if account_type.admin:
+        author_label = "Admin"
+    elif account_type.peso:
+        author_label = "PESO"
+    else:
+        return None
+
+    if post_type == "forum":
+        content = f"{author_label} posted a new forum discussion."
+        subject = f"New Forum Discussion from {author_label}"
+    elif post_type == "donation":
+        content = f"{author_label} created a new donation request."
+        subject = f"New Donation Request from {author_label}"
+    else:
+        content = f"{author_label} shared a new post."
+        subject = f"New Post from {author_label}"
+
+    # Add author info (hidden metadata)
+    content += f"<!--AUTHOR_ID:{post_author.user_id}-->"
+    content += f"<!--AUTHOR_NAME:{post_author.full_name}-->"
+
+    # Add post link if available
+    if post_id:
+        if post_type == "forum":
+            content += f"<!--FORUM_ID:{post_id}-->"
+        elif post_type == "donation":
+            content += f"<!--DONATION_ID:{post_id}-->"
+        else:
+            content += f"<!--POST_ID:{post_id}-->"
+    return subject, content
+
+
+def _recipient_chunks(exclude_user_id):
+    recipients = User.objects.filter(AUDIENCE_USERS).exclude(user_id=exclude_user_id)
+    last_id = 0
+    while True:
+        chunk = list(
+            recipients.filter(user_id__gt=last_id).order_by('user_id')
+            .values_list('user_id', flat=True)[:FANOUT_CHUNK_SIZE]
+        )
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1]
+
+
+def _broadcast_payload(channel_layer, payload, notif_date):
+    from asgiref.sync import async_to_sync
+
+    async_to_sync(channel_layer.group_send)(AUDIENCE_GROUP, {
+        'type': 'notification_fanout',
+        'payload_id': payload.payload_id,
+        'notification': {
+            'type': payload.notif_type,
+            'subject': payload.subject or 'Notification',
+            'content': payload.content,
+            'date': notif_date.strftime('%Y-%m-%d %H:%M:%S'),
+            'is_read': False,
+            'timestamp': timezone.now().isoformat(),
+        },
+    })
+
+
+def fan_out_notification(notif_type, subject, content, exclude_user_id=None, object_id=None):
+    """
+    Create one notification per alumni/OJT user (except ``exclude_user_id``)
+    and broadcast the shared payload once. Returns the number delivered.
+    """
+    from channels.layers import get_channel_layer
+
+    channel_layer = get_channel_layer()
+    notif_date = timezone.now()
+    payload = NotificationPayload.objects.create(notif_type=notif_type, subject=subject, content=content)
+    delivered = 0
+    for user_ids in _recipient_chunks(exclude_user_id):
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                user_id=user_id,
+                notif_type=notif_type,
+                notifi_content='',
+                notif_date=notif_date,
+                payload=payload,
+            )
+            for user_id in user_ids
+        ])
+        delivered += len(notifications)
+
+    if delivered and channel_layer is not None:
+        try:
+            _broadcast_payload(channel_layer, payload, notif_date)
+        except Exception as e:
+            logger.error(f"Error broadcasting {notif_type} notifications: {e}")
+
+    logger.info(f"Delivered {delivered} {notif_type} notifications")
+    cache.set(f'notification_fanout:{notif_type}:{object_id}', {
+        'delivered': delivered,
+        'finished_at': timezone.now().isoformat(),
+    }, RESULT_TIMEOUT)
+    return delivered
+
+
+def _run_fanout(*args, **kwargs):
+    close_old_connections()
+    try:
+        return fan_out_notification(*args, **kwargs)
+    except Exception as e:
+        logger.error(f"Notification fan-out failed: {e}")
+        return 0
+    finally:
+        close_old_connections()
+
+
+def queue_admin_peso_post_notifications(post_author, post_type='post', post_id=None):
+    """
+    Schedule the admin/PESO post fan-out after the current transaction
+    commits. Returns False when the author is not admin/PESO.
+    """
+    message = admin_peso_post_message(post_author, post_type, post_id)
+    if message is None:
+        return False
+    subject, content = message
+    author_id = post_author.user_id
+    transaction.on_commit(lambda: _get_executor().submit(
+        _run_fanout, 'admin_peso_post', subject, content,
+        exclude_user_id=author_id, object_id=f'{post_type}-{post_id}',
+    ))
+    return True
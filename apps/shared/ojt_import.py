@@ -0,0 +1,778 @@
+"""
+Set-based OJT import for coordinators.
+
+The old importer walked the sheet row by row and hit the database several
+times per row (user lookups, get_or_create on every related model, OJTImport
+and SendDate lookups). :class:`OJTImportPipeline` runs the same rules in
+stages instead:
+
+1. parse     - normalise headers and clean every column with pandas
+2. prefetch  - load the sheet's users with their related rows, the OJTImport
+               owners of their batches and the batch SendDate, once each
+3. classify  - decide per row whether it is skipped, a new account, an
+               update (second import) or a retake of a different batch
+4. write     - bulk_create / bulk_update each model inside one transaction
+
+so the number of queries depends on the number of models, not rows.
+"""
+import logging
+import re
+import secrets
+import string
+from datetime import datetime
+
+import pandas as pd
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.shared.alumni_import import text_column, too_long_fields
+from apps.shared.models import (
+    AcademicInfo,
+    AccountType,
+    OJTCompanyProfile,
+    OJTImport,
+    OJTInfo,
+    SendDate,
+    User,
+    UserInitialPassword,
+    UserProfile,
+)
+from apps.shared.stats_rollup import rebuild_on_commit
+from apps.shared.timeline import seed_timelines_on_commit
+
+logger = logging.getLogger('apps.shared.ojt_import')
+
+REQUIRED_COLUMNS = ['CTU_ID']
+
+BULK_BATCH_SIZE = 500
+
+# Rows between progress callbacks
+PROGRESS_INTERVAL = 500
+
+# Lower-cased header variants -> canonical column name
+HEADER_ALIASES = {
+    'firstname': 'First_Name', 'first name': 'First_Name',
+    'middlename': 'Middle_Name', 'middle name': 'Middle_Name',
+    'lastname': 'Last_Name', 'last name': 'Last_Name',
+    'contactno': 'Contact_No', 'contact no': 'Contact_No', 'contact_no': 'Contact_No',
+    'contact number': 'Contact_No',
+    'company name': 'Company', 'company_name': 'Company', 'companyname': 'Company',
+    'company': 'Company',
+    'companyaddress': 'Company_Address', 'company address': 'Company_Address',
+    'companyemail': 'Company_Email', 'company email': 'Company_Email',
+    'companycontact': 'Company_Contact', 'company contact': 'Company_Contact',
+    'contactperson': 'Contact_Person', 'contact_person': 'Contact_Person',
+    'contact person name': 'Contact_Person', 'contact person': 'Contact_Person',
+    'contact_person_position': 'Position', 'contact person position': 'Position',
+    'contactpersonposition': 'Position', 'position': 'Position',
+    'ojt_status': 'Status', 'ojtstatus': 'Status', 'ojt status': 'Status',
+    'ojt_start_date': 'Ojt_Start_Date', 'start_date': 'Ojt_Start_Date', 'start date': 'Ojt_Start_Date',
+    'ojt_end_date': 'Ojt_End_Date', 'end_date': 'Ojt_End_Date', 'end date': 'Ojt_End_Date',
+    'civil status': 'Civil_Status',
+    'social media': 'Social_Media',
+    'batch year': 'Batch_Year', 'batch_year': 'Batch_Year', 'year': 'Batch_Year',
+}
+
+COMPANY_DETAIL_COLUMNS = {
+    'company_address': 'Company_Address',
+    'company_email': 'Company_Email',
+    'company_contact': 'Company_Contact',
+    'contact_person': 'Contact_Person',
+    'position': 'Position',
+}
+
+DEFAULT_SECTION = '4-A'
+
+
+class OJTImportError(ValueError):
+    """Raised when the uploaded sheet cannot be imported at all."""
+
+
+def _first_filled(df, *columns):
+    """Row-wise first non-blank value among ``columns``."""
+    result = pd.Series('', index=df.index, dtype=object)
+    for column in reversed(columns):
+        values = text_column(df, column)
+        result = values.where(values.ne(''), result)
+    return result
+
+
+def _date_column(df, *columns, dayfirst=False):
+    """Parse the first non-empty of ``columns`` into ``date`` objects (None if unparseable)."""
+    raw = pd.Series(None, index=df.index, dtype=object)
+    for column in reversed(columns):
+        if column in df.columns:
+            raw = df[column].where(df[column].notna(), raw)
+    parsed = pd.to_datetime(raw, errors='coerce', dayfirst=dayfirst, format='mixed')
+    dates = pd.Series(parsed.dt.date, index=df.index, dtype=object)
+    return dates.where(parsed.notna(), None)
+
+
+def _normalize_gender(value):
+    upper = value.upper()
+    if upper in ['MALE', 'M']:
+        return 'M'
+    if upper in ['FEMALE', 'F']:
+        return 'F'
+    return upper
+
+
+def _normalize_status(value):
+    if not value:
+        return 'Ongoing'
+    lower = value.lower()
+    if lower in ['completed', 'complete', 'done']:
+        return 'Completed'
+    if lower in ['ongoing', 'active', 'in progress']:
+        return 'Ongoing'
+    if lower in ['incomplete', 'failed', 'dropped', 'not started']:
+        return 'Not Started'
+    return value
+
+
+def _normalize_phone(value):
+    # Excel turns long numbers into scientific notation (e.g. 9.17E+09)
+    if value and 'E+' in value:
+        try:
+            return str(int(float(value)))
+        except ValueError:
+            pass
+    return value or None
+
+
+def _normalize_upper(value):
+    """Same canonical form OJTCompanyProfile.save() stores (bulk writes skip save())."""
+    collapsed = ' '.join(value.split()) if value else ''
+    return collapsed.upper() or None
+
+
+def _generate_password():
+    alphabet = string.ascii_letters + string.digits
+    return ''.join(secrets.choice(alphabet) for _ in range(12))
+
+
+def _related(user, name):
+    """Reverse one-to-one accessor that returns None instead of raising."""
+    try:
+        return getattr(user, name)
+    except ObjectDoesNotExist:
+        return None
+
+
+class OJTImportPipeline:
+    """
+    Import one coordinator OJT sheet.
+
+    Usage::
+
+        result = OJTImportPipeline(df, file.name, coordinator, batch_year, course).run()
+
+    ``run()`` returns the JSON payload ``import_ojt_view`` sends back and
+    leaves the created OJTImport rows in ``import_records``. The optional
+    ``progress(rows_processed, errors)`` callback is invoked while rows are
+    classified, before anything is written.
+    """
+
+    def __init__(self, df, file_name, coordinator, batch_year='', course='', progress=None):
+        self.df = df
+        self.progress = progress
+        self.file_name = file_name
+        self.coordinator = coordinator
+        self.batch_year = batch_year
+        self.course = course
+
+        self.errors = []
+        self.passwords = []
+        self.created_count = 0
+        self.updating_count = 0
+        self.skipped_count = 0
+        self.retaking_count = 0
+        self.deactivated_count = 0
+        self.reactivated_count = 0
+
+    # --- Stage 1: parse ---
+
+    def _normalize_headers(self):
+        rename_map = {}
+        for col in self.df.columns:
+            alias = HEADER_ALIASES.get(str(col).lower().strip())
+            if alias and alias != col:
+                rename_map[col] = alias
+        if rename_map:
+            self.df = self.df.rename(columns=rename_map)
+
+    def _parse(self):
+        df = self.df
+        self.has_section_column = 'Section' in df.columns
+        columns = {
+            'ctu_id': text_column(df, 'CTU_ID'),
+            'first_name': text_column(df, 'First_Name'),
+            'middle_name': text_column(df, 'Middle_Name'),
+            'last_name': text_column(df, 'Last_Name'),
+            'gender_raw': text_column(df, 'Gender'),
+            'section': text_column(df, 'Section'),
+            'password': text_column(df, 'Password'),
+            'status': text_column(df, 'Status').map(_normalize_status),
+            'contact_no': text_column(df, 'Contact_No'),
+            'email': text_column(df, 'Email'),
+            'address': text_column(df, 'Address'),
+            'civil_status': text_column(df, 'Civil_Status'),
+            'social_media': text_column(df, 'Social_Media'),
+            'company_name': _first_filled(df, 'Company Name', 'Company', 'Company name current'),
+            'birthdate': _date_column(df, 'Birthdate'),
+            'start_date': _date_column(df, 'Ojt_Start_Date', 'Start_Date', dayfirst=True),
+            'end_date': _date_column(df, 'Ojt_End_Date', 'End_Date', dayfirst=True),
+        }
+        for field, column in COMPANY_DETAIL_COLUMNS.items():
+            columns[field] = text_column(df, column)
+        columns['gender'] = columns['gender_raw'].map(_normalize_gender)
+        columns['has_birthdate'] = df['Birthdate'].notna() if 'Birthdate' in df.columns else pd.Series(False, index=df.index)
+
+        records = pd.DataFrame(columns, index=df.index).to_dict('records')
+        for position, row in enumerate(records):
+            row['row'] = position + 2
+            # Only OJT periods from 2021 onwards are treated as real start dates
+            if row['start_date'] and row['start_date'].year <= 2020:
+                row['start_date'] = None
+        self.rows = records
+
+    # --- Stage 2: prefetch ---
+
+    def _load_users(self):
+        ctu_ids = {row['ctu_id'] for row in self.rows if row['ctu_id']}
+        users = User.objects.filter(acc_username__in=ctu_ids).select_related(
+            'account_type', 'academic_info', 'profile', 'ojt_info',
+            'ojt_company_profile', 'initial_password',
+        )
+        self.users = {user.acc_username: user for user in users}
+
+    def _detect_batch_year(self):
+        """Existing first student > Batch_Year column > current year + 1."""
+        detected = None
+        if self.rows:
+            first_user = self.users.get(self.rows[0]['ctu_id'])
+            academic = _related(first_user, 'academic_info') if first_user else None
+            if academic:
+                detected = academic.year_graduated
+        if not detected and 'Batch_Year' in self.df.columns and len(self.df):
+            excel_year = self.df.iloc[0].get('Batch_Year')
+            if pd.notna(excel_year):
+                try:
+                    detected = int(excel_year)
+                except (TypeError, ValueError):
+                    pass
+        if not detected:
+            detected = datetime.now().year + 1
+        if not self.batch_year:
+            self.batch_year = str(detected)
+
+        match = re.search(r"(20\d{2})", str(self.batch_year))
+        try:
+            self.normalized_year = int(match.group(1)) if match else int(str(self.batch_year).strip())
+        except ValueError:
+            self.normalized_year = self.batch_year
+        self.new_batch_year = self.normalized_year if isinstance(self.normalized_year, int) else None
+
+    def _detect_sections(self):
+        if self.has_section_column:
+            sections = [row['section'] for row in self.rows if row['section']]
+            self.sections = list(dict.fromkeys(sections))
+            return
+        # Second import without a Section column: reuse the students' sections
+        sections = []
+        for user in self.users.values():
+            academic = _related(user, 'academic_info')
+            if user.account_type.ojt and academic and academic.section:
+                sections.append(academic.section)
+        self.sections = list(dict.fromkeys(sections)) or [DEFAULT_SECTION]
+
+    def _load_batch_owners(self):
+        """
+        Map ``(batch_year, section)`` -> coordinators who imported it,
+        including the OJTImport rows this run is about to create.
+        """
+        years = {
+            academic.year_graduated
+            for academic in (_related(user, 'academic_info') for user in self.users.values())
+            if academic and academic.year_graduated
+        }
+        self.batch_owners = {}
+        rows = OJTImport.objects.filter(batch_year__in=years).values_list('batch_year', 'section', 'coordinator')
+        for year, section, coordinator in rows:
+            self.batch_owners.setdefault((year, section), set()).add(coordinator)
+        for section in self.sections:
+            self.batch_owners.setdefault((self.normalized_year, section), set()).add(self.coordinator)
+
+    def _load_send_date(self):
+        send_date = SendDate.objects.filter(
+            coordinator=self.coordinator, batch_year=self.normalized_year
+        ).values_list('send_date', flat=True).first()
+        self.send_date = send_date or None
+
+    # --- Old batch housekeeping ---
+
+    def _sync_old_batches(self):
+        """
+        Deactivate this coordinator's students from older batches that are not
+        in the new sheet, and reactivate the ones that are. Students with an
+        Incomplete OJT stay active until the new batch's send date has passed.
+        """
+        old_year_sections = set(
+            OJTImport.objects.filter(coordinator=self.coordinator)
+            .exclude(batch_year=self.normalized_year)
+            .values_list('batch_year', 'section')
+        )
+        batch_filter = Q()
+        for year, section in old_year_sections:
+            if not year:
+                continue
+            if section:
+                batch_filter |= Q(academic_info__year_graduated=year, academic_info__section=section)
+            else:
+                batch_filter |= Q(academic_info__year_graduated=year)
+        if not batch_filter:
+            return
+
+        old_users = User.objects.filter(
+            batch_filter,
+            account_type__ojt=True,
+            user_status__iexact='Active',
+            academic_info__isnull=False,
+        ).values_list('user_id', 'acc_username', 'user_status', 'ojt_info__ojtstatus')
+
+        imported = {row['ctu_id'] for row in self.rows if row['ctu_id']}
+        today = timezone.now().date()
+        deactivate_ids = []
+        reactivate_ids = []
+        for user_id, ctu_id, user_status, ojt_status in old_users:
+            if ctu_id in imported:
+                if user_status != 'Active':
+                    reactivate_ids.append(user_id)
+                    if ctu_id in self.users:
+                        self.users[ctu_id].user_status = 'Active'
+                continue
+            is_incomplete = ojt_status and str(ojt_status).strip().lower() in ['incomplete', 'in complete']
+            if is_incomplete and self.send_date and today < self.send_date:
+                logger.info(f"Keeping {ctu_id} active: Incomplete OJT and batch {self.normalized_year} send date {self.send_date} not yet due")
+                continue
+            deactivate_ids.append(user_id)
+
+        if deactivate_ids:
+            User.objects.filter(user_id__in=deactivate_ids).update(user_status='Inactive')
+        if reactivate_ids:
+            User.objects.filter(user_id__in=reactivate_ids).update(user_status='Active')
+        self.deactivated_count = len(deactivate_ids)
+        self.reactivated_count = len(reactivate_ids)
+
+    # --- Stage 3: classify ---
+
+    def _skip(self, message):
+        self.errors.append(message)
+        self.skipped_count += 1
+
+    def _ownership_error(self, row, user):
+        """Block students whose batch belongs to another coordinator."""
+        academic = _related(user, 'academic_info')
+        if not academic:
+            return None
+        user_year = academic.year_graduated
+        user_section = academic.section or ''
+        owners = self.batch_owners.get((user_year, user_section))
+        if owners:
+            others = owners - {self.coordinator}
+            if others:
+                return (
+                    f"Row {row['row']}: CTU_ID {row['ctu_id']} was already imported by {next(iter(others))} "
+                    f"(batch {user_year}, section {user_section}). Cannot import to {self.coordinator}."
+                )
+        elif user.account_type and user.account_type.ojt:
+            return (
+                f"Row {row['row']}: CTU_ID {row['ctu_id']} already exists as OJT student "
+                f"(batch {user_year}, section {user_section}) but has no import record. "
+                f"Cannot import to prevent conflicts."
+            )
+        return None
+
+    def _new_user_error(self, row):
+        required = {
+            "FirstName": row['first_name'],
+            "LastName": row['last_name'],
+            "Gender": row['gender'],
+            "Section": row['section'],
+            "Birthdate": row['has_birthdate'],
+            "ContactNo": row['contact_no'],
+            "Email": row['email'],
+            "Address": row['address'],
+        }
+        missing = [key for key, value in required.items() if not value]
+        if missing:
+            return f"Row {row['row']}: New user requires - {', '.join(missing)}"
+        if row['gender'] not in ['M', 'F']:
+            return (
+                f"Row {row['row']}: Gender must be 'M'/'Male' or 'F'/'Female', "
+                f"but was '{row['gender']}' (from raw: '{row['gender_raw']}')"
+            )
+        birthdate = row['birthdate']
+        if birthdate and (birthdate.year < 1900 or birthdate.year > 2020):
+            raw = self.df['Birthdate'].iloc[row['row'] - 2]
+            return f"Row {row['row']}: Invalid birthdate '{raw}'. Must be between 1900-2020."
+        return None
+
+    def _length_error(self, row, new_user):
+        """Reject values the bulk writes would fail on with DataError."""
+        user_values = {
+            'acc_username': row['ctu_id'],
+            'f_name': row['first_name'],
+            'm_name': row['middle_name'],
+            'l_name': row['last_name'],
+            'gender': row['gender'],
+        }
+        company_values = {field: row[field] for field in COMPANY_DETAIL_COLUMNS}
+        company_values['company_name'] = _normalize_upper(row['company_name'])
+        company_values['position'] = _normalize_upper(row['position'])
+        too_long = (
+            too_long_fields(User, user_values)
+            + too_long_fields(AcademicInfo, {'section': row['user_section'], 'program': self.course})
+            + too_long_fields(OJTInfo, {'ojtstatus': row['status']})
+            + too_long_fields(OJTCompanyProfile, company_values)
+        )
+        if new_user:
+            too_long += too_long_fields(UserProfile, {
+                'phone_num': _normalize_phone(row['contact_no']),
+                'civil_status': row['civil_status'],
+                'social_media': row['social_media'],
+            })
+        if too_long:
+            return f"Row {row['row']}: Value too long for {', '.join(too_long)}"
+        return None
+
+    def _classify(self):
+        self.new_rows = []
+        self.update_rows = []
+        self.retake_user_ids = set()
+        seen = set()
+        for position, row in enumerate(self.rows):
+            if self.progress and position and position % PROGRESS_INTERVAL == 0:
+                self.progress(position, self.errors)
+            ctu_id = row['ctu_id']
+            if not ctu_id:
+                self._skip(f"Row {row['row']}: Missing CTU_ID (required)")
+                continue
+            if ctu_id in seen:
+                self._skip(f"Row {row['row']}: Duplicate CTU_ID {ctu_id} in file (skipped)")
+                continue
+            seen.add(ctu_id)
+
+            if row['section'] and row['section'] in self.sections:
+                row['user_section'] = row['section']
+            else:
+                row['user_section'] = self.sections[0] if self.sections else f"{self.batch_year}-A"
+
+            user = self.users.get(ctu_id)
+            if user is None:
+                error = self._new_user_error(row) or self._length_error(row, new_user=True)
+                if error:
+                    self._skip(error)
+                    continue
+                self.new_rows.append(row)
+                continue
+
+            error = self._ownership_error(row, user) or self._length_error(row, new_user=False)
+            if error:
+                self._skip(error)
+                continue
+
+            academic = _related(user, 'academic_info')
+            old_batch_year = academic.year_graduated if academic else None
+            if old_batch_year and self.new_batch_year and old_batch_year != self.new_batch_year:
+                if user.account_type and user.account_type.user:
+                    self._skip(
+                        f"Row {row['row']}: Student {ctu_id} ({row['first_name']} {row['last_name']}) "
+                        f"is already APPROVED (alumni) and cannot retake OJT."
+                    )
+                    continue
+                # Retaking OJT in a new batch: old OJT data is dropped and recreated
+                self.retake_user_ids.add(user.user_id)
+                self.retaking_count += 1
+            self.update_rows.append((user, row))
+
+    # --- Stage 4: write ---
+
+    def _create_import_records(self):
+        self.import_records = OJTImport.objects.bulk_create([
+            OJTImport(
+                coordinator=self.coordinator,
+                batch_year=self.normalized_year,
+                course=self.course or 'Unknown',
+                section=section,
+                file_name=self.file_name,
+            )
+            for section in self.sections
+        ])
+
+    def _apply_company(self, company, row, has_new_company):
+        if has_new_company:
+            company.company_name = _normalize_upper(row['company_name'])
+        for field in COMPANY_DETAIL_COLUMNS:
+            if row[field]:
+                value = row[field]
+                setattr(company, field, _normalize_upper(value) if field == 'position' else value)
+
+    def _write_updates(self, ojt_account_type):
+        now = timezone.now()
+        user_changes, creates, updates = [], {}, {}
+        password_creates, password_updates = [], []
+        for model in (UserProfile, AcademicInfo, OJTInfo, OJTCompanyProfile):
+            creates[model] = []
+            updates[model] = []
+
+        def stage(model, instance):
+            if instance.pk:
+                instance.updated_at = now
+                updates[model].append(instance)
+            else:
+                creates[model].append(instance)
+
+        if self.retake_user_ids:
+            OJTInfo.objects.filter(user_id__in=self.retake_user_ids).delete()
+            OJTCompanyProfile.objects.filter(user_id__in=self.retake_user_ids).delete()
+
+        for user, row in self.update_rows:
+            retaking = user.user_id in self.retake_user_ids
+            profile = _related(user, 'profile') or UserProfile(user=user)
+            academic = _related(user, 'academic_info') or AcademicInfo(user=user)
+            ojt_info = None if retaking else _related(user, 'ojt_info')
+            company = None if retaking else _related(user, 'ojt_company_profile')
+
+            if retaking and (not user.account_type or not user.account_type.ojt):
+                user.account_type = ojt_account_type
+
+            # Section only changes when the sheet states it explicitly
+            if row['section']:
+                academic.section = row['user_section']
+            if isinstance(self.normalized_year, int):
+                academic.year_graduated = self.normalized_year
+            if self.course:
+                academic.program = self.course
+
+            if row['first_name']:
+                user.f_name = row['first_name']
+            if row['middle_name']:
+                user.m_name = row['middle_name']
+            if row['last_name']:
+                user.l_name = row['last_name']
+            if row['gender'] in ['M', 'F']:
+                user.gender = row['gender']
+            user_changes.append(user)
+
+            if row['birthdate']:
+                profile.birthdate = row['birthdate']
+
+            # Initial password: activate the existing record, or store the sheet's password
+            initial = _related(user, 'initial_password')
+            if initial:
+                if row['password']:
+                    initial.set_plaintext(row['password'])
+                initial.is_active = True
+                password_updates.append(initial)
+            elif row['password']:
+                initial = UserInitialPassword(user=user, is_active=True)
+                initial.set_plaintext(row['password'])
+                password_creates.append(initial)
+
+            has_existing_company = bool(company and company.company_name and str(company.company_name).strip())
+            has_new_company = bool(row['company_name'])
+            start_date, end_date = row['start_date'], row['end_date']
+            if has_new_company and not has_existing_company:
+                # Second import: the OJT period starts today and runs to the batch send date
+                start_date = now.date()
+                if self.send_date:
+                    end_date = self.send_date
+
+            ojt_info = ojt_info or OJTInfo(user=user)
+            if start_date:
+                ojt_info.ojtstatus = row['status']
+                ojt_info.ojt_start_date = start_date
+            elif not ojt_info.ojtstatus:
+                ojt_info.ojtstatus = 'Not Started'
+            if end_date:
+                ojt_info.ojt_end_date = end_date
+
+            if company is None:
+                company = OJTCompanyProfile(user=user, start_date=start_date, end_date=end_date)
+            else:
+                if start_date:
+                    company.start_date = start_date
+                if end_date:
+                    company.end_date = end_date
+            company.coordinator = self.coordinator
+            self._apply_company(company, row, has_new_company)
+
+            stage(UserProfile, profile)
+            stage(AcademicInfo, academic)
+            stage(OJTInfo, ojt_info)
+            stage(OJTCompanyProfile, company)
+
+        User.objects.bulk_update(
+            user_changes, ['f_name', 'm_name', 'l_name', 'gender', 'account_type'], batch_size=BULK_BATCH_SIZE
+        )
+        update_fields = {
+            UserProfile: ['birthdate', 'updated_at'],
+            AcademicInfo: ['section', 'year_graduated', 'program', 'updated_at'],
+            OJTInfo: ['ojtstatus', 'ojt_start_date', 'ojt_end_date', 'updated_at'],
+            OJTCompanyProfile: ['coordinator', 'company_name', 'start_date', 'end_date', 'updated_at']
+                               + list(COMPANY_DETAIL_COLUMNS),
+        }
+        for model, fields in update_fields.items():
+            model.objects.bulk_create(creates[model], batch_size=BULK_BATCH_SIZE)
+            model.objects.bulk_update(updates[model], fields, batch_size=BULK_BATCH_SIZE)
+        UserInitialPassword.objects.bulk_create(password_creates, batch_size=BULK_BATCH_SIZE)
+        UserInitialPassword.objects.bulk_update(
+            password_updates, ['password_encrypted', 'is_active'], batch_size=BULK_BATCH_SIZE
+        )
+        self.updating_count = len(self.update_rows)
+
+    def _write_new_users(self, ojt_account_type):
+        users = []
+        for row in self.new_rows:
+            row['password'] = row['password'] or _generate_password()
+            user = User(
+                acc_username=row['ctu_id'],
+                user_status='active',
+                f_name=row['first_name'],
+                m_name=row['middle_name'],
+                l_name=row['last_name'],
+                gender=row['gender'],
+                account_type=ojt_account_type,
+            )
+            user.set_password(row['password'])
+            users.append(user)
+        users = User.objects.bulk_create(users, batch_size=BULK_BATCH_SIZE)
+        # bulk_create skips the timeline signal
+        seed_timelines_on_commit(user.pk for user in users)
+
+        year = self.normalized_year if isinstance(self.normalized_year, int) else None
+        profiles, academics, ojt_infos, companies, initials = [], [], [], [], []
+        for user, row in zip(users, self.new_rows):
+            birthdate = row['birthdate']
+            profiles.append(UserProfile(
+                user=user,
+                age=None,
+                phone_num=_normalize_phone(row['contact_no']),
+                address=row['address'] or None,
+                civil_status=row['civil_status'] or None,
+                social_media=row['social_media'] or None,
+                birthdate=birthdate if birthdate and birthdate.year > 1900 else None,
+            ))
+            academics.append(AcademicInfo(
+                user=user,
+                year_graduated=year,
+                program=self.course or 'OJT',
+                section=row['user_section'],
+            ))
+            ojt_infos.append(OJTInfo(
+                user=user,
+                ojt_start_date=row['start_date'],
+                ojt_end_date=row['end_date'],
+                ojtstatus=row['status'] if row['start_date'] else 'Not Started',
+            ))
+            company = OJTCompanyProfile(
+                user=user,
+                coordinator=self.coordinator,
+                start_date=row['start_date'],
+                end_date=row['end_date'],
+            )
+            self._apply_company(company, row, bool(row['company_name']))
+            companies.append(company)
+            initial = UserInitialPassword(user=user, is_active=True)
+            initial.set_plaintext(row['password'])
+            initials.append(initial)
+            self.passwords.append({
+                'CTU_ID': row['ctu_id'],
+                'First_Name': row['first_name'],
+                'Last_Name': row['last_name'],
+                'Password': row['password'],
+            })
+
+        for model, instances in (
+            (UserProfile, profiles),
+            (AcademicInfo, academics),
+            (OJTInfo, ojt_infos),
+            (OJTCompanyProfile, companies),
+            (UserInitialPassword, initials),
+        ):
+            model.objects.bulk_create(instances, batch_size=BULK_BATCH_SIZE)
+        self.created_count = len(users)
+
+    def _finish_import_records(self):
+        for record in self.import_records:
+            record.records_imported = self.created_count
+            if self.errors:
+                record.status = 'Partial' if self.created_count > 0 else 'Failed'
+        OJTImport.objects.bulk_update(self.import_records, ['records_imported', 'status'])
+
+    # --- Entry point ---
+
+    def run(self):
+        self._normalize_headers()
+        missing = [col for col in REQUIRED_COLUMNS if col not in self.df.columns]
+        if missing:
+            raise OJTImportError(f'Missing required OJT columns: {", ".join(missing)}')
+
+        ojt_account_type, _ = AccountType.objects.get_or_create(
+            admin=False, peso=False, user=False, coordinator=False, ojt=True,
+        )
+        self._parse()
+        self._load_users()
+        self._detect_batch_year()
+        self._detect_sections()
+        self._load_send_date()
+        self._load_batch_owners()
+        self._classify()
+        if self.progress:
+            self.progress(len(self.rows), self.errors)
+
+        with transaction.atomic():
+            self._create_import_records()
+            self._sync_old_batches()
+            self._write_updates(ojt_account_type)
+            self._write_new_users(ojt_account_type)
+            self._finish_import_records()
+            # Bulk writes skip the rollup signals
+            rebuild_on_commit()
+
+        logger.info(
+            f"OJT import by {self.coordinator}: {self.created_count} created, {self.updating_count} updated, "
+            f"{self.skipped_count} skipped, {self.retaking_count} retaking, {self.deactivated_count} deactivated"
+        )
+        return self._response()
+
+    def _response(self):
+        data = {
+            'success': True,
+            'message': (
+                f'OJT import completed. Created: {self.created_count}, Updated: {self.updating_count}, '
+                f'Skipped: {self.skipped_count}, Deactivated: {self.deactivated_count}'
+            ),
+            'created_count': self.created_count,
+            'updating_count': self.updating_count,
+            'skipped_count': self.skipped_count,
+            'retaking_count': self.retaking_count,
+            'deactivated_count': self.deactivated_count,  # Old batch students deactivated
+            'reactivated_count': self.reactivated_count,  # Students reactivated (same CTU_ID)
+            'errors': self.errors[:10],  # Limit errors to first 10
+            'passwords': self.passwords,  # Only new accounts get passwords (first import)
+            'sections': self.sections,
+            'batch_year': self.normalized_year,
+        }
+        if self.retaking_count > 0:
+            data['message'] += f' 🔄 {self.retaking_count} student(s) retaking OJT (account reactivated, old data cleared).'
+        if self.passwords:
+            data['message'] += f' ✅ {len(self.passwords)} passwords generated (First Import).'
+        else:
+            data['message'] += ' ℹ️ No passwords generated (Second Import - company info updated).'
+        if self.sections:
+            data['message'] += f' Detected sections: {", ".join(self.sections)}'
+        return data
@@ -1,13 +1,18 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional
 
+from django.core.cache import cache
 from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.utils import timezone
 
 from apps.shared.milestones import ENGAGEMENT_MILESTONES, MilestoneSpec
 from apps.shared.models import PointsTask, UserPoints, UserTaskCompletion
 
+MILESTONE_TASKS_CACHE_KEY = 'engagement_milestone_tasks'
+MILESTONE_TASKS_TIMEOUT = 300
+
 
 def ensure_milestone_tasks() -> Dict[str, PointsTask]:
     """
@@ -54,55 +59,89 @@ def _get_metric_value(user_points: UserPoints, spec: MilestoneSpec) -> int:
     return max(0, getattr(user_points, spec.metric, 0))
 
 
-def evaluate_and_award_milestones(user_points: UserPoints) -> List[dict]:
+def milestone_tasks() -> Dict[str, PointsTask]:
+    """
+    Cached ``ensure_milestone_tasks()`` result; PointsTask saves and deletes
+    drop the cache so admin changes apply immediately.
+    """
+    tasks = cache.get(MILESTONE_TASKS_CACHE_KEY)
+    if tasks is None:
+        tasks = ensure_milestone_tasks()
+        cache.set(MILESTONE_TASKS_CACHE_KEY, tasks, MILESTONE_TASKS_TIMEOUT)
+    return tasks
+
+
+def _invalidate_milestone_tasks(**kwargs) -> None:
+    cache.delete(MILESTONE_TASKS_CACHE_KEY)
+
+
+def connect_signals() -> None:
+    post_save.connect(_invalidate_milestone_tasks, sender=PointsTask, dispatch_uid='milestone_tasks_saved')
+    post_delete.connect(_invalidate_milestone_tasks, sender=PointsTask, dispatch_uid='milestone_tasks_deleted')
+
+
+def evaluate_and_award_milestones(
+    user_points: UserPoints,
+    metrics: Optional[Iterable[str]] = None,
+    settings=None,
+) -> List[dict]:
     """
     Evaluate milestone progress for a user and award any newly completed milestones.
 
+    ``metrics`` limits the check to milestones on those UserPoints counters
+    (e.g. only ``like_count`` after a like). Completions are only queried for
+    milestones whose threshold ``user_points`` already reaches.
+
     Returns a list describing each milestone that awarded points during this evaluation.
     """
     from apps.shared.models import EngagementPointsSettings
     
     # Check if milestone tasks feature is enabled
-    settings = EngagementPointsSettings.get_settings()
+    if settings is None:
+        settings = EngagementPointsSettings.get_settings()
     if not getattr(settings, 'milestone_tasks_enabled', True):
         return []  # Milestone tasks are disabled, don't award any
     
-    user = user_points.user
-    tasks = ensure_milestone_tasks()
-
-    existing_completions = {
-        completion.task.task_type: completion
-        for completion in UserTaskCompletion.objects.filter(
-            user=user, task__task_type__in=tasks.keys()
-        )
-    }
-
-    awarded: List[dict] = []
+    tasks = milestone_tasks()
+    metrics = set(metrics) if metrics is not None else None
 
+    due = []
     for spec in ENGAGEMENT_MILESTONES:
+        if metrics is not None and spec.metric not in metrics:
+            continue
         task = tasks.get(spec.task_type)
         if not task or not task.is_active:
             continue
-        if spec.task_type in existing_completions:
-            continue
+        required = task.required_count if task.required_count else spec.threshold
+        if _get_metric_value(user_points, spec) >= required:
+            due.append((spec, task))
+    if not due:
+        return []
 
-        current_value = _get_metric_value(user_points, spec)
-        required = task.required_count if (task and task.required_count) else spec.threshold
-        if current_value < required:
+    completed_task_ids = set(
+        UserTaskCompletion.objects.filter(
+            user_id=user_points.user_id, task__in=[task for _, task in due]
+        ).values_list('task_id', flat=True)
+    )
+
+    awarded: List[dict] = []
+
+    for spec, task in due:
+        if task.task_id in completed_task_ids:
             continue
 
         with transaction.atomic():
             # Double-check completion inside the transaction to avoid race conditions.
             completion = (
                 UserTaskCompletion.objects.select_for_update()
-                .filter(user=user, task=task)
+                .filter(user_id=user_points.user_id, task=task)
                 .first()
             )
             if completion:
                 continue
 
             completion = UserTaskCompletion.objects.create(
-                user=user,
+                user_id=user_points.user_id,
                 task=task,
                 points_awarded=task.points,
             )
@@ -133,7 +172,7 @@ def get_milestone_status(user_points: UserPoints) -> List[dict]:
     if not getattr(settings, 'milestone_tasks_enabled', True):
         return []  # Milestone tasks are disabled, return empty list
     
-    tasks = ensure_milestone_tasks()
+    tasks = milestone_tasks()
 
     completions = {
         completion.task.task_type: completion
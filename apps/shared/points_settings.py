@@ -0,0 +1,108 @@
+"""
+Process-local cache of the EngagementPointsSettings singleton.
+
+``EngagementPointsSettings.get_settings()`` used to run a ``get_or_create``
+on every call, and a single like reads the settings several times (points
+award, milestone check, rate limiter). The row is now kept per process:
+
+* within SETTINGS_TTL seconds the cached copy is returned without any I/O
+* after that, the version stored under SETTINGS_VERSION_KEY in the shared
+  cache is compared with the cached copy's; the row is only re-read when it
+  changed, or at least every SETTINGS_MAX_AGE seconds
+* saves and deletes bump the version, so updates made through
+  ``engagement_points_settings_view`` or the admin reach every worker within
+  SETTINGS_TTL seconds (when the cache backend is shared between them)
+
+Callers get their own copy of the instance, so a view that edits the
+settings before saving does not leak half-applied changes to other threads.
+"""
+import copy
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+SETTINGS_TTL = 1  # seconds a cached copy is trusted without checking the version
+SETTINGS_MAX_AGE = 60  # seconds before the row is re-read regardless of the version
+
+SETTINGS_VERSION_KEY = 'engagement_points_settings_version'
+SETTINGS_VERSION_TIMEOUT = None  # never expire; a missing key just forces a reload
+
+_lock = threading.Lock()
+_local = threading.local()
+_settings = None
+_version = None
+_loaded_at = 0.0
+_checked_at = 0.0
+
+
+def _current_version():
+    version = cache.get(SETTINGS_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        # Another process may have set it first; use whichever won
+        if not cache.add(SETTINGS_VERSION_KEY, version, SETTINGS_VERSION_TIMEOUT):
+            version = cache.get(SETTINGS_VERSION_KEY, version)
+    return version
+
+
+def get_points_settings():
+    """Return a copy of the current settings, reading the row only when stale."""
+    global _settings, _version, _loaded_at, _checked_at
+    now = time.monotonic()
+    settings = _settings
+    if settings is not None and now - _checked_at < SETTINGS_TTL:
+        return copy.copy(settings)
+    with _lock:
+        if _settings is not None and now - _checked_at < SETTINGS_TTL:
+            return copy.copy(_settings)
+        version = _current_version()
+        if _settings is not None and version == _version and now - _loaded_at < SETTINGS_MAX_AGE:
+            _checked_at = now
+            return copy.copy(_settings)
+
+    # Read outside the lock: on a fresh database load_settings() creates the
+    # row, and the post_save handler below must not wait for this thread
+    from apps.shared.models import EngagementPointsSettings
+    _local.loading = True
+    try:
+        settings = EngagementPointsSettings.load_settings()
+    finally:
+        _local.loading = False
+
+    with _lock:
+        _settings = settings
+        _version = version
+        _loaded_at = now
+        _checked_at = now
+        return copy.copy(settings)
+
+
+def invalidate_points_settings(**kwargs):
+    """Drop this process' copy and bump the shared version once the change commits."""
+    global _settings
+
+    # The default row created by load_settings() is what is being cached
+    if getattr(_local, 'loading', False):
+        return
+
+    def bump():
+        global _settings
+        cache.set(SETTINGS_VERSION_KEY, uuid.uuid4().hex, SETTINGS_VERSION_TIMEOUT)
+        with _lock:
+            _settings = None
+
+    with _lock:
+        _settings = None
+    transaction.on_commit(bump)
+
+
+def connect_signals():
+    from apps.shared.models import EngagementPointsSettings
+    post_save.connect(invalidate_points_settings, sender=EngagementPointsSettings,
+                      dispatch_uid='points_settings_saved')
+    post_delete.connect(invalidate_points_settings, sender=EngagementPointsSettings,
+                        dispatch_uid='points_settings_deleted')
@@ -0,0 +1,257 @@
+"""
+Pluggable rate limit backends.
+
+The WebSocket and REST rate limiters used to keep a Python list of request
+timestamps under one cache key: every check read the whole list, filtered
+it and wrote it back, which costs O(requests in window) per check and loses
+updates when two workers check the same key at once. The limiters now
+delegate to a backend:
+
+* ``counter``     - sliding-window counter: two fixed-window counters
+                    (current and previous window) bumped with atomic
+                    ``cache.incr``; the previous window is weighted by how
+                    much of it still overlaps the sliding window. Works on
+                    any Django cache backend, O(1) per check.
+* ``sliding_log`` - exact sliding log in a Redis sorted set, trimmed,
+                    counted and appended by one Lua script (one round trip).
+                    Needs a Redis cache backend.
+* ``list``        - the original cached timestamp list, kept for comparison
+                    (see ``manage.py websocket_rate_limits --benchmark``).
+
+``settings.RATE_LIMIT_BACKEND`` picks one; the default ``auto`` uses
+``sliding_log`` when the default cache is Redis and ``counter`` otherwise.
+"""
+import logging
+import math
+import time
+import uuid
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from django.core.cache import cache
+
+from apps.shared.redis_cache import redis_client
+
+logger = logging.getLogger('apps.shared.rate_limit')
+
+
+class Hit(NamedTuple):
+    """Outcome of one rate limit check."""
+    allowed: bool
+    count: int  # requests in the window, including this one when allowed
+    retry_after: int  # seconds until a request would be allowed (0 when allowed)
+    token: object = None  # what undo() needs to take this request back
+
+
+class RateLimitBackend:
+    name = None
+
+    def hit(self, key: str, limit: int, window: int, now: float) -> Hit:
+        """Count one request against ``key`` unless that would exceed ``limit``."""
+        raise NotImplementedError
+
+    def undo(self, key: str, window: int, token) -> None:
+        """Take back a request counted by an allowed :meth:`hit`."""
+        raise NotImplementedError
+
+    def peek(self, key: str, window: int, now: float) -> Tuple[int, int]:
+        """``(count, reset_in)`` for ``key`` without counting a request."""
+        raise NotImplementedError
+
+    def hit_all(self, checks: Sequence[Tuple[str, int]], window: int,
+                now: float) -> Tuple[Optional[int], List[Hit]]:
+        """
+        Check ``[(key, limit)]`` in order, counting the request against every
+        key only if all of them allow it. Returns ``(denied_index, hits)``
+        where ``denied_index`` is None when the request is allowed.
+        """
+        hits = []
+        for index, (key, limit) in enumerate(checks):
+            hit = self.hit(key, limit, window, now)
+            hits.append(hit)
+            if not hit.allowed:
+                for (allowed_key, _), allowed in zip(checks, hits[:-1]):
+                    self.undo(allowed_key, window, allowed.token)
+                return index, hits
+        return None, hits
+
+
+class CachedListBackend(RateLimitBackend):
+    """Original implementation: a cached list of request timestamps per key."""
+    name = 'list'
+
+    def _recent(self, key, window, now):
+        times = cache.get(key, [])
+        if not isinstance(times, list):
+            return []
+        return [t for t in times if t >= now - window]
+
+    def hit(self, key, limit, window, now):
+        recent = self._recent(key, window, now)
+        if len(recent) >= limit:
+            return Hit(False, len(recent), max(1, int(recent[0] + window - now)))
+        recent.append(now)
+        cache.set(key, recent, timeout=window + 10)
+        return Hit(True, len(recent), 0, now)
+
+    def undo(self, key, window, token):
+        times = cache.get(key, [])
+        if isinstance(times, list) and token in times:
+            times.remove(token)
+            cache.set(key, times, timeout=window + 10)
+
+    def peek(self, key, window, now):
+        recent = self._recent(key, window, now)
+        return len(recent), int(recent[0] + window - now) if recent else 0
+
+
+class CounterBackend(RateLimitBackend):
+    """Sliding-window counter over two atomic fixed-window counters."""
+    name = 'counter'
+
+    def _incr(self, key, window):
+        for _ in range(3):
+            try:
+                return cache.incr(key)
+            except ValueError:
+                # Keep each window's counter until the next window is done with it
+                cache.add(key, 0, timeout=window * 2 + 1)
+        raise RuntimeError(f"Could not increment {key}")
+
+    def _state(self, key, window, now):
+        bucket = int(now // window)
+        elapsed = now - bucket * window
+        return f'{key}:{bucket}', f'{key}:{bucket - 1}', elapsed, 1 - elapsed / window
+
+    def hit(self, key, limit, window, now):
+        current_key, previous_key, elapsed, weight = self._state(key, window, now)
+        previous = cache.get(previous_key) or 0
+        current = self._incr(current_key, window)
+        estimate = previous * weight + current
+        if estimate <= limit:
+            return Hit(True, math.ceil(estimate), 0, current_key)
+
+        cache.decr(current_key)
+        current -= 1
+        if previous and current < limit:
+            # The previous window's weight must fall until one more request fits
+            wait = window * (1 - (limit - current) / previous) - elapsed
+        else:
+            wait = window - elapsed
+        return Hit(False, math.ceil(previous * weight + current), max(1, math.ceil(wait)))
+
+    def undo(self, key, window, token):
+        try:
+            cache.decr(token)
+        except ValueError:
+            pass
+
+    def peek(self, key, window, now):
+        current_key, previous_key, elapsed, weight = self._state(key, window, now)
+        values = cache.get_many([current_key, previous_key])
+        estimate = values.get(previous_key, 0) * weight + values.get(current_key, 0)
+        return math.ceil(estimate), int(window - elapsed) if estimate else 0
+
+
+# Trim the log to the window, then append the request if it fits.
+# Returns {allowed, count, oldest score}.
+SLIDING_LOG_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1] - ARGV[2])
+local count = redis.call('ZCARD', KEYS[1])
+if count >= tonumber(ARGV[3]) then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    return {0, count, oldest[2] or ARGV[1]}
+end
+redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+redis.call('PEXPIRE', KEYS[1], math.ceil(ARGV[2] * 1000))
+return {1, count + 1, ARGV[1]}
+"""
+
+
+class RedisSlidingLogBackend(RateLimitBackend):
+    """Exact sliding log in a Redis sorted set, one Lua call per check."""
+    name = 'sliding_log'
+
+    def __init__(self):
+        self._scripts = {}
+
+    def _client(self, key):
+        client = redis_client(key)
+        if client is None:
+            raise RuntimeError("The sliding_log rate limit backend needs a Redis cache")
+        return client
+
+    def _script(self, client):
+        script = self._scripts.get(id(client))
+        if script is None:
+            script = self._scripts[id(client)] = client.register_script(SLIDING_LOG_SCRIPT)
+        return script
+
+    def hit(self, key, limit, window, now):
+        key = cache.make_key(key)
+        client = self._client(key)
+        member = f'{now}:{uuid.uuid4().hex[:8]}'
+        allowed, count, oldest = self._script(client)(keys=[key], args=[now, window, limit, member])
+        if allowed:
+            return Hit(True, int(count), 0, member)
+        return Hit(False, int(count), max(1, int(float(oldest) + window - now)))
+
+    def undo(self, key, window, token):
+        key = cache.make_key(key)
+        self._client(key).zrem(key, token)
+
+    def peek(self, key, window, now):
+        key = cache.make_key(key)
+        pipe = self._client(key).pipeline()
+        pipe.zremrangebyscore(key, '-inf', now - window)
+        pipe.zcard(key)
+        pipe.zrange(key, 0, 0, withscores=True)
+        _, count, oldest = pipe.execute()
+        return int(count), int(oldest[0][1] + window - now) if oldest else 0
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (CachedListBackend, CounterBackend, RedisSlidingLogBackend)
+}
+
+
+def get_backend(name=None) -> RateLimitBackend:
+    """Backend called ``name``, defaulting to ``settings.RATE_LIMIT_BACKEND``."""
+    from django.conf import settings
+
+    name = name or getattr(settings, 'RATE_LIMIT_BACKEND', 'auto')
+    if name == 'auto':
+        name = 'sliding_log' if redis_client() is not None else 'counter'
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        logger.error(f"Unknown rate limit backend {name!r}; using the counter backend")
+        return CounterBackend()
+
+
+def benchmark(backends=None, limit=30, window=60, keys=100, requests=5000):
+    """
+    Time ``requests`` checks spread over ``keys`` keys on each backend and
+    return ``{name: {'seconds', 'checks_per_second', 'allowed'}}``. Keys are
+    namespaced per run and cleaned up afterwards.
+    """
+    results = {}
+    for name in backends or BACKENDS:
+        backend = get_backend(name)
+        prefix = f'rate_limit_benchmark:{name}:{uuid.uuid4().hex[:8]}:'
+        allowed = 0
+        started = time.perf_counter()
+        for i in range(requests):
+            allowed += backend.hit(f'{prefix}{i % keys}', limit, window, time.time()).allowed
+        seconds = time.perf_counter() - started
+        results[name] = {
+            'seconds': seconds,
+            'checks_per_second': requests / seconds if seconds else float('inf'),
+            'allowed': allowed,
+        }
+        if isinstance(backend, CounterBackend):
+            bucket = int(time.time() // window)
+            cache.delete_many([f'{prefix}{k}:{b}' for k in range(keys) for b in (bucket - 1, bucket)])
+        else:
+            cache.delete_many([f'{prefix}{k}' for k in range(keys)])
+    return results
@@ -0,0 +1,20 @@
+"""
+Access to the Redis server behind the default Django cache.
+
+Some structures need native Redis commands (sorted sets, sets, Lua
+scripts) that the Django cache API does not expose. :func:`redis_client`
+returns the redis-py client of the default cache when it is Redis (Django's
+built-in backend or django-redis) and None otherwise, so callers can fall
+back to a portable implementation.
+"""
+from django.core.cache import caches
+
+
+def redis_client(key=None):
+    """Raw redis-py client behind the default cache, or None for other backends."""
+    backend = caches['default']
+    if type(backend).__name__ != 'RedisCache':
+        return None
+    if hasattr(backend, 'client'):  # django-redis
+        return backend.client.get_client(write=True)
+    return backend._cache.get_client(key, write=True)
@@ -301,7 +301,11 @@ class ConversationSerializer(serializers.ModelSerializer):
         read_only_fields = ['conversation_id', 'created_at', 'updated_at']
     
     def get_last_message(self, obj):
-        last_msg = obj.get_last_message()
+        # Inbox pages load the last message up front (apps.messaging.conversation_summary)
+        if hasattr(obj, 'summary_last_message'):
+            last_msg = obj.summary_last_message
+        else:
+            last_msg = obj.get_last_message()
         if last_msg:
             return {
                 'message_id': last_msg.message_id,
@@ -316,6 +320,8 @@ class ConversationSerializer(serializers.ModelSerializer):
     
     def get_unread_count(self, obj):
         request = self.context.get('request')
+        if hasattr(obj, 'summary_unread_count'):
+            return obj.summary_unread_count
         if request and request.user.is_authenticated:
             return obj.get_unread_count(request.user)
         return 0
@@ -323,10 +329,17 @@ class ConversationSerializer(serializers.ModelSerializer):
     def get_other_participant(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            other_user = obj.get_other_participant(request.user)
+            if hasattr(obj, 'summary_other_participant'):
+                other_user = obj.summary_other_participant
+            else:
+                other_user = obj.get_other_participant(request.user)
             if other_user:
-                from apps.api.views import build_profile_pic_url
-                avatar_url = build_profile_pic_url(other_user, request)
+                avatar_urls = self.context.get('avatar_urls')
+                if avatar_urls is not None and other_user.user_id in avatar_urls:
+                    avatar_url = avatar_urls[other_user.user_id]
+                else:
+                    from apps.api.views import build_profile_pic_url
+                    avatar_url = build_profile_pic_url(other_user, request)
                 return {
                     'user_id': other_user.user_id,
                     'name': other_user.full_name,
@@ -0,0 +1,280 @@
+"""
+Incrementally maintained user counts for the alumni and OJT statistics dashboards.
+
+``alumni_statistics_view``, ``generate_statistics_view``,
+``ojt_statistics_view`` and ``generate_ojt_statistics_view`` used to count
+users by year, course and status from the raw User/AcademicInfo/OJTInfo rows
+on every load. With STATS_ROLLUP_ENABLED on, the counts are kept in the
+StatsRollup table, one row per (year, course, dimension, value), and the
+dashboards sum a handful of rows instead of scanning users:
+
+* pre_save/pre_delete of User, AcademicInfo and OJTInfo remember what the
+  affected user contributed to the rollup; once the transaction commits the
+  user's new contribution is read and only the difference is applied, with
+  ``UPDATE ... SET count = count + n``
+* saves whose ``update_fields`` touch no counted field (e.g. ``last_login``)
+  are ignored
+* bulk imports bypass model signals and rebuild the table after they commit,
+  as does ``python manage.py rebuild_stats_rollup``, which also repairs
+  drift (raw SQL, concurrent edits of the same user)
+
+With the setting off (the default) :func:`dimension_counts` and
+:func:`year_counts` compute the same numbers with GROUP BY queries on the
+live tables. Enabling the setting on an existing database requires a
+one-off ``python manage.py rebuild_stats_rollup``.
+"""
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+logger = logging.getLogger('apps.shared.stats_rollup')
+
+BULK_BATCH_SIZE = 1000
+
+# population -> (users filter, year path, course path)
+POPULATIONS = {
+    'alumni': (Q(account_type__user=True), 'year_graduated', 'course'),
+    'ojt': (Q(account_type__ojt=True), 'academic_info__year_graduated', 'academic_info__program'),
+}
+
+# dimension -> (population, User field path of the counted value)
+DIMENSIONS = {
+    'alumni_status': ('alumni', 'user_status'),
+    'alumni_further_study': ('alumni', 'pursue_further_study'),
+    'alumni_program': ('alumni', 'program'),
+    'ojt_status': ('ojt', 'ojt_info__ojtstatus'),
+}
+
+# Fields whose changes can move a user between rollup rows, per model name
+COUNTED_FIELDS = {
+    'User': {'account_type', 'year_graduated', 'course', 'user_status', 'pursue_further_study', 'program'},
+    'AcademicInfo': {'user', 'year_graduated', 'program'},
+    'OJTInfo': {'user', 'ojtstatus'},
+}
+
+_local = threading.local()
+
+
+def rollup_enabled():
+    return getattr(settings, 'STATS_ROLLUP_ENABLED', False)
+
+
+def _users(population, year=None, course=None):
+    from apps.shared.models import User
+
+    users_filter, year_path, course_path = POPULATIONS[population]
+    users = User.objects.filter(users_filter)
+    if year and year != 'ALL':
+        users = users.filter(**{year_path: year})
+    if course and course != 'ALL':
+        users = users.filter(**{course_path: course})
+    return users.order_by()
+
+
+def _rows(population, year=None, course=None):
+    from apps.shared.models import StatsRollup
+
+    rows = StatsRollup.objects.filter(dimension__in=[
+        dimension for dimension, (owner, _) in DIMENSIONS.items() if owner == population
+    ])
+    if year and year != 'ALL':
+        rows = rows.filter(year=year)
+    if course and course != 'ALL':
+        rows = rows.filter(course=course)
+    return rows
+
+
+def _blank_value(path):
+    """What an empty rollup value stands for: '' for NOT NULL fields, else None."""
+    from apps.shared.models import User
+
+    model = User
+    *relations, name = path.split('__')
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    field = model._meta.get_field(name)
+    return None if relations or field.null else ''
+
+
+def dimension_counts(dimension, year=None, course=None):
+    """
+    ``{value: users}`` for ``dimension`` among the users of its population,
+    optionally filtered by year and course ('ALL' means no filter). Values
+    are keyed as stored, so '' and None stay apart; the rollup keeps both as
+    '', which is read back as None for nullable or related fields.
+    """
+    population, path = DIMENSIONS[dimension]
+    if not rollup_enabled():
+        return dict(
+            _users(population, year, course).values(path).annotate(users=Count('pk')).values_list(path, 'users')
+        )
+    rows = _rows(population, year, course).filter(dimension=dimension).values('value').annotate(
+        users=Sum('count')
+    ).filter(users__gt=0).values_list('value', 'users')
+    blank = _blank_value(path)
+    return {value if value else blank: users for value, users in rows}
+
+
+def year_counts(population):
+    """``{year: users}`` over the whole population, without unknown years."""
+    _, year_path, _ = POPULATIONS[population]
+    if not rollup_enabled():
+        return dict(
+            _users(population).exclude(**{f'{year_path}__isnull': True}).values(year_path).annotate(
+                users=Count('pk')
+            ).values_list(year_path, 'users')
+        )
+    # Every user has exactly one value per dimension, so any dimension gives the totals
+    dimension = next(name for name, (owner, _) in DIMENSIONS.items() if owner == population)
+    rows = _rows(population).filter(dimension=dimension).exclude(year=0).values('year').annotate(
+        users=Sum('count')
+    ).filter(users__gt=0).values_list('year', 'users')
+    return dict(rows)
+
+
+# --- Maintenance ---
+
+def _keys(user_ids):
+    """Counter of the ``(dimension, year, course, value)`` rows ``user_ids`` count in."""
+    keys = Counter()
+    if not user_ids:
+        return keys
+    for population, (_, year_path, course_path) in POPULATIONS.items():
+        paths = {dimension: path for dimension, (owner, path) in DIMENSIONS.items() if owner == population}
+        users = _users(population).filter(pk__in=user_ids).values(year_path, course_path, *paths.values())
+        for user in users:
+            year, course = user[year_path] or 0, user[course_path] or ''
+            for dimension, path in paths.items():
+                value = user[path]
+                keys[(dimension, year, course, '' if value is None else str(value))] += 1
+    return keys
+
+
+def _apply(delta):
+    from apps.shared.models import StatsRollup
+
+    for (dimension, year, course, value), change in delta.items():
+        if not change:
+            continue
+        key = {'dimension': dimension, 'year': year, 'course': course, 'value': value}
+        if StatsRollup.objects.filter(**key).update(count=F('count') + change) or change < 0:
+            continue
+        try:
+            with transaction.atomic():
+                StatsRollup.objects.create(count=change, **key)
+        except IntegrityError:
+            # Created concurrently; add to that row instead
+            StatsRollup.objects.filter(**key).update(count=F('count') + change)
+
+
+def _pending():
+    if not hasattr(_local, 'before'):
+        _local.before = {}
+    return _local.before
+
+
+def _flush():
+    """Apply the difference between the remembered and current contributions."""
+    pending = _pending()
+    if not pending:
+        return
+    before = Counter()
+    for keys in pending.values():
+        before.update(keys)
+    user_ids = list(pending)
+    pending.clear()
+    try:
+        delta = _keys(user_ids)
+        delta.subtract(before)
+        with transaction.atomic():
+            _apply(delta)
+    except Exception:
+        logger.exception(f"Could not update the statistics rollup for users {user_ids}; run rebuild_stats_rollup")
+
+
+def _user_id(instance):
+    return instance.pk if type(instance).__name__ == 'User' else instance.user_id
+
+
+def remember_user(sender, instance, raw=False, update_fields=None, **kwargs):
+    """pre_save/pre_delete: record the user's contribution before the change."""
+    if raw or not rollup_enabled():
+        return
+    if update_fields is not None and not set(update_fields) & COUNTED_FIELDS[sender.__name__]:
+        return
+    user_id = _user_id(instance)
+    pending = _pending()
+    if user_id is None or user_id in pending:
+        return
+    pending[user_id] = _keys([user_id])
+
+
+def user_changed(sender, instance, raw=False, created=False, **kwargs):
+    """post_save/post_delete: apply the change once the transaction commits."""
+    if raw or not rollup_enabled():
+        return
+    user_id = _user_id(instance)
+    pending = _pending()
+    if created and user_id is not None:
+        # A new row had no primary key before it was saved (or no row to count)
+        pending.setdefault(user_id, Counter())
+    if user_id not in pending:
+        return
+    transaction.on_commit(_flush)
+
+
+def rebuild_rollup():
+    """Recompute every rollup row from the live tables; returns ``{dimension: rows}``."""
+    from apps.shared.models import StatsRollup
+
+    rows, report = [], {}
+    for dimension, (population, path) in DIMENSIONS.items():
+        _, year_path, course_path = POPULATIONS[population]
+        groups = _users(population).values(year_path, course_path, path).annotate(users=Count('pk'))
+        rows.extend(
+            StatsRollup(
+                dimension=dimension,
+                year=group[year_path] or 0,
+                course=group[course_path] or '',
+                value='' if group[path] is None else str(group[path]),
+                count=group['users'],
+            )
+            for group in groups
+        )
+        report[dimension] = len(rows) - sum(report.values())
+
+    # Groups that differ only by NULL vs '' fold into the same row
+    merged = {}
+    for row in rows:
+        key = (row.dimension, row.year, row.course, row.value)
+        if key in merged:
+            merged[key].count += row.count
+        else:
+            merged[key] = row
+
+    with transaction.atomic():
+        StatsRollup.objects.all().delete()
+        StatsRollup.objects.bulk_create(merged.values(), batch_size=BULK_BATCH_SIZE)
+    return report
+
+
+def rebuild_on_commit():
+    """Rebuild after bulk writes that bypass model signals (imports)."""
+    if rollup_enabled():
+        transaction.on_commit(rebuild_rollup)
+
+
+def connect_signals():
+    from apps.shared.models import AcademicInfo, OJTInfo, User
+
+    for model in (User, AcademicInfo, OJTInfo):
+        name = model.__name__.lower()
+        pre_save.connect(remember_user, sender=model, dispatch_uid=f'stats_rollup_pre_save_{name}')
+        post_save.connect(user_changed, sender=model, dispatch_uid=f'stats_rollup_post_save_{name}')
+        pre_delete.connect(remember_user, sender=model, dispatch_uid=f'stats_rollup_pre_delete_{name}')
+        post_delete.connect(user_changed, sender=model, dispatch_uid=f'stats_rollup_post_delete_{name}')
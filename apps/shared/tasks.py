@@ -17,66 +17,15 @@ logger = logging.getLogger('apps.shared.tasks')
 def recalculate_all_job_alignments(self):
     """
     SENIOR DEV: Background task to recalculate job alignments for all users.
-    Handles large datasets efficiently with progress tracking.
+    Streams employment rows in chunks, aligns them on a process pool against
+    the in-memory title index and writes changes back with bulk_update.
+    Progress is published under the 'job_alignment_progress' cache key.
     """
     try:
         logger.info("Starting background job alignment recalculation...")
         
-        # Get all alumni users
-        alumni_users = User.objects.filter(account_type__user=True).select_related(
-            'academic_info', 'employment'
-        )
-        
-        total_users = alumni_users.count()
-        processed = 0
-        updated = 0
-        errors = 0
-        
-        # Process in batches to avoid memory issues
-        batch_size = 100
-        
-        for i in range(0, total_users, batch_size):
-            batch = alumni_users[i:i + batch_size]
-            
-            for user in batch:
-                try:
-                    employment = getattr(user, 'employment', None)
-                    if employment and employment.position_current:
-                        # Recalculate alignment
-                        employment.update_job_alignment()
-                        employment.save()
-                        updated += 1
-                    
-                    processed += 1
-                    
-                    # Update progress every 50 users
-                    if processed % 50 == 0:
-                        progress = (processed / total_users) * 100
-                        cache.set('job_alignment_progress', {
-                            'processed': processed,
-                            'total': total_users,
-                            'updated': updated,
-                            'errors': errors,
-                            'progress_percent': round(progress, 2)
-                        }, 3600)  # Cache for 1 hour
-                        
-                        logger.info(f"Job alignment progress: {processed}/{total_users} ({progress:.1f}%)")
-                
-                except Exception as e:
-                    errors += 1
-                    logger.error(f"Error processing user {user.user_id}: {e}")
-            
-            # Small delay between batches to prevent overwhelming the database
-            time.sleep(0.1)
-        
-        # Final results
-        results = {
-            'total_users': total_users,
-            'processed': processed,
-            'updated': updated,
-            'errors': errors,
-            'completed_at': time.time()
-        }
+        from apps.shared.job_alignment import recalculate_job_alignments
+        results = recalculate_job_alignments()
         
         cache.set('job_alignment_results', results, 3600)
         logger.info(f"Job alignment recalculation completed: {results}")
@@ -1,3 +1,673 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import pandas as pd
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.shared import job_index, points_settings
+from apps.shared.import_jobs import fail_stale_jobs
+from apps.shared.alumni_import import import_alumni_dataframe
+from apps.shared.counters import reconcile_counters
+from apps.shared.ojt_import import OJTImportPipeline
+from apps.shared.feed import KIND_POST, KIND_REPOST, FeedAssembler, fetch_feed_page
+from apps.shared.timeline import (
+    add_follow,
+    fan_out_post,
+    fan_out_repost,
+    fetch_timeline_page,
+    prune_follow,
+    timeline_entries,
+)
+from apps.shared.models import (
+    AccountType,
+    Comment,
+    EngagementPointsSettings,
+    FeedEntry,
+    ImportJob,
+    Follow,
+    Like,
+    Notification,
+    NotificationPayload,
+    OJTCompanyProfile,
+    OJTImport,
+    OJTInfo,
+    Post,
+    PostCategory,
+    Reply,
+    Repost,
+    StatsRollup,
+    User,
+    UserPoints,
+    UserProfile,
+)
+
+
+def create_account_type(**flags):
+    values = {'admin': False, 'peso': False, 'user': False, 'coordinator': False, 'ojt': False}
+    values.update(flags)
+    return AccountType.objects.create(**values)
+
+
+def create_user(username, account_type, **fields):
+    return User.objects.create(
+        acc_username=username,
+        acc_password=date(2000, 1, 1),
+        user_status='active',
+        f_name=fields.pop('f_name', username.title()),
+        l_name=fields.pop('l_name', 'Test'),
+        gender=fields.pop('gender', 'M'),
+        account_type=account_type,
+        **fields
+    )
+
+
+def create_post(user, category, **fields):
+    return Post.objects.create(
+        user=user,
+        post_cat=category,
+        post_title=fields.pop('post_title', 'Title'),
+        post_image='',
+        post_content=fields.pop('post_content', 'Content'),
+        **fields
+    )
+
+
+def create_category():
+    return PostCategory.objects.create(events=False, announcements=False, donation=False, personal=True)
+
+
+class PointsSettingsTestCase(TestCase):
+    """Test case for the process-local EngagementPointsSettings cache."""
+
+    def setUp(self):
+        """Start every test with an empty process cache."""
+        points_settings._settings = None
+
+    def tearDown(self):
+        """Clean up test data."""
+        points_settings._settings = None
+
+    def test_first_read_creates_the_row(self):
+        """Test that reading the settings on an empty table returns the default row."""
+        EngagementPointsSettings.objects.all().delete()
+
+        settings = EngagementPointsSettings.get_settings()
+
+        self.assertEqual(settings.pk, 1)
+        self.assertTrue(EngagementPointsSettings.objects.filter(pk=1).exists())
+        # The row created by the read is cached; no reload is needed
+        self.assertIsNotNone(points_settings._settings)
+
+    def test_save_invalidates_the_cached_copy(self):
+        """Test that saving the settings reloads them on the next read."""
+        settings = EngagementPointsSettings.get_settings()
+        settings.like_points = settings.like_points + 1
+
+        with self.captureOnCommitCallbacks(execute=True):
+            settings.save()
+
+        self.assertEqual(EngagementPointsSettings.get_settings().like_points, settings.like_points)
+
+
+class FeedAssemblerTestCase(TestCase):
+    """Test case for the batched feed assembly."""
+
+    def setUp(self):
+        """Create a post with a like, a comment and a repost."""
+        alumni = create_account_type(user=True)
+        self.author = create_user('author', alumni)
+        self.viewer = create_user('viewer', alumni)
+        self.post = create_post(self.author, create_category())
+        Like.objects.create(user=self.viewer, post=self.post)
+        Comment.objects.create(
+            user=self.viewer, post=self.post, comment_content='Nice', date_created=timezone.now()
+        )
+        self.repost = Repost.objects.create(post=self.post, user=self.viewer, repost_date=timezone.now())
+        self.assembler = FeedAssembler(
+            self.viewer, profile_pic_url=lambda user: None, image_url=lambda image, request: None
+        )
+
+    def test_assemble_post_with_repost(self):
+        """Test that a page with a repost is assembled with a fixed number of queries."""
+        # posts, likes, comments, images, reposts
+        with self.assertNumQueries(5):
+            items = self.assembler.assemble(Post.objects.filter(post_id=self.post.post_id))
+
+        self.assertEqual([item['item_type'] for item in items], ['post', 'repost'])
+        post_item, repost_item = items
+        self.assertTrue(post_item['is_liked'])
+        self.assertEqual(len(post_item['likes']), 1)
+        self.assertEqual(len(post_item['comments']), 1)
+        self.assertEqual(repost_item['repost_id'], self.repost.repost_id)
+        self.assertEqual(repost_item['original_post']['post_id'], self.post.post_id)
+        # Likes and comments only reference posts, so reposts carry none
+        self.assertEqual(repost_item['likes'], [])
+        self.assertEqual(repost_item['comments'], [])
+        self.assertFalse(repost_item['is_liked'])
+
+    def test_assemble_entries_keeps_page_order(self):
+        """Test that keyset page entries come back in order, reposts included."""
+        entries = [(KIND_REPOST, self.repost.repost_id), (KIND_POST, self.post.post_id)]
+
+        # reposts, posts, likes, comments, images
+        with self.assertNumQueries(5):
+            items = self.assembler.assemble_entries(entries)
+
+        self.assertEqual([item['item_type'] for item in items], ['repost', 'post'])
+        self.assertEqual(items[0]['likes'], [])
+        self.assertEqual(items[1]['likes_count'], self.post.likes_count)
+
+
+class FeedPageTestCase(TestCase):
+    """Test case for keyset pages of the merged post/repost stream."""
+
+    def setUp(self):
+        """Create two posts, each reposted after it was written."""
+        alumni = create_account_type(user=True)
+        author = create_user('author', alumni)
+        reposter = create_user('reposter', alumni)
+        category = create_category()
+        start = timezone.now() - timedelta(days=1)
+        self.old_post = create_post(author, category)
+        self.new_post = create_post(author, category)
+        Post.objects.filter(pk=self.old_post.pk).update(created_at=start)
+        Post.objects.filter(pk=self.new_post.pk).update(created_at=start + timedelta(hours=2))
+        self.old_repost = Repost.objects.create(
+            post=self.old_post, user=reposter, repost_date=start + timedelta(hours=1)
+        )
+        self.new_repost = Repost.objects.create(
+            post=self.new_post, user=reposter, repost_date=start + timedelta(hours=3)
+        )
+
+    def test_pages_through_posts_and_reposts(self):
+        """Test that two pages return every item newest first, then stop."""
+        first_page, cursor = fetch_feed_page(Post.objects.all(), limit=2)
+        second_page, last_cursor = fetch_feed_page(Post.objects.all(), cursor=cursor, limit=2)
+
+        self.assertEqual(first_page, [
+            (KIND_REPOST, self.new_repost.repost_id),
+            (KIND_POST, self.new_post.post_id),
+        ])
+        self.assertEqual(second_page, [
+            (KIND_REPOST, self.old_repost.repost_id),
+            (KIND_POST, self.old_post.post_id),
+        ])
+        self.assertIsNotNone(cursor)
+        self.assertIsNone(last_cursor)
+
+    def test_posts_sort_before_reposts_at_the_same_time(self):
+        """Test that a post and a repost with the same timestamp page in a stable order."""
+        created_at = Post.objects.get(pk=self.new_post.pk).created_at
+        Repost.objects.filter(pk=self.new_repost.pk).update(repost_date=created_at)
+
+        first_page, cursor = fetch_feed_page(Post.objects.all(), limit=1)
+        second_page, _ = fetch_feed_page(Post.objects.all(), cursor=cursor, limit=1)
+
+        self.assertEqual(first_page, [(KIND_POST, self.new_post.post_id)])
+        self.assertEqual(second_page, [(KIND_REPOST, self.new_repost.repost_id)])
+
+
+class BackfillPostCreatedAtTestCase(TestCase):
+    """Test case for dating posts that predate Post.created_at."""
+
+    def test_dates_posts_from_first_activity(self):
+        """Test that old posts take their first activity date and never sort after newer posts."""
+        alumni = create_account_type(user=True)
+        user = create_user('author', alumni)
+        category = create_category()
+        quiet, active, latest = (create_post(user, category) for _ in range(3))
+        migrated_at = timezone.now()
+        Post.objects.update(created_at=migrated_at)
+        commented_at = migrated_at - timedelta(days=3)
+        Comment.objects.create(user=user, post=active, comment_content='First', date_created=commented_at)
+
+        call_command('backfill_post_created_at', up_to_post_id=latest.post_id, stdout=StringIO())
+
+        dates = dict(Post.objects.values_list('post_id', 'created_at'))
+        self.assertEqual(dates[latest.post_id], migrated_at)
+        self.assertEqual(dates[active.post_id], commented_at)
+        # No activity: dated like the next newer post
+        self.assertEqual(dates[quiet.post_id], commented_at)
+
+
+class TimelineTestCase(TestCase):
+    """Test case for the fan-out-on-write FeedEntry timeline."""
+
+    def setUp(self):
+        """Create an admin, an alumni author and an alumni follower."""
+        self.admin = create_user('admin', create_account_type(admin=True))
+        alumni = create_account_type(user=True)
+        self.author = create_user('author', alumni)
+        self.follower = create_user('follower', alumni)
+        self.category = create_category()
+
+    def _post(self, user):
+        post = create_post(user, self.category)
+        fan_out_post(post)
+        return post
+
+    def _repost(self, post, user):
+        repost = Repost.objects.create(post=post, user=user, repost_date=timezone.now())
+        fan_out_repost(repost)
+        return repost
+
+    def test_fan_out_post_reaches_followers_and_author(self):
+        """Test that a new post is written to its author's and followers' timelines only."""
+        Follow.objects.create(follower=self.follower, following=self.author)
+
+        post = self._post(self.author)
+
+        entries = FeedEntry.objects.filter(item_type=KIND_POST, item_id=post.post_id)
+        owners = set(entries.values_list('owner', flat=True))
+        self.assertEqual(owners, {self.author.user_id, self.follower.user_id})
+
+    def test_admin_post_reaches_every_timeline(self):
+        """Test that an admin post is written to every alumni timeline."""
+        post = self._post(self.admin)
+
+        for user in (self.author, self.follower):
+            self.assertEqual(timeline_entries(user), [(KIND_POST, post.post_id)])
+
+    def test_follow_and_unfollow(self):
+        """Test that following pulls in existing items and unfollowing removes them."""
+        post = self._post(self.author)
+        repost = self._repost(post, self.author)
+        admin_post = self._post(self.admin)
+
+        Follow.objects.create(follower=self.follower, following=self.author)
+        add_follow(self.follower, self.author)
+        self.assertEqual(set(timeline_entries(self.follower)), {
+            (KIND_POST, post.post_id), (KIND_REPOST, repost.repost_id), (KIND_POST, admin_post.post_id),
+        })
+
+        prune_follow(self.follower, self.author)
+        self.assertEqual(timeline_entries(self.follower), [(KIND_POST, admin_post.post_id)])
+
+    def test_backfill_rebuilds_timelines(self):
+        """Test that the backfill command restores the items fan-out would have written."""
+        Follow.objects.create(follower=self.follower, following=self.author)
+        post = self._post(self.author)
+        admin_post = self._post(self.admin)
+        expected = timeline_entries(self.follower)
+        FeedEntry.objects.all().delete()
+
+        call_command('backfill_feed_timeline', stdout=StringIO())
+
+        self.assertEqual(timeline_entries(self.follower), expected)
+        self.assertEqual(set(expected), {(KIND_POST, post.post_id), (KIND_POST, admin_post.post_id)})
+
+    def test_fetch_timeline_page(self):
+        """Test that timeline pages follow the feed's newest-first keyset order."""
+        posts = [self._post(self.admin) for _ in range(3)]
+
+        first_page, cursor = fetch_timeline_page(self.author, limit=2)
+        second_page, last_cursor = fetch_timeline_page(self.author, cursor=cursor, limit=2)
+
+        self.assertEqual(first_page + second_page, [(KIND_POST, post.post_id) for post in reversed(posts)])
+        self.assertIsNone(last_cursor)
+
+
+class ReconcileCountersTestCase(TestCase):
+    """Test case for repairing denormalized engagement counters."""
+
+    def setUp(self):
+        """Create a post with two likes, a commented comment and a repost."""
+        alumni = create_account_type(user=True)
+        author = create_user('author', alumni)
+        fan = create_user('fan', alumni)
+        self.post = create_post(author, create_category())
+        Like.objects.create(user=author, post=self.post)
+        Like.objects.create(user=fan, post=self.post)
+        self.comment = Comment.objects.create(
+            user=fan, post=self.post, comment_content='Hi', date_created=timezone.now()
+        )
+        Reply.objects.create(comment=self.comment, user=author, reply_content='Hello')
+        Repost.objects.create(post=self.post, user=fan, repost_date=timezone.now())
+        Post.objects.filter(pk=self.post.pk).update(likes_count=7, comments_count=0, reposts_count=3)
+        Comment.objects.filter(pk=self.comment.pk).update(replies_count=5)
+
+    def test_dry_run_reports_without_writing(self):
+        """Test that a dry run counts drifted rows and leaves them unchanged."""
+        report = reconcile_counters(dry_run=True)
+
+        self.assertEqual(report['Post.likes_count'], 1)
+        self.assertEqual(report['Comment.replies_count'], 1)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).likes_count, 7)
+
+    def test_repairs_drifted_counters(self):
+        """Test that every drifted counter is recomputed from its source table."""
+        report = reconcile_counters()
+
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual((post.likes_count, post.comments_count, post.reposts_count), (2, 1, 1))
+        self.assertEqual(Comment.objects.get(pk=self.comment.pk).replies_count, 1)
+        self.assertEqual(report, {
+            'Post.likes_count': 1,
+            'Post.comments_count': 1,
+            'Post.reposts_count': 1,
+            'Comment.replies_count': 1,
+        })
+        # A second pass finds nothing left to fix
+        self.assertFalse(any(reconcile_counters().values()))
+
+
+class JobIndexTestCase(TestCase):
+    """Test case for the process-local job title index."""
+
+    def setUp(self):
+        """Start every test without a loaded index."""
+        job_index._index = None
+
+    def tearDown(self):
+        """Drop the index built by the test."""
+        job_index._index = None
+
+    def test_missing_job_models_are_skipped(self):
+        """Test that the index loads, and matches nothing, when the job tables are not installed."""
+        with mock.patch.object(job_index, '_job_model', side_effect=LookupError):
+            index = job_index.get_job_index()
+            job_index.connect_signals()
+
+        self.assertEqual(index.programs, {})
+        self.assertEqual(index.match('bsit', 'Software Engineer'), (None, None))
+        self.assertIsNone(index.exact('bsit', 'Software Engineer'))
+
+    def test_match_tiers(self):
+        """Test the exact, substring and fuzzy tiers of an in-memory index."""
+        index = job_index.JobTitleIndex('v1', {'bsit': [(1, 'Software Engineer'), (2, 'Web Developer')]})
+
+        self.assertEqual(index.match('bsit', 'software engineer'), ('Software Engineer', 'exact'))
+        self.assertEqual(index.match('bsit', 'developer'), ('Web Developer', 'substring'))
+        title, method = index.match('bsit', 'Software Engineers')
+        self.assertEqual(title, 'Software Engineer')
+        self.assertTrue(method.startswith('fuzzy'))
+        self.assertEqual(index.match('bsis', 'Web Developer'), (None, None))
+
+
+class AlumniImportTestCase(TestCase):
+    """Test case for the bulk alumni Excel import."""
+
+    def setUp(self):
+        """Create the alumni account type and one existing alumnus."""
+        self.alumni = create_account_type(user=True)
+        create_user('1000', self.alumni)
+
+    def _sheet(self, *rows):
+        columns = ['CTU_ID', 'First_Name', 'Last_Name', 'Gender', 'Birthdate', 'Phone_Number']
+        return pd.DataFrame(list(rows), columns=columns)
+
+    def test_imports_valid_rows_and_reports_the_rest(self):
+        """Test that one valid row is created while duplicate and over-length rows are reported."""
+        df = self._sheet(
+            ['1001', 'Ana', 'Cruz', 'F', '2000-05-01', '09171234567'],
+            ['1000', 'Ben', 'Reyes', 'M', '2000-06-01', ''],
+            ['1002', 'Carl', 'Lim', 'm', '2000-07-01', '0917 123 4567 / 0918 765 4321'],
+            ['1003', 'Dina', '', 'F', '2000-08-01', ''],
+        )
+
+        result = import_alumni_dataframe(df, '2024', 'BSIT', self.alumni)
+
+        self.assertEqual(result['created_count'], 1)
+        self.assertEqual(result['skipped_count'], 1)
+        self.assertEqual(result['errors'], [
+            "Row 3: CTU ID 1000 already exists (skipped)",
+            "Row 4: Value too long for phone_num (max 20)",
+            "Row 5: Missing required fields (CTU_ID, First_Name, Last_Name, Gender, Birthdate)",
+        ])
+        user = User.objects.get(acc_username='1001')
+        self.assertEqual((user.year_graduated, user.course, user.birthdate), (2024, 'BSIT', date(2000, 5, 1)))
+        self.assertEqual(UserProfile.objects.get(user=user).phone_num, '09171234567')
+        self.assertFalse(User.objects.filter(acc_username='1002').exists())
+
+    def test_rejects_bad_gender_and_birthdate(self):
+        """Test that vectorized validation rejects bad gender and unparseable birthdates."""
+        df = self._sheet(
+            ['1004', 'Eve', 'Tan', 'X', '2000-01-01', ''],
+            ['1005', 'Fay', 'Uy', 'F', 'not a date', ''],
+        )
+
+        result = import_alumni_dataframe(df, '2024', 'BSIT', self.alumni)
+
+        self.assertEqual(result['created_count'], 0)
+        self.assertEqual(result['errors'], [
+            "Row 2: Gender must be 'M' or 'F'",
+            "Row 3: Cannot parse birthdate 'not a date'. Please check the format.",
+        ])
+
+
+class OJTImportPipelineTestCase(TestCase):
+    """Test case for the set-based OJT import."""
+
+    COLUMNS = [
+        'CTU_ID', 'First_Name', 'Last_Name', 'Gender', 'Section', 'Birthdate',
+        'Contact_No', 'Email', 'Address', 'Company', 'Company_Contact', 'Status',
+    ]
+
+    def _run(self, *rows, coordinator='coord1'):
+        df = pd.DataFrame(list(rows), columns=self.COLUMNS)
+        return OJTImportPipeline(df, 'ojt.xlsx', coordinator, batch_year='2025', course='BSIT').run()
+
+    def _row(self, ctu_id, **fields):
+        row = {
+            'CTU_ID': ctu_id, 'First_Name': 'Ana', 'Last_Name': 'Cruz', 'Gender': 'Female',
+            'Section': '4-A', 'Birthdate': '2003-05-01', 'Contact_No': '09171234567',
+            'Email': f'{ctu_id}@example.com', 'Address': 'Cebu City', 'Company': '',
+            'Company_Contact': '', 'Status': '',
+        }
+        row.update(fields)
+        return [row[column] for column in self.COLUMNS]
+
+    def test_first_import_creates_accounts(self):
+        """Test that valid rows become OJT accounts and invalid rows are reported."""
+        result = self._run(
+            self._row('2001'),
+            self._row('2002', Email=''),
+            self._row('2003', Company='Acme', Company_Contact='0917-123-4567 loc 1234 / 0918'),
+            self._row('2001'),
+        )
+
+        self.assertEqual(result['created_count'], 1)
+        self.assertEqual(result['skipped_count'], 3)
+        self.assertEqual(result['errors'], [
+            "Row 3: New user requires - Email",
+            "Row 4: Value too long for company_contact (max 20)",
+            "Row 5: Duplicate CTU_ID 2001 in file (skipped)",
+        ])
+        self.assertEqual([p['CTU_ID'] for p in result['passwords']], ['2001'])
+        user = User.objects.get(acc_username='2001')
+        self.assertTrue(user.account_type.ojt)
+        self.assertEqual(user.gender, 'F')
+        self.assertEqual(user.academic_info.section, '4-A')
+        self.assertEqual(user.ojt_info.ojtstatus, 'Not Started')
+        record = OJTImport.objects.get()
+        self.assertEqual((record.batch_year, record.records_imported, record.status), (2025, 1, 'Partial'))
+
+    def test_second_import_updates_existing_accounts(self):
+        """Test that re-importing a student updates their company instead of creating an account."""
+        self._run(self._row('2001'))
+
+        result = self._run(self._row('2001', Company='Acme Corp', Company_Contact='0917', Status='Completed'))
+
+        self.assertEqual((result['created_count'], result['updating_count']), (0, 1))
+        self.assertEqual(result['passwords'], [])
+        self.assertEqual(User.objects.filter(acc_username='2001').count(), 1)
+        company = OJTCompanyProfile.objects.get(user__acc_username='2001')
+        self.assertEqual((company.company_name, company.company_contact), ('ACME CORP', '0917'))
+        self.assertEqual(OJTInfo.objects.get(user__acc_username='2001').ojtstatus, 'Completed')
+
+    def test_other_coordinators_batch_is_blocked(self):
+        """Test that a student imported by another coordinator is not taken over."""
+        self._run(self._row('2001'), coordinator='coord1')
+
+        result = self._run(self._row('2001'), coordinator='coord2')
+
+        self.assertEqual(result['updating_count'], 0)
+        self.assertIn('already imported by coord1', result['errors'][0])
+
+    @override_settings(STATS_ROLLUP_ENABLED=True)
+    def test_rebuilds_stats_rollup_after_commit(self):
+        """Test that the rollup is rebuilt once the import transaction commits."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self._run(self._row('2001'), self._row('2002'))
+
+        counts = StatsRollup.objects.filter(dimension='ojt_status').values_list('value', 'count')
+        self.assertEqual(dict(counts), {'Not Started': 2})
+
+
+class UserPointsTestCase(TestCase):
+    """Test case for the atomic UserPoints counter updates."""
+
+    def setUp(self):
+        """Create an alumnus without a points row."""
+        self.user = create_user('points', create_account_type(user=True))
+
+    def test_award_then_reverse(self):
+        """Test that awarding creates the row and reversing undoes one action."""
+        first = UserPoints.record_action(self.user.user_id, 'like', 1)
+        second = UserPoints.record_action(self.user.user_id, 'comment', 3)
+        reversed_row = UserPoints.reverse_action(self.user.user_id, 'like', 1)
+
+        self.assertEqual((first.total_points, first.points_from_likes, first.like_count), (1, 1, 1))
+        self.assertEqual((second.total_points, second.comment_count), (4, 1))
+        self.assertEqual(
+            (reversed_row.total_points, reversed_row.points_from_likes, reversed_row.like_count), (3, 0, 0)
+        )
+        # The returned row is what was stored
+        stored = UserPoints.objects.get(user=self.user)
+        self.assertEqual((stored.pk, stored.total_points, stored.comment_count), (reversed_row.pk, 3, 1))
+
+    def test_deductions_are_clamped_at_zero(self):
+        """Test that reversing more than was awarded leaves fields at zero."""
+        UserPoints.record_action(self.user.user_id, 'like', 1)
+
+        row = UserPoints.reverse_action(self.user.user_id, 'like', 5)
+        row = UserPoints.reverse_action(self.user.user_id, 'like', 5)
+
+        self.assertEqual((row.total_points, row.points_from_likes, row.like_count), (0, 0, 0))
+
+    def test_deduction_without_points_row(self):
+        """Test that deducting for a user with no points row creates nothing."""
+        self.assertIsNone(UserPoints.reverse_action(self.user.user_id, 'comment', 3))
+
+        points = UserPoints(user=self.user)
+        points.deduct_points('comment', 3)
+
+        self.assertFalse(UserPoints.objects.filter(user=self.user).exists())
+        self.assertEqual(points.total_points, 0)
+
+    def test_add_points_refreshes_the_instance(self):
+        """Test that add_points on an unsaved instance inserts the row and copies it back."""
+        points = UserPoints(user=self.user)
+
+        points.add_points('post', 5)
+
+        self.assertIsNotNone(points.pk)
+        self.assertFalse(points._state.adding)
+        self.assertEqual((points.total_points, points.post_count), (5, 1))
+
+
+class NotificationPayloadCleanupTestCase(TestCase):
+    """Test case for deleting broadcast payloads without deliveries."""
+
+    def setUp(self):
+        """Create a broadcast payload delivered to two users."""
+        account_type = create_account_type(user=True)
+        self.users = [create_user(f'recipient{i}', account_type) for i in range(2)]
+        self.payload = NotificationPayload.objects.create(notif_type='broadcast', subject='Hi', content='Hello')
+        self.deliveries = [
+            Notification.objects.create(
+                user=user, notif_type='broadcast', notifi_content='', notif_date=timezone.now(), payload=self.payload
+            )
+            for user in self.users
+        ]
+
+    def delete_deliveries(self, notifications):
+        """Delete deliveries the way delete_notifications_view does."""
+        Notification.objects.filter(pk__in=[n.pk for n in notifications]).delete()
+        return NotificationPayload.delete_orphans({self.payload.pk})
+
+    def test_payload_kept_while_deliveries_remain(self):
+        """Test that deleting one delivery keeps the shared payload."""
+        self.assertEqual(self.delete_deliveries(self.deliveries[:1]), 0)
+        self.assertTrue(NotificationPayload.objects.filter(pk=self.payload.pk).exists())
+
+    def test_payload_deleted_with_last_delivery(self):
+        """Test that deleting the last delivery deletes the payload too."""
+        self.delete_deliveries(self.deliveries[:1])
+
+        self.assertEqual(self.delete_deliveries(self.deliveries[1:]), 1)
+        self.assertFalse(NotificationPayload.objects.filter(pk=self.payload.pk).exists())
+
+    def test_delete_orphans_limited_to_given_ids(self):
+        """Test that only the given payload ids are considered."""
+        other = NotificationPayload.objects.create(notif_type='broadcast', content='Undelivered')
+        Notification.objects.filter(payload=self.payload).delete()
+
+        NotificationPayload.delete_orphans({self.payload.pk})
+
+        self.assertEqual(list(NotificationPayload.objects.values_list('pk', flat=True)), [other.pk])
+
+    def test_prune_command_removes_cascade_orphans(self):
+        """Test that the prune command removes payloads orphaned by deleted users."""
+        for user in self.users:
+            user.delete()
+        kept = NotificationPayload.objects.create(notif_type='broadcast', content='Still delivered')
+        Notification.objects.create(
+            user=create_user('kept', create_account_type(user=True)),
+            notif_type='broadcast', notifi_content='', notif_date=timezone.now(), payload=kept,
+        )
+
+        call_command('prune_notification_payloads', '--dry-run', stdout=StringIO())
+        self.assertEqual(NotificationPayload.objects.count(), 2)
+        call_command('prune_notification_payloads', stdout=StringIO())
+
+        self.assertEqual(list(NotificationPayload.objects.values_list('pk', flat=True)), [kept.pk])
+
+
+@override_settings(IMPORT_JOB_TIMEOUT=600)
+class StaleImportJobTestCase(TestCase):
+    """Test case for failing import jobs lost to a restart."""
+
+    def create_job(self, status, age_seconds):
+        """Create a job whose queued/started time lies ``age_seconds`` in the past."""
+        job = ImportJob.objects.create(kind=ImportJob.ALUMNI, file_name='alumni.xlsx', status=status)
+        stamp = timezone.now() - timedelta(seconds=age_seconds)
+        ImportJob.objects.filter(pk=job.pk).update(created_at=stamp, started_at=stamp)
+        return job
+
+    def test_old_queued_and_running_jobs_fail(self):
+        """Test that queued/running jobs past the timeout are marked failed."""
+        queued = self.create_job(ImportJob.QUEUED, 900)
+        running = self.create_job(ImportJob.RUNNING, 900)
+
+        self.assertEqual(fail_stale_jobs(), 2)
+
+        for job in (queued, running):
+            job.refresh_from_db()
+            self.assertEqual(job.status, ImportJob.FAILED)
+            self.assertIsNotNone(job.finished_at)
+            self.assertIn('interrupted', job.message)
+
+    def test_recent_and_finished_jobs_untouched(self):
+        """Test that recent jobs and finished jobs keep their status."""
+        recent = self.create_job(ImportJob.RUNNING, 60)
+        completed = self.create_job(ImportJob.COMPLETED, 900)
+
+        self.assertEqual(fail_stale_jobs(), 0)
+
+        recent.refresh_from_db()
+        completed.refresh_from_db()
+        self.assertEqual((recent.status, completed.status), (ImportJob.RUNNING, ImportJob.COMPLETED))
+
+    def test_limited_to_given_job_ids(self):
+        """Test that only the requested jobs are checked."""
+        polled = self.create_job(ImportJob.QUEUED, 900)
+        other = self.create_job(ImportJob.QUEUED, 900)
+
+        self.assertEqual(fail_stale_jobs([polled.job_id]), 1)
+
+        other.refresh_from_db()
+        self.assertEqual(other.status, ImportJob.QUEUED)
@@ -0,0 +1,266 @@
+"""
+Fan-out-on-write home timeline backed by the FeedEntry table.
+
+Every new Post/Repost is copied into the timeline of each alumni/OJT user
+who can see it, and follows/unfollows and deletions are mirrored, whether or
+not FEED_TIMELINE_ENABLED is on. The setting only gates the read path: when
+on, alumni/OJT feeds are read with a single range scan on FeedEntry instead
+of rebuilding the follow/admin/PESO filter per request; when off (the
+default) posts_view keeps using the query path in apps.shared.feed.
+
+Keeping the writes on means the table stays complete from the moment
+``python manage.py backfill_feed_timeline`` has run, so the setting can be
+turned on at any later point. Accounts created afterwards (signups, bulk
+imports) are seeded with the admin/PESO posts they can already see once
+their transaction commits.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save
+
+from apps.shared.feed import (
+    DEFAULT_PAGE_SIZE,
+    KIND_POST,
+    KIND_REPOST,
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    encode_cursor,
+    visible_feed_posts,
+)
+from apps.shared.models import FeedEntry, Follow, Post, Repost, User
+
+logger = logging.getLogger('apps.shared.timeline')
+
+BULK_BATCH_SIZE = 1000
+
+
+def timeline_enabled():
+    return getattr(settings, 'FEED_TIMELINE_ENABLED', False)
+
+
+def _has_timeline(user):
+    """Only alumni and OJT feeds are filtered, so only they get a timeline."""
+    account_type = user.account_type
+    return bool(account_type.user or account_type.ojt)
+
+
+def uses_timeline(user):
+    """Whether ``user``'s feed should be read from FeedEntry."""
+    return timeline_enabled() and _has_timeline(user)
+
+
+def _is_broadcast_author(user):
+    account_type = user.account_type
+    return bool(account_type.admin or account_type.peso)
+
+
+def _timeline_users():
+    return User.objects.filter(Q(account_type__user=True) | Q(account_type__ojt=True))
+
+
+def _audience_ids(author):
+    """Ids of alumni/OJT users whose feed shows posts written by ``author``."""
+    if _is_broadcast_author(author):
+        return list(_timeline_users().values_list('user_id', flat=True))
+    audience = set(
+        Follow.objects.filter(
+            following=author, follower__in=_timeline_users()
+        ).values_list('follower_id', flat=True)
+    )
+    if _has_timeline(author):
+        audience.add(author.user_id)
+    return list(audience)
+
+
+def _bulk_write(rows):
+    """Insert ``(owner_id, kind, item_id, source_user_id, sort_ts)`` rows."""
+    entries = [
+        FeedEntry(
+            owner_id=owner_id,
+            item_type=kind,
+            item_id=item_id,
+            source_user_id=source_user_id,
+            sort_ts=sort_ts,
+        )
+        for owner_id, kind, item_id, source_user_id, sort_ts in rows
+        if sort_ts is not None
+    ]
+    FeedEntry.objects.bulk_create(entries, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+    return len(entries)
+
+
+# --- Write path ---
+
+def fan_out_post(post):
+    """Copy a newly created post into the timeline of everyone who can see it."""
+    if post.type == 'forum':
+        return 0
+    return _bulk_write(
+        (owner_id, KIND_POST, post.post_id, post.user_id, post.created_at)
+        for owner_id in _audience_ids(post.user)
+    )
+
+
+def fan_out_repost(repost):
+    """Copy a new repost into every timeline that shows its original post."""
+    post = repost.post
+    if post is None or post.type == 'forum':
+        return 0
+    return _bulk_write(
+        (owner_id, KIND_REPOST, repost.repost_id, post.user_id, repost.repost_date)
+        for owner_id in _audience_ids(post.user)
+    )
+
+
+def remove_post(post_id):
+    """Drop a deleted post and its reposts from every timeline."""
+    repost_ids = Repost.objects.filter(post_id=post_id).values_list('repost_id', flat=True)
+    FeedEntry.objects.filter(
+        Q(item_type=KIND_POST, item_id=post_id) |
+        Q(item_type=KIND_REPOST, item_id__in=list(repost_ids))
+    ).delete()
+
+
+def remove_repost(repost_id):
+    """Drop a deleted repost from every timeline."""
+    FeedEntry.objects.filter(item_type=KIND_REPOST, item_id=repost_id).delete()
+
+
+def add_follow(follower, following):
+    """Pull an author's existing posts and reposts into a new follower's timeline."""
+    if not _has_timeline(follower) or _is_broadcast_author(following):
+        return 0
+    posts = Post.objects.filter(user=following).exclude(type='forum')
+    post_rows = posts.values_list('post_id', 'created_at')
+    repost_rows = Repost.objects.filter(post__in=posts).values_list('repost_id', 'repost_date')
+    rows = [
+        (follower.user_id, KIND_POST, post_id, following.user_id, created_at)
+        for post_id, created_at in post_rows
+    ]
+    rows.extend(
+        (follower.user_id, KIND_REPOST, repost_id, following.user_id, repost_date)
+        for repost_id, repost_date in repost_rows
+    )
+    return _bulk_write(rows)
+
+
+def prune_follow(follower, following):
+    """Remove an unfollowed author's items from the follower's timeline."""
+    if follower.user_id == following.user_id or _is_broadcast_author(following):
+        # Own and admin/PESO posts stay visible regardless of follows
+        return 0
+    deleted, _ = FeedEntry.objects.filter(owner=follower, source_user=following).delete()
+    return deleted
+
+
+def seed_timelines(user_ids):
+    """
+    Give new alumni/OJT accounts the admin/PESO posts and reposts already
+    visible to them. A new account follows nobody and has no posts, so this
+    is its whole timeline; entries fanned out meanwhile are kept.
+    """
+    owner_ids = list(_timeline_users().filter(user_id__in=user_ids).values_list('user_id', flat=True))
+    if not owner_ids:
+        return 0
+    posts = Post.objects.filter(
+        Q(user__account_type__admin=True) | Q(user__account_type__peso=True)
+    ).exclude(type='forum').order_by()
+    post_rows = list(posts.values_list('post_id', 'user_id', 'created_at'))
+    repost_rows = list(
+        Repost.objects.filter(post__in=posts).values_list('repost_id', 'post__user_id', 'repost_date')
+    )
+    written = 0
+    for owner_id in owner_ids:
+        rows = [
+            (owner_id, KIND_POST, post_id, author_id, created_at)
+            for post_id, author_id, created_at in post_rows
+        ]
+        rows.extend(
+            (owner_id, KIND_REPOST, repost_id, author_id, repost_date)
+            for repost_id, author_id, repost_date in repost_rows
+        )
+        written += _bulk_write(rows)
+    return written
+
+
+def seed_timelines_on_commit(user_ids):
+    """Seed the timelines of ``user_ids`` after the creating transaction commits."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+
+    def seed():
+        try:
+            seed_timelines(user_ids)
+        except Exception:
+            logger.exception(f"Could not seed timelines for {len(user_ids)} new users; run backfill_feed_timeline")
+
+    transaction.on_commit(seed)
+
+
+def user_created(sender, instance, created=False, raw=False, **kwargs):
+    """post_save on User: seed the timeline of a new alumni/OJT account."""
+    if created and not raw:
+        seed_timelines_on_commit([instance.pk])
+
+
+def connect_signals():
+    post_save.connect(user_created, sender=User, dispatch_uid='timeline_user_created')
+
+
+# --- Read path ---
+
+def _ordered_entries(owner):
+    return FeedEntry.objects.filter(owner=owner).order_by('-sort_ts', '-item_type', '-item_id')
+
+
+def timeline_entries(owner):
+    """Return every ``(kind, item_id)`` in ``owner``'s timeline, newest first."""
+    return list(_ordered_entries(owner).values_list('item_type', 'item_id'))
+
+
+def fetch_timeline_page(owner, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Keyset page of ``owner``'s timeline in the same ``(entries, next_cursor)``
+    form and cursor format as :func:`apps.shared.feed.fetch_feed_page`.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    rows = _ordered_entries(owner)
+    if cursor:
+        c_ts, c_kind, c_id = decode_cursor(cursor)
+        rows = rows.filter(
+            Q(sort_ts__lt=c_ts) |
+            Q(sort_ts=c_ts, item_type__lt=c_kind) |
+            Q(sort_ts=c_ts, item_type=c_kind, item_id__lt=c_id)
+        )
+    rows = list(rows.values_list('sort_ts', 'item_type', 'item_id')[:limit + 1])
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(*rows[-1])
+    return [(kind, item_id) for _, kind, item_id in rows], next_cursor
+
+
+# --- Backfill ---
+
+def rebuild_timeline(owner):
+    """Rebuild one user's timeline from the live visibility rules."""
+    posts = visible_feed_posts(owner).order_by()
+    rows = [
+        (owner.user_id, KIND_POST, post_id, author_id, created_at)
+        for post_id, author_id, created_at in posts.values_list('post_id', 'user_id', 'created_at')
+    ]
+    reposts = Repost.objects.filter(post_id__in=posts.values('post_id')).values_list(
+        'repost_id', 'post__user_id', 'repost_date'
+    )
+    rows.extend(
+        (owner.user_id, KIND_REPOST, repost_id, author_id, repost_date)
+        for repost_id, author_id, repost_date in reposts
+    )
+    with transaction.atomic():
+        FeedEntry.objects.filter(owner=owner).delete()
+        return _bulk_write(rows)
@@ -10,8 +10,10 @@ import re
 
 from collections import Counter
 from statistics import mean
-from django.db.models import Q, Count, Avg, FloatField
-from django.db.models.functions import Cast
+from django.db import models
+from django.db.models import Q, Count, Avg, Case, FloatField, Min, Value, When
+from django.db.models.functions import Cast, Replace
+from django.db.models.lookups import Regex
 
 
 def safe_mode(qs, field):
@@ -52,6 +54,68 @@ def safe_sample(qs, field):
 	return None
 
 
+# A plain decimal number once ',' and ' ' are stripped, as safe_mean parses strings
+NUMERIC_PATTERN = r'^[+-]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?$'
+
+
+def _present(model, field):
+	"""Q matching the values safe_mode/safe_sample keep (non-null and truthy)."""
+	q = Q(**{f'{field}__isnull': False})
+	model_field = model._meta.get_field(field)
+	if isinstance(model_field, (models.CharField, models.TextField)):
+		q &= ~Q(**{field: ''})
+	elif isinstance(model_field, (models.IntegerField, models.FloatField, models.DecimalField)):
+		q &= ~Q(**{field: 0})
+	return q
+
+
+def numeric_mean(model, field):
+	"""Avg expression equivalent to safe_mean, parsing string values in the database."""
+	model_field = model._meta.get_field(field)
+	if not isinstance(model_field, (models.CharField, models.TextField)):
+		return Avg(Cast(field, FloatField()), filter=_present(model, field))
+	cleaned = Replace(Replace(field, Value(','), Value('')), Value(' '), Value(''))
+	return Avg(Case(When(Regex(cleaned, NUMERIC_PATTERN), then=Cast(cleaned, FloatField()))))
+
+
+def summarize(qs, counts=None, means=None):
+	"""
+	Aggregate `qs` in one query: `total`, a filtered count per `{name: Q}` in
+	`counts` and a safe_mean per `{name: field}` in `means`, rounded to 2 places.
+	"""
+	counts, means = counts or {}, means or {}
+	expressions = {'total': Count('pk')}
+	for name, condition in counts.items():
+		expressions[name] = Count('pk', filter=condition)
+	for name, field in means.items():
+		expressions[name] = numeric_mean(qs.model, field)
+	result = qs.order_by().aggregate(**expressions)
+	for name in means:
+		if result[name] is not None:
+			result[name] = round(result[name], 2)
+	return result
+
+
+def value_counts(qs, field):
+	"""`dict(Counter(qs.values_list(field, flat=True)))` computed with GROUP BY."""
+	return dict(
+		qs.order_by().values(field).annotate(value_count=Count('pk')).values_list(field, 'value_count')
+	)
+
+
+def db_mode(qs, field):
+	"""safe_mode in SQL: GROUP BY `field` ORDER BY count DESC LIMIT 1; ties go to the lowest pk."""
+	row = qs.order_by().filter(_present(qs.model, field)).values(field).annotate(
+		value_count=Count('pk'), first_pk=Min('pk')
+	).order_by('-value_count', 'first_pk').first()
+	return row[field] if row else None
+
+
+def db_sample(qs, field):
+	"""safe_sample in SQL: the first non-empty value of `field` by primary key."""
+	return qs.filter(_present(qs.model, field)).order_by('pk').values_list(field, flat=True).first()
+
+
 def _resolve_path(obj, field_path):
 	parts = field_path.split('__')
 	cur = obj
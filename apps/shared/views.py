@@ -12,82 +12,34 @@ import logging
 
 # Create your views here.
 
-# Export alumni data to Excel
+# Export alumni data to Excel (or CSV with ?format=csv)
+
+ALUMNI_EXPORT_FIELDS = [
+    ("CTU_ID", "acc_username"),
+    ("First Name", "f_name"),
+    ("Middle Name", "m_name"),
+    ("Last Name", "l_name"),
+    ("Gender", "gender"),
+    ("Birthdate", "birthdate"),
+    ("Phone Number", "phone_num"),
+    ("Address", "address"),
+    ("Social Media", "social_media"),
+    ("Civil Status", "civil_status"),
+    ("Age", "age"),
+    ("Email", "email"),
+    ("Program Name", "program"),
+]
 
 def export_alumni_excel(request):
+    from apps.shared.alumni_export import AlumniExport, export_response
+
     batch_year = request.GET.get('batch_year')
     alumni = User.objects.filter(account_type__user=True)
     if batch_year:
         alumni = alumni.filter(year_graduated=batch_year)
 
-    # Basic User model fields to always include
-    basic_fields = [
-        ("CTU_ID", "acc_username"),
-        ("First Name", "f_name"),
-        ("Middle Name", "m_name"),
-        ("Last Name", "l_name"),
-        ("Gender", "gender"),
-        ("Birthdate", "birthdate"),
-        ("Phone Number", "phone_num"),
-        ("Address", "address"),
-        ("Social Media", "social_media"),
-        ("Civil Status", "civil_status"),
-        ("Age", "age"),
-        ("Email", "email"),
-        ("Program Name", "program"),
-        
-    ]
-
-    # Collect all tracker question texts that have been answered by any alumni
-    all_tracker_qids = set()
-    for alum in alumni:
-        tracker_responses = TrackerResponse.objects.filter(user=alum).order_by('-submitted_at')
-        latest_tracker = tracker_responses.first() if tracker_responses.exists() else None
-        tracker_answers = latest_tracker.answers if latest_tracker and latest_tracker.answers else {}
-        all_tracker_qids.update([int(qid) for qid in tracker_answers.keys() if str(qid).isdigit()])
-    # Get question text for all qids
-    tracker_questions = {q.id: q.text for q in Question.objects.filter(id__in=all_tracker_qids)}
-    tracker_columns = [tracker_questions[qid] for qid in sorted(tracker_questions.keys())]
-
-    # Build a unique set of export columns: basic fields + tracker question texts (no duplicates)
-    export_columns = []
-    seen = set()
-    for col, _ in basic_fields:
-        if col not in seen:
-            export_columns.append(col)
-            seen.add(col)
-    for qtext in tracker_columns:
-        if qtext not in seen:
-            export_columns.append(qtext)
-            seen.add(qtext)
-
-    data = []
-    for alum in alumni:
-        row = {}
-        # Fill basic fields
-        for col, field in basic_fields:
-            value = getattr(alum, field, "")
-            row[col] = value if value is not None else ""
-        # Fill tracker answers, but only if not already filled by user model
-        tracker_responses = TrackerResponse.objects.filter(user=alum).order_by('-submitted_at')
-        latest_tracker = tracker_responses.first() if tracker_responses.exists() else None
-        tracker_answers = latest_tracker.answers if latest_tracker and latest_tracker.answers else {}
-        for qid, qtext in tracker_questions.items():
-            if qtext in row and row[qtext]:
-                continue  # Already filled by user model
-            answer = tracker_answers.get(str(qid)) or tracker_answers.get(qid)
-            if isinstance(answer, list):
-                answer = ', '.join(str(a) for a in answer)
-            row[qtext] = answer if answer is not None else ""
-        data.append(row)
-    df = pd.DataFrame(data, columns=export_columns)
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False)
-    output.seek(0)
-    response = HttpResponse(output.read(), content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename=alumni_export.xlsx'
-    return response
+    export = AlumniExport(alumni, ALUMNI_EXPORT_FIELDS)
+    return export_response(export, 'alumni_export', request.GET.get('format', 'xlsx'))
 
 # Import alumni data from Excel, updating only missing fields
 @csrf_exempt
@@ -157,3 +157,20 @@ SIMPLE_JWT = {
 }
 
 AUTH_USER_MODEL = 'shared.User'
+
+# Read alumni/OJT home feeds from the materialized FeedEntry timeline.
+# Run `python manage.py backfill_feed_timeline` before enabling.
+FEED_TIMELINE_ENABLED = os.getenv('FEED_TIMELINE_ENABLED', 'False') == 'True'
+
+# Read alumni/OJT statistics dashboard counts from the StatsRollup table.
+# Run `python manage.py rebuild_stats_rollup` before enabling.
+STATS_ROLLUP_ENABLED = os.getenv('STATS_ROLLUP_ENABLED', 'False') == 'True'
+
+# Worker threads for background alumni/OJT imports (apps.shared.import_jobs)
+IMPORT_JOB_WORKERS = int(os.getenv('IMPORT_JOB_WORKERS', '2'))
+# Seconds a job may stay queued/running before it is assumed lost to a restart
+IMPORT_JOB_TIMEOUT = int(os.getenv('IMPORT_JOB_TIMEOUT', '3600'))
+
+# Worker processes for bulk job alignment recalculation (apps.shared.job_alignment);
+# unset uses every CPU core
+JOB_ALIGNMENT_WORKERS = int(os.getenv('JOB_ALIGNMENT_WORKERS', '0')) or None